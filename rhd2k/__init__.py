@@ -2,6 +2,11 @@ from .rhd2000evalboard import Rhd2000EvalBoard
 from .rhd2000datablock import Rhd2000DataBlock
 from .rhd2000registers import Rhd2000Registers
 from .dataqueue import DataQueue
+from .usbdecoder import UsbDataBlocks, openUsbDataFile
+from .rhdfile import RhdFile, SaveFileHeader
+from .rhdindex import RhdIndex
+from .datfiles import SignalTypeFiles, ChannelFiles
+from .compressedfile import CompressedFile
 from .vector import VectorInt
 from .ofstream import Ofstream
 from .constants import *
@@ -0,0 +1,180 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import signal
+import sys
+
+import constants
+from acquisitionengine import AcquisitionEngine, sampleRateIndex
+from simulatedevalboard import SimulatedEvalBoard, parseChips
+from triggerdetector import TriggerSource
+
+SAVE_FORMATS = {
+    "intan": constants.SaveFormatIntan,
+    "signaltype": constants.SaveFormatFilePerSignalType,
+    "channel": constants.SaveFormatFilePerChannel,
+    "raw": constants.SaveFormatRaw,
+    "compressed": constants.SaveFormatCompressed,
+}
+
+CODECS = {"zlib": constants.CompressionZlib, "lzma": constants.CompressionLzma}
+
+NOTCH_FILTERS = {"none": 0, "50": 1, "60": 2}
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Acquire and record data from the RHD2000 USB interface board without the GUI.")
+    parser.add_argument("--bitfile", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.bit"),
+                        help="Rhythm FPGA configuration file (default: main.bit next to this script)")
+    parser.add_argument("--synth", action="store_true",
+                        help="generate synthetic data instead of using an interface board")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed of the synthetic data, to generate the same data on every run")
+    parser.add_argument("--simulate", metavar="CHIPS", default=None,
+                        help="use a simulated interface board with the given comma-separated chips "
+                             "(2132, 2216, 2164 or none) on ports A1, A2, B1, ..., D2")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="simulated board speed relative to real time; 0 = as fast as possible (default: 1)")
+    parser.add_argument("--sample-rate", type=float, default=20000.0,
+                        help="amplifier sample rate in Hz (default: 20000)")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="stop after this many seconds (default: run until interrupted)")
+    parser.add_argument("--record", metavar="BASEFILENAME", default=None,
+                        help="record to disk; date and time stamps are added to this name")
+    parser.add_argument("--format", choices=sorted(SAVE_FORMATS), default="intan",
+                        help="save file format (default: intan); raw saves the USB data as read, "
+                             "to be converted later with convertraw.py; compressed saves losslessly "
+                             "compressed Intan format data (.rhc), read with CompressedFile")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="zlib",
+                        help="compression codec of the compressed format (default: zlib)")
+    parser.add_argument("--new-file-minutes", type=int, default=1,
+                        help="start a new Intan, raw or compressed format file every N minutes (default: 1)")
+    parser.add_argument("--write-window", type=float, metavar="SECONDS", default=1.0,
+                        help="gather this many seconds of data of each file before writing it (channel format, "
+                             "default: 1)")
+    parser.add_argument("--preallocate", type=float, metavar="SECONDS", default=0.0,
+                        help="reserve disk space for this many seconds of data of each file ahead "
+                             "(channel format, Linux only, default: 0 = none); file sizes only count "
+                             "written data, but if recording is killed the reserved space stays "
+                             "allocated until the files are truncated or copied")
+    parser.add_argument("--save-temp", action="store_true",
+                        help="save temperature sensor readings (Intan, raw and compressed formats)")
+    parser.add_argument("--save-ttl-out", action="store_true",
+                        help="save board digital outputs")
+    parser.add_argument("--board-adc", action="store_true",
+                        help="save the eight board ADC inputs")
+    parser.add_argument("--digital-in", action="store_true",
+                        help="save the sixteen board digital inputs")
+    parser.add_argument("--bandwidth", nargs=3, type=float, metavar=("DSP", "LOWER", "UPPER"),
+                        default=None, help="desired DSP cutoff, lower and upper bandwidth in Hz")
+    parser.add_argument("--no-dsp", action="store_true",
+                        help="disable the on-chip DSP offset removal filter")
+    parser.add_argument("--notch", choices=sorted(NOTCH_FILTERS), default="none",
+                        help="notch filter frequency recorded in the header (default: none)")
+    parser.add_argument("--note", action="append", default=[],
+                        help="note saved in the file header (up to three)")
+    parser.add_argument("--trigger", type=int, metavar="CHANNEL", action="append", default=None,
+                        help="wait for digital input CHANNEL to start recording "
+                        "(16-23 for analog inputs; repeat to trigger on any of several inputs)")
+    parser.add_argument("--trigger-low", action="store_true",
+                        help="trigger on a low level instead of a high level")
+    parser.add_argument("--trigger-edge", action="store_true",
+                        help="trigger only when the input changes to the trigger level")
+    parser.add_argument("--pre-trigger", type=float, default=1.0,
+                        help="seconds of data saved before the trigger (default: 1)")
+    parser.add_argument("--post-trigger", type=float, default=1.0,
+                        help="seconds recorded after the trigger ends (default: 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Configure the board and stream or record data"""
+    args = parseArguments(sys.argv[1:] if argv is None else argv)
+
+    if args.trigger is not None and args.record is None:
+        print("--trigger requires --record")
+        return 2
+    if args.trigger is not None and args.synth:
+        print("Triggered recording is not available with synthetic data")
+        return 2
+    if len(args.note) > 3:
+        print("At most three notes can be saved")
+        return 2
+
+    evalBoard = None
+    if args.simulate is not None:
+        try:
+            evalBoard = SimulatedEvalBoard(parseChips(args.simulate), speed=args.speed)
+        except ValueError as e:
+            print(str(e))
+            return 2
+
+    engine = AcquisitionEngine(synthMode=args.synth, evalBoard=evalBoard, synthSeed=args.seed)
+    try:
+        engine.openInterfaceBoard(args.bitfile)
+    except IOError as e:
+        print(str(e))
+        return 1
+
+    engine.changeSampleRate(sampleRateIndex(args.sample_rate))
+    if args.bandwidth is not None or args.no_dsp:
+        dspCutoffFreq, lowerBandwidth, upperBandwidth = args.bandwidth or (
+            engine.desiredDspCutoffFreq, engine.desiredLowerBandwidth, engine.desiredUpperBandwidth)
+        engine.changeBandwidth(dspCutoffFreq, lowerBandwidth,
+                               upperBandwidth, not args.no_dsp)
+    engine.changeNotchFilter(NOTCH_FILTERS[args.notch])
+
+    engine.scanPorts()
+    for port in range(4):
+        if engine.signalSources.signalPort[port].enabled:
+            print(engine.signalSources.signalPort[port].name + ": " +
+                  str(engine.signalSources.signalPort[port].numAmplifierChannels()) + " amplifier channels")
+
+    for channel in engine.signalSources.signalPort[4].channel:
+        channel.enabled = args.board_adc
+    for channel in engine.signalSources.signalPort[5].channel:
+        channel.enabled = args.digital_in
+
+    engine.saveFormat = SAVE_FORMATS[args.format]
+    engine.compressionCodec = CODECS[args.codec]
+    engine.channelWriteWindowSeconds = args.write_window
+    engine.preallocateSeconds = args.preallocate
+    engine.saveTemp = args.save_temp
+    engine.saveTtlOut = args.save_ttl_out
+    engine.newSaveFilePeriodMinutes = args.new_file_minutes
+    engine.saveFileNotes = (args.note + ["", "", ""])[:3]
+
+    # Stop cleanly (closing save files) on Ctrl-C or SIGTERM.
+    signal.signal(signal.SIGINT, lambda signum, frame: engine.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: engine.stop())
+
+    try:
+        if args.record is None:
+            engine.run(args.seconds)
+        elif args.trigger is not None:
+            polarity = 1 if args.trigger_low else 0
+            engine.setTrigger(args.trigger[0], polarity, args.pre_trigger, args.post_trigger, True,
+                              args.trigger_edge,
+                              [TriggerSource(channel, polarity, args.trigger_edge)
+                               for channel in args.trigger[1:]])
+            print("Waiting for trigger on input " + ", ".join(str(channel) for channel in args.trigger))
+            engine.triggerRecord(args.record, args.seconds)
+        else:
+            print("Recording to " + args.record)
+            engine.record(args.record, args.seconds)
+    except IOError as e:
+        print(str(e))
+        return 1
+    finally:
+        engine.signalProcessor.dataWriter.stop()
+
+    if args.record is not None:
+        print(str(engine.totalBytesWritten) + " bytes written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1205 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import math
+import os
+import time
+
+import numpy as np
+
+import constants
+from compressedfile import openCompressedStream
+from datablockbatch import DataBlockRing
+
+from dataqueue import DataQueue
+from datastream import openDataStream
+from rhd2000datablock import Rhd2000DataBlock
+from rhd2000evalboard import Rhd2000EvalBoard
+from rhd2000registers import Rhd2000Registers
+from rhdfile import SaveFileHeader
+from signalprocessor import SignalProcessor
+from signalsources import SignalSources
+from triggerdetector import TriggerDetector, TriggerSource
+from vector import VectorInt
+
+# Board sample rate setting, sample rate in Hz and number of USB data blocks
+# read at a time for each sample rate index (the entries of the GUI sample
+# rate combo box).  numUsbBlocksToRead gives an approximate read rate of 30 Hz
+# for most sampling rates.
+SAMPLE_RATES = [
+    (Rhd2000EvalBoard.SampleRate1000Hz, 1000.0, 1),
+    (Rhd2000EvalBoard.SampleRate1250Hz, 1250.0, 1),
+    (Rhd2000EvalBoard.SampleRate1500Hz, 1500.0, 1),
+    (Rhd2000EvalBoard.SampleRate2000Hz, 2000.0, 1),
+    (Rhd2000EvalBoard.SampleRate2500Hz, 2500.0, 2),
+    (Rhd2000EvalBoard.SampleRate3000Hz, 3000.0, 2),
+    (Rhd2000EvalBoard.SampleRate3333Hz, 10000.0 / 3.0, 2),
+    (Rhd2000EvalBoard.SampleRate4000Hz, 4000.0, 2),
+    (Rhd2000EvalBoard.SampleRate5000Hz, 5000.0, 3),
+    (Rhd2000EvalBoard.SampleRate6250Hz, 6250.0, 4),
+    (Rhd2000EvalBoard.SampleRate8000Hz, 8000.0, 4),
+    (Rhd2000EvalBoard.SampleRate10000Hz, 10000.0, 6),
+    (Rhd2000EvalBoard.SampleRate12500Hz, 12500.0, 7),
+    (Rhd2000EvalBoard.SampleRate15000Hz, 15000.0, 8),
+    (Rhd2000EvalBoard.SampleRate20000Hz, 20000.0, 12),
+    (Rhd2000EvalBoard.SampleRate25000Hz, 25000.0, 14),
+    (Rhd2000EvalBoard.SampleRate30000Hz, 30000.0, 16),
+]
+
+
+class AcquisitionEngine():
+    """ This class configures the RHD2000 USB interface board, streams
+    data from it, and records data to disk, without any user interface,
+    so data can be acquired on computers without PyQt5 or a display.  All
+    settings are held as attributes.  MainWindow is an AcquisitionEngine
+    that sets these attributes from its widgets and displays the data of
+    every read, so the GUI and headless programs share one acquisition
+    loop and save file code.
+
+    A typical session is:
+        engine = AcquisitionEngine()
+        engine.openInterfaceBoard("main.bit")
+        engine.changeSampleRate(sampleRateIndex(20000.0))
+        engine.scanPorts()
+        engine.record("/data/rat1.rhd", 60.0)
+
+    run(), record() and triggerRecord() block until the given number of
+    seconds has been acquired or stop() is called (e.g., from a signal
+    handler or from the callback, which is called with the engine after
+    every read).  If synthMode is True, no board is used and synthetic
+    data is generated instead, from the random seed synthSeed if it is
+    given (for reproducible runs).  evalBoard can be given to use another
+    object with the Rhd2000EvalBoard methods, such as a SimulatedEvalBoard.
+    """
+
+    def __init__(self, synthMode=False, evalBoard=None, synthSeed=None):
+        # Default amplifier bandwidth settings
+        self.desiredLowerBandwidth = 0.1
+        self.desiredUpperBandwidth = 7500.0
+        self.desiredDspCutoffFreq = 1.0
+        self.dspEnabled = True
+
+        self.actualDspCutoffFreq = 0.0
+        self.actualLowerBandwidth = 0.0
+        self.actualUpperBandwidth = 0.0
+
+        # Default electrode impedance measurement frequency (saved in headers)
+        self.desiredImpedanceFreq = 1000.0
+        self.actualImpedanceFreq = 0.0
+
+        self.evalBoard = evalBoard
+        self.evalBoardMode = 0
+        self.synthMode = synthMode
+        self.fastSettleEnabled = False
+
+        self.sampleRateIndex = 14
+        self.sampleRate = Rhd2000EvalBoard.SampleRate20000Hz
+        self.boardSampleRate = 20000.0
+        self.numUsbBlocksToRead = 12
+
+        self.cableLengthPortA = 1.0
+        self.cableLengthPortB = 1.0
+        self.cableLengthPortC = 1.0
+        self.cableLengthPortD = 1.0
+        self.manualDelayEnabled = [False]*4
+        self.manualDelay = [0]*4
+
+        self.chipId = [-1]*constants.MAX_NUM_DATA_STREAMS
+        self.ttlOut = [0]*16
+
+        self.recordTriggerChannel = 0
+        self.recordTriggerPolarity = 0
+        self.recordTriggerEdge = False
+        self.recordTriggerBuffer = 1
+        self.postTriggerTime = 1
+        self.saveTriggerChannel = True
+        self.triggerDetector = TriggerDetector([TriggerSource(0, 0)])
+
+        self.signalSources = SignalSources()
+
+        # Amplifier channels filtered by filterData() for the callback.
+        self.channelVisible = [[False]*32 for i in range(constants.MAX_NUM_DATA_STREAMS)]
+
+        self.signalProcessor = SignalProcessor(synthSeed=synthSeed)
+        self.notchFilterIndex = 0
+        self.notchFilterFrequency = 60.0
+        self.notchFilterBandwidth = 10.0
+        self.notchFilterEnabled = False
+        self.signalProcessor.setNotchFilterEnabled(self.notchFilterEnabled)
+        self.highpassFilterFrequency = 250.0
+        self.highpassFilterEnabled = False
+        self.signalProcessor.setHighpassFilterEnabled(
+            self.highpassFilterEnabled)
+
+        self.running = False
+        self.recording = False
+        self.triggerSet = False
+        self.triggered = False
+        self.fifoOverrun = False
+
+        self.saveFormat = constants.SaveFormatIntan
+        self.compressionCodec = constants.CompressionZlib
+        # "One File Per Channel" files are written every channelWriteWindowSeconds,
+        # with disk space reserved for preallocateSeconds of data ahead (0 = none).
+        self.channelWriteWindowSeconds = 1.0
+        self.preallocateSeconds = 0.0
+        self.saveTemp = False
+        self.saveTtlOut = False
+        self.newSaveFilePeriodMinutes = 1
+        self.saveBaseFileName = ""
+        self.saveFileName = ""
+        self.saveFileNotes = ["", "", ""]
+        self.saveFile = None
+        self.saveStream = None
+        self.infoFile = None
+        self.infoFileName = ""
+        self.infoStream = None
+        self.totalBytesWritten = 0
+
+        self.dataQueue = DataQueue()
+
+    # Open the USB interface board, upload the Rhythm FPGA configuration bitfile
+    # and initialize the board.  Raises IOError if the board cannot be used.
+    def openInterfaceBoard(self, bitfileName):
+        if self.synthMode:
+            return
+
+        if self.evalBoard is None:
+            self.evalBoard = Rhd2000EvalBoard()
+
+        # Open Opal Kelly XEM6010 board.
+        errorCode = self.evalBoard.open()
+        if errorCode < 1:
+            if errorCode == -1:
+                raise IOError("Cannot load Opal Kelly FrontPanel DLL: "
+                              "Opal Kelly USB drivers not installed.")
+            raise IOError("Intan RHD2000 USB interface board not found on any USB port.")
+
+        self.initializeInterfaceBoard(bitfileName)
+
+    # Upload the Rhythm FPGA configuration bitfile to the opened USB interface
+    # board and initialize the board.  Raises IOError if the bitfile cannot be
+    # uploaded.
+    def initializeInterfaceBoard(self, bitfileName):
+        # Load Rhythm FPGA configuration bitfile (provided by Intan Technologies).
+        if not self.evalBoard.uploadFpgaBitfile(bitfileName):
+            raise IOError("Cannot upload configuration file " +
+                          bitfileName + " to FPGA.")
+
+        # Initialize interface board.
+        self.evalBoard.initialize()
+
+        # Read 4-bit board mode.
+        self.evalBoardMode = self.evalBoard.getBoardMode()
+
+        # Set sample rate and upload all auxiliary SPI command sequences.
+        self.changeSampleRate(self.sampleRateIndex)
+
+        # Select RAM Bank 0 for AuxCmd3 initially, so the ADC is calibrated.
+        self.selectAuxCommandBank(Rhd2000EvalBoard.AuxCmd3, 0)
+
+        # Since our longest command sequence is 60 commands, we run the SPI
+        # interface for 60 samples.
+        self.evalBoard.setMaxTimeStep(60)
+        self.evalBoard.setContinuousRunMode(False)
+
+        # Start SPI interface and read the resulting single data block.
+        dataBlock = Rhd2000DataBlock(self.evalBoard.getNumEnabledDataStreams())
+        self.runSingleDataBlock(dataBlock)
+
+        # Now that ADC calibration has been performed, we switch to the command sequence
+        # that does not execute ADC calibration.
+        self.selectAuxCommandBank(Rhd2000EvalBoard.AuxCmd3,
+                                  2 if self.fastSettleEnabled else 1)
+
+        # Set default configuration for all eight DACs on interface board,
+        # initially pointing them to the DacManual1 input.
+        for dac in range(8):
+            self.evalBoard.enableDac(dac, False)
+            self.evalBoard.selectDacDataStream(dac, 8)
+            self.evalBoard.selectDacDataChannel(dac, 1 if dac == 1 else 0)
+        self.evalBoard.setDacManual(32768)
+        self.evalBoard.setDacGain(0)
+        self.evalBoard.setAudioNoiseSuppress(0)
+
+        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortA, 0.0)
+        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortB, 0.0)
+        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortC, 0.0)
+        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortD, 0.0)
+
+        self.evalBoard.enableDacHighpassFilter(False)
+        self.evalBoard.setDacHighpassFilter(250.0)
+
+    # Select the given auxiliary command RAM bank on all four SPI ports.
+    def selectAuxCommandBank(self, auxCommandSlot, bank):
+        for port in (Rhd2000EvalBoard.PortA, Rhd2000EvalBoard.PortB,
+                     Rhd2000EvalBoard.PortC, Rhd2000EvalBoard.PortD):
+            self.evalBoard.selectAuxCommandBank(port, auxCommandSlot, bank)
+
+    # Run the SPI interface for the programmed number of samples and read the
+    # resulting data block.
+    def runSingleDataBlock(self, dataBlock):
+        self.evalBoard.run()
+
+        # Wait for the 60-sample run to complete.
+        while self.evalBoard.isRunning():
+            time.sleep(0.001)
+
+        self.evalBoard.readDataBlock(dataBlock)
+
+    # Change the sample rate to entry sampleRateIndex of SAMPLE_RATES, and
+    # upload all auxiliary SPI command sequences for the new rate.
+    def changeSampleRate(self, sampleRateIndex):
+        self.sampleRateIndex = sampleRateIndex
+        self.sampleRate, self.boardSampleRate, self.numUsbBlocksToRead = SAMPLE_RATES[
+            sampleRateIndex]
+
+        # Set up an RHD2000 register object using this sample rate to
+        # optimize MUX-related register settings.
+        chipRegisters = Rhd2000Registers(self.boardSampleRate)
+
+        if not self.synthMode:
+            self.evalBoard.setSampleRate(self.sampleRate)
+
+            # Now that we have set our sampling rate, we can set the MISO sampling delay
+            # which is dependent on the sample rate.
+            cableLengths = [self.cableLengthPortA, self.cableLengthPortB,
+                            self.cableLengthPortC, self.cableLengthPortD]
+            ports = [Rhd2000EvalBoard.PortA, Rhd2000EvalBoard.PortB,
+                     Rhd2000EvalBoard.PortC, Rhd2000EvalBoard.PortD]
+            for i in range(4):
+                if self.manualDelayEnabled[i]:
+                    self.evalBoard.setCableDelay(ports[i], self.manualDelay[i])
+                else:
+                    self.evalBoard.setCableLengthMeters(
+                        ports[i], cableLengths[i])
+
+            # Create a command list for the AuxCmd1 slot.  This command sequence will
+            # continuously update Register 3, which controls the auxiliary digital
+            # output pin on each RHD2000 chip.
+            commandList = VectorInt()
+            chipRegisters.setDigOutLow()
+            commandSequenceLength = chipRegisters.createCommandListUpdateDigOut(
+                commandList)
+            self.evalBoard.uploadCommandList(
+                commandList, Rhd2000EvalBoard.AuxCmd1, 0)
+            self.evalBoard.selectAuxCommandLength(
+                Rhd2000EvalBoard.AuxCmd1, 0, commandSequenceLength - 1)
+            self.selectAuxCommandBank(Rhd2000EvalBoard.AuxCmd1, 0)
+
+            # Next, we'll create a command list for the AuxCmd2 slot.  This command
+            # sequence will sample the temperature sensor and other auxiliary ADC inputs.
+            commandSequenceLength = chipRegisters.createCommandListTempSensor(
+                commandList)
+            self.evalBoard.uploadCommandList(
+                commandList, Rhd2000EvalBoard.AuxCmd2, 0)
+            self.evalBoard.selectAuxCommandLength(
+                Rhd2000EvalBoard.AuxCmd2, 0, commandSequenceLength - 1)
+            self.selectAuxCommandBank(Rhd2000EvalBoard.AuxCmd2, 0)
+
+        # Before generating register configuration command sequences, set amplifier
+        # bandwidth paramters.
+        self.actualDspCutoffFreq = chipRegisters.setDspCutoffFreq(
+            self.desiredDspCutoffFreq)
+        self.actualLowerBandwidth = chipRegisters.setLowerBandwidth(
+            self.desiredLowerBandwidth)
+        self.actualUpperBandwidth = chipRegisters.setUpperBandwidth(
+            self.desiredUpperBandwidth)
+        chipRegisters.enableDsp(self.dspEnabled)
+
+        if not self.synthMode:
+            # For the AuxCmd3 slot, we create three command sequences.  All sequences
+            # configure and read back the RHD2000 chip registers, but one sequence also
+            # runs ADC calibration, and another enables amplifier 'fast settle'.
+            commandSequenceLength = chipRegisters.createCommandListRegisterConfig(
+                commandList, True)
+            # Upload version with ADC calibration to AuxCmd3 RAM Bank 0.
+            self.evalBoard.uploadCommandList(
+                commandList, Rhd2000EvalBoard.AuxCmd3, 0)
+            self.evalBoard.selectAuxCommandLength(Rhd2000EvalBoard.AuxCmd3, 0,
+                                                  commandSequenceLength - 1)
+
+            commandSequenceLength = chipRegisters.createCommandListRegisterConfig(
+                commandList, False)
+            # Upload version with no ADC calibration to AuxCmd3 RAM Bank 1.
+            self.evalBoard.uploadCommandList(
+                commandList, Rhd2000EvalBoard.AuxCmd3, 1)
+            self.evalBoard.selectAuxCommandLength(Rhd2000EvalBoard.AuxCmd3, 0,
+                                                  commandSequenceLength - 1)
+
+            chipRegisters.setFastSettle(True)
+            commandSequenceLength = chipRegisters.createCommandListRegisterConfig(
+                commandList, False)
+            # Upload version with fast settle enabled to AuxCmd3 RAM Bank 2.
+            self.evalBoard.uploadCommandList(
+                commandList, Rhd2000EvalBoard.AuxCmd3, 2)
+            self.evalBoard.selectAuxCommandLength(Rhd2000EvalBoard.AuxCmd3, 0,
+                                                  commandSequenceLength - 1)
+            chipRegisters.setFastSettle(False)
+
+            self.selectAuxCommandBank(Rhd2000EvalBoard.AuxCmd3,
+                                      2 if self.fastSettleEnabled else 1)
+
+        self.signalProcessor.setNotchFilter(
+            self.notchFilterFrequency, self.notchFilterBandwidth, self.boardSampleRate)
+        self.signalProcessor.setHighpassFilter(
+            self.highpassFilterFrequency, self.boardSampleRate)
+
+        if not self.synthMode:
+            self.evalBoard.setDacHighpassFilter(self.highpassFilterFrequency)
+
+    # Set the desired amplifier bandwidth (in Hz) and upload the new register
+    # configuration.  The actual bandwidth is stored in the actual* attributes.
+    def changeBandwidth(self, dspCutoffFreq, lowerBandwidth, upperBandwidth, dspEnabled):
+        self.desiredDspCutoffFreq = dspCutoffFreq
+        self.desiredLowerBandwidth = lowerBandwidth
+        self.desiredUpperBandwidth = upperBandwidth
+        self.dspEnabled = dspEnabled
+        self.changeSampleRate(self.sampleRateIndex)
+
+    # Select the software notch filter: 0 = disabled, 1 = 50 Hz, 2 = 60 Hz.
+    def changeNotchFilter(self, notchFilterIndex):
+        self.notchFilterIndex = notchFilterIndex
+        if notchFilterIndex == 0:
+            self.notchFilterEnabled = False
+        elif notchFilterIndex == 1:
+            self.notchFilterFrequency = 50.0
+            self.notchFilterEnabled = True
+        elif notchFilterIndex == 2:
+            self.notchFilterFrequency = 60.0
+            self.notchFilterEnabled = True
+
+        self.signalProcessor.setNotchFilter(
+            self.notchFilterFrequency, self.notchFilterBandwidth, self.boardSampleRate)
+        self.signalProcessor.setNotchFilterEnabled(self.notchFilterEnabled)
+
+    # Enable/disable software/FPGA high-pass filter.
+    def enableHighpassFilter(self, enable):
+        self.highpassFilterEnabled = enable
+        self.signalProcessor.setHighpassFilterEnabled(enable)
+        if not self.synthMode:
+            self.evalBoard.enableDacHighpassFilter(enable)
+
+    # Update software/FPGA high-pass filter cutoff frequency.
+    def setHighpassFilterCutoff(self, cutoff):
+        self.highpassFilterFrequency = cutoff
+        self.signalProcessor.setHighpassFilter(cutoff, self.boardSampleRate)
+        if not self.synthMode:
+            self.evalBoard.setDacHighpassFilter(cutoff)
+
+    # Set the digital input that triggers recording in triggerRecord().
+    # triggerPolarity is 0 to trigger on a high level and 1 to trigger on a low
+    # level.  recordTriggerBuffer seconds of data before the trigger are saved,
+    # and recording continues postTriggerTime seconds after the trigger ends.
+    # If triggerEdge is True, recording only starts when the input changes to
+    # the trigger level (a rising or falling edge).  More TriggerSource objects
+    # can be given in moreTriggerSources; recording starts when any source
+    # triggers, and the trigger ends when no source is at its trigger level.
+    # If saveTriggerChannel is True, the inputs of all sources are saved.
+    def setTrigger(self, triggerChannel, triggerPolarity, recordTriggerBuffer, postTriggerTime, saveTriggerChannel,
+                   triggerEdge=False, moreTriggerSources=()):
+        self.recordTriggerChannel = triggerChannel
+        self.recordTriggerPolarity = triggerPolarity
+        self.recordTriggerEdge = triggerEdge
+        self.recordTriggerBuffer = recordTriggerBuffer
+        self.postTriggerTime = postTriggerTime
+        self.saveTriggerChannel = saveTriggerChannel
+        self.triggerDetector = TriggerDetector(
+            [TriggerSource(triggerChannel, triggerPolarity, triggerEdge)] + list(moreTriggerSources))
+
+    # Scan SPI ports A-D for connected amplifiers and configure the data streams
+    # and the SignalProcessor accordingly.
+    def scanPorts(self):
+        self.findConnectedAmplifiers()
+
+        # Configure SignalProcessor object for the required number of data streams.
+        if not self.synthMode:
+            self.signalProcessor.allocateMemory(
+                self.evalBoard.getNumEnabledDataStreams())
+        else:
+            self.signalProcessor.allocateMemory(1)
+
+        # Turn on appropriate(optional) LEDs for Ports A-D
+        if not self.synthMode:
+            for port in range(4):
+                self.ttlOut[11 + port] = 1 if self.signalSources.signalPort[port].enabled else 0
+            self.evalBoard.setTtlOut(self.ttlOut)
+
+    def findConnectedAmplifiers(self):
+        numChannelsOnPort = [0, 0, 0, 0]
+
+        portIndex = [-1]*constants.MAX_NUM_DATA_STREAMS
+        portIndexOld = [-1]*constants.MAX_NUM_DATA_STREAMS
+        chipIdOld = [-1]*constants.MAX_NUM_DATA_STREAMS
+
+        for i in range(len(self.chipId)):
+            self.chipId[i] = -1
+
+        initStreamPorts = [
+            Rhd2000EvalBoard.PortA1,
+            Rhd2000EvalBoard.PortA2,
+            Rhd2000EvalBoard.PortB1,
+            Rhd2000EvalBoard.PortB2,
+            Rhd2000EvalBoard.PortC1,
+            Rhd2000EvalBoard.PortC2,
+            Rhd2000EvalBoard.PortD1,
+            Rhd2000EvalBoard.PortD2]
+
+        initStreamDdrPorts = [
+            Rhd2000EvalBoard.PortA1Ddr,
+            Rhd2000EvalBoard.PortA2Ddr,
+            Rhd2000EvalBoard.PortB1Ddr,
+            Rhd2000EvalBoard.PortB2Ddr,
+            Rhd2000EvalBoard.PortC1Ddr,
+            Rhd2000EvalBoard.PortC2Ddr,
+            Rhd2000EvalBoard.PortD1Ddr,
+            Rhd2000EvalBoard.PortD2Ddr]
+
+        if not self.synthMode:
+            # Set sampling rate to highest value for maximum temporal resolution.
+            originalSampleRateIndex = self.sampleRateIndex
+            self.changeSampleRate(len(SAMPLE_RATES) - 1)
+
+            # Enable all data streams, and set sources to cover one or two chips
+            # on Ports A-D.
+            for stream in range(constants.MAX_NUM_DATA_STREAMS):
+                self.evalBoard.setDataSource(stream, initStreamPorts[stream])
+                portIndexOld[stream] = stream // 2
+                self.evalBoard.enableDataStream(stream, True)
+
+            self.selectAuxCommandBank(Rhd2000EvalBoard.AuxCmd3, 0)
+
+            # Since our longest command sequence is 60 commands, we run the SPI
+            # interface for 60 samples.
+            self.evalBoard.setMaxTimeStep(60)
+            self.evalBoard.setContinuousRunMode(False)
+
+            dataBlock = Rhd2000DataBlock(
+                self.evalBoard.getNumEnabledDataStreams())
+            sumGoodDelays = [0]*constants.MAX_NUM_DATA_STREAMS
+            indexFirstGoodDelay = [-1]*constants.MAX_NUM_DATA_STREAMS
+            indexSecondGoodDelay = [-1]*constants.MAX_NUM_DATA_STREAMS
+
+            # Run SPI command sequence at all 16 possible FPGA MISO delay settings
+            # to find optimum delay for each SPI interface cable.
+            for delay in range(16):
+                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortA, delay)
+                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortB, delay)
+                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortC, delay)
+                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortD, delay)
+
+                self.runSingleDataBlock(dataBlock)
+
+                # Read the Intan chip ID number from each RHD2000 chip found.
+                # Record delay settings that yield good communication with the chip.
+                for stream in range(constants.MAX_NUM_DATA_STREAMS):
+                    did, register59Value = self.deviceId(dataBlock, stream)
+
+                    if (did == constants.CHIP_ID_RHD2132 or did == constants.CHIP_ID_RHD2216 or
+                            (did == constants.CHIP_ID_RHD2164 and register59Value == constants.REGISTER_59_MISO_A)):
+                        sumGoodDelays[stream] = sumGoodDelays[stream] + 1
+                        if indexFirstGoodDelay[stream] == -1:
+                            indexFirstGoodDelay[stream] = delay
+                            chipIdOld[stream] = did
+                        elif indexSecondGoodDelay[stream] == -1:
+                            indexSecondGoodDelay[stream] = delay
+                            chipIdOld[stream] = did
+
+            # Set cable delay settings that yield good communication with each
+            # RHD2000 chip.
+            optimumDelay = [0]*constants.MAX_NUM_DATA_STREAMS
+            for stream in range(constants.MAX_NUM_DATA_STREAMS):
+                if sumGoodDelays[stream] == 1 or sumGoodDelays[stream] == 2:
+                    optimumDelay[stream] = indexFirstGoodDelay[stream]
+                elif sumGoodDelays[stream] > 2:
+                    optimumDelay[stream] = indexSecondGoodDelay[stream]
+
+            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortA,
+                                         max(optimumDelay[0], optimumDelay[1]))
+            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortB,
+                                         max(optimumDelay[2], optimumDelay[3]))
+            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortC,
+                                         max(optimumDelay[4], optimumDelay[5]))
+            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortD,
+                                         max(optimumDelay[6], optimumDelay[7]))
+
+            self.cableLengthPortA = self.evalBoard.estimateCableLengthMeters(
+                max(optimumDelay[0], optimumDelay[1]))
+            self.cableLengthPortB = self.evalBoard.estimateCableLengthMeters(
+                max(optimumDelay[2], optimumDelay[3]))
+            self.cableLengthPortC = self.evalBoard.estimateCableLengthMeters(
+                max(optimumDelay[4], optimumDelay[5]))
+            self.cableLengthPortD = self.evalBoard.estimateCableLengthMeters(
+                max(optimumDelay[6], optimumDelay[7]))
+
+        else:
+            # If we are running with synthetic data (i.e., no interface board), just assume
+            # that one RHD2132 is plugged into Port A.
+            chipIdOld[0] = constants.CHIP_ID_RHD2132
+            portIndexOld[0] = 0
+
+        # Now that we know which RHD2000 amplifier chips are plugged into each SPI port,
+        # add up the total number of amplifier channels on each port and calcualate the number
+        # of data streams necessary to convey this data over the USB interface.
+        numStreamsRequired = 0
+        rhd2216ChipPresent = False
+        for stream in range(constants.MAX_NUM_DATA_STREAMS):
+            if chipIdOld[stream] == constants.CHIP_ID_RHD2216:
+                numStreamsRequired += 1
+                if numStreamsRequired <= constants.MAX_NUM_DATA_STREAMS:
+                    numChannelsOnPort[portIndexOld[stream]] += 16
+                rhd2216ChipPresent = True
+            if chipIdOld[stream] == constants.CHIP_ID_RHD2132:
+                numStreamsRequired += 1
+                if numStreamsRequired <= constants.MAX_NUM_DATA_STREAMS:
+                    numChannelsOnPort[portIndexOld[stream]] += 32
+            if chipIdOld[stream] == constants.CHIP_ID_RHD2164:
+                numStreamsRequired += 2
+                if numStreamsRequired <= constants.MAX_NUM_DATA_STREAMS:
+                    numChannelsOnPort[portIndexOld[stream]] += 64
+
+        # If the user plugs in more chips than the USB interface can support, warn
+        # that not all channels will be acquired.
+        if numStreamsRequired > constants.MAX_NUM_DATA_STREAMS:
+            self.warnCapacityExceeded(rhd2216ChipPresent)
+
+        # Reconfigure USB data streams in consecutive order to accommodate all connected chips.
+        stream = 0
+        for oldStream in range(constants.MAX_NUM_DATA_STREAMS):
+            if (chipIdOld[oldStream] == constants.CHIP_ID_RHD2216) and (stream < constants.MAX_NUM_DATA_STREAMS):
+                self.chipId[stream] = constants.CHIP_ID_RHD2216
+                portIndex[stream] = portIndexOld[oldStream]
+                if not self.synthMode:
+                    self.evalBoard.enableDataStream(stream, True)
+                    self.evalBoard.setDataSource(
+                        stream, initStreamPorts[oldStream])
+                stream += 1
+            elif (chipIdOld[oldStream] == constants.CHIP_ID_RHD2132) and (stream < constants.MAX_NUM_DATA_STREAMS):
+                self.chipId[stream] = constants.CHIP_ID_RHD2132
+                portIndex[stream] = portIndexOld[oldStream]
+                if not self.synthMode:
+                    self.evalBoard.enableDataStream(stream, True)
+                    self.evalBoard.setDataSource(
+                        stream, initStreamPorts[oldStream])
+                stream += 1
+            elif (chipIdOld[oldStream] == constants.CHIP_ID_RHD2164) and (stream < constants.MAX_NUM_DATA_STREAMS - 1):
+                self.chipId[stream] = constants.CHIP_ID_RHD2164
+                self.chipId[stream + 1] = constants.CHIP_ID_RHD2164_B
+                portIndex[stream] = portIndexOld[oldStream]
+                portIndex[stream + 1] = portIndexOld[oldStream]
+                if not self.synthMode:
+                    self.evalBoard.enableDataStream(stream, True)
+                    self.evalBoard.enableDataStream(stream + 1, True)
+                    self.evalBoard.setDataSource(
+                        stream, initStreamPorts[oldStream])
+                    self.evalBoard.setDataSource(
+                        stream + 1, initStreamDdrPorts[oldStream])
+                stream += 2
+
+        # Disable unused data streams.
+        for stream in range(stream, constants.MAX_NUM_DATA_STREAMS):
+            if not self.synthMode:
+                self.evalBoard.enableDataStream(stream, False)
+
+        # Add channel descriptions to the SignalSources object to create a list of all waveforms.
+        for port in range(4):
+            signalPort = self.signalSources.signalPort[port]
+            signalPort.enabled = numChannelsOnPort[port] > 0
+
+            # If the number of channels on the port has not changed, don't create
+            # new channels, since this would clear all user-defined channel names,
+            # but update the data stream indices of the channels on the port.
+            if signalPort.enabled and signalPort.numAmplifierChannels() == numChannelsOnPort[port]:
+                self.updateChannelStreams(signalPort, portIndex, port)
+                continue
+
+            signalPort.channel.clear()
+
+            # Create amplifier channels for each chip (32 channels on MISO A and
+            # another 32 on MISO B for the RHD2164).
+            channel = 0
+            for stream in range(constants.MAX_NUM_DATA_STREAMS):
+                if portIndex[stream] == port:
+                    if self.chipId[stream] == constants.CHIP_ID_RHD2216:
+                        numChipChannels = 16
+                    else:
+                        numChipChannels = 32
+                    for i in range(numChipChannels):
+                        signalPort.addAmplifierChannelSpecific(
+                            channel, i, stream)
+                        channel += 1
+
+            # Now create auxiliary input channels and supply voltage channels for each chip.
+            auxName = 1
+            vddName = 1
+            for stream in range(constants.MAX_NUM_DATA_STREAMS):
+                if portIndex[stream] == port and self.chipId[stream] != constants.CHIP_ID_RHD2164_B:
+                    for i in range(3):
+                        signalPort.addAuxInputChannel(
+                            channel, i, auxName, stream)
+                        channel += 1
+                        auxName += 1
+                    signalPort.addSupplyVoltageChannel(
+                        channel, 0, vddName, stream)
+                    channel += 1
+                    vddName += 1
+
+        # Return sample rate to original user-selected value.
+        if not self.synthMode:
+            self.changeSampleRate(originalSampleRateIndex)
+
+    # Update the data stream indices of the amplifier, auxiliary input and supply
+    # voltage channels of signalPort (SPI port number port), in the order they
+    # were created by findConnectedAmplifiers().
+    def updateChannelStreams(self, signalPort, portIndex, port):
+        channel = 0
+        for stream in range(constants.MAX_NUM_DATA_STREAMS):
+            if portIndex[stream] == port:
+                if self.chipId[stream] == constants.CHIP_ID_RHD2216:
+                    numChipChannels = 16
+                else:
+                    numChipChannels = 32
+                for i in range(channel, channel + numChipChannels):
+                    signalPort.channel[i].boardStream = stream
+                channel += numChipChannels
+
+        for stream in range(constants.MAX_NUM_DATA_STREAMS):
+            if portIndex[stream] == port and self.chipId[stream] != constants.CHIP_ID_RHD2164_B:
+                for i in range(channel, channel + 4):
+                    signalPort.channel[i].boardStream = stream
+                channel += 4
+
+    # Warn that more amplifier chips are connected than the USB interface board
+    # can support.  rhd2216ChipPresent is True if an RHD2216 chip (which uses a
+    # whole data stream) is connected.
+    def warnCapacityExceeded(self, rhd2216ChipPresent):
+        print("Capacity of USB interface exceeded: the RHD2000 USB interface board can "
+              "support only 256 amplifier channels.  Amplifier chips exceeding this "
+              "limit will not be acquired.")
+
+    # Return the Intan chip ID stored in ROM register 63.  If the data is invalid
+    # (due to a SPI communication channel with the wrong delay or a chip not present)
+    # then return -1.  The value of ROM register 59 is also returned.
+    def deviceId(self, dataBlock, stream):
+        # First, check ROM registers 32-36 to verify that they hold 'INTAN', and
+        # the initial chip name ROM registers 24-26 that hold 'RHD'.
+        intanChipPresent = (chr(dataBlock.auxiliaryData[stream][2][32]) == 'I' and
+                            chr(dataBlock.auxiliaryData[stream][2][33]) == 'N' and
+                            chr(dataBlock.auxiliaryData[stream][2][34]) == 'T' and
+                            chr(dataBlock.auxiliaryData[stream][2][35]) == 'A' and
+                            chr(dataBlock.auxiliaryData[stream][2][36]) == 'N' and
+                            chr(dataBlock.auxiliaryData[stream][2][24]) == 'R' and
+                            chr(dataBlock.auxiliaryData[stream][2][25]) == 'H' and
+                            chr(dataBlock.auxiliaryData[stream][2][26]) == 'D')
+
+        if not intanChipPresent:
+            return -1, -1
+        else:
+            # chip ID (Register 63) and Register 59
+            return dataBlock.auxiliaryData[stream][2][19], dataBlock.auxiliaryData[stream][2][23]
+
+    # Stream data from the board for the given number of seconds (or until stop()
+    # is called) without saving to disk.
+    def run(self, seconds=None, callback=None):
+        self.recording = False
+        self.triggerSet = False
+        self.triggered = False
+        self.runInterfaceBoard(seconds, callback)
+
+    # Record data to disk in saveFormat, starting new save files named after
+    # saveBaseFileName, for the given number of seconds (or until stop() is called).
+    def record(self, saveBaseFileName, seconds=None, callback=None):
+        self.checkSaveFormat()
+        self.saveBaseFileName = saveBaseFileName
+
+        # Create list of enabled channels that will be saved to disk.
+        self.signalProcessor.createSaveList(self.signalSources, False, ())
+
+        self.startNewSaveFile(self.saveFormat)
+
+        # Write save file header information.
+        self.writeSaveFileHeader(self.saveStream, self.infoStream,
+                                 self.saveFormat, self.signalProcessor.getNumTempSensors())
+
+        self.recording = True
+        self.triggerSet = False
+        self.triggered = False
+        self.runInterfaceBoard(seconds, callback)
+
+    # Wait for the trigger set with setTrigger() to start recording data to disk.
+    # Recording stops and waits for a new trigger when the trigger ends.
+    def triggerRecord(self, saveBaseFileName, seconds=None, callback=None):
+        self.checkSaveFormat()
+        self.saveBaseFileName = saveBaseFileName
+
+        # Create list of enabled channels that will be saved to disk, including
+        # the inputs of every trigger source if saveTriggerChannel is set.
+        self.signalProcessor.createSaveList(
+            self.signalSources, self.saveTriggerChannel,
+            [source.channel for source in self.triggerDetector.sources])
+
+        self.recording = False
+        self.triggerSet = True
+        self.triggered = False
+        self.triggerDetector.reset()
+        self.runInterfaceBoard(seconds, callback)
+
+    # Raises ValueError if data cannot be recorded in saveFormat.  Synthetic data
+    # is generated as raw data blocks, so it can be recorded in every format.
+    def checkSaveFormat(self):
+        if self.saveFormat not in (constants.SaveFormatIntan, constants.SaveFormatFilePerSignalType,
+                                   constants.SaveFormatFilePerChannel, constants.SaveFormatRaw,
+                                   constants.SaveFormatCompressed):
+            raise ValueError("Unknown save format " + str(self.saveFormat))
+
+    # Stop data acquisition.  May be called from the callback, a signal handler
+    # or another thread.
+    def stop(self):
+        self.running = False
+
+    # Returns the number of bytes per minute saved to disk while recording
+    # (excluding headers).
+    def bytesPerMinute(self):
+        return self.signalProcessor.bytesPerBlock(self.saveFormat, self.saveTemp, self.saveTtlOut) * \
+            self.boardSampleRate
+
+    # Start SPI communication to all connected RHD2000 amplifiers and stream
+    # waveform data over the USB port, processing and saving it, until seconds
+    # of data have been acquired or running is set to False.
+    def runInterfaceBoard(self, seconds=None, callback=None):
+        # Average temperature sensor readings over a ~0.1 second interval.
+        self.signalProcessor.tempHistoryReset(self.numUsbBlocksToRead * 3)
+
+        self.running = True
+        self.fifoOverrun = False
+        self.totalBytesWritten = 0
+
+        # Turn LEDs on to indicate that data acquisition is running.
+        self.ttlOut[15] = 1
+        ledArray = [1, 0, 0, 0, 0, 0, 0, 0]
+        if not self.synthMode:
+            self.evalBoard.setLedDisplay(ledArray)
+            self.evalBoard.setTtlOut(self.ttlOut)
+            self.evalBoard.setContinuousRunMode(True)
+            self.evalBoard.run()
+
+        try:
+            self.runAcquisitionLoop(ledArray, seconds, callback)
+        finally:
+            # Stop data acquisition (when running == False)
+            if not self.synthMode:
+                self.evalBoard.setContinuousRunMode(False)
+                self.evalBoard.setMaxTimeStep(0)
+
+                # Flush USB FIFO on XEM6010
+                self.evalBoard.flush()
+
+            # Close save file, if recording, and wait until all data has been
+            # written and the files are closed.
+            if self.recording:
+                self.closeSaveFile(self.saveFormat)
+                self.recording = False
+            self.signalProcessor.dataWriter.flush()
+
+            # Reset trigger
+            self.triggerSet = False
+            self.triggered = False
+            self.running = False
+
+            # Turn off LED.
+            for i in range(8):
+                ledArray[i] = 0
+            self.ttlOut[15] = 0
+            if not self.synthMode:
+                self.evalBoard.setLedDisplay(ledArray)
+                self.evalBoard.setTtlOut(self.ttlOut)
+
+        if self.fifoOverrun:
+            raise IOError("USB buffer overrun: acquisition was stopped because the USB FIFO "
+                          "buffer on the interface board reached maximum capacity.")
+
+    def runAcquisitionLoop(self, ledArray, seconds, callback):
+        triggerIndex = 0
+
+        timestampOffset = 0
+        preTriggerBufferLength = 0
+        fifoNearlyFull = 0
+        triggerEndCounter = 0
+        ledIndex = 0
+
+        triggerEndThreshold = math.ceil(self.postTriggerTime * self.boardSampleRate / (
+            self.numUsbBlocksToRead * constants.SAMPLES_PER_DATA_BLOCK)) - 1
+
+        if self.triggerSet:
+            preTriggerBufferLength = self.numUsbBlocksToRead * math.ceil(self.recordTriggerBuffer / (
+                self.numUsbBlocksToRead * Rhd2000DataBlock.getSamplesPerDataBlock() / self.boardSampleRate)) + 1
+
+        # Raw data blocks acquired before the trigger.
+        bufferRing = DataBlockRing(self.signalProcessor.numDataStreams, preTriggerBufferLength)
+
+        if self.synthMode:
+            dataBlockSize = Rhd2000DataBlock.calculateDataBlockSizeInWords(1)
+        else:
+            numDataStreams = self.evalBoard.getNumEnabledDataStreams()
+            dataBlockSize = Rhd2000DataBlock.calculateDataBlockSizeInWords(
+                numDataStreams)
+            fifoCapacity = self.evalBoard.fifoCapacityInWords()
+
+        # In the raw format, USB data is read into rawBuffer and saved exactly as
+        # read.  It is only decoded when it is needed to look for a trigger or
+        # by the callback.
+        rawMode = self.saveFormat == constants.SaveFormatRaw and not self.synthMode
+        if rawMode:
+            rawBuffer = np.empty(
+                2 * dataBlockSize * self.numUsbBlocksToRead, dtype=np.uint8)
+
+        totalRecordTimeSeconds = 0.0
+        recordTimeIncrementSeconds = self.numUsbBlocksToRead * \
+            Rhd2000DataBlock.getSamplesPerDataBlock() / self.boardSampleRate
+
+        # Number of reads to acquire before stopping, if seconds was given.
+        if seconds is not None:
+            numReadsLeft = math.ceil(seconds / recordTimeIncrementSeconds)
+        else:
+            numReadsLeft = None
+
+        samplePeriod = 1.0 / self.boardSampleRate
+
+        self.latency = 0.0
+        self.fifoPercentageFull = 0.0
+
+        synthPeriodSeconds = 60.0 * self.numUsbBlocksToRead / self.boardSampleRate
+        synthStartTime = time.perf_counter()
+
+        while self.running and numReadsLeft != 0:
+            # If we are running in demo mode, use a timer to periodically generate more synthetic
+            # data.  If not, wait for a certain amount of data to be ready from the USB interface board.
+            if self.synthMode:
+                newDataReady = (time.perf_counter() -
+                                synthStartTime >= synthPeriodSeconds)
+            elif rawMode:
+                newDataReady = self.evalBoard.readRawDataBlocks(
+                    self.numUsbBlocksToRead, rawBuffer)
+            else:
+                newDataReady = self.evalBoard.readDataBlocks(
+                    self.numUsbBlocksToRead, self.dataQueue)
+
+            if not newDataReady:
+                # Don't spin while waiting for more data.
+                time.sleep(0.001)
+                continue
+
+            if self.synthMode:
+                synthStartTime = time.perf_counter()
+                self.fifoPercentageFull = 0.0
+
+                # Generate synthetic data
+                self.totalBytesWritten += self.signalProcessor.loadSyntheticData(
+                    self.numUsbBlocksToRead, self.boardSampleRate, self.recording, self.saveStream, self.saveFormat, self.saveTemp, self.saveTtlOut)
+            else:
+                # Check the number of words stored in the Opal Kelly USB interface FIFO.
+                wordsInFifo = self.evalBoard.numWordsInFifo()
+                self.latency = 1000.0 * Rhd2000DataBlock.getSamplesPerDataBlock() * \
+                    (wordsInFifo / dataBlockSize) * samplePeriod
+
+                self.fifoPercentageFull = 100.0 * wordsInFifo / fifoCapacity
+
+                # USB data saved in the raw format is only decoded when it is needed
+                # to look for a trigger or by the callback.
+                decodeData = not rawMode or callback or self.triggerSet or self.triggered
+                if rawMode:
+                    if self.recording:
+                        self.signalProcessor.dataWriter.write(
+                            self.saveStream, rawBuffer.tobytes())
+                        self.totalBytesWritten += len(rawBuffer)
+
+                    if decodeData:
+                        self.dataQueue.pushFromUsbBuffer(
+                            rawBuffer, self.numUsbBlocksToRead, numDataStreams)
+
+                if decodeData:
+                    # Read waveform data from USB interface board.
+                    self.totalBytesWritten += self.signalProcessor.loadAmplifierData(self.dataQueue, self.numUsbBlocksToRead,
+                                                                                     self.triggerSet, bufferRing,
+                                                                                     self.recording and not rawMode, self.saveStream,
+                                                                                     self.saveFormat, self.saveTemp, self.saveTtlOut,
+                                                                                     timestampOffset)
+
+                    # Look for the start of a trigger, or for its end once triggered,
+                    # with the detector of the whole run, so that an edge between two
+                    # reads is found.
+                    if self.triggerSet:
+                        triggerIndex = self.triggerDetector.find(
+                            self.signalProcessor.dataBlockBatch, self.numUsbBlocksToRead)
+                    elif self.triggered:
+                        triggerIndex = self.triggerDetector.findInactive(
+                            self.signalProcessor.dataBlockBatch, self.numUsbBlocksToRead)
+
+                    if self.triggerSet and (triggerIndex != -1):
+                        self.triggerSet = False
+                        self.triggered = True
+                        self.recording = True
+                        timestampOffset = triggerIndex
+
+                        self.startNewSaveFile(self.saveFormat)
+
+                        # Write save file header information.
+                        self.writeSaveFileHeader(self.saveStream, self.infoStream, self.saveFormat,
+                                                 self.signalProcessor.getNumTempSensors(), timestampOffset)
+
+                        totalRecordTimeSeconds = len(
+                            bufferRing) * Rhd2000DataBlock.getSamplesPerDataBlock() / self.boardSampleRate
+
+                        # Write contents of pre-trigger buffer to file.
+                        self.totalBytesWritten += self.signalProcessor.saveBufferedData(bufferRing, self.saveStream, self.saveFormat,
+                                                                                        self.saveTemp, self.saveTtlOut, timestampOffset)
+                    # Episodic triggered recording
+                    elif self.triggered and (triggerIndex != -1):
+                        triggerEndCounter += 1
+                        if triggerEndCounter > triggerEndThreshold:
+                            # Keep recording for the specified number of seconds after the trigger has
+                            # been de-asserted, then enable the trigger again.
+                            triggerEndCounter = 0
+                            self.triggerSet = True
+                            self.triggered = False
+                            self.recording = False
+                            self.closeSaveFile(self.saveFormat)
+                            totalRecordTimeSeconds = 0.0
+
+                    elif self.triggered:
+                        # Ignore brief (< 1 second) trigger-off events.
+                        triggerEndCounter = 0
+
+            # Apply notch and high-pass filters to the visible amplifier channels.
+            if callback:
+                self.signalProcessor.filterData(
+                    self.numUsbBlocksToRead, self.channelVisible)
+                callback(self)
+
+            # If we are recording in Intan, raw or compressed format and our data file has reached its
+            # specified maximum length (e.g., 1 minute), close the current data file and open a new one.
+            if self.recording:
+                totalRecordTimeSeconds += recordTimeIncrementSeconds
+
+                if self.saveFormat == constants.SaveFormatIntan or self.saveFormat == constants.SaveFormatRaw or \
+                        self.saveFormat == constants.SaveFormatCompressed:
+                    if totalRecordTimeSeconds >= (60 * self.newSaveFilePeriodMinutes):
+                        self.closeSaveFile(self.saveFormat)
+                        self.startNewSaveFile(self.saveFormat)
+
+                        # Write save file header information.
+                        self.writeSaveFileHeader(self.saveStream, self.infoStream, self.saveFormat,
+                                                 self.signalProcessor.getNumTempSensors(), timestampOffset)
+
+                        totalRecordTimeSeconds = 0.0
+
+            # If the USB interface FIFO (on the FPGA board) exceeds 98% full, halt
+            # data acquisition.  We must see the FIFO >98% full three times in a row
+            # to eliminate the possiblity of a USB glitch causing recording to stop.
+            if self.fifoPercentageFull > 98.0:
+                fifoNearlyFull += 1
+                if fifoNearlyFull > 2:
+                    self.running = False
+                    self.fifoOverrun = True
+            else:
+                fifoNearlyFull = 0
+
+            # Advance LED display
+            ledArray[ledIndex] = 0
+            ledIndex = (ledIndex + 1) % 8
+            ledArray[ledIndex] = 1
+            if not self.synthMode:
+                self.evalBoard.setLedDisplay(ledArray)
+
+            if numReadsLeft is not None:
+                numReadsLeft -= 1
+
+    # Create and open a new save file for data (saveFile), and create a new
+    # data stream (saveStream) for writing to the file.  If addDateTime is
+    # False, saveBaseFileName is used without a date and time stamp.
+    def startNewSaveFile(self, saveFormat, addDateTime=True):
+        path = os.path.dirname(self.saveBaseFileName) or "."
+        baseName = os.path.basename(self.saveBaseFileName).split(".")[0]
+
+        # Add time and date stamp to base filename.
+        if addDateTime:
+            dateTime = datetime.datetime.now()
+            stampedName = baseName + "_" + \
+                dateTime.strftime("%y%m%d") + "_" + dateTime.strftime("%H%M%S")
+        else:
+            stampedName = baseName
+
+        if saveFormat == constants.SaveFormatIntan:
+            self.saveFileName = path + "/" + stampedName + ".rhd"
+            self.saveFile, self.saveStream = openDataStream(self.saveFileName)
+            return
+        elif saveFormat == constants.SaveFormatRaw:
+            self.saveFileName = path + "/" + stampedName + ".raw"
+            self.saveFile, self.saveStream = openDataStream(self.saveFileName)
+            return
+        elif saveFormat == constants.SaveFormatCompressed:
+            # Data block records are compressed in the Intan format layout.
+            self.saveFileName = path + "/" + stampedName + ".rhc"
+            self.saveFile, self.saveStream = openCompressedStream(
+                self.saveFileName,
+                self.signalProcessor.dataBlockEncoder.intanBytesPerBlock(self.saveTemp, self.saveTtlOut),
+                len(self.signalProcessor.saveListAmplifier), self.compressionCodec)
+            return
+
+        # Create 'save file' name for status display, and a subdirectory for
+        # data, timestamp, and info files.
+        self.saveFileName = path + "/" + stampedName
+        subdir = path + "/" + stampedName
+        os.makedirs(subdir, exist_ok=True)
+
+        self.signalProcessor.createTimestampFilename(subdir)
+        self.signalProcessor.openTimestampFile()
+
+        if saveFormat == constants.SaveFormatFilePerSignalType:
+            self.signalProcessor.createSignalTypeFilenames(subdir)
+            self.signalProcessor.openSignalTypeFiles(self.saveTtlOut)
+        elif saveFormat == constants.SaveFormatFilePerChannel:
+            # Create filename for each channel, and open save files.
+            self.signalProcessor.createFilenames(self.signalSources, subdir)
+            self.signalProcessor.openSaveFiles(self.signalSources)
+            self.signalProcessor.channelWriter.setWindow(
+                int(self.channelWriteWindowSeconds * self.boardSampleRate),
+                int(self.preallocateSeconds * self.boardSampleRate))
+
+        # Create info file.
+        self.infoFileName = subdir + "/" + "info.rhd"
+        self.infoFile, self.infoStream = openDataStream(self.infoFileName)
+
+    def closeSaveFile(self, saveFormat):
+        # Files are closed by the background data writer once their data has been
+        # written, so the acquisition loop never waits for the disk.
+        if saveFormat == constants.SaveFormatIntan or saveFormat == constants.SaveFormatRaw:
+            self.signalProcessor.dataWriter.close(self.saveFile)
+        elif saveFormat == constants.SaveFormatCompressed:
+            # The last chunks are compressed and the chunk index is written on
+            # the data writer thread too.
+            self.signalProcessor.dataWriter.close(self.saveStream)
+            self.signalProcessor.dataWriter.close(self.saveFile)
+        elif saveFormat == constants.SaveFormatFilePerSignalType:
+            self.signalProcessor.closeTimestampFile()
+            self.signalProcessor.closeSignalTypeFiles()
+            self.infoFile.close()
+        elif saveFormat == constants.SaveFormatFilePerChannel:
+            self.signalProcessor.closeTimestampFile()
+            self.signalProcessor.closeSaveFiles(self.signalSources)
+            self.infoFile.close()
+
+    # Write the save file header.  The Intan and raw format headers go to
+    # outStream, the header of the other formats goes to the info.rhd file
+    # (infoStream).  The raw format header starts with a description of the
+    # USB data blocks that follow it, including the timestampOffset of the
+    # trigger point, followed by the Intan format header.  The compressed
+    # format header starts with the codec and size of its data chunks.
+    def writeSaveFileHeader(self, outStream, infoStream, saveFormat, numTempSensors, timestampOffset=0):
+        for i in range(16):
+            self.signalSources.signalPort[6].channel[i].enabled = self.saveTtlOut
+
+        if saveFormat == constants.SaveFormatIntan or saveFormat == constants.SaveFormatRaw or \
+                saveFormat == constants.SaveFormatCompressed:
+            stream = outStream
+        else:
+            stream = infoStream
+
+        if saveFormat == constants.SaveFormatRaw:
+            stream.writeUInt32(constants.RAW_FILE_MAGIC_NUMBER)
+            stream.writeInt16(constants.RAW_FILE_VERSION_NUMBER)
+            stream.writeInt16(self.signalProcessor.numDataStreams)
+            stream.writeDouble(self.boardSampleRate)
+            for dataStream in range(self.signalProcessor.numDataStreams):
+                stream.writeInt16(self.chipId[dataStream])
+            stream.writeUInt32(timestampOffset)
+        elif saveFormat == constants.SaveFormatCompressed:
+            stream.writeUInt32(constants.COMPRESSED_FILE_MAGIC_NUMBER)
+            stream.writeInt16(constants.COMPRESSED_FILE_VERSION_NUMBER)
+            stream.writeInt16(stream.codec)
+            stream.writeUInt32(stream.blocksPerChunk)
+
+        stream.writeUInt32(constants.DATA_FILE_MAGIC_NUMBER)
+        stream.writeInt16(constants.DATA_FILE_MAIN_VERSION_NUMBER)
+        stream.writeInt16(constants.DATA_FILE_SECONDARY_VERSION_NUMBER)
+
+        stream.writeDouble(self.boardSampleRate)
+
+        stream.writeInt16(self.dspEnabled)
+        stream.writeDouble(self.actualDspCutoffFreq)
+        stream.writeDouble(self.actualLowerBandwidth)
+        stream.writeDouble(self.actualUpperBandwidth)
+
+        stream.writeDouble(self.desiredDspCutoffFreq)
+        stream.writeDouble(self.desiredLowerBandwidth)
+        stream.writeDouble(self.desiredUpperBandwidth)
+
+        stream.writeInt16(self.notchFilterIndex)
+
+        stream.writeDouble(self.desiredImpedanceFreq)
+        stream.writeDouble(self.actualImpedanceFreq)
+
+        stream.writeQString(self.saveFileNotes[0])
+        stream.writeQString(self.saveFileNotes[1])
+        stream.writeQString(self.saveFileNotes[2])
+
+        # Temperature sensor data is only saved in the Intan and compressed
+        # formats (and can be converted from the raw format).
+        if (saveFormat == constants.SaveFormatIntan or saveFormat == constants.SaveFormatRaw or
+                saveFormat == constants.SaveFormatCompressed) and self.saveTemp:
+            stream.writeInt16(numTempSensors)
+        else:
+            stream.writeInt16(0)
+
+        stream.writeInt16(self.evalBoardMode)
+        self.signalSources.writeToStream(stream)
+
+        if saveFormat == constants.SaveFormatCompressed:
+            stream.beginData()
+
+    # Read a save file header written by writeSaveFileHeader() in saveFormat (the
+    # Intan format header of an .rhd or info.rhd file, or a raw format header)
+    # from inStream, and restore the settings, signal sources and save options
+    # it describes.  The SignalProcessor is configured for the data streams of
+    # a raw format file.  Returns the timestampOffset of a raw format file (0
+    # for the other formats).  Raises ValueError if the header is not valid.
+    def readSaveFileHeader(self, inStream, saveFormat):
+        header = SaveFileHeader.readFromStream(inStream, saveFormat)
+        if saveFormat == constants.SaveFormatRaw:
+            self.chipId = [-1]*constants.MAX_NUM_DATA_STREAMS
+            self.chipId[:header.numDataStreams] = header.chipId
+            self.signalProcessor.allocateMemory(header.numDataStreams)
+
+        self.boardSampleRate = header.boardSampleRate
+
+        self.dspEnabled = header.dspEnabled
+        self.actualDspCutoffFreq = header.actualDspCutoffFreq
+        self.actualLowerBandwidth = header.actualLowerBandwidth
+        self.actualUpperBandwidth = header.actualUpperBandwidth
+
+        self.desiredDspCutoffFreq = header.desiredDspCutoffFreq
+        self.desiredLowerBandwidth = header.desiredLowerBandwidth
+        self.desiredUpperBandwidth = header.desiredUpperBandwidth
+
+        self.notchFilterIndex = header.notchFilterIndex
+
+        self.desiredImpedanceFreq = header.desiredImpedanceFreq
+        self.actualImpedanceFreq = header.actualImpedanceFreq
+
+        self.saveFileNotes = header.saveFileNotes
+        self.evalBoardMode = header.evalBoardMode
+        self.signalSources = header.signalSources
+
+        self.saveTemp = header.numTempSensors > 0
+        self.saveTtlOut = header.saveTtlOut()
+        return header.timestampOffset
+
+# Returns the index in SAMPLE_RATES of the given sample rate in Hz.
+
+
+def sampleRateIndex(sampleRate):
+    for index in range(len(SAMPLE_RATES)):
+        if abs(SAMPLE_RATES[index][1] - sampleRate) < 1.0:
+            return index
+    raise ValueError("Unsupported sample rate: " + str(sampleRate) + " Hz")
@@ -0,0 +1,438 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import constants
+from acquire import SAVE_FORMATS
+from acquisitionengine import AcquisitionEngine, sampleRateIndex
+from datablockbatch import DataBlockRing
+from dataqueue import DataQueue
+from framering import WaveformFrame
+from simulatedevalboard import SimulatedEvalBoard
+
+# Version of the JSON results document written by --json.
+RESULTS_VERSION = 1
+
+STAGES = [
+    "loadAmplifierData",
+    "filterData",
+    "saveBufferedData.intan",
+    "saveBufferedData.signaltype",
+    "saveBufferedData.channel",
+    "loadSyntheticData",
+    "measureComplexAmplitude",
+    "drawWaveforms",
+    "updateWaveform",
+]
+
+DEFAULT_STREAMS = [1, 2, 4, 8]
+DEFAULT_SAMPLE_RATES = [1000.0, 5000.0, 10000.0, 20000.0, 30000.0]
+
+# QApplication created for the plotting stages.
+application = None
+
+
+class PlotHost():
+    """ This class stands in for MainWindow as the parent of a WavePlot,
+    providing the few MainWindow methods and attributes that the plot uses
+    while drawing, taken from an AcquisitionEngine.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.channelVisible = engine.channelVisible
+
+    def setNumWaveformsComboBox(self, index):
+        pass
+
+    def getEvalBoardMode(self):
+        return self.engine.evalBoardMode
+
+    def isRecording(self):
+        return False
+
+
+class StageBenchmark():
+    """ This class times the acquisition hot paths for one configuration:
+    numStreams RHD2132 chips on a SimulatedEvalBoard at sampleRate.  The
+    board is opened, scanned and configured with the same code as a real
+    board, and the data blocks of the requested number of seconds are
+    acquired once before any stage is timed.
+
+    Every stage processes the data one read (numUsbBlocksToRead blocks, the
+    amount read per loop iteration while acquiring) at a time.  Work that
+    a stage depends on but that is not part of it, such as refilling the
+    data queue or loading and filtering the data to be drawn, is done
+    before the clock is started.  The notch and highpass filters are both
+    enabled, every board ADC and digital input is saved, and the plots
+    show as many channels as fit on one screen.
+
+    run(stage) returns a dictionary with the processing time and the
+    real-time factor (seconds of data processed per second of processing
+    time; the stage keeps up with the board if it is above 1).
+    """
+
+    def __init__(self, numStreams, sampleRate, seconds, tempDir):
+        self.numStreams = numStreams
+        self.tempDir = tempDir
+        self.plots = None
+
+        self.engine = AcquisitionEngine(evalBoard=SimulatedEvalBoard(
+            [constants.CHIP_ID_RHD2132] * numStreams, speed=0))
+        engine = self.engine
+        engine.openInterfaceBoard("main.bit")
+        engine.changeSampleRate(sampleRateIndex(sampleRate))
+        engine.scanPorts()
+        engine.changeNotchFilter(2)
+        engine.enableHighpassFilter(True)
+        for port in (4, 5):
+            for channel in engine.signalSources.signalPort[port].channel:
+                channel.enabled = True
+        for stream in range(numStreams):
+            engine.channelVisible[stream] = [True] * 32
+
+        self.signalProcessor = engine.signalProcessor
+        self.sampleRate = engine.boardSampleRate
+        self.numBlocks = engine.numUsbBlocksToRead
+        self.numReads = max(1, math.ceil(seconds * self.sampleRate /
+                                         (constants.SAMPLES_PER_DATA_BLOCK * self.numBlocks)))
+        self.signalProcessor.tempHistoryReset(self.numBlocks * 3)
+
+        # Electrode impedance measurement settings, chosen as in
+        # MainWindow.runImpedanceMeasurement() for a 1 kHz test frequency.
+        period = max(4, round(self.sampleRate / engine.desiredImpedanceFreq))
+        self.impedanceFreq = self.sampleRate / period
+        self.numPeriods = max(5, round(0.020 * self.impedanceFreq))
+        self.impedanceNumBlocks = max(2, math.ceil((self.numPeriods + 2.0) * period /
+                                                   constants.SAMPLES_PER_DATA_BLOCK))
+
+        # Acquire the data of all reads once; stages take copies of it.
+        board = engine.evalBoard
+        self.sourceQueue = DataQueue()
+        board.setContinuousRunMode(True)
+        board.run()
+        board.readDataBlocks(max(self.numBlocks * self.numReads, self.impedanceNumBlocks),
+                             self.sourceQueue)
+        board.setContinuousRunMode(False)
+        board.setMaxTimeStep(0)
+        board.flush()
+
+        self.dataQueue = DataQueue()
+        self.frame = WaveformFrame(numStreams, self.numBlocks, self.signalProcessor.waveformDtype)
+
+    # Returns the number of amplifier channels being processed.
+    def numChannels(self):
+        return 32 * self.numStreams
+
+    # Copy the next numBlocks data blocks of the acquired data to queue.  The
+    # acquired data is used round-robin.
+    def stageBlocks(self, numBlocks, queue):
+        self.sourceQueue.copyFrontTo(numBlocks, queue)
+        # Move the blocks to the back of the source queue.
+        self.sourceQueue.copyFrontTo(numBlocks, self.sourceQueue)
+        self.sourceQueue.discard(numBlocks)
+
+    # Load the next numBlocks data blocks into the SignalProcessor waveforms.
+    def loadBlocks(self, numBlocks):
+        self.stageBlocks(numBlocks, self.dataQueue)
+        self.signalProcessor.loadAmplifierData(self.dataQueue, numBlocks, False, None,
+                                               False, None, constants.SaveFormatIntan, False, False, 0)
+
+    # Load, filter and copy the next read to the frame drawn by the plots.
+    def loadFrame(self):
+        self.loadBlocks(self.numBlocks)
+        self.signalProcessor.filterData(self.numBlocks, self.engine.channelVisible)
+        self.frame.copyFrom(self.signalProcessor, self.numBlocks, 0.0, 0.0)
+
+    # Time process(read) for every read, calling prepare(read) first.  Returns
+    # the time taken by each read.
+    def timeReads(self, prepare, process, numReads=None):
+        readSeconds = []
+        for read in range(self.numReads if numReads is None else numReads):
+            prepare(read)
+            startTime = time.perf_counter()
+            process(read)
+            readSeconds.append(time.perf_counter() - startTime)
+        return readSeconds
+
+    def run(self, stage):
+        numBlocks = self.numBlocks
+        signalProcessor = self.signalProcessor
+
+        if stage == "loadAmplifierData":
+            readSeconds = self.timeReads(
+                lambda read: self.stageBlocks(numBlocks, self.dataQueue),
+                lambda read: signalProcessor.loadAmplifierData(
+                    self.dataQueue, numBlocks, False, None,
+                    False, None, constants.SaveFormatIntan, False, False, 0))
+
+        elif stage == "filterData":
+            readSeconds = self.timeReads(
+                lambda read: self.loadBlocks(numBlocks),
+                lambda read: signalProcessor.filterData(numBlocks, self.engine.channelVisible))
+
+        elif stage.startswith("saveBufferedData."):
+            readSeconds = self.runSaveBufferedData(SAVE_FORMATS[stage.split(".")[1]])
+
+        elif stage == "loadSyntheticData":
+            readSeconds = self.timeReads(
+                lambda read: None,
+                lambda read: signalProcessor.loadSyntheticData(
+                    numBlocks, self.sampleRate, False, None, constants.SaveFormatIntan, False, False))
+
+        elif stage == "measureComplexAmplitude":
+            # Measure one channel on every data stream per impedance read, as
+            # MainWindow.runImpedanceMeasurement() does.
+            magnitude = np.zeros((self.numStreams, 32, 3))
+            phase = np.zeros((self.numStreams, 32, 3))
+
+            def measure(read):
+                for stream in range(self.numStreams):
+                    signalProcessor.measureComplexAmplitude(
+                        magnitude, phase, 0, stream, read % 32, self.impedanceNumBlocks,
+                        self.sampleRate, self.impedanceFreq, self.numPeriods)
+
+            numReads = max(1, (self.numReads * numBlocks) // self.impedanceNumBlocks)
+            readSeconds = self.timeReads(
+                lambda read: self.loadBlocks(self.impedanceNumBlocks), measure, numReads)
+            numBlocks = self.impedanceNumBlocks
+
+        elif stage == "drawWaveforms":
+            wavePlot, spikePlot = self.createPlots()
+            readSeconds = self.timeReads(
+                lambda read: self.loadFrame(),
+                lambda read: wavePlot.drawWaveforms(self.frame))
+
+        elif stage == "updateWaveform":
+            wavePlot, spikePlot = self.createPlots()
+            readSeconds = self.timeReads(
+                lambda read: self.loadFrame(),
+                lambda read: spikePlot.updateWaveform(numBlocks, self.frame))
+
+        else:
+            raise ValueError("Unknown stage " + repr(stage))
+
+        dataSeconds = len(readSeconds) * numBlocks * constants.SAMPLES_PER_DATA_BLOCK / self.sampleRate
+        seconds = sum(readSeconds)
+        return {
+            "numBlocks": numBlocks,
+            "numReads": len(readSeconds),
+            "dataSeconds": dataSeconds,
+            "seconds": seconds,
+            "maxReadSeconds": max(readSeconds),
+            "realTimeFactor": dataSeconds / seconds if seconds > 0.0 else math.inf,
+        }
+
+    # Save every read to a new save file in saveFormat through saveBufferedData(),
+    # waiting for the background data writer to finish writing it.
+    def runSaveBufferedData(self, saveFormat):
+        engine = self.engine
+        signalProcessor = self.signalProcessor
+        bufferRing = DataBlockRing(self.numStreams, self.numBlocks)
+
+        engine.saveFormat = saveFormat
+        engine.saveTemp = True
+        engine.saveTtlOut = True
+        engine.saveBaseFileName = os.path.join(self.tempDir, "benchmark")
+        signalProcessor.createSaveList(engine.signalSources, False, ())
+        engine.startNewSaveFile(saveFormat)
+        engine.writeSaveFileHeader(engine.saveStream, engine.infoStream,
+                                   saveFormat, signalProcessor.getNumTempSensors())
+
+        # Fill the ring with the next read.
+        def fill(read):
+            self.stageBlocks(self.numBlocks, self.dataQueue)
+            batch = signalProcessor.dataBlockBatch
+            batch.clear()
+            self.dataQueue.popBatch(batch, self.numBlocks)
+            bufferRing.append(batch, 0, self.numBlocks, signalProcessor.blockTempAvg)
+
+        def save(read):
+            signalProcessor.saveBufferedData(bufferRing, engine.saveStream, saveFormat,
+                                             engine.saveTemp, engine.saveTtlOut, 0)
+            signalProcessor.dataWriter.flush()
+
+        try:
+            return self.timeReads(fill, save)
+        finally:
+            engine.closeSaveFile(saveFormat)
+            signalProcessor.dataWriter.flush()
+            shutil.rmtree(engine.saveFileName, ignore_errors=True)
+            if os.path.isfile(engine.saveFileName):
+                os.remove(engine.saveFileName)
+
+    # Create the WavePlot and SpikePlot used by the drawing stages, drawing
+    # into off-screen pixmaps.  Raises ImportError if PyQt5 is not installed.
+    def createPlots(self):
+        if self.plots is not None:
+            return self.plots
+
+        from PyQt5.QtWidgets import QApplication
+        from spikeplot import SpikePlot
+        from waveplot import WavePlot
+
+        global application
+        if application is None:
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+            application = QApplication(sys.argv[:1])
+
+        engine = self.engine
+        wavePlot = WavePlot(self.signalProcessor, engine.signalSources, PlotHost(engine), None)
+        wavePlot.resize(1200, 800)
+        wavePlot.initialize(0)
+        wavePlot.setSampleRate(self.sampleRate)
+        wavePlot.setYScale(500)
+        wavePlot.setTScale(200)
+        wavePlot.setNumUsbBlocksToPlot(self.numBlocks)
+        wavePlot.refreshPixmap()
+
+        channel = engine.signalSources.signalPort[0].channelByIndex(0)
+        spikePlot = SpikePlot(self.signalProcessor, channel, None, None)
+        spikePlot.resize(500, 400)
+        spikePlot.show()
+        spikePlot.setSampleRate(self.sampleRate)
+        spikePlot.setNewChannel(channel)
+        spikePlot.setVoltageThreshold(-50)
+
+        self.plots = wavePlot, spikePlot
+        return self.plots
+
+
+# Run the given stages for every combination of number of data streams and
+# sample rate, printing a line per result.  Returns the list of results.
+def runBenchmarks(stages, streams, sampleRates, seconds):
+    results = []
+    tempDir = tempfile.mkdtemp(prefix="rhd2k-benchmark-")
+    try:
+        for numStreams in streams:
+            for sampleRate in sampleRates:
+                benchmark = StageBenchmark(numStreams, sampleRate, seconds, tempDir)
+                for stage in stages:
+                    result = {
+                        "stage": stage,
+                        "numStreams": numStreams,
+                        "numChannels": benchmark.numChannels(),
+                        "sampleRate": benchmark.sampleRate,
+                    }
+                    try:
+                        result.update(benchmark.run(stage))
+                    except Exception as e:
+                        result["error"] = type(e).__name__ + ": " + " ".join(str(e).split())
+                    results.append(result)
+                    printResult(result)
+                benchmark.signalProcessor.dataWriter.stop()
+    finally:
+        shutil.rmtree(tempDir, ignore_errors=True)
+    return results
+
+
+def printResult(result):
+    line = "%-28s %3d ch %6.0f S/s  " % (result["stage"], result["numChannels"], result["sampleRate"])
+    if "error" in result:
+        print(line + "failed: " + result["error"])
+    else:
+        print(line + "%8.2fx real time  (%.1f ms per read, max %.1f ms)" % (
+            result["realTimeFactor"], 1000.0 * result["seconds"] / result["numReads"],
+            1000.0 * result["maxReadSeconds"]))
+    sys.stdout.flush()
+
+
+# Returns the results whose real-time factor dropped by more than tolerance
+# (a fraction) from the matching result in baseline, as (result, baseline) pairs.
+# Stages that failed now but not in the baseline are regressions too.
+def findRegressions(results, baseline, tolerance):
+    baselineResults = {}
+    for result in baseline["results"]:
+        baselineResults[(result["stage"], result["numStreams"], result["sampleRate"])] = result
+
+    regressions = []
+    for result in results:
+        old = baselineResults.get((result["stage"], result["numStreams"], result["sampleRate"]))
+        if old is None or "error" in old:
+            continue
+        if "error" in result or result["realTimeFactor"] < old["realTimeFactor"] * (1.0 - tolerance):
+            regressions.append((result, old))
+    return regressions
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Measure the real-time factor of the acquisition, filtering, saving and plotting "
+                    "code on data from a simulated interface board.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, metavar="STAGE",
+                        help="stages to time (default: all): " + ", ".join(STAGES))
+    parser.add_argument("--streams", nargs="+", type=int, default=DEFAULT_STREAMS,
+                        help="numbers of 32-channel data streams (default: 1 2 4 8)")
+    parser.add_argument("--sample-rates", nargs="+", type=float, default=DEFAULT_SAMPLE_RATES,
+                        help="amplifier sample rates in Hz (default: 1000 5000 10000 20000 30000)")
+    parser.add_argument("--seconds", type=float, default=0.5,
+                        help="seconds of data processed by each stage (default: 0.5)")
+    parser.add_argument("--json", metavar="FILE", default=None,
+                        help="write the results to FILE as JSON")
+    parser.add_argument("--baseline", metavar="FILE", default=None,
+                        help="compare with the results saved in FILE by --json and exit with "
+                             "status 1 if any stage is slower")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="fraction the real-time factor may drop below the baseline (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Time the processing stages and save or compare the results"""
+    args = parseArguments(sys.argv[1:] if argv is None else argv)
+
+    for numStreams in args.streams:
+        if numStreams < 1 or numStreams > constants.MAX_NUM_DATA_STREAMS:
+            print("The number of data streams must be between 1 and " + str(constants.MAX_NUM_DATA_STREAMS))
+            return 2
+    try:
+        for sampleRate in args.sample_rates:
+            sampleRateIndex(sampleRate)
+    except ValueError as e:
+        print(str(e))
+        return 2
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = runBenchmarks(args.stages, args.streams, args.sample_rates, args.seconds)
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({
+                "version": RESULTS_VERSION,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "seconds": args.seconds,
+                "results": results,
+            }, f, indent=1)
+
+    if baseline is not None:
+        regressions = findRegressions(results, baseline, args.tolerance)
+        for result, old in regressions:
+            print("Regression: %s, %d channels at %.0f S/s: %s (was %.2fx real time)" % (
+                result["stage"], result["numChannels"], result["sampleRate"],
+                result.get("error", "%.2fx real time" % result.get("realTimeFactor", 0.0)),
+                old["realTimeFactor"]))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import ctypes
+import ctypes.util
+import functools
+
+# File offsets of the data handed to the DataWriter are multiples of this
+# number of bytes (except for the last write before the files are closed).
+WRITE_ALIGNMENT = 4096
+
+# fallocate() mode that reserves disk space without changing the file size.
+FALLOC_FL_KEEP_SIZE = 1
+
+
+# Returns the Linux fallocate() function of the C library, or None where it is
+# not available.
+def loadFallocate():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fallocate = libc.fallocate64
+    except (OSError, AttributeError, TypeError):
+        return None
+    fallocate.restype = ctypes.c_int
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    return fallocate
+
+
+fallocate = loadFallocate()
+
+
+class ChannelWriter():
+    """ This class gathers the data of the many small files of the "One File
+    Per Channel" format before handing it to a DataWriter, so that each
+    file receives a few large writes instead of one small write per read
+    from the board.  Hundreds of files growing by a few kilobytes at a time
+    make the disk seek between them and fragment them.
+
+    write(target, data) appends the samples in data (a NumPy array) to the
+    buffer of target (a DataStream, QDataStream or Ofstream); once a buffer
+    holds windowSamples samples, its data is queued on the DataWriter in a
+    multiple of WRITE_ALIGNMENT bytes, and the remainder is kept for the
+    next window.  If preallocateSamples is not 0, disk space for that many
+    samples ahead is reserved for targets backed by a file, with Linux
+    fallocate(FALLOC_FL_KEEP_SIZE) (elsewhere, or on file systems without
+    it, nothing is reserved).  The size of the files is not changed, so a
+    recording that is cut short never leaves padding that readers would
+    take for samples; finish() releases the space reserved past the data.
+
+    finish() must be called before the files are closed (with
+    DataWriter.close()).
+    """
+
+    def __init__(self, dataWriter, windowSamples=0, preallocateSamples=0):
+        self.dataWriter = dataWriter
+        self.windowSamples = windowSamples
+        self.preallocateSamples = preallocateSamples
+
+        # Buffered bytes, bytes queued and bytes preallocated for each target.
+        self.buffers = {}
+        self.bytesQueued = {}
+        self.bytesAllocated = {}
+
+    # Set the number of samples gathered for each target before writing, and
+    # the number of samples of disk space reserved ahead of the data (0 = none).
+    # A window of 0 samples queues data as soon as it is written, unaligned.
+    def setWindow(self, windowSamples, preallocateSamples=0):
+        self.windowSamples = windowSamples
+        self.preallocateSamples = preallocateSamples
+
+    # Append data (a NumPy array of samples) to the buffer of target, and queue
+    # the buffer on the data writer if it holds a full window.
+    def write(self, target, data):
+        buffer = self.buffers.get(target)
+        if buffer is None:
+            buffer = self.buffers[target] = bytearray()
+            self.bytesQueued[target] = 0
+            self.bytesAllocated[target] = 0
+        buffer += data.tobytes()
+
+        if self.windowSamples == 0:
+            self.queue(target, len(buffer), data.itemsize)
+        elif len(buffer) >= self.windowSamples * data.itemsize:
+            self.queue(target, len(buffer) - (len(buffer) % WRITE_ALIGNMENT), data.itemsize)
+
+    # Queue the first numBytes buffered bytes of target on the data writer,
+    # reserving disk space for them (and preallocateSamples more samples of
+    # itemSize bytes) first.
+    def queue(self, target, numBytes, itemSize):
+        if numBytes == 0:
+            return
+        buffer = self.buffers[target]
+        self.bytesQueued[target] += numBytes
+        if self.preallocateSamples > 0 and self.bytesAllocated[target] < self.bytesQueued[target]:
+            self.preallocate(target, self.bytesQueued[target] + self.preallocateSamples * itemSize)
+        self.dataWriter.write(target, bytes(buffer[:numBytes]))
+        del buffer[:numBytes]
+
+    # Reserve disk space for the first numBytes bytes of the file of target,
+    # without changing its size.
+    def preallocate(self, target, numBytes):
+        device = getattr(target, "device", None)
+        if fallocate is None or not hasattr(device, "fileno"):
+            return
+        allocated = self.bytesAllocated[target]
+        if fallocate(device.fileno(), FALLOC_FL_KEEP_SIZE, allocated, numBytes - allocated) != 0:
+            # Not supported by the file system: write without preallocation.
+            return
+        self.bytesAllocated[target] = numBytes
+
+    # Queue all buffered data on the data writer, followed by the release of the
+    # disk space reserved past the data of preallocated files, without waiting
+    # for the writes.  Buffers are forgotten, so the writer can be used for new
+    # files.
+    def finish(self):
+        for target, buffer in self.buffers.items():
+            if buffer:
+                self.dataWriter.write(target, bytes(buffer))
+                self.bytesQueued[target] += len(buffer)
+
+        for target, allocated in self.bytesAllocated.items():
+            if allocated > self.bytesQueued[target]:
+                self.dataWriter.call(functools.partial(target.device.truncate, self.bytesQueued[target]))
+
+        self.buffers = {}
+        self.bytesQueued = {}
+        self.bytesAllocated = {}
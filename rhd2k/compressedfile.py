@@ -0,0 +1,300 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import collections
+import concurrent.futures
+import lzma
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from . import constants
+    from .datastream import DataStream
+    from .rhdfile import RhdFile, SaveFileReader
+except ImportError:
+    import constants
+    from datastream import DataStream
+    from rhdfile import RhdFile, SaveFileReader
+
+# Compression and decompression functions of each codec.
+CODECS = {
+    constants.CompressionZlib: (lambda data: zlib.compress(data, 1), zlib.decompress),
+    constants.CompressionLzma: (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+
+# Byte offset of the amplifier data in an Intan format data block record,
+# which starts with the timestamps.
+AMPLIFIER_DATA_OFFSET = 4 * constants.SAMPLES_PER_DATA_BLOCK
+
+# NumPy structured type of the entries of the chunk index.
+chunkIndexDtype = np.dtype([
+    ("offset", "<u8"),
+    ("numBlocks", "<u4"),
+    ("compressedSize", "<u4"),
+])
+
+
+# Compresses data, consecutive Intan format data block records of bytesPerBlock
+# bytes with numAmplifierChannels amplifier channels, with codec.  The
+# amplifier samples of each channel are delta-encoded (as 16-bit differences
+# between consecutive samples) and stored channel by channel before the rest
+# of the records, so that the slowly varying signals compress well.
+def compressChunk(data, bytesPerBlock, numAmplifierChannels, codec):
+    records = np.frombuffer(data, dtype=np.uint8).reshape(-1, bytesPerBlock)
+    amplifierEnd = AMPLIFIER_DATA_OFFSET + 2 * constants.SAMPLES_PER_DATA_BLOCK * numAmplifierChannels
+
+    amplifier = np.ascontiguousarray(records[:, AMPLIFIER_DATA_OFFSET:amplifierEnd]).view("<u2")
+    amplifier = amplifier.reshape(len(records), numAmplifierChannels, constants.SAMPLES_PER_DATA_BLOCK)
+    amplifier = amplifier.transpose(1, 0, 2).reshape(numAmplifierChannels, -1)
+    delta = np.diff(amplifier, axis=1, prepend=np.zeros((numAmplifierChannels, 1), dtype="<u2"))
+
+    rest = np.concatenate([records[:, :AMPLIFIER_DATA_OFFSET], records[:, amplifierEnd:]], axis=1)
+    return CODECS[codec][0](delta.tobytes() + rest.tobytes())
+
+
+# Decompresses a chunk compressed by compressChunk() holding numBlocks data
+# block records, and returns the records as a [block][byte] uint8 array.
+def decompressChunk(payload, numBlocks, bytesPerBlock, numAmplifierChannels, codec):
+    data = np.frombuffer(CODECS[codec][1](payload), dtype=np.uint8)
+    amplifierSize = 2 * constants.SAMPLES_PER_DATA_BLOCK * numAmplifierChannels
+    amplifierEnd = AMPLIFIER_DATA_OFFSET + amplifierSize
+    if len(data) != numBlocks * bytesPerBlock:
+        raise ValueError("Compressed chunk holds " + str(len(data)) + " bytes, not " +
+                         str(numBlocks * bytesPerBlock))
+
+    delta = data[:numBlocks * amplifierSize].view("<u2").reshape(numAmplifierChannels, -1)
+    amplifier = np.cumsum(delta, axis=1, dtype=np.uint16).astype("<u2", copy=False)
+    amplifier = amplifier.reshape(numAmplifierChannels, numBlocks, constants.SAMPLES_PER_DATA_BLOCK)
+
+    rest = data[numBlocks * amplifierSize:].reshape(numBlocks, -1)
+    records = np.empty((numBlocks, bytesPerBlock), dtype=np.uint8)
+    records[:, :AMPLIFIER_DATA_OFFSET] = rest[:, :AMPLIFIER_DATA_OFFSET]
+    records[:, AMPLIFIER_DATA_OFFSET:amplifierEnd] = np.ascontiguousarray(
+        amplifier.transpose(1, 0, 2)).view(np.uint8).reshape(numBlocks, -1)
+    records[:, amplifierEnd:] = rest[:, AMPLIFIER_DATA_OFFSET:]
+    return records
+
+
+class CompressedStream(DataStream):
+    """ This class writes a compressed format data file (.rhc).  The file
+    header is written with the DataStream methods as usual; after
+    beginData() is called, everything written to the stream is taken to be
+    Intan format data block records of bytesPerBlock bytes.  Records are
+    collected in chunks of blocksPerChunk blocks, and each chunk is
+    compressed by compressChunk() on a pool of numWorkers threads (zlib and
+    lzma release the GIL), so writing never compresses data inline.  At
+    most two chunks per worker wait to be written.
+
+    Chunks are written in order, each preceded by its number of blocks and
+    compressed size (quint32).  close() compresses the last, partial chunk
+    and writes the chunk index (offset, number of blocks and compressed
+    size of every chunk), followed by the number of chunks and
+    COMPRESSED_INDEX_MAGIC_NUMBER (quint32).  The device is not closed.
+    While recording, the stream is a DataWriter target and is closed with
+    DataWriter.close(), so the last chunks are compressed on the writer
+    thread.
+    """
+
+    def __init__(self, device, bytesPerBlock, numAmplifierChannels, codec=constants.CompressionZlib,
+                 blocksPerChunk=constants.COMPRESSED_BLOCKS_PER_CHUNK, numWorkers=None):
+        DataStream.__init__(self, device)
+        self.file = device
+        self.bytesPerBlock = bytesPerBlock
+        self.numAmplifierChannels = numAmplifierChannels
+        self.codec = codec
+        self.blocksPerChunk = blocksPerChunk
+        self.numWorkers = numWorkers or min(4, os.cpu_count() or 1)
+
+        self.buffer = bytearray()
+        self.pending = collections.deque()
+        self.chunkIndex = []
+        self.executor = None
+
+    # Start the data block records (after the header).
+    def beginData(self):
+        self.device = self
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.numWorkers, thread_name_prefix="Compressor")
+
+    # Collects data block records written by the DataStream methods after
+    # beginData(), and queues every complete chunk for compression.
+    def write(self, data):
+        self.buffer += data
+        chunkSize = self.blocksPerChunk * self.bytesPerBlock
+        if len(self.buffer) >= chunkSize:
+            numChunks = len(self.buffer) // chunkSize
+            for chunk in range(numChunks):
+                self.compress(bytes(self.buffer[chunk * chunkSize:(chunk + 1) * chunkSize]))
+            del self.buffer[:numChunks * chunkSize]
+
+    # Queue data (complete records) for compression, and write the chunks that
+    # are done.  Waits for the oldest chunk if too many are queued.
+    def compress(self, data):
+        future = self.executor.submit(compressChunk, data, self.bytesPerBlock,
+                                      self.numAmplifierChannels, self.codec)
+        self.pending.append((future, len(data) // self.bytesPerBlock))
+        while self.pending and (self.pending[0][0].done() or len(self.pending) > 2 * self.numWorkers):
+            self.writeChunk()
+
+    # Write the oldest compressed chunk to the file.
+    def writeChunk(self):
+        future, numBlocks = self.pending.popleft()
+        payload = future.result()
+        self.chunkIndex.append((self.file.tell(), numBlocks, len(payload)))
+        self.file.write(struct.pack("<II", numBlocks, len(payload)))
+        self.file.write(payload)
+
+    # Compress and write all remaining data, and write the chunk index.
+    def close(self):
+        if self.executor is None:
+            return
+        try:
+            numBlocks = len(self.buffer) // self.bytesPerBlock
+            if numBlocks > 0:
+                self.compress(bytes(self.buffer[:numBlocks * self.bytesPerBlock]))
+            self.buffer.clear()
+            while self.pending:
+                self.writeChunk()
+        finally:
+            self.executor.shutdown()
+            self.executor = None
+
+        self.file.write(np.array(self.chunkIndex, dtype=chunkIndexDtype).tobytes())
+        self.file.write(struct.pack("<II", len(self.chunkIndex), constants.COMPRESSED_INDEX_MAGIC_NUMBER))
+
+
+# Open a compressed format data file for writing.  Returns the file and its
+# CompressedStream (see CompressedStream for the other arguments).
+def openCompressedStream(fileName, bytesPerBlock, numAmplifierChannels, codec=constants.CompressionZlib,
+                         numWorkers=None):
+    try:
+        device = open(fileName, "wb")
+    except OSError as e:
+        print("Cannot open file for writing: " + str(e.strerror) + "\n")
+        raise
+    return device, CompressedStream(device, bytesPerBlock, numAmplifierChannels, codec,
+                                    numWorkers=numWorkers)
+
+
+class CompressedBlocks():
+    """ This class gives the data block records of a CompressedFile the
+    interface of its blocks array used by SampleArray: blocks[field]
+    [start:stop] decompresses only the chunks holding blocks [start,
+    stop) and returns the field of these blocks.  The last chunk read is
+    kept, so that reading consecutive ranges decompresses every chunk once.
+    """
+
+    def __init__(self, compressedFile):
+        self.compressedFile = compressedFile
+        self.dtype = compressedFile.blockDtype
+        self.cachedChunk = None
+        self.cachedRecords = None
+
+    def __len__(self):
+        return self.compressedFile.numBlocks
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return CompressedField(self, key)
+        return self.readBlocks(key)
+
+    # Returns the records of the blocks selected by key (a slice with step 1)
+    # as an array of blockDtype.
+    def readBlocks(self, key):
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise IndexError("Only contiguous ranges of blocks can be read")
+        stop = max(start, stop)
+
+        compressedFile = self.compressedFile
+        blocksPerChunk = compressedFile.blocksPerChunk
+        records = []
+        for chunk in range(start // blocksPerChunk, -(-stop // blocksPerChunk)):
+            chunkStart = chunk * blocksPerChunk
+            records.append(self.readChunk(chunk)[max(start - chunkStart, 0):stop - chunkStart])
+        if not records:
+            return np.zeros(0, dtype=self.dtype)
+        return np.concatenate(records).view(self.dtype)[:, 0]
+
+    # Returns the [block][byte] records of chunk.
+    def readChunk(self, chunk):
+        if self.cachedChunk != chunk:
+            compressedFile = self.compressedFile
+            entry = compressedFile.chunkIndex[chunk]
+            with open(compressedFile.fileName, "rb") as f:
+                f.seek(int(entry["offset"]) + 8)
+                payload = f.read(int(entry["compressedSize"]))
+            self.cachedRecords = decompressChunk(payload, int(entry["numBlocks"]), compressedFile.bytesPerBlock,
+                                                 len(compressedFile.amplifierChannels), compressedFile.codec)
+            self.cachedChunk = chunk
+        return self.cachedRecords
+
+
+class CompressedField():
+    """ This class is one field of CompressedBlocks (blocks[field]). """
+
+    def __init__(self, blocks, field):
+        self.blocks = blocks
+        self.field = field
+
+    def __getitem__(self, key):
+        return self.blocks.readBlocks(key)[self.field]
+
+
+class CompressedFile(RhdFile):
+    """ This class reads a compressed format data file (.rhc) like an
+    RhdFile, with the same signals and channels, decompressing only the
+    chunks holding the requested samples:
+        file = CompressedFile("rec.rhc")
+        file.amplifierData[3, 20000:220000]    10 s of amplifier channel 3
+
+    The chunks are found with the chunk index at the end of the file.  If
+    the file was not closed (e.g., recording was interrupted), there is no
+    index and the chunk headers are read instead, up to the last complete
+    chunk.
+    """
+
+    def __init__(self, fileName):
+        SaveFileReader.__init__(self, fileName, constants.SaveFormatCompressed)
+        self.fileName = fileName
+        self.codec = self.header.codec
+        self.blocksPerChunk = self.header.blocksPerChunk
+        if self.codec not in CODECS:
+            raise ValueError("Unsupported compression codec: " + str(self.codec))
+
+        self.blockDtype = self.dataBlockDtype()
+        self.bytesPerBlock = self.blockDtype.itemsize
+        self.chunkIndex = self.readChunkIndex()
+        self.numBlocks = int(self.chunkIndex["numBlocks"].sum())
+        self.numSamples = self.numBlocks * constants.SAMPLES_PER_DATA_BLOCK
+
+        self.blocks = CompressedBlocks(self)
+        self.createSampleArrays()
+
+    # Returns the chunk index (an array of chunkIndexDtype), from the end of the
+    # file or from the chunk headers.
+    def readChunkIndex(self):
+        fileSize = os.path.getsize(self.fileName)
+        with open(self.fileName, "rb") as f:
+            if fileSize >= self.headerSize + 8:
+                f.seek(fileSize - 8)
+                numChunks, magicNumber = struct.unpack("<II", f.read(8))
+                indexOffset = fileSize - 8 - numChunks * chunkIndexDtype.itemsize
+                if magicNumber == constants.COMPRESSED_INDEX_MAGIC_NUMBER and indexOffset >= self.headerSize:
+                    f.seek(indexOffset)
+                    return np.frombuffer(f.read(numChunks * chunkIndexDtype.itemsize), dtype=chunkIndexDtype)
+
+            chunkIndex = []
+            offset = self.headerSize
+            while offset + 8 <= fileSize:
+                f.seek(offset)
+                numBlocks, compressedSize = struct.unpack("<II", f.read(8))
+                if offset + 8 + compressedSize > fileSize:
+                    break
+                chunkIndex.append((offset, numBlocks, compressedSize))
+                offset += 8 + compressedSize
+            return np.array(chunkIndex, dtype=chunkIndexDtype)
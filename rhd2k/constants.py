@@ -17,6 +17,16 @@ DATA_FILE_MAGIC_NUMBER = 0xc6912702
 DATA_FILE_MAIN_VERSION_NUMBER = 1
 DATA_FILE_SECONDARY_VERSION_NUMBER = 5
 
+# Raw USB data file constants
+RAW_FILE_MAGIC_NUMBER = 0xc6912772
+RAW_FILE_VERSION_NUMBER = 1
+
+# Compressed data file constants
+COMPRESSED_FILE_MAGIC_NUMBER = 0xc6912773
+COMPRESSED_FILE_VERSION_NUMBER = 1
+COMPRESSED_INDEX_MAGIC_NUMBER = 0xc6912774
+COMPRESSED_BLOCKS_PER_CHUNK = 500
+
 # Saved settings file constants
 SETTINGS_FILE_MAGIC_NUMBER = 0x45ab12cd
 SETTINGS_FILE_MAIN_VERSION_NUMBER = 1
@@ -41,6 +51,12 @@ BoardDigOutSignal = 5
 SaveFormatIntan = 0
 SaveFormatFilePerSignalType = 1
 SaveFormatFilePerChannel = 2
+SaveFormatRaw = 3
+SaveFormatCompressed = 4
+
+# enum Compression
+CompressionZlib = 0
+CompressionLzma = 1
 
 CHIP_ID_RHD2132 = 1
 CHIP_ID_RHD2216 = 2
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import sys
+
+import constants
+from acquisitionengine import AcquisitionEngine, SAMPLE_RATES, sampleRateIndex
+from datastream import DataStream
+from usbdecoder import UsbDataBlocks, openUsbDataFile
+
+# Formats that raw data files can be converted to.
+CONVERT_FORMATS = {
+    "intan": constants.SaveFormatIntan,
+    "signaltype": constants.SaveFormatFilePerSignalType,
+    "channel": constants.SaveFormatFilePerChannel,
+}
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Convert raw USB data files recorded with acquire.py --format raw to another save file format.")
+    parser.add_argument("files", metavar="FILE", nargs="+",
+                        help="raw data file (.raw)")
+    parser.add_argument("--format", choices=sorted(CONVERT_FORMATS), default="intan",
+                        help="save file format (default: intan)")
+    parser.add_argument("--output-dir", metavar="DIR", default=None,
+                        help="directory for the converted files (default: next to each raw file)")
+    parser.add_argument("--ignore-bad-headers", action="store_true",
+                        help="convert data blocks with an incorrect header instead of stopping")
+    return parser.parse_args(argv)
+
+
+# Convert the raw data file fileName to saveFormat.  The converted file (or
+# directory) has the name of the raw file, in outputDir if given.  The data is
+# saved exactly as AcquisitionEngine would have saved it while recording,
+# with the settings, channel names and trigger point saved in the raw file
+# header.  Returns the AcquisitionEngine used, with the converted file name in
+# saveFileName and the number of data bytes written in totalBytesWritten.
+def convertRawFile(fileName, saveFormat, outputDir=None, checkHeaders=True):
+    engine = AcquisitionEngine()
+    signalProcessor = engine.signalProcessor
+    try:
+        with open(fileName, "rb") as rawFile:
+            try:
+                timestampOffset = engine.readSaveFileHeader(
+                    DataStream(rawFile), constants.SaveFormatRaw)
+            except EOFError:
+                raise ValueError("Incomplete raw data file header")
+            headerSize = rawFile.tell()
+
+        numDataStreams = signalProcessor.numDataStreams
+        if os.path.getsize(fileName) > headerSize:
+            usbDataBlocks = openUsbDataFile(
+                fileName, numDataStreams, headerSize, checkHeaders)
+        else:
+            usbDataBlocks = UsbDataBlocks(b"", numDataStreams)
+
+        # Average temperature sensor readings over the same interval as
+        # AcquisitionEngine.runInterfaceBoard().
+        numUsbBlocksToRead = SAMPLE_RATES[sampleRateIndex(engine.boardSampleRate)][2]
+        signalProcessor.tempHistoryReset(numUsbBlocksToRead * 3)
+
+        # Channels that were saved (including a trigger channel) are enabled
+        # in the header.
+        signalProcessor.createSaveList(engine.signalSources, False, ())
+
+        if outputDir is None:
+            outputDir = os.path.dirname(fileName)
+        engine.saveBaseFileName = os.path.join(
+            outputDir, os.path.basename(fileName))
+        engine.saveFormat = saveFormat
+
+        engine.startNewSaveFile(saveFormat, addDateTime=False)
+        try:
+            engine.writeSaveFileHeader(engine.saveStream, engine.infoStream,
+                                       saveFormat, signalProcessor.getNumTempSensors())
+            engine.totalBytesWritten = signalProcessor.saveUsbDataBlocks(
+                usbDataBlocks, engine.saveStream, saveFormat, engine.saveTemp,
+                engine.saveTtlOut, timestampOffset)
+        finally:
+            engine.closeSaveFile(saveFormat)
+    finally:
+        signalProcessor.dataWriter.stop()
+    return engine
+
+
+def main(argv=None):
+    """Convert raw data files"""
+    args = parseArguments(sys.argv[1:] if argv is None else argv)
+
+    status = 0
+    for fileName in args.files:
+        try:
+            engine = convertRawFile(fileName, CONVERT_FORMATS[args.format],
+                                    args.output_dir, not args.ignore_bad_headers)
+        except (IOError, ValueError) as e:
+            print(fileName + ": " + str(e))
+            status = 1
+            continue
+
+        numDataStreams = engine.signalProcessor.numDataStreams
+        print(fileName + ": " + str(numDataStreams) + " data streams (chip IDs " +
+              ", ".join(str(chipId) for chipId in engine.chipId[:numDataStreams]) + ") at " +
+              str(engine.boardSampleRate) + " S/s -> " + engine.saveFileName + " (" +
+              str(engine.totalBytesWritten) + " bytes)")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
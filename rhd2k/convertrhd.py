@@ -0,0 +1,323 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+import constants
+from acquisitionengine import AcquisitionEngine
+from datablockbatch import DataBlockBatch
+from datablockencoder import DataBlockEncoder
+from datastream import DataStream
+from rhdfile import RhdFile
+
+# Formats that Intan format files can be converted to.
+CONVERT_FORMATS = {
+    "signaltype": constants.SaveFormatFilePerSignalType,
+    "channel": constants.SaveFormatFilePerChannel,
+}
+
+# Data files of the "One File Per Signal Type" and "One File Per Channel"
+# formats (as named by DataBlockEncoder) and the RhdFile save lists of their
+# channels.
+SIGNAL_SAVE_LISTS = [
+    ("amplifier", "amplifierChannels"),
+    ("auxiliary", "auxInputChannels"),
+    ("supply", "supplyVoltageChannels"),
+    ("analogin", "boardAdcChannels"),
+    ("digitalin", "boardDigInChannels"),
+    ("digitalout", "boardDigOutChannels"),
+]
+
+# Number of data blocks each worker converts at a time.  Together with the
+# number of workers, this bounds the memory used by a conversion.
+BLOCKS_PER_BATCH = 256
+
+# Number of data blocks of each "One File Per Signal Type" conversion task.
+BLOCKS_PER_TASK = 16 * BLOCKS_PER_BATCH
+
+
+class ConvertTask():
+    """ This class describes one part of the conversion of an Intan format
+    file, which is run on a worker process: data blocks [startBlock,
+    stopBlock) of the channels listed in channels (a dictionary that maps
+    each data file name of SIGNAL_SAVE_LISTS to indices in the RhdFile save
+    list) are encoded in saveFormat with the DataBlockEncoder used while
+    recording, and written to the files in fileNames (a dictionary that
+    maps "time" and each data file name to a file name, or to a list of
+    file names, one per channel, in the "One File Per Channel" format).
+
+    The data files, already created by the main process, are written from
+    the byte offset of startBlock, so that tasks covering different blocks
+    of the same files can run in parallel.
+    """
+
+    def __init__(self, fileName, saveFormat, startBlock, stopBlock, channels, fileNames):
+        self.fileName = fileName
+        self.saveFormat = saveFormat
+        self.startBlock = startBlock
+        self.stopBlock = stopBlock
+        self.channels = channels
+        self.fileNames = fileNames
+
+    # Convert the data blocks.  Returns the number of bytes written.
+    def run(self):
+        rhdFile = RhdFile(self.fileName)
+        saveLists = {name: [getattr(rhdFile, listName)[index] for index in self.channels.get(name, [])]
+                     for name, listName in SIGNAL_SAVE_LISTS}
+        saveTtlOut = len(saveLists["digitalout"]) > 0
+        encoder = DataBlockEncoder(saveLists["amplifier"], saveLists["auxiliary"], saveLists["supply"], [],
+                                   saveLists["analogin"], saveLists["digitalin"], saveLists["digitalout"])
+
+        # Channels are staged at their place in the data streams read from
+        # the board, so the batch needs every stream of the saved channels.
+        numStreams = 1 + max([channel.boardStream for channel in rhdFile.amplifierChannels +
+                              rhdFile.auxInputChannels + rhdFile.supplyVoltageChannels] + [0])
+        batch = DataBlockBatch(numStreams, BLOCKS_PER_BATCH)
+
+        files = {}
+        openFiles = []
+        bytesWritten = 0
+        try:
+            for name, fileName in self.fileNames.items():
+                if isinstance(fileName, list):
+                    files[name] = [openDataFile(channelFileName) for channelFileName in fileName]
+                    openFiles += files[name]
+                elif fileName is not None:
+                    files[name] = openDataFile(fileName)
+                    openFiles.append(files[name])
+
+            for start in range(self.startBlock, self.stopBlock, BLOCKS_PER_BATCH):
+                stop = min(start + BLOCKS_PER_BATCH, self.stopBlock)
+                stageSavedBlocks(batch, rhdFile, self.channels, encoder, start, stop)
+
+                if self.saveFormat == constants.SaveFormatFilePerSignalType:
+                    encoded = encoder.encodeFilePerSignalType(batch, 0, batch.numBlocks, 0, saveTtlOut)
+                else:
+                    encoded = encoder.encodeFilePerChannel(batch, 0, batch.numBlocks, 0, saveTtlOut)
+
+                for name, data in encoded.items():
+                    if name not in files:
+                        continue
+                    if isinstance(files[name], list):
+                        for dataFile, channelData in zip(files[name], data):
+                            bytesWritten += writeBlocks(dataFile, channelData, start, batch.numBlocks)
+                    else:
+                        bytesWritten += writeBlocks(files[name], data, start, batch.numBlocks)
+        finally:
+            for dataFile in openFiles:
+                dataFile.close()
+        return bytesWritten
+
+
+# Runs a ConvertTask (on a worker process).
+def runTask(task):
+    return task.run()
+
+
+# Open an existing data file for writing at any position.
+def openDataFile(fileName):
+    return open(fileName, "r+b")
+
+
+# Write data, the encoded contents of numBlocks data blocks starting at block
+# start, at the position of block start in dataFile.  Returns the number of
+# bytes written.
+def writeBlocks(dataFile, data, start, numBlocks):
+    data = data.tobytes()
+    dataFile.seek(start * (len(data) // numBlocks))
+    dataFile.write(data)
+    return len(data)
+
+
+# Stage blocks [start, stop) of rhdFile in a DataBlockBatch, placing the saved
+# channels selected by channels (see ConvertTask) where they were in the data
+# blocks read from the board, so that encoder (built from the save lists of
+# these channels) encodes them exactly as it did while recording.  Words of
+# channels that were not saved are left as they are.
+def stageSavedBlocks(batch, rhdFile, channels, encoder, start, stop):
+    blocks = rhdFile.blocks[start:stop]
+    numBlocks = stop - start
+    batch.clear()
+
+    batch.timeStamp[:numBlocks] = blocks["timeStamp"]
+    if "amplifier" in channels:
+        batch.amplifierData[:numBlocks, encoder.amplifierStream, encoder.amplifierChannel] = \
+            blocks["amplifierData"][:, channels["amplifier"]]
+    if "auxiliary" in channels:
+        batch.auxiliaryData[:numBlocks, encoder.auxInputStream[:, None], 1, encoder.auxInputIndex] = \
+            blocks["auxInputData"][:, channels["auxiliary"]]
+    if "supply" in channels:
+        batch.auxiliaryData[:numBlocks, encoder.supplyStream, 1, 28] = \
+            blocks["supplyVoltageData"][:, channels["supply"]]
+    if "analogin" in channels:
+        batch.boardAdcData[:numBlocks, encoder.boardAdcChannel] = \
+            blocks["boardAdcData"][:, channels["analogin"]]
+    if "digitalin" in channels:
+        batch.ttlIn[:numBlocks] = blocks["boardDigInData"]
+    if "digitalout" in channels:
+        batch.ttlOut[:numBlocks] = blocks["boardDigOutData"]
+    batch.numBlocks = numBlocks
+
+
+# Create the converted file of the Intan format file fileName in saveFormat: a
+# directory named after the file (in outputDir if given) holding the info.rhd
+# header and the (empty) data files, created exactly as AcquisitionEngine
+# creates them while recording.  Returns the AcquisitionEngine used, with the
+# directory name in saveFileName and the data files in its SignalProcessor.
+def createConvertedFile(fileName, saveFormat, outputDir=None):
+    engine = AcquisitionEngine()
+    signalProcessor = engine.signalProcessor
+    try:
+        with open(fileName, "rb") as rhdFile:
+            try:
+                engine.readSaveFileHeader(DataStream(rhdFile), constants.SaveFormatIntan)
+            except EOFError:
+                raise ValueError("Incomplete data file header")
+
+        signalProcessor.createSaveList(engine.signalSources, False, ())
+
+        if outputDir is None:
+            outputDir = os.path.dirname(fileName)
+        engine.saveBaseFileName = os.path.join(outputDir, os.path.basename(fileName))
+        engine.saveFormat = saveFormat
+
+        engine.startNewSaveFile(saveFormat, addDateTime=False)
+        try:
+            engine.writeSaveFileHeader(engine.saveStream, engine.infoStream,
+                                       saveFormat, signalProcessor.getNumTempSensors())
+        finally:
+            engine.closeSaveFile(saveFormat)
+
+        # A recording opens the files of the digital outputs, which are enabled
+        # until writeSaveFileHeader() applies saveTtlOut, so they are left empty
+        # when the outputs are not saved.
+        if saveFormat == constants.SaveFormatFilePerChannel and not engine.saveTtlOut:
+            for channel in engine.signalSources.signalPort[6].channel:
+                open(os.path.join(engine.saveFileName, "board-" + channel.nativeChannelName + ".dat"), "wb").close()
+    finally:
+        signalProcessor.dataWriter.stop()
+    return engine
+
+
+# Returns the ConvertTasks converting the Intan format file fileName to the
+# files created by createConvertedFile() (engine).  The "One File Per Signal
+# Type" format interleaves all channels of each signal type in one file, so
+# its tasks convert all channels of BLOCKS_PER_TASK data blocks each; in the
+# "One File Per Channel" format, each task converts all data blocks of
+# channelsPerTask channels (the first also writes the timestamps).
+def createTasks(fileName, saveFormat, engine, channelsPerTask):
+    rhdFile = RhdFile(fileName)
+    signalProcessor = engine.signalProcessor
+    tasks = []
+    if rhdFile.numBlocks == 0:
+        return tasks
+
+    if saveFormat == constants.SaveFormatFilePerSignalType:
+        fileNames = {"time": signalProcessor.timestampFileName,
+                     "amplifier": signalProcessor.amplifierFileName,
+                     "auxiliary": signalProcessor.auxInputFileName,
+                     "supply": signalProcessor.supplyFileName,
+                     "analogin": signalProcessor.adcInputFileName,
+                     "digitalin": signalProcessor.digitalInputFileName,
+                     "digitalout": signalProcessor.digitalOutputFileName}
+        channels = {name: list(range(len(getattr(rhdFile, listName))))
+                    for name, listName in SIGNAL_SAVE_LISTS if getattr(rhdFile, listName)}
+        fileNames = {name: fileNames[name] for name in ["time"] + list(channels)}
+        for start in range(0, rhdFile.numBlocks, BLOCKS_PER_TASK):
+            tasks.append(ConvertTask(fileName, saveFormat, start,
+                                     min(start + BLOCKS_PER_TASK, rhdFile.numBlocks), channels, fileNames))
+        return tasks
+
+    saveLists = {"amplifier": signalProcessor.saveListAmplifier,
+                 "auxiliary": signalProcessor.saveListAuxInput,
+                 "supply": signalProcessor.saveListSupplyVoltage,
+                 "analogin": signalProcessor.saveListBoardAdc,
+                 "digitalin": signalProcessor.saveListBoardDigitalIn,
+                 "digitalout": signalProcessor.saveListBoardDigitalOut}
+    allChannels = []
+    for name, listName in SIGNAL_SAVE_LISTS:
+        if len(saveLists[name]) != len(getattr(rhdFile, listName)):
+            raise ValueError("Save list of " + name + " channels does not match the data file")
+        allChannels += [(name, index) for index in range(len(saveLists[name]))]
+
+    for first in range(0, len(allChannels), channelsPerTask):
+        channels = {}
+        fileNames = {"time": signalProcessor.timestampFileName if first == 0 else None}
+        for name, index in allChannels[first:first + channelsPerTask]:
+            channels.setdefault(name, []).append(index)
+            fileNames.setdefault(name, []).append(saveLists[name][index].saveFileName)
+        tasks.append(ConvertTask(fileName, saveFormat, 0, rhdFile.numBlocks, channels, fileNames))
+    return tasks
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Convert Intan format data files (.rhd) to the One File Per Signal Type or One File Per Channel format.")
+    parser.add_argument("files", metavar="FILE", nargs="+",
+                        help="Intan format data file (.rhd)")
+    parser.add_argument("--format", choices=sorted(CONVERT_FORMATS), default="channel",
+                        help="save file format (default: channel)")
+    parser.add_argument("--output-dir", metavar="DIR", default=None,
+                        help="directory for the converted files (default: next to each data file)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--channels-per-task", type=int, default=32,
+                        help="channels converted by each task in the channel format (default: 32)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Convert Intan format data files in parallel"""
+    args = parseArguments(sys.argv[1:] if argv is None else argv)
+    if args.jobs < 1 or args.channels_per_task < 1:
+        print("--jobs and --channels-per-task must be at least 1")
+        return 2
+    saveFormat = CONVERT_FORMATS[args.format]
+
+    status = 0
+    startTime = time.perf_counter()
+    totalBytesRead = 0
+    totalSeconds = 0.0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        # Queue the tasks of all files, then report each file as its tasks finish.
+        conversions = []
+        for fileName in args.files:
+            try:
+                engine = createConvertedFile(fileName, saveFormat, args.output_dir)
+                tasks = createTasks(fileName, saveFormat, engine, args.channels_per_task)
+                rhdFile = RhdFile(fileName)
+            except (IOError, ValueError) as e:
+                print(fileName + ": " + str(e))
+                status = 1
+                continue
+            conversions.append((fileName, engine, rhdFile,
+                                [executor.submit(runTask, task) for task in tasks]))
+
+        for fileName, engine, rhdFile, futures in conversions:
+            try:
+                bytesWritten = sum(future.result() for future in futures)
+            except (IOError, ValueError) as e:
+                print(fileName + ": " + str(e))
+                status = 1
+                continue
+
+            bytesRead = rhdFile.numBlocks * rhdFile.bytesPerBlock
+            seconds = rhdFile.numSamples / rhdFile.sampleRate
+            totalBytesRead += bytesRead
+            totalSeconds += seconds
+            print(fileName + ": " + str(rhdFile.numBlocks) + " data blocks (%.1f s) -> " % seconds +
+                  engine.saveFileName + " (" + str(bytesWritten) + " bytes)")
+
+    elapsed = time.perf_counter() - startTime
+    print("Converted %.1f MB (%.1f s of data) in %.2f s: %.1f MB/s, %.1fx real time" % (
+        totalBytesRead / 1e6, totalSeconds, elapsed, totalBytesRead / 1e6 / elapsed,
+        totalSeconds / elapsed))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import constants
+
+
+class DataBlockBatch():
+    """ This class holds a contiguous copy of the raw contents of several
+    Rhd2000DataBlock objects, typically all the blocks returned by a single
+    call to readDataBlocks().  Staging the raw words here lets the signal
+    processor scale every stream, channel and block of a read with a few
+    array operations instead of indexing each sample through ctypes.
+
+    Every array is indexed by block first and then follows the layout of
+    the corresponding Rhd2000DataBlock array:
+        timeStamp      [block][t]
+        amplifierData  [block][stream][channel 0-31][t]
+        auxiliaryData  [block][stream][channel 0-2][t]
+        boardAdcData   [block][channel 0-7][t]
+        ttlIn, ttlOut  [block][t]
+    """
+
+    def __init__(self, numStreams, maxNumBlocks):
+        self.numStreams = numStreams
+        self.maxNumBlocks = maxNumBlocks
+        self.numBlocks = 0
+
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        self.timeStamp = np.zeros((maxNumBlocks, samples), dtype=np.uint32)
+        self.amplifierData = np.zeros(
+            (maxNumBlocks, numStreams, 32, samples), dtype=np.int32)
+        self.auxiliaryData = np.zeros(
+            (maxNumBlocks, numStreams, 3, samples), dtype=np.int32)
+        self.boardAdcData = np.zeros((maxNumBlocks, 8, samples), dtype=np.int32)
+        self.ttlIn = np.zeros((maxNumBlocks, samples), dtype=np.int32)
+        self.ttlOut = np.zeros((maxNumBlocks, samples), dtype=np.int32)
+
+    # Forget all staged blocks (memory is kept for reuse).
+    def clear(self):
+        self.numBlocks = 0
+
+    # Copy the contents of dataBlock into the next free slot of the batch.
+    def append(self, dataBlock):
+        if self.numBlocks >= self.maxNumBlocks:
+            raise IndexError("DataBlockBatch is full (" +
+                             str(self.maxNumBlocks) + " blocks)")
+
+        block = self.numBlocks
+        self.timeStamp[block] = dataBlock.timeStamp
+        self.amplifierData[block] = dataBlock.amplifierData
+        self.auxiliaryData[block] = dataBlock.auxiliaryData
+        self.boardAdcData[block] = dataBlock.boardAdcData
+        self.ttlIn[block] = dataBlock.ttlIn
+        self.ttlOut[block] = dataBlock.ttlOut
+        self.numBlocks += 1
+
+    # Copy blocks [start, stop) of a UsbDataBlocks (raw USB data decoded with
+    # NumPy) into the next free slots of the batch.
+    def appendUsbDataBlocks(self, usbDataBlocks, start=0, stop=None):
+        if stop is None:
+            stop = usbDataBlocks.numBlocks
+        if usbDataBlocks.numDataStreams != self.numStreams:
+            raise ValueError("Data blocks have " + str(usbDataBlocks.numDataStreams) +
+                             " data streams, not " + str(self.numStreams))
+        first = self.numBlocks
+        last = first + stop - start
+        if last > self.maxNumBlocks:
+            raise IndexError("DataBlockBatch is full (" +
+                             str(self.maxNumBlocks) + " blocks)")
+
+        self.timeStamp[first:last] = usbDataBlocks.timeStamp[start:stop]
+        self.amplifierData[first:last] = usbDataBlocks.amplifierData[start:stop]
+        self.auxiliaryData[first:last] = usbDataBlocks.auxiliaryData[start:stop]
+        self.boardAdcData[first:last] = usbDataBlocks.boardAdcData[start:stop]
+        self.ttlIn[first:last] = usbDataBlocks.ttlIn[start:stop]
+        self.ttlOut[first:last] = usbDataBlocks.ttlOut[start:stop]
+        self.numBlocks = last
+
+
+class DataBlockRing():
+    """ This class keeps the raw contents of the last capacity data blocks,
+    e.g., the data acquired before a trigger, in a DataBlockBatch used as a
+    ring buffer: appending a read overwrites its oldest blocks in place
+    with a few array copies, so nothing is allocated or popped while
+    waiting for a trigger.  The averaged temperature of each stream is
+    kept with every block, as it was when the block was loaded.
+
+    The blocks are stored in batch, oldest first from the slots returned
+    by segments(): at most two ranges of consecutive slots, each of which
+    can be encoded directly with SignalProcessor.writeDataBlockBatch().
+    """
+
+    def __init__(self, numStreams, capacity):
+        self.capacity = capacity
+        self.batch = DataBlockBatch(numStreams, capacity)
+        self.batch.numBlocks = capacity
+        self.blockTempAvg = np.zeros((capacity, numStreams))
+        self.clear()
+
+    def __len__(self):
+        return self.numBlocks
+
+    # Forget all blocks (memory is kept for reuse).
+    def clear(self):
+        self.start = 0
+        self.numBlocks = 0
+
+    # Append blocks [start, stop) of batch and their averaged temperatures
+    # blockTempAvg[start:stop], dropping the oldest blocks if the ring is full.
+    def append(self, batch, start, stop, blockTempAvg):
+        if self.capacity == 0:
+            return
+        # Only the newest blocks fit.
+        start = max(start, stop - self.capacity)
+        numBlocks = stop - start
+
+        end = (self.start + self.numBlocks) % self.capacity
+        first = min(numBlocks, self.capacity - end)
+        for slot, source, count in ((end, start, first), (0, start + first, numBlocks - first)):
+            if count == 0:
+                continue
+            slots = slice(slot, slot + count)
+            blocks = slice(source, source + count)
+            self.batch.timeStamp[slots] = batch.timeStamp[blocks]
+            self.batch.amplifierData[slots] = batch.amplifierData[blocks]
+            self.batch.auxiliaryData[slots] = batch.auxiliaryData[blocks]
+            self.batch.boardAdcData[slots] = batch.boardAdcData[blocks]
+            self.batch.ttlIn[slots] = batch.ttlIn[blocks]
+            self.batch.ttlOut[slots] = batch.ttlOut[blocks]
+            self.blockTempAvg[slots] = blockTempAvg[blocks]
+
+        overflow = max(0, self.numBlocks + numBlocks - self.capacity)
+        self.start = (self.start + overflow) % self.capacity
+        self.numBlocks += numBlocks - overflow
+
+    # Returns the (start, stop) slot ranges of batch that hold the blocks, oldest
+    # first.
+    def segments(self):
+        end = self.start + self.numBlocks
+        if end <= self.capacity:
+            return [(self.start, end)] if self.numBlocks > 0 else []
+        return [(self.start, self.capacity), (0, end - self.capacity)]
@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import constants
+from usbdecoder import RHD2000_HEADER_MAGIC_NUMBER, usbSampleDtype
+
+
+class DataBlockEncoder():
+    """ This class converts the raw contents of data blocks staged in a
+    DataBlockBatch into the little-endian byte layout of the Intan save
+    file formats.  Each block record is assembled in one contiguous buffer
+    with vectorized dtype conversions, so it can be sent to disk with a
+    single write.
+
+    The encoder is built from the save lists created by
+    SignalProcessor.createSaveList() and must be rebuilt whenever those
+    lists change.
+    """
+
+    def __init__(self, saveListAmplifier, saveListAuxInput, saveListSupplyVoltage, saveListTempSensor, saveListBoardAdc, saveListBoardDigitalIn, saveListBoardDigitalOut):
+        self.amplifierStream = channelIndex(saveListAmplifier, "boardStream")
+        self.amplifierChannel = channelIndex(saveListAmplifier, "chipChannel")
+        self.auxInputStream = channelIndex(saveListAuxInput, "boardStream")
+        self.auxInputChannel = channelIndex(saveListAuxInput, "chipChannel")
+        self.supplyStream = channelIndex(saveListSupplyVoltage, "boardStream")
+        self.tempSensorStream = channelIndex(saveListTempSensor, "boardStream")
+        self.boardAdcChannel = channelIndex(
+            saveListBoardAdc, "nativeChannelNumber")
+        self.boardDigInChannel = channelIndex(
+            saveListBoardDigitalIn, "nativeChannelNumber")
+        self.boardDigOutChannel = channelIndex(
+            saveListBoardDigitalOut, "nativeChannelNumber")
+
+        # In the Intan and "One File Per Signal Type" formats, if ANY digital
+        # inputs are enabled, we save ALL 16 channels, since we are writing
+        # 16-bit chunks of data.
+        self.saveBoardDigIn = len(self.boardDigInChannel) > 0
+
+        # Auxiliary inputs are sampled at 1/4 amplifier sampling rate: every
+        # fourth sample of auxiliary command slot 1 is followed by one sample
+        # from each of the three auxiliary inputs.  auxInputIndex picks the
+        # samples of each saved auxiliary input within a block, and
+        # auxInputHoldIndex repeats each of them four times.
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        self.auxInputIndex = np.arange(0, samples, 4)[None, :] + \
+            self.auxInputChannel[:, None] + 1
+        self.auxInputHoldIndex = 4 * (np.arange(samples) // 4)[None, :] + \
+            self.auxInputChannel[:, None] + 1
+
+    # Returns the number of bytes of one data block record in the Intan format.
+    def intanBytesPerBlock(self, saveTemp, saveTtlOut):
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        numWords = 2 * samples  # timestamps
+        numWords += samples * len(self.amplifierChannel)
+        numWords += (samples // 4) * len(self.auxInputChannel)
+        numWords += len(self.supplyStream)
+        if saveTemp:
+            numWords += len(self.tempSensorStream)
+        numWords += samples * len(self.boardAdcChannel)
+        if self.saveBoardDigIn:
+            numWords += samples
+        if saveTtlOut:
+            numWords += samples
+        return 2 * numWords
+
+    # Encodes blocks [start, stop) of a DataBlockBatch in the Intan format and
+    # returns them as a [block][byte] uint8 array.  tempAvg holds the averaged
+    # temperature of each stream in degrees C, either one value per stream or
+    # one row per block.  timestampOffset is subtracted from all timestamps.
+    def encodeIntan(self, batch, start, stop, tempAvg, timestampOffset, saveTemp, saveTtlOut):
+        numBlocks = stop - start
+        record = np.empty(
+            (numBlocks, self.intanBytesPerBlock(saveTemp, saveTtlOut)), dtype=np.uint8)
+
+        # Save timestamp data (qint32)
+        offset = putWords(record, 0, batch.timeStamp[start:stop].astype(np.int64) -
+                          timestampOffset, "<i4")
+
+        # Save amplifier data (quint16)
+        offset = putWords(record, offset, batch.amplifierData[start:stop, self.amplifierStream,
+                                                              self.amplifierChannel], "<u2")
+
+        # Save auxiliary input data (quint16)
+        auxiliary_ = batch.auxiliaryData[start:stop, self.auxInputStream, 1]
+        offset = putWords(record, offset, np.take_along_axis(
+            auxiliary_, self.auxInputIndex[None], axis=2), "<u2")
+
+        # Save supply voltage data (quint16)
+        offset = putWords(record, offset, batch.auxiliaryData[start:stop, self.supplyStream, 1, 28],
+                          "<u2")
+
+        # Save temperature sensor data if saveTemp == True
+        # Save as temperature in degrees C, multiplied by 100 and truncated to a
+        # signed integer (qint16).
+        if saveTemp:
+            tempAvg_ = np.broadcast_to(np.asarray(tempAvg, dtype=np.float64),
+                                       (numBlocks, batch.numStreams))
+            offset = putWords(record, offset, 100.0 *
+                              tempAvg_[:, self.tempSensorStream], "<i2")
+
+        # Save board ADC data (quint16)
+        offset = putWords(record, offset, batch.boardAdcData[start:stop, self.boardAdcChannel],
+                          "<u2")
+
+        # Save board digital input data (quint16)
+        if self.saveBoardDigIn:
+            offset = putWords(record, offset, batch.ttlIn[start:stop], "<u2")
+
+        # Save board digital output data, if saveTtlOut = True (quint16)
+        if saveTtlOut:
+            offset = putWords(record, offset, batch.ttlOut[start:stop], "<u2")
+
+        return record
+
+    # Encodes blocks [start, stop) of a DataBlockBatch in the "One File Per Signal
+    # Type" format.  Returns a dictionary that maps each data file that receives
+    # data ("time", "amplifier", "auxiliary", "supply", "analogin", "digitalin",
+    # "digitalout") to its new contents as a uint8 array.  All files except
+    # time.dat are interleaved, with all saved channels for each sample.
+    def encodeFilePerSignalType(self, batch, start, stop, timestampOffset, saveTtlOut):
+        numBlocks = stop - start
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        files = {}
+
+        # Save timestamp data (qint32)
+        files["time"] = toBytes(batch.timeStamp[start:stop].astype(np.int64) -
+                                timestampOffset, "<i4")
+
+        # Save amplifier data (qint16, offset-binary ADC value minus 32768)
+        if len(self.amplifierChannel) > 0:
+            amplifier_ = batch.amplifierData[start:stop,
+                                             self.amplifierStream, self.amplifierChannel]
+            files["amplifier"] = toBytes(
+                amplifier_.transpose(0, 2, 1) - 32768, "<i2")
+
+        # Save auxiliary input data (quint16, each sample held for four samples)
+        if len(self.auxInputChannel) > 0:
+            auxiliary_ = np.take_along_axis(batch.auxiliaryData[start:stop, self.auxInputStream, 1],
+                                            self.auxInputHoldIndex[None], axis=2)
+            files["auxiliary"] = toBytes(
+                auxiliary_.transpose(0, 2, 1), "<u2")
+
+        # Save supply voltage data (quint16, each sample held for 60 samples)
+        if len(self.supplyStream) > 0:
+            supply_ = batch.auxiliaryData[start:stop, self.supplyStream, 1, 28]
+            files["supply"] = toBytes(np.broadcast_to(supply_[:, None, :],
+                                                      (numBlocks, samples, len(self.supplyStream))), "<u2")
+
+        # Not saving temperature data in this save format.
+
+        # Save board ADC data (quint16)
+        if len(self.boardAdcChannel) > 0:
+            boardAdc_ = batch.boardAdcData[start:stop, self.boardAdcChannel]
+            files["analogin"] = toBytes(boardAdc_.transpose(0, 2, 1), "<u2")
+
+        # Save board digital input data (quint16, all 16 channels)
+        if self.saveBoardDigIn:
+            files["digitalin"] = toBytes(batch.ttlIn[start:stop], "<u2")
+
+        # Save board digital output data, if saveTtlOut = True (quint16, all 16 channels)
+        if saveTtlOut:
+            files["digitalout"] = toBytes(batch.ttlOut[start:stop], "<u2")
+
+        return files
+
+    # Encodes blocks [start, stop) of a DataBlockBatch in the "One File Per Channel"
+    # format.  Returns a dictionary that maps "time" to the new contents of
+    # time.dat, and each signal type ("amplifier", "auxiliary", "supply",
+    # "analogin", "digitalin", "digitalout") to a [channel][t] array with the new
+    # samples of every saved channel of that type, in save list order.
+    def encodeFilePerChannel(self, batch, start, stop, timestampOffset, saveTtlOut):
+        numBlocks = stop - start
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        channels = {}
+
+        # Save timestamp data (qint32)
+        channels["time"] = toBytes(batch.timeStamp[start:stop].astype(np.int64) -
+                                   timestampOffset, "<i4")
+
+        # Save amplifier data (qint16, offset-binary ADC value minus 32768)
+        amplifier_ = batch.amplifierData[start:stop,
+                                         self.amplifierStream, self.amplifierChannel]
+        channels["amplifier"] = channelMajor(amplifier_ - 32768, "<i2")
+
+        # Save auxiliary input data (quint16).  Aux data is sampled at 1/4
+        # amplifier sampling rate, so each sample is written 4 times.
+        auxiliary_ = np.take_along_axis(batch.auxiliaryData[start:stop, self.auxInputStream, 1],
+                                        self.auxInputHoldIndex[None], axis=2)
+        channels["auxiliary"] = channelMajor(auxiliary_, "<u2")
+
+        # Save supply voltage data (quint16).  Vdd data is sampled at 1/60
+        # amplifier sampling rate, so each sample is written 60 times.
+        supply_ = batch.auxiliaryData[start:stop, self.supplyStream, 1, 28]
+        channels["supply"] = channelMajor(np.broadcast_to(supply_[:, :, None],
+                                                          (numBlocks, len(self.supplyStream), samples)), "<u2")
+
+        # Not saving temperature data in this save format.
+
+        # Save board ADC data (quint16)
+        channels["analogin"] = channelMajor(
+            batch.boardAdcData[start:stop, self.boardAdcChannel], "<u2")
+
+        # Save board digital input data (quint16, 0 or 1)
+        channels["digitalin"] = channelMajor(
+            unpackBits(batch.ttlIn[start:stop], self.boardDigInChannel), "<u2")
+
+        # Save board digital output data, if saveTtlOut = True (quint16, 0 or 1)
+        if saveTtlOut:
+            channels["digitalout"] = channelMajor(
+                unpackBits(batch.ttlOut[start:stop], self.boardDigOutChannel), "<u2")
+
+        return channels
+
+    # Encodes blocks [start, stop) of a DataBlockBatch back into the raw USB
+    # format read from the interface board (see UsbDataBlocks) and returns them
+    # as a flat uint8 array.  Used for the raw format, which stores every data
+    # stream and signal as read; filler words are written as zero.
+    def encodeRaw(self, batch, start, stop):
+        numBlocks = stop - start
+        samples = np.zeros((numBlocks, constants.SAMPLES_PER_DATA_BLOCK),
+                           dtype=usbSampleDtype(batch.numStreams))
+        samples["header"] = RHD2000_HEADER_MAGIC_NUMBER
+        samples["timeStamp"] = batch.timeStamp[start:stop]
+        samples["auxiliaryData"] = batch.auxiliaryData[start:stop].transpose(0, 3, 2, 1)
+        samples["amplifierData"] = batch.amplifierData[start:stop].transpose(0, 3, 2, 1)
+        samples["boardAdcData"] = batch.boardAdcData[start:stop].transpose(0, 2, 1)
+        samples["ttlIn"] = batch.ttlIn[start:stop]
+        samples["ttlOut"] = batch.ttlOut[start:stop]
+        return samples.reshape(-1).view(np.uint8)
+# Returns the given attribute of every channel in a save list as an index array.
+
+
+def channelIndex(saveList, attribute):
+    return np.array([getattr(channel, attribute) for channel in saveList], dtype=np.intp)
+
+# Stores values (indexed [block][...]) as consecutive little-endian words of the
+# given dtype in columns [offset, ...) of the [block][byte] array record, and
+# returns the offset just past them.  Values are converted like a C cast.
+
+
+def putWords(record, offset, values, dtype):
+    values = values.reshape(record.shape[0], -1)
+    size = values.shape[1] * np.dtype(dtype).itemsize
+    record[:, offset:offset + size].view(dtype)[...] = values
+    return offset + size
+
+# Returns values as consecutive little-endian words of the given dtype, viewed
+# as a flat uint8 array.  Values are converted like a C cast.
+
+
+def toBytes(values, dtype):
+    return np.ascontiguousarray(values).astype(dtype).reshape(-1).view(np.uint8)
+
+# Converts [block][channel][t] values into a [channel][block * t] array of
+# little-endian words of the given dtype.
+
+
+def channelMajor(values, dtype):
+    numBlocks, numChannels, samples = values.shape
+    return values.transpose(1, 0, 2).astype(dtype).reshape(numChannels, numBlocks * samples)
+
+# Expands [block][t] TTL words into [block][channel][t] bits for the given
+# channel numbers.
+
+
+def unpackBits(ttl, channels):
+    return (ttl[:, None, :] >> channels[None, :, None]) & 1
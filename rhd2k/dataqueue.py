@@ -2,7 +2,13 @@ import ctypes
 import platform
 import os
 
-from .rhd2000datablock import Rhd2000DataBlock
+import numpy as np
+
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from .rhd2000datablock import Rhd2000DataBlock
+except ImportError:
+    from rhd2000datablock import Rhd2000DataBlock
 
 libname = '/librhd2k.so'
 if platform.system() == 'Windows' or 'CYGWIN' in platform.system():
@@ -11,20 +17,61 @@ rhd2klib = ctypes.cdll.LoadLibrary(os.path.dirname(__file__) + libname)
 
 
 class DataQueue:
+    """ This class wraps a C++ Rhd2000DataQueue, a first-in, first-out queue
+    of data blocks that recycles its blocks: popped blocks are kept in a pool
+    and reused by later reads, so streaming data through the queue does not
+    allocate memory once it has reached its working size.
+
+    front() returns an Rhd2000DataBlock wrapper whose arrays are views into
+    the queued block.  Wrappers are cached per pooled block and reused, so
+    a block obtained from front() must not be used after the queue has been
+    popped: its memory will be refilled by a later read.
+
+    Whole reads are moved with frontBatch()/popBatch(), which copy several
+    blocks into a DataBlockBatch in a single native call, and discarded
+    with discard().
+    """
     rhd2klib.new_queue_data.restype = ctypes.c_void_p
-    rhd2klib.new_ofstream.argtypes = []
+    rhd2klib.new_queue_data.argtypes = []
     rhd2klib.queue_data_delete.restype = None
     rhd2klib.queue_data_delete.argtypes = [ctypes.c_void_p]
     rhd2klib.queue_data_size.restype = ctypes.c_uint
     rhd2klib.queue_data_size.argtypes = [ctypes.c_void_p]
+    rhd2klib.queue_data_empty.restype = ctypes.c_bool
+    rhd2klib.queue_data_empty.argtypes = [ctypes.c_void_p]
     rhd2klib.queue_data_front.restype = ctypes.c_void_p
     rhd2klib.queue_data_front.argtypes = [ctypes.c_void_p]
+    rhd2klib.queue_data_push.restype = None
+    rhd2klib.queue_data_push.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    rhd2klib.queue_data_push_from_usb_buffer.restype = None
+    rhd2klib.queue_data_push_from_usb_buffer.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_int]
     rhd2klib.queue_data_pop.restype = None
     rhd2klib.queue_data_pop.argtypes = [ctypes.c_void_p]
+    rhd2klib.queue_data_read_front.restype = ctypes.c_int
+    rhd2klib.queue_data_read_front.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int] + [ctypes.c_void_p] * 6
+    rhd2klib.queue_data_pop_front.restype = ctypes.c_int
+    rhd2klib.queue_data_pop_front.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int] + [ctypes.c_void_p] * 6
+    rhd2klib.queue_data_copy_front_to.restype = ctypes.c_int
+    rhd2klib.queue_data_copy_front_to.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p]
+    rhd2klib.queue_data_discard.restype = ctypes.c_int
+    rhd2klib.queue_data_discard.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    rhd2klib.queue_data_pool_size.restype = ctypes.c_uint
+    rhd2klib.queue_data_pool_size.argtypes = [ctypes.c_void_p]
+    rhd2klib.queue_data_num_allocated.restype = ctypes.c_uint
+    rhd2klib.queue_data_num_allocated.argtypes = [ctypes.c_void_p]
+    rhd2klib.queue_data_generation.restype = ctypes.POINTER(ctypes.c_uint)
+    rhd2klib.queue_data_generation.argtypes = [ctypes.c_void_p]
 
     def __init__(self):
         self._as_parameter_ = rhd2klib.new_queue_data()
         self.front_cache = None
+        # Wrappers of pooled blocks, keyed by block address.  The C++ queue
+        # increments its generation counter whenever it frees a block, which
+        # invalidates the cache.
+        self.blockCache = {}
+        self.generation = rhd2klib.queue_data_generation(self).contents
+        self.cacheGeneration = self.generation.value
 
     def __del__(self):
         rhd2klib.queue_data_delete(self)
@@ -32,11 +79,82 @@ class DataQueue:
     def __len__(self):
         return int(rhd2klib.queue_data_size(self))
 
+    def empty(self):
+        return bool(rhd2klib.queue_data_empty(self))
+
     def front(self):
         if self.front_cache is None:
-            self.front_cache = Rhd2000DataBlock(0, ptr=rhd2klib.queue_data_front(self))
+            if self.generation.value != self.cacheGeneration:
+                self.blockCache.clear()
+                self.cacheGeneration = self.generation.value
+            ptr = rhd2klib.queue_data_front(self)
+            block = self.blockCache.get(ptr)
+            if block is None:
+                block = Rhd2000DataBlock(0, ptr=ptr)
+                self.blockCache[ptr] = block
+            self.front_cache = block
         return self.front_cache
 
+    # Append a copy of dataBlock to the queue.
+    def push(self, dataBlock):
+        rhd2klib.queue_data_push(self, dataBlock)
+
+    # Decode numBlocks consecutive data blocks from a raw USB buffer (bytes,
+    # ctypes buffer or contiguous NumPy array in the interface board's USB
+    # format) and append them to the queue.
+    def pushFromUsbBuffer(self, usbBuffer, numBlocks, numDataStreams):
+        if isinstance(usbBuffer, np.ndarray):
+            usbBuffer = usbBuffer.ctypes.data
+        rhd2klib.queue_data_push_from_usb_buffer(self, usbBuffer, numBlocks, numDataStreams)
+
     def pop(self):
         rhd2klib.queue_data_pop(self)
         self.front_cache = None
+
+    # Copy the oldest numBlocks blocks (or all blocks, if fewer are queued) into
+    # the next free slots of a DataBlockBatch, leaving them in the queue.
+    # Returns the number of blocks copied.
+    def frontBatch(self, batch, numBlocks):
+        return self._readBatch(rhd2klib.queue_data_read_front, batch, numBlocks)
+
+    # Copy the oldest numBlocks blocks (or all blocks, if fewer are queued) into
+    # the next free slots of a DataBlockBatch and remove them from the queue.
+    # Returns the number of blocks moved.
+    def popBatch(self, batch, numBlocks):
+        count = self._readBatch(rhd2klib.queue_data_pop_front, batch, numBlocks)
+        self.front_cache = None
+        return count
+
+    # Append copies of the oldest numBlocks blocks to another DataQueue, leaving
+    # this queue unchanged.  Returns the number of blocks copied.
+    def copyFrontTo(self, numBlocks, destination):
+        return int(rhd2klib.queue_data_copy_front_to(self, numBlocks, destination))
+
+    # Remove the oldest numBlocks blocks (or all blocks, if fewer are queued).
+    # Returns the number of blocks removed.
+    def discard(self, numBlocks):
+        if numBlocks <= 0:
+            return 0
+        self.front_cache = None
+        return int(rhd2klib.queue_data_discard(self, numBlocks))
+
+    def _readBatch(self, function, batch, numBlocks):
+        if batch.numBlocks + numBlocks > batch.maxNumBlocks:
+            raise IndexError("DataBlockBatch is full (" +
+                             str(batch.maxNumBlocks) + " blocks)")
+
+        start = batch.numBlocks
+        arrays = (batch.timeStamp, batch.amplifierData, batch.auxiliaryData,
+                  batch.boardAdcData, batch.ttlIn, batch.ttlOut)
+        count = function(self, numBlocks, batch.numStreams,
+                         *[array.ctypes.data + start * array.strides[0] for array in arrays])
+        batch.numBlocks += count
+        return count
+
+    # Returns a dictionary of queued, pooled and allocated block counts.
+    def statistics(self):
+        return {
+            "numQueued": len(self),
+            "poolSize": int(rhd2klib.queue_data_pool_size(self)),
+            "numAllocated": int(rhd2klib.queue_data_num_allocated(self)),
+        }
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import struct
+
+
+class DataStream():
+    """ This class writes and reads binary data to and from a file object
+    with the same byte layout as a QDataStream set to version Qt_4_8,
+    little endian byte order and single floating-point precision, the
+    settings used for all Intan data files.  It lets save files be written
+    and read without PyQt5.
+
+    Only the methods used for the headers of data files are provided.  The
+    read methods raise EOFError at the end of the file.
+    """
+
+    def __init__(self, device):
+        self.device = device
+
+    # Writes raw bytes to the stream.  Returns the number of bytes written.
+    def writeRawData(self, data):
+        self.device.write(data)
+        return len(data)
+
+    def writeInt16(self, value):
+        self.device.write(struct.pack("<h", int(value)))
+
+    def writeUInt16(self, value):
+        self.device.write(struct.pack("<H", int(value)))
+
+    def writeInt32(self, value):
+        self.device.write(struct.pack("<i", int(value)))
+
+    def writeUInt32(self, value):
+        self.device.write(struct.pack("<I", int(value)))
+
+    # Doubles are written as 4-byte floating-point numbers (single precision).
+    def writeDouble(self, value):
+        self.device.write(struct.pack("<f", value))
+
+    # Writes a string as its length in bytes (quint32) followed by its UTF-16
+    # characters.  A None (null) string is written as length 0xffffffff.
+    def writeQString(self, value):
+        if value is None:
+            self.device.write(struct.pack("<I", 0xffffffff))
+            return
+        data = value.encode("utf-16-le")
+        self.device.write(struct.pack("<I", len(data)))
+        self.device.write(data)
+
+    # Reads numBytes raw bytes from the stream.
+    def readRawData(self, numBytes):
+        data = self.device.read(numBytes)
+        if len(data) < numBytes:
+            raise EOFError("Unexpected end of file")
+        return data
+
+    def readInt16(self):
+        return struct.unpack("<h", self.readRawData(2))[0]
+
+    def readUInt16(self):
+        return struct.unpack("<H", self.readRawData(2))[0]
+
+    def readInt32(self):
+        return struct.unpack("<i", self.readRawData(4))[0]
+
+    def readUInt32(self):
+        return struct.unpack("<I", self.readRawData(4))[0]
+
+    def readDouble(self):
+        return struct.unpack("<f", self.readRawData(4))[0]
+
+    # A null string (length 0xffffffff) is returned as None.
+    def readQString(self):
+        length = self.readUInt32()
+        if length == 0xffffffff:
+            return None
+        return self.readRawData(length).decode("utf-16-le")
+
+# Opens fileName for writing and returns the file and a DataStream that
+# writes to it.
+
+
+def openDataStream(fileName):
+    try:
+        device = open(fileName, "wb")
+    except OSError as e:
+        print("Cannot open file for writing: " + str(e.strerror) + "\n")
+        raise
+    return device, DataStream(device)
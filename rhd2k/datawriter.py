@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import collections
+import threading
+import time
+
+
+class DataWriter():
+    """ This class writes encoded save-file data to disk on a dedicated
+    thread, so that slow disk writes never stall the loop that drains the
+    USB interface board.
+
+    Data is handed over with write(target, data), where target is any object
+    with a writeRawData(bytes) method (QDataStream, DataStream, Ofstream).
+    Writes to the same target are performed in the order they were queued.
+    The queue is bounded by maxQueueBytes: when it is full, write() blocks
+    until the writer thread has caught up (backpressure), and the time spent
+    blocked is recorded in the statistics.
+
+    A file that has data queued is closed with close(file), which closes it
+    on the writer thread once everything queued before has been written, so
+    starting a new file never waits for the disk; call(function) runs any
+    other function there in the same way.  flush() waits until everything
+    queued has been done.
+    """
+
+    def __init__(self, maxQueueBytes=64 * 1024 * 1024):
+        self.maxQueueBytes = maxQueueBytes
+
+        self.pending = collections.deque()
+        self.queuedBytes = 0
+        self.writing = False
+        self.stopping = False
+        self.error = None
+        self.condition = threading.Condition()
+
+        self.resetStatistics()
+
+        self.thread = threading.Thread(
+            target=self.run, name="DataWriter", daemon=True)
+        self.thread.start()
+
+    # Reset the queue-depth, throughput, and backpressure statistics.
+    def resetStatistics(self):
+        with self.condition:
+            self.maxQueueDepth = len(self.pending)
+            self.maxQueuedBytes = self.queuedBytes
+            self.bytesWritten = 0
+            self.numWrites = 0
+            self.writeSeconds = 0.0
+            self.blockedCount = 0
+            self.blockedSeconds = 0.0
+
+    # Queue data (bytes) to be written to target.  Blocks while the queue is full.
+    def write(self, target, data):
+        with self.condition:
+            self.checkError()
+
+            if self.pending and self.queuedBytes + len(data) > self.maxQueueBytes:
+                self.blockedCount += 1
+                startTime = time.perf_counter()
+                while self.pending and self.queuedBytes + len(data) > self.maxQueueBytes \
+                        and self.error is None:
+                    self.condition.wait()
+                self.blockedSeconds += time.perf_counter() - startTime
+                self.checkError()
+
+            self.pending.append((target, data))
+            self.queuedBytes += len(data)
+            self.maxQueueDepth = max(self.maxQueueDepth, len(self.pending))
+            self.maxQueuedBytes = max(self.maxQueuedBytes, self.queuedBytes)
+            self.condition.notify_all()
+
+    # Queue function to be called (without arguments) on the writer thread after
+    # all data queued before it has been written.
+    def call(self, function):
+        with self.condition:
+            self.checkError()
+            self.pending.append((function, None))
+            self.maxQueueDepth = max(self.maxQueueDepth, len(self.pending))
+            self.condition.notify_all()
+
+    # Queue closing target (any object with a close() method, e.g. a file)
+    # after all data queued before it has been written.
+    def close(self, target):
+        self.call(target.close)
+
+    # Wait until all queued data has been written.
+    def flush(self):
+        with self.condition:
+            while (self.pending or self.writing) and self.error is None:
+                self.condition.wait()
+            self.checkError()
+
+    # Write any queued data and stop the writer thread.
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.thread.join()
+        with self.condition:
+            self.checkError()
+
+    # Returns the number of write requests waiting to be written.
+    def queueDepth(self):
+        with self.condition:
+            return len(self.pending)
+
+    # Returns a dictionary of queue-depth, throughput and backpressure statistics.
+    def statistics(self):
+        with self.condition:
+            return {
+                "queueDepth": len(self.pending),
+                "maxQueueDepth": self.maxQueueDepth,
+                "queuedBytes": self.queuedBytes,
+                "maxQueuedBytes": self.maxQueuedBytes,
+                "maxQueueBytes": self.maxQueueBytes,
+                "bytesWritten": self.bytesWritten,
+                "numWrites": self.numWrites,
+                "writeSeconds": self.writeSeconds,
+                "blockedCount": self.blockedCount,
+                "blockedSeconds": self.blockedSeconds,
+            }
+
+    # Re-raise (once) an error that occurred on the writer thread.
+    def checkError(self):
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            raise error
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                target, data = self.pending[0]
+                self.writing = True
+
+            startTime = time.perf_counter()
+            try:
+                if data is None:
+                    # A function queued by call() (e.g. closing a file).
+                    target()
+                else:
+                    result = target.writeRawData(data)
+                    if result is not None and result != len(data):
+                        raise IOError("Write failed: " + str(result) +
+                                      " of " + str(len(data)) + " bytes written")
+                error = None
+            except Exception as e:
+                error = e
+            elapsed = time.perf_counter() - startTime
+
+            with self.condition:
+                self.pending.popleft()
+                self.writing = False
+                self.writeSeconds += elapsed
+                if data is not None:
+                    self.queuedBytes -= len(data)
+                if error is None:
+                    if data is not None:
+                        self.bytesWritten += len(data)
+                        self.numWrites += 1
+                else:
+                    # Drop everything still queued; the error is raised by
+                    # the next call to write() or flush().
+                    self.error = error
+                    self.pending.clear()
+                    self.queuedBytes = 0
+                self.condition.notify_all()
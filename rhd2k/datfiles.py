@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from .rhdfile import SaveFileReader
+except ImportError:
+    from rhdfile import SaveFileReader
+
+
+# Memory-maps the data file fileName as a [t] array (numChannels is None) or
+# a sample-major [t][channel] array of the given dtype.  Empty files give an
+# empty array.
+def mapDataFile(fileName, dtype, numChannels=None):
+    rowSize = np.dtype(dtype).itemsize * (1 if numChannels is None else numChannels)
+    numSamples = os.path.getsize(fileName) // rowSize
+    shape = (numSamples,) if numChannels is None else (numSamples, numChannels)
+    if numSamples == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(fileName, dtype=dtype, mode="r", shape=shape)
+
+
+class ChannelArray():
+    """ This class exposes the per-channel data files of one signal type of
+    ChannelFiles as a [t][channel] array.  channel[n] is the memory-mapped
+    [t] array of channel n, so reading a single channel never copies:
+        files.amplifierData[:, 3]               channel 3 (a view)
+        files.amplifierData[1000:2000, [0, 5]]  two channels, stacked
+
+    Indexing with a channel subset reads only the requested samples of the
+    files of those channels.
+    """
+
+    def __init__(self, channel, numSamples, dtype):
+        self.channel = [data[:numSamples] for data in channel]
+        self.dtype = np.dtype(dtype)
+        self.shape = (numSamples, len(channel))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            samples, channels = key
+        else:
+            samples, channels = key, slice(None)
+
+        channelIndex = np.arange(len(self.channel))[channels]
+        if np.ndim(channelIndex) == 0:
+            return self.channel[channelIndex][samples]
+        if len(channelIndex) == 0:
+            return np.zeros((len(range(self.shape[0])[samples]), 0), dtype=self.dtype)
+        return np.stack([self.channel[index][samples] for index in channelIndex], axis=-1)
+
+
+class SignalTypeFiles(SaveFileReader):
+    """ This class reads a directory saved in the "One File Per Signal Type"
+    format without loading it into memory.  Channel counts and names come
+    from info.rhd, and every data file is memory-mapped as a sample-major
+    NumPy array, so slicing it reads only the requested samples and a
+    single channel or a slice of channels is a strided view:
+        timeStamp          [t]             int32
+        amplifierData      [t][channel]    int16, 0.195 uV per step
+        auxInputData       [t][channel]    uint16, 37.4 uV per step
+        supplyVoltageData  [t][channel]    uint16, 74.8 uV per step
+        boardAdcData       [t][channel]    uint16
+        boardDigInData     [t]             uint16, one bit per digital input
+        boardDigOutData    [t]             uint16, one bit per digital output
+    Channels are in save list order (listed in amplifierChannels,
+    auxInputChannels, ...).  All signals are sampled at the amplifier
+    sampling rate.  Signals that were not saved have no channels (or no
+    samples); if the files have different lengths, all are cut to the
+    shortest.
+    """
+
+    def __init__(self, path):
+        SaveFileReader.__init__(self, os.path.join(path, "info.rhd"))
+        self.path = path
+
+        self.timeStamp = mapDataFile(os.path.join(path, "time.dat"), "<i4")
+        self.amplifierData = self.mapSignalFile(
+            "amplifier.dat", "<i2", self.amplifierChannels)
+        self.auxInputData = self.mapSignalFile(
+            "auxiliary.dat", "<u2", self.auxInputChannels)
+        self.supplyVoltageData = self.mapSignalFile(
+            "supply.dat", "<u2", self.supplyVoltageChannels)
+        self.boardAdcData = self.mapSignalFile(
+            "analogin.dat", "<u2", self.boardAdcChannels)
+        self.boardDigInData = self.mapSignalFile(
+            "digitalin.dat", "<u2", self.boardDigInChannels, False)
+        self.boardDigOutData = self.mapSignalFile(
+            "digitalout.dat", "<u2", self.boardDigOutChannels, False)
+
+        # Cut all signals to the length of the shortest saved file.
+        signals = ["timeStamp", "amplifierData", "auxInputData", "supplyVoltageData",
+                   "boardAdcData", "boardDigInData", "boardDigOutData"]
+        self.numSamples = min(len(getattr(self, signal)) for signal in signals
+                              if getattr(self, signal) is not None)
+        for signal in signals:
+            data = getattr(self, signal)
+            if data is None:
+                if signal.startswith("boardDig"):
+                    data = np.zeros(0, dtype="<u2")
+                else:
+                    data = np.zeros((self.numSamples, 0), dtype="<u2")
+            setattr(self, signal, data[:self.numSamples])
+
+    # Memory-maps the data file of a signal type with the channels of saveList
+    # (as [t][channel] if interleaved is True, or [t] otherwise), or returns
+    # None if no channels were saved.
+    def mapSignalFile(self, fileName, dtype, saveList, interleaved=True):
+        if not saveList:
+            return None
+        return mapDataFile(os.path.join(self.path, fileName), dtype,
+                           len(saveList) if interleaved else None)
+
+    def __len__(self):
+        return self.numSamples
+
+
+class ChannelFiles(SaveFileReader):
+    """ This class reads a directory saved in the "One File Per Channel"
+    format without loading it into memory.  The saved channels are listed
+    in info.rhd, and every channel's data file (e.g., amp-A-000.dat) is
+    memory-mapped.  Each signal is a ChannelArray indexed [t][channel]:
+        timeStamp          [t]             int32
+        amplifierData      [t][channel]    int16, 0.195 uV per step
+        auxInputData       [t][channel]    uint16, 37.4 uV per step
+        supplyVoltageData  [t][channel]    uint16, 74.8 uV per step
+        boardAdcData       [t][channel]    uint16
+        boardDigInData     [t][channel]    uint16, 0 or 1
+        boardDigOutData    [t][channel]    uint16, 0 or 1
+    Channels are in save list order (listed in amplifierChannels,
+    auxInputChannels, ...).  All signals are sampled at the amplifier
+    sampling rate; if the files have different lengths, all are cut to the
+    shortest.
+    """
+
+    def __init__(self, path):
+        SaveFileReader.__init__(self, os.path.join(path, "info.rhd"))
+        self.path = path
+
+        signals = [("amplifierData", "amp-", "<i2", self.amplifierChannels),
+                   ("auxInputData", "aux-", "<u2", self.auxInputChannels),
+                   ("supplyVoltageData", "vdd-", "<u2", self.supplyVoltageChannels),
+                   ("boardAdcData", "board-", "<u2", self.boardAdcChannels),
+                   ("boardDigInData", "board-", "<u2", self.boardDigInChannels),
+                   ("boardDigOutData", "board-", "<u2", self.boardDigOutChannels)]
+
+        timeStamp = mapDataFile(os.path.join(path, "time.dat"), "<i4")
+        channelData = {}
+        self.numSamples = len(timeStamp)
+        for signal, prefix, dtype, saveList in signals:
+            channelData[signal] = [mapDataFile(os.path.join(path, prefix + channel.nativeChannelName + ".dat"),
+                                               dtype) for channel in saveList]
+            for data in channelData[signal]:
+                self.numSamples = min(self.numSamples, len(data))
+
+        self.timeStamp = timeStamp[:self.numSamples]
+        for signal, prefix, dtype, saveList in signals:
+            setattr(self, signal, ChannelArray(channelData[signal], self.numSamples, dtype))
+
+    def __len__(self):
+        return self.numSamples
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import collections
+import threading
+
+import numpy as np
+
+import constants
+
+
+class WaveformFrame():
+    """ This class holds a copy of the displayed waveforms produced by one
+    read of numBlocks data blocks: the filtered amplifier waveforms, the
+    auxiliary input, supply voltage and board ADC waveforms, and the board
+    digital inputs.  The arrays have the same names and layout as the
+    SignalProcessor buffers they are copied from, so WavePlot and SpikePlot
+    can draw from a frame while the SignalProcessor is already processing
+    the next read.  The USB FIFO latency and fill level at the time of the
+    read are carried along for display.
+    """
+
+    def __init__(self, numStreams, maxNumBlocks, waveformDtype=np.float64):
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        self.numBlocks = 0
+        self.latency = 0.0
+        self.fifoPercentageFull = 0.0
+
+        self.amplifierPostFilter = np.zeros(
+            (numStreams, 32, samples * maxNumBlocks), dtype=waveformDtype)
+        self.auxChannel = np.zeros(
+            (numStreams, 3, (samples // 4) * maxNumBlocks), dtype=waveformDtype)
+        self.supplyVoltage = np.zeros(
+            (numStreams, maxNumBlocks), dtype=waveformDtype)
+        self.boardAdc = np.zeros((8, samples * maxNumBlocks), dtype=waveformDtype)
+        self.boardDigIn = np.zeros((16, samples * maxNumBlocks), dtype=np.uint8)
+
+    # Copy the waveforms of the last numBlocks blocks loaded into signalProcessor.
+    def copyFrom(self, signalProcessor, numBlocks, latency, fifoPercentageFull):
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        length = samples * numBlocks
+        self.numBlocks = numBlocks
+        self.latency = latency
+        self.fifoPercentageFull = fifoPercentageFull
+
+        self.amplifierPostFilter[:, :, :length] = signalProcessor.amplifierPostFilter[:, :, :length]
+        self.auxChannel[:, :, :length // 4] = signalProcessor.auxChannel[:, :, :length // 4]
+        self.supplyVoltage[:, :numBlocks] = signalProcessor.supplyVoltage[:, :numBlocks]
+        self.boardAdc[:, :length] = signalProcessor.boardAdc[:, :length]
+        self.boardDigIn[:, :length] = signalProcessor.boardDigIn[:, :length]
+
+
+class FrameRing():
+    """ This class hands WaveformFrame objects from the acquisition thread
+    (the producer) to the GUI thread (the consumer) through a fixed ring of
+    preallocated frames.  Neither side ever waits for the other: the
+    producer fills a free frame with acquireFrame()/publishFrame(), and if
+    the consumer has fallen behind, the oldest unread frame is recycled and
+    counted as dropped.  The consumer takes frames in order with
+    takeFrame() and hands each one back with releaseFrame(); the frame it
+    holds is never overwritten.  The lock only guards the bookkeeping of
+    frame indices, never the copying of waveform data.
+
+    Only displayed data is dropped; every data block is still processed
+    and saved by the acquisition thread.
+    """
+
+    def __init__(self, numFrames, numStreams, maxNumBlocks, waveformDtype=np.float64):
+        if numFrames < 3:
+            raise ValueError("FrameRing needs at least 3 frames")
+
+        self.frames = [WaveformFrame(numStreams, maxNumBlocks, waveformDtype)
+                       for i in range(numFrames)]
+        self.free = collections.deque(range(numFrames))
+        self.ready = collections.deque()
+        self.writing = None
+        self.reading = None
+        self.lock = threading.Lock()
+
+        self.numPublished = 0
+        self.numDropped = 0
+        self.numTaken = 0
+
+    # Returns a frame for the producer to fill.  If no frame is free, the oldest
+    # frame not yet taken by the consumer is dropped and reused.
+    def acquireFrame(self):
+        with self.lock:
+            if self.free:
+                self.writing = self.free.popleft()
+            else:
+                self.writing = self.ready.popleft()
+                self.numDropped += 1
+            return self.frames[self.writing]
+
+    # Make the frame returned by acquireFrame() available to the consumer.
+    def publishFrame(self):
+        with self.lock:
+            self.ready.append(self.writing)
+            self.writing = None
+            self.numPublished += 1
+
+    # Returns the oldest published frame not yet taken, or None if there is none.
+    # The frame stays valid until releaseFrame() is called.
+    def takeFrame(self):
+        with self.lock:
+            if not self.ready:
+                return None
+            self.reading = self.ready.popleft()
+            self.numTaken += 1
+            return self.frames[self.reading]
+
+    # Return the frame obtained from takeFrame() to the ring.
+    def releaseFrame(self):
+        with self.lock:
+            if self.reading is not None:
+                self.free.append(self.reading)
+                self.reading = None
+
+    # Returns the number of published frames waiting to be taken.
+    def queueDepth(self):
+        with self.lock:
+            return len(self.ready)
+
+    # Returns a dictionary of published, displayed and dropped frame counts.
+    def statistics(self):
+        with self.lock:
+            return {
+                "queueDepth": len(self.ready),
+                "numPublished": self.numPublished,
+                "numTaken": self.numTaken,
+                "numDropped": self.numDropped,
+            }
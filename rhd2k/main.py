@@ -1,9 +1,11 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import sys
 from PyQt5.QtWidgets import QApplication, QStyleFactory
 from mainwindow import MainWindow
+from simulatedevalboard import SimulatedEvalBoard, parseChips
 
 
 def isMac():
@@ -12,12 +14,24 @@ def isMac():
 
 def main():
     """Start the app"""
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Intan RHD2000 interface")
+    parser.add_argument("--simulate", metavar="CHIPS", default=None,
+                        help="use a simulated interface board with the given comma-separated chips "
+                             "(2132, 2216, 2164 or none) on ports A1, A2, B1, ..., D2")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="simulated board speed relative to real time (default: 1)")
+    args, qtArguments = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qtArguments)
 
     if isMac():
         app.setStyle(QStyleFactory.create("Fusion"))
 
-    main_window = MainWindow()
+    evalBoard = None
+    if args.simulate is not None:
+        evalBoard = SimulatedEvalBoard(parseChips(args.simulate), speed=args.speed)
+
+    main_window = MainWindow(evalBoard)
     main_window.show()
     sys.exit(app.exec_())
 
@@ -8,20 +8,24 @@
 
 import math
 import sys
+import threading
+import time
 
 from PyQt5.QtWidgets import QMainWindow, QAction, QLabel, QPushButton, QRadioButton, QSlider
 from PyQt5.QtWidgets import QButtonGroup, QGroupBox, QVBoxLayout, QHBoxLayout, QComboBox
 from PyQt5.QtWidgets import QFrame, QLineEdit, QCheckBox, QSpinBox, QTabWidget, QWidget
 from PyQt5.QtWidgets import QApplication, QScrollArea, QMessageBox, QFileDialog, qApp, QProgressDialog
 from PyQt5.QtGui import QIcon, QDoubleValidator, QDesktopServices
-from PyQt5.QtCore import Qt, QUrl, QFileInfo, QFile, QDir, QIODevice, QDataStream, QDateTime, QCoreApplication, QTime, QTextStream
+from PyQt5.QtCore import Qt, QUrl, QFileInfo, QFile, QIODevice, QDataStream, QCoreApplication, QTextStream
 
 import constants
 
+from acquisitionengine import AcquisitionEngine
 from auxdigoutconfigdialog import AuxDigOutConfigDialog
 from bandwidthdialog import BandwidthDialog
 from cabledelaydialog import CableDelayDialog
 from dataqueue import DataQueue
+from framering import FrameRing
 from helpdialogcomparators import HelpDialogComparators
 from helpdialogchipfilters import HelpDialogChipFilters
 from helpdialogdacs import HelpDialogDacs
@@ -31,31 +35,27 @@ from helpdialognotchfilter import HelpDialogNotchFilter
 from impedancefreqdialog import ImpedanceFreqDialog
 from keyboardshortcutdialog import KeyboardShortcutDialog
 from renamechanneldialog import RenameChannelDialog
-from rhd2000datablock import Rhd2000DataBlock
 from rhd2000evalboard import Rhd2000EvalBoard
 from rhd2000registers import Rhd2000Registers
 from setsaveformatdialog import SetSaveFormatDialog
 from signalsources import SignalSources
-from signalprocessor import SignalProcessor
 from spikescopedialog import SpikeScopeDialog
 from triggerrecorddialog import TriggerRecordDialog
 from vector import VectorInt
 from waveplot import WavePlot
 
 
-class MainWindow(QMainWindow):
-    """Main window of the application"""
+class MainWindow(QMainWindow, AcquisitionEngine):
+    """Main window of the application.  The board is configured, and data is
+    acquired and saved, by the AcquisitionEngine methods; MainWindow sets
+    the engine settings from its widgets and displays the acquired data."""
 
-    def __init__(self):
-        super().__init__()
-
-        # Default amplifier bandwidth settings
-        self.desiredLowerBandwidth = 0.1
-        self.desiredUpperBandwidth = 7500.0
-        self.desiredDspCutoffFreq = 1.0
+    # evalBoard can be given to use another object with the Rhd2000EvalBoard
+    # methods, such as a SimulatedEvalBoard, instead of the USB interface board.
+    def __init__(self, evalBoard=None):
+        super().__init__(evalBoard=evalBoard if evalBoard is not None else Rhd2000EvalBoard())
 
         # Defaults for linting
-        self.dspEnabled = True
         self.keyboardShortcutDialog = None
         self.helpDialogChipFilters = None
         self.helpDialogComparators = None
@@ -66,75 +66,14 @@ class MainWindow(QMainWindow):
         self.spikeScopeDialog = None
         self.auxDigOutConfigDialog = None
         self.triggerRecordDialog = None
-        self.saveBaseFileName = ""
-
-        self.evalBoard = Rhd2000EvalBoard()
-        self.saveFormat = None
-        self.infoFile = None
-        self.infoFileName = ""
-        self.infoStream = None
-        self.saveStream = None
-
-        self.actualDspCutoffFreq = 0.0
-        self.actualLowerBandwidth = 0.0
-        self.actualUpperBandwidth = 0.0
-
-        self.boardSampleRate = 0
-        self.saveFileName = ""
 
-        # Default electrode impedance measurement frequency
-        self.desiredImpedanceFreq = 1000.0
-
-        self.actualImpedanceFreq = 0.0
         self.impedanceFreqValid = False
 
         # Set up vectors for 8 DACs on USB interface board
         self.dacEnabled = [False]*8
         self.dacSelectedChannel = [0]*8
 
-        self.cableLengthPortA = 1.0
-        self.cableLengthPortB = 1.0
-        self.cableLengthPortC = 1.0
-        self.cableLengthPortD = 1.0
-
-        self.chipId = [-1]*constants.MAX_NUM_DATA_STREAMS
-        self.ttlOut = [0]*16
-
-        for i in range(0, 16):
-            self.ttlOut[i] = 0
-
-        self.evalBoardMode = 0
-
-        self.recordTriggerChannel = 0
-        self.recordTriggerPolarity = 0
-        self.recordTriggerBuffer = 1
-        self.postTriggerTime = 1
-        self.saveTriggerChannel = True
-
-        self.signalSources = SignalSources()
-
-        self.channelVisible = [[False]*32]*constants.MAX_NUM_DATA_STREAMS
-
-        self.signalProcessor = SignalProcessor()
-        self.notchFilterFrequency = 60.0
-        self.notchFilterBandwidth = 10.0
-        self.notchFilterEnabled = False
-        self.signalProcessor.setNotchFilterEnabled(self.notchFilterEnabled)
-        self.highpassFilterFrequency = 250.0
-        self.highpassFilterEnabled = False
-        self.signalProcessor.setHighpassFilterEnabled(
-            self.highpassFilterEnabled)
-
-        self.running = False
-        self.recording = False
-        self.triggerSet = False
-        self.triggered = False
-
-        self.saveTemp = False
-        self.saveTtlOut = False
         self.validFilename = False
-        self.synthMode = False
-        self.fastSettleEnabled = False
 
         self.wavePlot = WavePlot(self.signalProcessor,
                                  self.signalSources, self, self)
@@ -150,9 +89,6 @@ class MainWindow(QMainWindow):
         self.triggerButton.setEnabled(self.validFilename)
         self.stopButton.setEnabled(False)
 
-        self.manualDelayEnabled = [False]*4
-        self.manualDelay = [0]*4
-
         self.openInterfaceBoard()
 
         self.changeSampleRate(self.sampleRateComboBox.currentIndex())
@@ -189,7 +125,6 @@ class MainWindow(QMainWindow):
         self.changeTScale(self.tScaleComboBox.currentIndex())
         self.changeYScale(self.yScaleComboBox.currentIndex())
 
-        self.dataQueue = DataQueue()
         self.filteredDataQueue = DataQueue()
 
         # CHECK
@@ -200,35 +135,16 @@ class MainWindow(QMainWindow):
     def scanPorts(self):
         self.statusBar().showMessage("Scanning ports...")
 
-        # Scan SPI Ports.
-        self.findConnectedAmplifiers()
+        # Scan SPI Ports, configure the SignalProcessor object for the required
+        # number of data streams and turn on LEDs for Ports A-D.
+        super().scanPorts()
 
-        # Configure SignalProcessor object for the required number of data streams.
         if not self.synthMode:
-            self.signalProcessor.allocateMemory(
-                self.evalBoard.getNumEnabledDataStreams())
             self.setWindowTitle("Intan Technologies RHD2000 Interface")
         else:
-            self.signalProcessor.allocateMemory(1)
             self.setWindowTitle("Intan Technologies RHD2000 Interface "
                                 "(Demonstration Mode with Synthesized Biopotentials)")
 
-        # Turn on appropriate(optional) LEDs for Ports A-D
-        if not self.synthMode:
-            self.ttlOut[11] = 0
-            self.ttlOut[12] = 0
-            self.ttlOut[13] = 0
-            self.ttlOut[14] = 0
-            if self.signalSources.signalPort[0].enabled:
-                self.ttlOut[11] = 1
-            if self.signalSources.signalPort[1].enabled:
-                self.ttlOut[12] = 1
-            if self.signalSources.signalPort[2].enabled:
-                self.ttlOut[13] = 1
-            if self.signalSources.signalPort[3].enabled:
-                self.ttlOut[14] = 1
-            self.evalBoard.setTtlOut(self.ttlOut)
-
         # Switch display to the first port that has an amplifier connected.
         if self.signalSources.signalPort[0].enabled:
             self.wavePlot.initialize(0)
@@ -403,7 +319,7 @@ class MainWindow(QMainWindow):
         self.notchFilterComboBox.addItem("60 Hz")
         self.notchFilterComboBox.setCurrentIndex(0)
 
-        self.runButton.clicked.connect(self.runInterfaceBoard)
+        self.runButton.clicked.connect(self.runInterfaceBoardSlot)
         self.stopButton.clicked.connect(self.stopInterfaceBoard)
         self.recordButton.clicked.connect(self.recordInterfaceBoard)
         self.triggerButton.clicked.connect(self.triggerRecordInterfaceBoard)
@@ -1124,15 +1040,10 @@ class MainWindow(QMainWindow):
         bandwidthDialog = BandwidthDialog(self.desiredLowerBandwidth, self.desiredUpperBandwidth,
                                           self.desiredDspCutoffFreq, self.dspEnabled, self.boardSampleRate, self)
         if bandwidthDialog.exec():
-            self.desiredDspCutoffFreq = float(
-                bandwidthDialog.dspFreqLineEdit.text())
-            self.desiredLowerBandwidth = float(
-                bandwidthDialog.lowFreqLineEdit.text())
-            self.desiredUpperBandwidth = float(
-                bandwidthDialog.highFreqLineEdit.text())
-            self.dspEnabled = bandwidthDialog.dspEnableCheckBox.isChecked()
-            # self function sets new amp bandwidth
-            self.changeSampleRate(self.sampleRateComboBox.currentIndex())
+            super().changeBandwidth(float(bandwidthDialog.dspFreqLineEdit.text()),
+                                    float(bandwidthDialog.lowFreqLineEdit.text()),
+                                    float(bandwidthDialog.highFreqLineEdit.text()),
+                                    bandwidthDialog.dspEnableCheckBox.isChecked())
         self.wavePlot.setFocus()
 
     # Launch electrode impedance measurement frequency selection dialog.
@@ -1320,215 +1231,25 @@ class MainWindow(QMainWindow):
 
     # Change notch filter settings.
     def changeNotchFilter(self, notchFilterIndex):
-        if notchFilterIndex == 0:
-            self.notchFilterEnabled = False
-        elif notchFilterIndex == 1:
-            self.notchFilterFrequency = 50.0
-            self.notchFilterEnabled = True
-        elif notchFilterIndex == 2:
-            self.notchFilterFrequency = 60.0
-            self.notchFilterEnabled = True
-
-        self.signalProcessor.setNotchFilter(
-            self.notchFilterFrequency, self.notchFilterBandwidth, self.boardSampleRate)
-        self.signalProcessor.setNotchFilterEnabled(self.notchFilterEnabled)
+        super().changeNotchFilter(notchFilterIndex)
         self.wavePlot.setFocus()
 
     # Enable/disable software/FPGA high-pass filter.
     def enableHighpassFilter(self, enable):
-        self.highpassFilterEnabled = enable
-        self.signalProcessor.setHighpassFilterEnabled(enable)
-        if not self.synthMode:
-            self.evalBoard.enableDacHighpassFilter(enable)
+        super().enableHighpassFilter(enable)
         self.wavePlot.setFocus()
 
     # Update software/FPGA high-pass filter when LineEdit changes.
     def highpassFilterLineEditChanged(self):
         self.setHighpassFilterCutoff(float(self.highpassFilterLineEdit.text()))
 
-    # Update software/FPGA high-pass filter cutoff frequency.
-    def setHighpassFilterCutoff(self, cutoff):
-        self.highpassFilterFrequency = cutoff
-        self.signalProcessor.setHighpassFilter(cutoff, self.boardSampleRate)
-        if not self.synthMode:
-            self.evalBoard.setDacHighpassFilter(cutoff)
-
     def changeSampleRate(self, sampleRateIndex):
-        self.sampleRate = Rhd2000EvalBoard.SampleRate1000Hz
-
-        # Note: numUsbBlocksToRead is set to give an approximate frame rate of
-        # 30 Hz for most sampling rates.
-        if sampleRateIndex == 0:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate1000Hz
-            self.boardSampleRate = 1000.0
-            self.numUsbBlocksToRead = 1
-        elif sampleRateIndex == 1:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate1250Hz
-            self.boardSampleRate = 1250.0
-            self.numUsbBlocksToRead = 1
-        elif sampleRateIndex == 2:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate1500Hz
-            self.boardSampleRate = 1500.0
-            self.numUsbBlocksToRead = 1
-        elif sampleRateIndex == 3:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate2000Hz
-            self.boardSampleRate = 2000.0
-            self.numUsbBlocksToRead = 1
-        elif sampleRateIndex == 4:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate2500Hz
-            self.boardSampleRate = 2500.0
-            self.numUsbBlocksToRead = 2
-        elif sampleRateIndex == 5:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate3000Hz
-            self.boardSampleRate = 3000.0
-            self.numUsbBlocksToRead = 2
-        elif sampleRateIndex == 6:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate3333Hz
-            self.boardSampleRate = 10000.0 / 3.0
-            self.numUsbBlocksToRead = 2
-        elif sampleRateIndex == 7:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate4000Hz
-            self.boardSampleRate = 4000.0
-            self.numUsbBlocksToRead = 2
-        elif sampleRateIndex == 8:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate5000Hz
-            self.boardSampleRate = 5000.0
-            self.numUsbBlocksToRead = 3
-        elif sampleRateIndex == 9:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate6250Hz
-            self.boardSampleRate = 6250.0
-            self.numUsbBlocksToRead = 4
-        elif sampleRateIndex == 10:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate8000Hz
-            self.boardSampleRate = 8000.0
-            self.numUsbBlocksToRead = 4
-        elif sampleRateIndex == 11:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate10000Hz
-            self.boardSampleRate = 10000.0
-            self.numUsbBlocksToRead = 6
-        elif sampleRateIndex == 12:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate12500Hz
-            self.boardSampleRate = 12500.0
-            self.numUsbBlocksToRead = 7
-        elif sampleRateIndex == 13:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate15000Hz
-            self.boardSampleRate = 15000.0
-            self.numUsbBlocksToRead = 8
-        elif sampleRateIndex == 14:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate20000Hz
-            self.boardSampleRate = 20000.0
-            self.numUsbBlocksToRead = 12
-        elif sampleRateIndex == 15:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate25000Hz
-            self.boardSampleRate = 25000.0
-            self.numUsbBlocksToRead = 14
-        elif sampleRateIndex == 16:
-            self.sampleRate = Rhd2000EvalBoard.SampleRate30000Hz
-            self.boardSampleRate = 30000.0
-            self.numUsbBlocksToRead = 16
+        # Set the sample rate, upload all auxiliary SPI command sequences and
+        # set amplifier bandwidth parameters.
+        super().changeSampleRate(sampleRateIndex)
 
         self.wavePlot.setNumUsbBlocksToPlot(self.numUsbBlocksToRead)
 
-        # Set up an RHD2000 register object using self sample rate to
-        # optimize MUX-related register settings.
-        chipRegisters = Rhd2000Registers(self.boardSampleRate)
-
-        if not self.synthMode:
-            self.evalBoard.setSampleRate(self.sampleRate)
-
-            # Now that we have set our sampling rate, we can set the MISO sampling delay
-            # which is dependent on the sample rate.
-            if self.manualDelayEnabled[0]:
-                self.evalBoard.setCableDelay(
-                    Rhd2000EvalBoard.PortA, self.manualDelay[0])
-            else:
-                self.evalBoard.setCableLengthMeters(
-                    Rhd2000EvalBoard.PortA, self.cableLengthPortA)
-
-            if self.manualDelayEnabled[1]:
-                self.evalBoard.setCableDelay(
-                    Rhd2000EvalBoard.PortB, self.manualDelay[1])
-            else:
-                self.evalBoard.setCableLengthMeters(
-                    Rhd2000EvalBoard.PortB, self.cableLengthPortB)
-
-            if self.manualDelayEnabled[2]:
-                self.evalBoard.setCableDelay(
-                    Rhd2000EvalBoard.PortC, self.manualDelay[2])
-            else:
-                self.evalBoard.setCableLengthMeters(
-                    Rhd2000EvalBoard.PortC, self.cableLengthPortC)
-
-            if self.manualDelayEnabled[3]:
-                self.evalBoard.setCableDelay(
-                    Rhd2000EvalBoard.PortD, self.manualDelay[3])
-            else:
-                self.evalBoard.setCableLengthMeters(
-                    Rhd2000EvalBoard.PortD, self.cableLengthPortD)
-
-            # Create command lists to be uploaded to auxiliary command slots.
-
-            # Create a command list for the AuxCmd1 slot.  self command sequence will create a 250 Hz,
-            # zero-amplitude sine wave (i.e., a flatline).  We will change self when we want to perform
-            # impedance testing.
-            # commandSequenceLength = chipRegisters.createCommandListZcheckDac(commandList, 250.0, 0.0)
-
-            # Create a command list for the AuxCmd1 slot.  self command sequence will continuously
-            # update Register 3, which controls the auxiliary digital output pin on each RHD2000 chip.
-            # In concert with the v1.4 Rhythm FPGA code, self permits real-time control of the digital
-            # output pin on chips on each SPI port.
-            # Take auxiliary output out of HiZ mode.
-
-            commandList = VectorInt()
-            chipRegisters.setDigOutLow()
-            commandSequenceLength = chipRegisters.createCommandListUpdateDigOut(
-                commandList)
-            self.evalBoard.uploadCommandList(
-                commandList, Rhd2000EvalBoard.AuxCmd1, 0)
-            self.evalBoard.selectAuxCommandLength(
-                Rhd2000EvalBoard.AuxCmd1, 0, commandSequenceLength - 1)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortA, Rhd2000EvalBoard.AuxCmd1, 0)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortB, Rhd2000EvalBoard.AuxCmd1, 0)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortC, Rhd2000EvalBoard.AuxCmd1, 0)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortD, Rhd2000EvalBoard.AuxCmd1, 0)
-
-            # Next, we'll create a command list for the AuxCmd2 slot.  self command sequence
-            # will sample the temperature sensor and other auxiliary ADC inputs.
-
-            commandSequenceLength = chipRegisters.createCommandListTempSensor(
-                commandList)
-            self.evalBoard.uploadCommandList(
-                commandList, Rhd2000EvalBoard.AuxCmd2, 0)
-            self.evalBoard.selectAuxCommandLength(
-                Rhd2000EvalBoard.AuxCmd2, 0, commandSequenceLength - 1)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortA, Rhd2000EvalBoard.AuxCmd2, 0)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortB, Rhd2000EvalBoard.AuxCmd2, 0)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortC, Rhd2000EvalBoard.AuxCmd2, 0)
-            self.evalBoard.selectAuxCommandBank(
-                Rhd2000EvalBoard.PortD, Rhd2000EvalBoard.AuxCmd2, 0)
-
-            # For the AuxCmd3 slot, we will create three command sequences.  All sequences
-            # will configure and read back the RHD2000 chip registers, but one sequence will
-            # also run ADC calibration.  Another sequence will enable amplifier 'fast settle'.
-
-        # Before generating register configuration command sequences, set amplifier
-        # bandwidth paramters.
-
-        self.actualDspCutoffFreq = chipRegisters.setDspCutoffFreq(
-            self.desiredDspCutoffFreq)
-        self.actualLowerBandwidth = chipRegisters.setLowerBandwidth(
-            self.desiredLowerBandwidth)
-        self.actualUpperBandwidth = chipRegisters.setUpperBandwidth(
-            self.desiredUpperBandwidth)
-        chipRegisters.enableDsp(self.dspEnabled)
-
         if self.dspEnabled:
             self.dspCutoffFreqLabel.setText("Desired/Actual DSP Cutoff: " +
                                             "%.2f" % self.desiredDspCutoffFreq + " Hz / " +
@@ -1544,56 +1265,8 @@ class MainWindow(QMainWindow):
                                          "%.2f" % (self.desiredUpperBandwidth / 1000.0) + " kHz / " +
                                          "%.2f" % (self.actualUpperBandwidth / 1000.0) + " kHz")
 
-        if not self.synthMode:
-            chipRegisters.createCommandListRegisterConfig(commandList, True)
-            # Upload version with ADC calibration to AuxCmd3 RAM Bank 0.
-            self.evalBoard.uploadCommandList(
-                commandList, Rhd2000EvalBoard.AuxCmd3, 0)
-            self.evalBoard.selectAuxCommandLength(Rhd2000EvalBoard.AuxCmd3, 0,
-                                                  commandSequenceLength - 1)
-
-            commandSequenceLength = chipRegisters.createCommandListRegisterConfig(
-                commandList, False)
-            # Upload version with no ADC calibration to AuxCmd3 RAM Bank 1.
-            self.evalBoard.uploadCommandList(
-                commandList, Rhd2000EvalBoard.AuxCmd3, 1)
-            self.evalBoard.selectAuxCommandLength(Rhd2000EvalBoard.AuxCmd3, 0,
-                                                  commandSequenceLength - 1)
-
-            chipRegisters.setFastSettle(True)
-            commandSequenceLength = chipRegisters.createCommandListRegisterConfig(
-                commandList, False)
-            # Upload version with fast settle enabled to AuxCmd3 RAM Bank 2.
-            self.evalBoard.uploadCommandList(
-                commandList, Rhd2000EvalBoard.AuxCmd3, 2)
-            self.evalBoard.selectAuxCommandLength(Rhd2000EvalBoard.AuxCmd3, 0,
-                                                  commandSequenceLength - 1)
-            chipRegisters.setFastSettle(False)
-
-            if self.fastSettleEnabled:
-                fastSE = 2
-            else:
-                fastSE = 1
-
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortA, Rhd2000EvalBoard.AuxCmd3,
-                                                fastSE)
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortB, Rhd2000EvalBoard.AuxCmd3,
-                                                fastSE)
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortC, Rhd2000EvalBoard.AuxCmd3,
-                                                fastSE)
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortD, Rhd2000EvalBoard.AuxCmd3,
-                                                fastSE)
-
         self.wavePlot.setSampleRate(self.boardSampleRate)
 
-        self.signalProcessor.setNotchFilter(
-            self.notchFilterFrequency, self.notchFilterBandwidth, self.boardSampleRate)
-        self.signalProcessor.setHighpassFilter(
-            self.highpassFilterFrequency, self.boardSampleRate)
-
-        if not self.synthMode:
-            self.evalBoard.setDacHighpassFilter(self.highpassFilterFrequency)
-
         if self.spikeScopeDialog:
             self.spikeScopeDialog.setSampleRate(self.boardSampleRate)
 
@@ -1603,8 +1276,6 @@ class MainWindow(QMainWindow):
         self.wavePlot.setFocus()
 
     def openInterfaceBoard(self):
-        self.evalBoard = Rhd2000EvalBoard()
-
         # Open Opal Kelly XEM6010 board.
         errorCode = self.evalBoard.open()
 
@@ -1647,428 +1318,22 @@ class MainWindow(QMainWindow):
             else:
                 sys.exit(1)  # abort application
 
-        # Load Rhythm FPGA configuration bitfile (provided by Intan Technologies).
+        # Load Rhythm FPGA configuration bitfile (provided by Intan Technologies)
+        # and initialize interface board.
         bitfilename = str(QCoreApplication.applicationDirPath() + "/main.bit")
 
-        if not self.evalBoard.uploadFpgaBitfile(bitfilename):
+        try:
+            self.initializeInterfaceBoard(bitfilename)
+        except IOError:
             QMessageBox.critical(self, "FPGA Configuration File Upload Error",
                                  "Cannot upload configuration file to FPGA.  Make sure file main.bit "
                                  "is in the same directory as the executable file.")
             sys.exit(1)  # abort application
 
-        # Initialize interface board.
-        self.evalBoard.initialize()
-
-        # Read 4-bit board mode.
-        self.evalBoardMode = self.evalBoard.getBoardMode()
-
-        # Set sample rate and upload all auxiliary SPI command sequences.
-        self.changeSampleRate(self.sampleRateComboBox.currentIndex())
-
-        # Select RAM Bank 0 for AuxCmd3 initially, so the ADC is calibrated.
-        self.evalBoard.selectAuxCommandBank(
-            Rhd2000EvalBoard.PortA, Rhd2000EvalBoard.AuxCmd3, 0)
-        self.evalBoard.selectAuxCommandBank(
-            Rhd2000EvalBoard.PortB, Rhd2000EvalBoard.AuxCmd3, 0)
-        self.evalBoard.selectAuxCommandBank(
-            Rhd2000EvalBoard.PortC, Rhd2000EvalBoard.AuxCmd3, 0)
-        self.evalBoard.selectAuxCommandBank(
-            Rhd2000EvalBoard.PortD, Rhd2000EvalBoard.AuxCmd3, 0)
-
-        # Since our longest command sequence is 60 commands, we run the SPI
-        # interface for 60 samples.
-        self.evalBoard.setMaxTimeStep(60)
-        self.evalBoard.setContinuousRunMode(False)
-
-        # Start SPI interface.
-        self.evalBoard.run()
-
-        # Wait for the 60-sample run to complete.
-        while self.evalBoard.isRunning():
-            qApp.processEvents()
-
-        # Read the resulting single data block from the USB interface.
-        dataBlock = Rhd2000DataBlock(self.evalBoard.getNumEnabledDataStreams())
-        self.evalBoard.readDataBlock(dataBlock)
-
-        # Now that ADC calibration has been performed, we switch to the command sequence
-        # that does not execute ADC calibration.
-        if self.fastSettleEnabled:
-            fastSE = 2
-        else:
-            fastSE = 1
-        self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortA, Rhd2000EvalBoard.AuxCmd3,
-                                            fastSE)
-        self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortB, Rhd2000EvalBoard.AuxCmd3,
-                                            fastSE)
-        self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortC, Rhd2000EvalBoard.AuxCmd3,
-                                            fastSE)
-        self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortD, Rhd2000EvalBoard.AuxCmd3,
-                                            fastSE)
-
-        # Set default configuration for all eight DACs on interface board.
-        self.evalBoard.enableDac(0, False)
-        self.evalBoard.enableDac(1, False)
-        self.evalBoard.enableDac(2, False)
-        self.evalBoard.enableDac(3, False)
-        self.evalBoard.enableDac(4, False)
-        self.evalBoard.enableDac(5, False)
-        self.evalBoard.enableDac(6, False)
-        self.evalBoard.enableDac(7, False)
-        # Initially point DACs to DacManual1 input
-        self.evalBoard.selectDacDataStream(0, 8)
-        self.evalBoard.selectDacDataStream(1, 8)
-        self.evalBoard.selectDacDataStream(2, 8)
-        self.evalBoard.selectDacDataStream(3, 8)
-        self.evalBoard.selectDacDataStream(4, 8)
-        self.evalBoard.selectDacDataStream(5, 8)
-        self.evalBoard.selectDacDataStream(6, 8)
-        self.evalBoard.selectDacDataStream(7, 8)
-        self.evalBoard.selectDacDataChannel(0, 0)
-        self.evalBoard.selectDacDataChannel(1, 1)
-        self.evalBoard.selectDacDataChannel(2, 0)
-        self.evalBoard.selectDacDataChannel(3, 0)
-        self.evalBoard.selectDacDataChannel(4, 0)
-        self.evalBoard.selectDacDataChannel(5, 0)
-        self.evalBoard.selectDacDataChannel(6, 0)
-        self.evalBoard.selectDacDataChannel(7, 0)
-        self.evalBoard.setDacManual(32768)
-        self.evalBoard.setDacGain(0)
-        self.evalBoard.setAudioNoiseSuppress(0)
-
-        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortA, 0.0)
-        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortB, 0.0)
-        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortC, 0.0)
-        self.evalBoard.setCableLengthMeters(Rhd2000EvalBoard.PortD, 0.0)
-
+    # Scan SPI ports A-D for connected amplifiers, and update the Port A-D
+    # radio buttons.
     def findConnectedAmplifiers(self):
-        numChannelsOnPort = [0, 0, 0, 0]
-
-        portIndex = [-1]*constants.MAX_NUM_DATA_STREAMS
-        portIndexOld = [-1]*constants.MAX_NUM_DATA_STREAMS
-        chipIdOld = [-1]*constants.MAX_NUM_DATA_STREAMS
-
-        for i in range(len(self.chipId)):
-            self.chipId[i] = -1
-
-        initStreamPorts = [
-            Rhd2000EvalBoard.PortA1,
-            Rhd2000EvalBoard.PortA2,
-            Rhd2000EvalBoard.PortB1,
-            Rhd2000EvalBoard.PortB2,
-            Rhd2000EvalBoard.PortC1,
-            Rhd2000EvalBoard.PortC2,
-            Rhd2000EvalBoard.PortD1,
-            Rhd2000EvalBoard.PortD2]
-
-        initStreamDdrPorts = [
-            Rhd2000EvalBoard.PortA1Ddr,
-            Rhd2000EvalBoard.PortA2Ddr,
-            Rhd2000EvalBoard.PortB1Ddr,
-            Rhd2000EvalBoard.PortB2Ddr,
-            Rhd2000EvalBoard.PortC1Ddr,
-            Rhd2000EvalBoard.PortC2Ddr,
-            Rhd2000EvalBoard.PortD1Ddr,
-            Rhd2000EvalBoard.PortD2Ddr]
-
-        if not self.synthMode:
-            # Set sampling rate to highest value for maximum temporal resolution.
-            self.changeSampleRate(self.sampleRateComboBox.count() - 1)
-
-            # Enable all data streams, and set sources to cover one or two chips
-            # on Ports A-D.
-            self.evalBoard.setDataSource(0, initStreamPorts[0])
-            self.evalBoard.setDataSource(1, initStreamPorts[1])
-            self.evalBoard.setDataSource(2, initStreamPorts[2])
-            self.evalBoard.setDataSource(3, initStreamPorts[3])
-            self.evalBoard.setDataSource(4, initStreamPorts[4])
-            self.evalBoard.setDataSource(5, initStreamPorts[5])
-            self.evalBoard.setDataSource(6, initStreamPorts[6])
-            self.evalBoard.setDataSource(7, initStreamPorts[7])
-
-            portIndexOld[0] = 0
-            portIndexOld[1] = 0
-            portIndexOld[2] = 1
-            portIndexOld[3] = 1
-            portIndexOld[4] = 2
-            portIndexOld[5] = 2
-            portIndexOld[6] = 3
-            portIndexOld[7] = 3
-
-            self.evalBoard.enableDataStream(0, True)
-            self.evalBoard.enableDataStream(1, True)
-            self.evalBoard.enableDataStream(2, True)
-            self.evalBoard.enableDataStream(3, True)
-            self.evalBoard.enableDataStream(4, True)
-            self.evalBoard.enableDataStream(5, True)
-            self.evalBoard.enableDataStream(6, True)
-            self.evalBoard.enableDataStream(7, True)
-
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortA,
-                                                Rhd2000EvalBoard.AuxCmd3, 0)
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortB,
-                                                Rhd2000EvalBoard.AuxCmd3, 0)
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortC,
-                                                Rhd2000EvalBoard.AuxCmd3, 0)
-            self.evalBoard.selectAuxCommandBank(Rhd2000EvalBoard.PortD,
-                                                Rhd2000EvalBoard.AuxCmd3, 0)
-
-            # Since our longest command sequence is 60 commands, we run the SPI
-            # interface for 60 samples.
-            self.evalBoard.setMaxTimeStep(60)
-            self.evalBoard.setContinuousRunMode(False)
-
-            dataBlock = Rhd2000DataBlock(
-                self.evalBoard.getNumEnabledDataStreams())
-            sumGoodDelays = [0]*constants.MAX_NUM_DATA_STREAMS
-            indexFirstGoodDelay = [-1]*constants.MAX_NUM_DATA_STREAMS
-            indexSecondGoodDelay = [-1]*constants.MAX_NUM_DATA_STREAMS
-
-            # Run SPI command sequence at all 16 possible FPGA MISO delay settings
-            # to find optimum delay for each SPI interface cable.
-            for delay in range(16):
-                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortA, delay)
-                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortB, delay)
-                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortC, delay)
-                self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortD, delay)
-
-                # Start SPI interface.
-                self.evalBoard.run()
-
-                # Wait for the 60-sample run to complete.
-                while self.evalBoard.isRunning():
-                    qApp.processEvents()
-
-                # Read the resulting single data block from the USB interface.
-                self.evalBoard.readDataBlock(dataBlock)
-
-                # Read the Intan chip ID number from each RHD2000 chip found.
-                # Record delay settings that yield good communication with the chip.
-                for stream in range(constants.MAX_NUM_DATA_STREAMS):
-                    did, register59Value = self.deviceId(dataBlock, stream)
-
-                    if (did == constants.CHIP_ID_RHD2132 or did == constants.CHIP_ID_RHD2216 or
-                            (did == constants.CHIP_ID_RHD2164 and register59Value == constants.REGISTER_59_MISO_A)):
-                        # cout << "Delay: " << delay << " on stream " << stream << " is good." << endl
-                        sumGoodDelays[stream] = sumGoodDelays[stream] + 1
-                        if indexFirstGoodDelay[stream] == -1:
-                            indexFirstGoodDelay[stream] = delay
-                            chipIdOld[stream] = did
-                        elif indexSecondGoodDelay[stream] == -1:
-                            indexSecondGoodDelay[stream] = delay
-                            chipIdOld[stream] = did
-
-            # Set cable delay settings that yield good communication with each
-            # RHD2000 chip.
-            optimumDelay = [0]*constants.MAX_NUM_DATA_STREAMS
-            for stream in range(constants.MAX_NUM_DATA_STREAMS):
-                if sumGoodDelays[stream] == 1 or sumGoodDelays[stream] == 2:
-                    optimumDelay[stream] = indexFirstGoodDelay[stream]
-                elif sumGoodDelays[stream] > 2:
-                    optimumDelay[stream] = indexSecondGoodDelay[stream]
-
-            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortA,
-                                         max(optimumDelay[0], optimumDelay[1]))
-            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortB,
-                                         max(optimumDelay[2], optimumDelay[3]))
-            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortC,
-                                         max(optimumDelay[4], optimumDelay[5]))
-            self.evalBoard.setCableDelay(Rhd2000EvalBoard.PortD,
-                                         max(optimumDelay[6], optimumDelay[7]))
-
-    #        cout << "Port A cable delay: " << qMax(optimumDelay[0], optimumDelay[1]) << endl
-    #        cout << "Port B cable delay: " << qMax(optimumDelay[2], optimumDelay[3]) << endl
-    #        cout << "Port C cable delay: " << qMax(optimumDelay[4], optimumDelay[5]) << endl
-    #        cout << "Port D cable delay: " << qMax(optimumDelay[6], optimumDelay[7]) << endl
-
-            self.cableLengthPortA = self.evalBoard.estimateCableLengthMeters(
-                max(optimumDelay[0], optimumDelay[1]))
-            self.cableLengthPortB = self.evalBoard.estimateCableLengthMeters(
-                max(optimumDelay[2], optimumDelay[3]))
-            self.cableLengthPortC = self.evalBoard.estimateCableLengthMeters(
-                max(optimumDelay[4], optimumDelay[5]))
-            self.cableLengthPortD = self.evalBoard.estimateCableLengthMeters(
-                max(optimumDelay[6], optimumDelay[7]))
-
-        else:
-            # If we are running with synthetic data (i.e., no interface board), just assume
-            # that one RHD2132 is plugged into Port A.
-            chipIdOld[0] = constants.CHIP_ID_RHD2132
-            portIndexOld[0] = 0
-
-        # Now that we know which RHD2000 amplifier chips are plugged into each SPI port,
-        # add up the total number of amplifier channels on each port and calcualate the number
-        # of data streams necessary to convey self data over the USB interface.
-        numStreamsRequired = 0
-        rhd2216ChipPresent = False
-        for stream in range(constants.MAX_NUM_DATA_STREAMS):
-            if chipIdOld[stream] == constants.CHIP_ID_RHD2216:
-                numStreamsRequired += 1
-                if numStreamsRequired <= constants.MAX_NUM_DATA_STREAMS:
-                    numChannelsOnPort[portIndexOld[stream]] += 16
-                rhd2216ChipPresent = True
-
-            if chipIdOld[stream] == constants.CHIP_ID_RHD2132:
-                numStreamsRequired += 1
-                if numStreamsRequired <= constants.MAX_NUM_DATA_STREAMS:
-                    numChannelsOnPort[portIndexOld[stream]] += 32
-            if chipIdOld[stream] == constants.CHIP_ID_RHD2164:
-                numStreamsRequired += 2
-                if numStreamsRequired <= constants.MAX_NUM_DATA_STREAMS:
-                    numChannelsOnPort[portIndexOld[stream]] += 64
-
-        # If the user plugs in more chips than the USB interface can support, throw
-        # up a warning that not all channels will be displayed.
-        if numStreamsRequired > 8:
-            if rhd2216ChipPresent:
-                QMessageBox.warning(self, "Capacity of USB Interface Exceeded",
-                                    "self RHD2000 USB interface board can support 256 only amplifier channels."
-                                    "<p>More than 256 total amplifier channels are currently connected.  (Each RHD2216 "
-                                    "chip counts as 32 channels for USB interface purposes.)"
-                                    "<p>Amplifier chips exceeding self limit will not appear in the GUI.")
-            else:
-                QMessageBox.warning(self, "Capacity of USB Interface Exceeded",
-                                    "self RHD2000 USB interface board can support 256 only amplifier channels."
-                                    "<p>More than 256 total amplifier channels are currently connected."
-                                    "<p>Amplifier chips exceeding self limit will not appear in the GUI.")
-
-        # Reconfigure USB data streams in consecutive order to accommodate all connected chips.
-        stream = 0
-        for oldStream in range(constants.MAX_NUM_DATA_STREAMS):
-            if (chipIdOld[oldStream] == constants.CHIP_ID_RHD2216) and (stream < constants.MAX_NUM_DATA_STREAMS):
-                self.chipId[stream] = constants.CHIP_ID_RHD2216
-                portIndex[stream] = portIndexOld[oldStream]
-                if not self.synthMode:
-                    self.evalBoard.enableDataStream(stream, True)
-                    self.evalBoard.setDataSource(
-                        stream, initStreamPorts[oldStream])
-
-                stream += 1
-            elif (chipIdOld[oldStream] == constants.CHIP_ID_RHD2132) and (stream < constants.MAX_NUM_DATA_STREAMS):
-                self.chipId[stream] = constants.CHIP_ID_RHD2132
-                portIndex[stream] = portIndexOld[oldStream]
-                if not self.synthMode:
-                    self.evalBoard.enableDataStream(stream, True)
-                    self.evalBoard.setDataSource(
-                        stream, initStreamPorts[oldStream])
-                stream += 1
-            elif (chipIdOld[oldStream] == constants.CHIP_ID_RHD2164) and (stream < constants.MAX_NUM_DATA_STREAMS - 1):
-                self.chipId[stream] = constants.CHIP_ID_RHD2164
-                self.chipId[stream + 1] = constants.CHIP_ID_RHD2164_B
-                portIndex[stream] = portIndexOld[oldStream]
-                portIndex[stream + 1] = portIndexOld[oldStream]
-                if not self.synthMode:
-                    self.evalBoard.enableDataStream(stream, True)
-                    self.evalBoard.enableDataStream(stream + 1, True)
-                    self.evalBoard.setDataSource(
-                        stream, initStreamPorts[oldStream])
-                    self.evalBoard.setDataSource(
-                        stream + 1, initStreamDdrPorts[oldStream])
-
-                stream += 2
-
-        # Disable unused data streams.
-        for stream in range(stream, constants.MAX_NUM_DATA_STREAMS):
-            if not self.synthMode:
-                self.evalBoard.enableDataStream(stream, False)
-
-        # Add channel descriptions to the SignalSources object to create a list of all waveforms.
-        for port in range(4):
-            if numChannelsOnPort[port] == 0:
-                self.signalSources.signalPort[port].channel.clear()
-                self.signalSources.signalPort[port].enabled = False
-            elif self.signalSources.signalPort[port].numAmplifierChannels() != numChannelsOnPort[port]:
-                # if number of channels on port has changed...
-                # ...clear existing channels...
-                self.signalSources.signalPort[port].channel.clear()
-                # ...and create new ones.
-                channel = 0
-                # Create amplifier channels for each chip.
-                for stream in range(constants.MAX_NUM_DATA_STREAMS):
-                    if portIndex[stream] == port:
-                        if self.chipId[stream] == constants.CHIP_ID_RHD2216:
-                            for i in range(16):
-                                self.signalSources.signalPort[port].addAmplifierChannelSpecific(
-                                    channel, i, stream)
-                                channel += 1
-                        elif self.chipId[stream] == constants.CHIP_ID_RHD2132:
-                            for i in range(32):
-                                self.signalSources.signalPort[port].addAmplifierChannelSpecific(
-                                    channel, i, stream)
-                                channel += 1
-                        elif self.chipId[stream] == constants.CHIP_ID_RHD2164:
-                            # 32 channels on MISO A another 32 on MISO B
-                            for i in range(32):
-                                self.signalSources.signalPort[port].addAmplifierChannelSpecific(
-                                    channel, i, stream)
-                                channel += 1
-                        elif self.chipId[stream] == constants.CHIP_ID_RHD2164_B:
-                            # 32 channels on MISO A another 32 on MISO B
-                            for i in range(32):
-                                self.signalSources.signalPort[port].addAmplifierChannelSpecific(
-                                    channel, i, stream)
-                                channel += 1
-
-                # Now create auxiliary input channels and supply voltage channels for each chip.
-                auxName = 1
-                vddName = 1
-                for stream in range(constants.MAX_NUM_DATA_STREAMS):
-                    if portIndex[stream] == port:
-                        if self.chipId[stream] == constants.CHIP_ID_RHD2216 or self.chipId[stream] == constants.CHIP_ID_RHD2132 or self.chipId[stream] == constants.CHIP_ID_RHD2164:
-                            self.signalSources.signalPort[port].addAuxInputChannel(
-                                channel, 0, auxName, stream)
-                            channel += 1
-                            auxName += 1
-                            self.signalSources.signalPort[port].addAuxInputChannel(
-                                channel, 1, auxName, stream)
-                            channel += 1
-                            auxName += 1
-                            self.signalSources.signalPort[port].addAuxInputChannel(
-                                channel, 2, auxName, stream)
-                            channel += 1
-                            auxName += 1
-                            self.signalSources.signalPort[port].addSupplyVoltageChannel(
-                                channel, 0, vddName, stream)
-                            channel += 1
-                            vddName += 1
-                # If number of channels on port has not changed, don't create new channels (since self
-            else:
-                # would clear all user-defined channel names.  But we must update the data stream indices
-                # on the port.
-                channel = 0
-                # Update stream indices for amplifier channels.
-                for stream in range(constants.MAX_NUM_DATA_STREAMS):
-                    if portIndex[stream] == port:
-                        if self.chipId[stream] == constants.CHIP_ID_RHD2216:
-                            for i in range(channel, channel + 16):
-                                self.signalSources.signalPort[port].channel[i].boardStream = stream
-                            channel += 16
-                        elif self.chipId[stream] == constants.CHIP_ID_RHD2132:
-                            for i in range(channel, channel + 32):
-                                self.signalSources.signalPort[port].channel[i].boardStream = stream
-                            channel += 32
-                        elif self.chipId[stream] == constants.CHIP_ID_RHD2164:
-                            # 32 channels on MISO A another 32 on MISO B
-                            for i in range(channel, channel + 32):
-                                self.signalSources.signalPort[port].channel[i].boardStream = stream
-                            channel += 32
-                        elif self.chipId[stream] == constants.CHIP_ID_RHD2164_B:
-                            # 32 channels on MISO A another 32 on MISO B
-                            for i in range(channel, channel + 32):
-                                self.signalSources.signalPort[port].channel[i].boardStream = stream
-                            channel += 32
-                # Update stream indices for auxiliary channels and supply voltage channels.
-                for stream in range(constants.MAX_NUM_DATA_STREAMS):
-                    if portIndex[stream] == port:
-                        if self.chipId[stream] == constants.CHIP_ID_RHD2216 or self.chipId[stream] == constants.CHIP_ID_RHD2132 or self.chipId[stream] == constants.CHIP_ID_RHD2164:
-                            self.signalSources.signalPort[port].channel[channel].boardStream = stream
-                            channel += 1
-                            self.signalSources.signalPort[port].channel[channel].boardStream = stream
-                            channel += 1
-                            self.signalSources.signalPort[port].channel[channel].boardStream = stream
-                            channel += 1
-                            self.signalSources.signalPort[port].channel[channel].boardStream = stream
-                            channel += 1
+        super().findConnectedAmplifiers()
 
         # Update Port A-D radio buttons in GUI
         if self.signalSources.signalPort[0].numAmplifierChannels() == 0:
@@ -2130,55 +1395,24 @@ class MainWindow(QMainWindow):
         else:
             self.displayAdcButton.setChecked(True)
 
-        # Return sample rate to original user-selected value.
-        self.changeSampleRate(self.sampleRateComboBox.currentIndex())
-
-        # signalSources.signalPort[0].print()
-        # signalSources.signalPort[1].print()
-        # signalSources.signalPort[2].print()
-        # signalSources.signalPort[3].print()
-
-    # Return the Intan chip ID stored in ROM register 63.  If the data is invalid
-    # (due to a SPI communication channel with the wrong delay or a chip not present)
-    # then return -1.  The value of ROM register 59 is also returned.  self register
-    # has a value of 0 on RHD2132 and RHD2216 chips, but in RHD2164 chips it is used
-    # to align the DDR MISO A/B data from the SPI bus.  (Register 59 has a value of 53
-    # on MISO A and a value of 58 on MISO B.)
-    def deviceId(self, dataBlock, stream):
-        # First, check ROM registers 32-36 to verify that they hold 'INTAN', and
-        # the initial chip name ROM registers 24-26 that hold 'RHD'.
-        # self is just used to verify that we are getting good data over the SPI
-        # communication channel.
-        intanChipPresent = (chr(dataBlock.auxiliaryData[stream][2][32]) == 'I' and
-                            chr(dataBlock.auxiliaryData[stream][2][33]) == 'N' and
-                            chr(dataBlock.auxiliaryData[stream][2][34]) == 'T' and
-                            chr(dataBlock.auxiliaryData[stream][2][35]) == 'A' and
-                            chr(dataBlock.auxiliaryData[stream][2][36]) == 'N' and
-                            chr(dataBlock.auxiliaryData[stream][2][24]) == 'R' and
-                            chr(dataBlock.auxiliaryData[stream][2][25]) == 'H' and
-                            chr(dataBlock.auxiliaryData[stream][2][26]) == 'D')
-
-        # If the SPI communication is bad, return -1.  Otherwise, return the Intan
-        # chip ID number stored in ROM regstier 63.
-        if not intanChipPresent:
-            register59Value = -1
-            return -1, register59Value
+    # Warn that more amplifier chips are connected than the USB interface board
+    # can support.
+    def warnCapacityExceeded(self, rhd2216ChipPresent):
+        if rhd2216ChipPresent:
+            QMessageBox.warning(self, "Capacity of USB Interface Exceeded",
+                                "This RHD2000 USB interface board can support 256 only amplifier channels."
+                                "<p>More than 256 total amplifier channels are currently connected.  (Each RHD2216 "
+                                "chip counts as 32 channels for USB interface purposes.)"
+                                "<p>Amplifier chips exceeding this limit will not appear in the GUI.")
         else:
-            # Register 59
-            register59Value = dataBlock.auxiliaryData[stream][2][23]
-            # chip ID (Register 63)
-            return dataBlock.auxiliaryData[stream][2][19], register59Value
+            QMessageBox.warning(self, "Capacity of USB Interface Exceeded",
+                                "This RHD2000 USB interface board can support 256 only amplifier channels."
+                                "<p>More than 256 total amplifier channels are currently connected."
+                                "<p>Amplifier chips exceeding this limit will not appear in the GUI.")
 
     # Start recording data from USB interface board to disk.
     def recordInterfaceBoard(self):
-        # Create list of enabled channels that will be saved to disk.
-        self.signalProcessor.createSaveList(self.signalSources, False, 0)
-
-        self.startNewSaveFile(self.saveFormat)
-
-        # Write save file header information.
-        self.writeSaveFileHeader(self.saveStream, self.infoStream,
-                                 self.saveFormat, self.signalProcessor.getNumTempSensors())
+        self.captureSaveFileSettings()
 
         # Disable some GUI buttons while recording is in progress.
         self.enableChannelButton.setEnabled(False)
@@ -2188,26 +1422,21 @@ class MainWindow(QMainWindow):
         # recordFileSpinBox.setEnabled(False)
         self.setSaveFormatButton.setEnabled(False)
 
-        self.recording = True
-        self.triggerSet = False
-        self.triggered = False
-        self.runInterfaceBoard()
+        self.record(self.saveBaseFileName)
 
     # Wait for user-defined trigger to start recording data from USB interface board to disk.
     def triggerRecordInterfaceBoard(self):
         self.triggerRecordDialog = TriggerRecordDialog(
-            self.recordTriggerChannel, self.recordTriggerPolarity, self.recordTriggerBuffer, self.postTriggerTime, self.saveTriggerChannel, self)
+            self.recordTriggerChannel, self.recordTriggerPolarity, self.recordTriggerEdge, self.recordTriggerBuffer, self.postTriggerTime, self.saveTriggerChannel, self)
         if self.triggerRecordDialog.exec():
-            self.recordTriggerChannel = self.triggerRecordDialog.digitalInput
-            self.recordTriggerPolarity = self.triggerRecordDialog.triggerPolarity
-            self.recordTriggerBuffer = self.triggerRecordDialog.recordBuffer
-            self.postTriggerTime = self.triggerRecordDialog.postTriggerTime
-            self.saveTriggerChannel = (
-                self.triggerRecordDialog.saveTriggerChannelCheckBox.checkState() == Qt.Checked)
+            self.setTrigger(self.triggerRecordDialog.digitalInput,
+                            self.triggerRecordDialog.triggerPolarity,
+                            self.triggerRecordDialog.recordBuffer,
+                            self.triggerRecordDialog.postTriggerTime,
+                            self.triggerRecordDialog.saveTriggerChannelCheckBox.checkState() == Qt.Checked,
+                            self.triggerRecordDialog.triggerEdgeCheckBox.checkState() == Qt.Checked)
 
-            # Create list of enabled channels that will be saved to disk.
-            self.signalProcessor.createSaveList(
-                self.signalSources, self.saveTriggerChannel, self.recordTriggerChannel)
+            self.captureSaveFileSettings()
 
             # Disable some GUI buttons while recording is in progress.
             self.enableChannelButton.setEnabled(False)
@@ -2217,108 +1446,31 @@ class MainWindow(QMainWindow):
             # recordFileSpinBox.setEnabled(False)
             self.setSaveFormatButton.setEnabled(False)
 
-            self.recording = False
-            self.triggerSet = True
-            self.triggered = False
-            self.runInterfaceBoard()
+            self.triggerRecord(self.saveBaseFileName)
 
         self.wavePlot.setFocus()
 
-    def writeSaveFileHeader(self, outStream, infoStream, saveFormat, numTempSensors):
-        for i in range(16):
-            self.signalSources.signalPort[6].channel[i].enabled = self.saveTtlOut
-
-        if saveFormat == constants.SaveFormatIntan:
-            outStream.writeUInt32(constants.DATA_FILE_MAGIC_NUMBER)
-            outStream.writeInt16(constants.DATA_FILE_MAIN_VERSION_NUMBER)
-            outStream.writeInt16(constants.DATA_FILE_SECONDARY_VERSION_NUMBER)
-
-            outStream.writeDouble(self.boardSampleRate)
-
-            outStream.writeInt16(self.dspEnabled)
-            outStream.writeDouble(self.actualDspCutoffFreq)
-            outStream.writeDouble(self.actualLowerBandwidth)
-            outStream.writeDouble(self.actualUpperBandwidth)
-
-            outStream.writeDouble(self.desiredDspCutoffFreq)
-            outStream.writeDouble(self.desiredLowerBandwidth)
-            outStream.writeDouble(self.desiredUpperBandwidth)
-
-            outStream.writeInt16(self.notchFilterComboBox.currentIndex())
-
-            outStream.writeDouble(self.desiredImpedanceFreq)
-            outStream.writeDouble(self.actualImpedanceFreq)
-
-            outStream.writeQString(self.note1LineEdit.text())
-            outStream.writeQString(self.note2LineEdit.text())
-            outStream.writeQString(self.note3LineEdit.text())
-
-            if self.saveTemp:
-                # version 1.1 addition
-                outStream.writeInt16(numTempSensors)
-            else:
-                outStream.writeInt16(0)
-
-            outStream.writeInt16(self.evalBoardMode)  # version 1.3 addition
-            self.signalSources.writeToStream(outStream)
-
-        elif saveFormat == constants.SaveFormatFilePerSignalType or saveFormat == constants.SaveFormatFilePerChannel:
-            infoStream.writeUInt32(constants.DATA_FILE_MAGIC_NUMBER)
-            infoStream.writeInt16(constants.DATA_FILE_MAIN_VERSION_NUMBER)
-            infoStream.writeInt16(constants.DATA_FILE_SECONDARY_VERSION_NUMBER)
-
-            infoStream.writeDouble(self.boardSampleRate)
-
-            infoStream.writeInt16(self.dspEnabled)
-            infoStream.writeDouble(self.actualDspCutoffFreq)
-            infoStream.writeDouble(self.actualLowerBandwidth)
-            infoStream.writeDouble(self.actualUpperBandwidth)
-
-            infoStream.writeDouble(self.desiredDspCutoffFreq)
-            infoStream.writeDouble(self.desiredLowerBandwidth)
-            infoStream.writeDouble(self.desiredUpperBandwidth)
-
-            infoStream.writeInt16(self.notchFilterComboBox.currentIndex())
-
-            infoStream.writeDouble(self.desiredImpedanceFreq)
-            infoStream.writeDouble(self.actualImpedanceFreq)
-
-            infoStream.writeQString(self.note1LineEdit.text())
-            infoStream.writeQString(self.note2LineEdit.text())
-            infoStream.writeQString(self.note3LineEdit.text())
-
-            infoStream.writeInt16(0)
-
-            # version 1.3 addition(bug fix: added here in version 1.41)
-            infoStream.writeInt16(self.evalBoardMode)
-
-            self.signalSources.writeToStream(infoStream)
+    # Capture the save file header settings that are read from GUI widgets.  Save
+    # files started while running are created by the acquisition thread, which
+    # must not access widgets.
+    def captureSaveFileSettings(self):
+        self.saveFileNotes = [self.note1LineEdit.text(),
+                              self.note2LineEdit.text(), self.note3LineEdit.text()]
 
     # Start SPI communication to all connected RHD2000 amplifiers and stream
-    # waveform data over USB port.
-    def runInterfaceBoard(self):
-        timer = QTime()
-        bufferQueue = DataQueue()
-        triggerIndex = 0
-
+    # waveform data over USB port, until seconds of data have been acquired (if
+    # given) or the stop button is clicked.  Called by run(), record() and
+    # triggerRecord().
+    #
+    # USB data is read, processed and saved to disk by the AcquisitionEngine
+    # acquisition loop on a separate acquisition thread (acquireInterfaceBoard),
+    # which hands finished waveform frames to this GUI loop through a FrameRing.
+    # The GUI consumes frames at display rate; if it falls behind, frames are
+    # dropped from the display, but the acquisition thread keeps draining the
+    # USB FIFO and recording every block.  callback, if given, is called by the
+    # acquisition thread after every read.
+    def runInterfaceBoard(self, seconds=None, callback=None):
         extraCycles = 0
-        timestampOffset = 0
-        preTriggerBufferQueueLength = 0
-        fifoNearlyFull = 0
-        triggerEndCounter = 0
-
-        triggerEndThreshold = math.ceil(self.postTriggerTime * self.boardSampleRate / (
-            self.numUsbBlocksToRead * constants.SAMPLES_PER_DATA_BLOCK)) - 1
-
-        if self.triggerSet:
-            preTriggerBufferQueueLength = self.numUsbBlocksToRead * math.ceil(self.recordTriggerBuffer / (
-                self.numUsbBlocksToRead * Rhd2000DataBlock.getSamplesPerDataBlock() / self.boardSampleRate)) + 1
-
-        # QSound triggerBeep(QDir.tempPath() + "/triggerbeep.wav")
-        # QSound triggerEndBeep(QDir.tempPath() + "/triggerendbeep.wav")
-
-        # Average temperature sensor readings over a ~0.1 second interval.
-        self.signalProcessor.tempHistoryReset(self.numUsbBlocksToRead * 3)
 
         self.running = True
         self.wavePlot.setFocus()
@@ -2341,32 +1493,9 @@ class MainWindow(QMainWindow):
         self.digOutButton.setEnabled(False)
         self.setSaveFormatButton.setEnabled(False)
 
-        # Turn LEDs on to indicate that data acquisition is running.
-        self.ttlOut[15] = 1
-        ledArray = [1, 0, 0, 0, 0, 0, 0, 0]
-        ledIndex = 0
-        if not self.synthMode:
-            self.evalBoard.setLedDisplay(ledArray)
-            self.evalBoard.setTtlOut(self.ttlOut)
-
-        if self.synthMode:
-            dataBlockSize = Rhd2000DataBlock.calculateDataBlockSizeInWords(1)
-        else:
-            dataBlockSize = Rhd2000DataBlock.calculateDataBlockSizeInWords(
-                self.evalBoard.getNumEnabledDataStreams())
-
-        totalBytesWritten = 0
-        totalRecordTimeSeconds = 0.0
-        recordTimeIncrementSeconds = self.numUsbBlocksToRead * \
-            Rhd2000DataBlock.getSamplesPerDataBlock() / self.boardSampleRate
-
         # Calculate the number of bytes per minute that we will be saving to disk
         # if recording data (excluding headers).
-        bytesPerMinute = Rhd2000DataBlock.getSamplesPerDataBlock() * (self.signalProcessor.bytesPerBlock(self.saveFormat,
-                                                                                                         self.saveTemp, self.saveTtlOut) / Rhd2000DataBlock.getSamplesPerDataBlock()) * self.boardSampleRate
-
-        samplePeriod = 1.0 / self.boardSampleRate
-        fifoCapacity = Rhd2000EvalBoard.fifoCapacityInWords()
+        bytesPerMinute = self.bytesPerMinute()
 
         if self.recording:
             self.setStatusBarRecording(bytesPerMinute)
@@ -2375,211 +1504,71 @@ class MainWindow(QMainWindow):
         else:
             self.setStatusBarRunning()
 
-        if not self.synthMode:
-            self.evalBoard.setContinuousRunMode(True)
-            self.evalBoard.run()
-        else:
-            timer.start()
+        self.frameRing = FrameRing(4, self.signalProcessor.numDataStreams, self.numUsbBlocksToRead,
+                                   self.signalProcessor.waveformDtype)
+        self.acquisitionError = None
+        acquisitionThread = threading.Thread(target=self.acquireInterfaceBoard, args=(seconds, callback),
+                                             name="Acquisition", daemon=True)
+        acquisitionThread.start()
 
-        while self.running:
-            # If we are running in demo mode, use a timer to periodically generate more synthetic
-            # data.  If not, wait for a certain amount of data to be ready from the USB interface board.
-            if self.synthMode:
-                newDataReady = (timer.elapsed() >= (
-                    (1000.0 * 60.0 * self.numUsbBlocksToRead / self.boardSampleRate)))
-            else:
-                # takes about 17 ms at 30 kS/s with 256 amplifiers
-                newDataReady = self.evalBoard.readDataBlocks(
-                    self.numUsbBlocksToRead, self.dataQueue)
+        recordingState = (self.recording, self.triggerSet, self.saveFileName)
 
-            # If new data is ready, then read it.
-            if newDataReady:
-                # statusBarLabel.setText("Running.  Extra CPU cycles: " + QString.number(extraCycles))
-
-                if self.synthMode:
-                    timer.start()  # restart timer
-                    fifoPercentageFull = 0.0
-
-                    # Generate synthetic data
-                    totalBytesWritten += self.signalProcessor.loadSyntheticData(
-                        self.numUsbBlocksToRead, self.boardSampleRate, self.recording, self.saveStream, self.saveFormat, self.saveTemp, self.saveTtlOut)
-                else:
-                    # Check the number of words stored in the Opal Kelly USB interface FIFO.
-                    wordsInFifo = self.evalBoard.numWordsInFifo()
-                    latency = 1000.0 * Rhd2000DataBlock.getSamplesPerDataBlock() * (wordsInFifo /
-                                                                                    dataBlockSize) * samplePeriod
-
-                    fifoPercentageFull = 100.0 * wordsInFifo / fifoCapacity
-
-                    # Alert the user if the number of words in the FIFO is getting to be significant
-                    # or nearing FIFO capacity.
+        while self.running:
+            frame = self.frameRing.takeFrame()
 
-                    self.fifoLagLabel.setText(("%.0f" % latency) + " ms")
-                    if latency > 50.0:
+            if frame:
+                # Alert the user if the number of words in the FIFO is getting to be significant
+                # or nearing FIFO capacity.
+                if not self.synthMode:
+                    self.fifoLagLabel.setText(("%.0f" % frame.latency) + " ms")
+                    if frame.latency > 50.0:
                         self.fifoLagLabel.setStyleSheet("color: red")
                     else:
                         self.fifoLagLabel.setStyleSheet("color: green")
 
                     self.fifoFullLabel.setText(
-                        "(" + ("%.0f" % fifoPercentageFull) + "% full)")
-                    if fifoPercentageFull > 75.0:
+                        "(" + ("%.0f" % frame.fifoPercentageFull) + "% full)")
+                    if frame.fifoPercentageFull > 75.0:
                         self.fifoFullLabel.setStyleSheet("color: red")
                     else:
                         self.fifoFullLabel.setStyleSheet("color: black")
 
-                    # Read waveform data from USB interface board.
-                    if self.triggered:
-                        triggerPolarity = (1 - self.recordTriggerPolarity)
-                    else:
-                        triggerPolarity = self.recordTriggerPolarity
-                    totalBytesWrittenTmp, triggerIndex = self.signalProcessor.loadAmplifierData(self.dataQueue, self.numUsbBlocksToRead,
-                                                                                                (self.triggerSet |
-                                                                                                 self.triggered), self.recordTriggerChannel,
-                                                                                                triggerPolarity,
-                                                                                                triggerIndex,
-                                                                                                self.triggerSet, bufferQueue,
-                                                                                                self.recording, self.saveStream, self.saveFormat, self.saveTemp,
-                                                                                                self.saveTtlOut, timestampOffset)
-
-                    totalBytesWritten += totalBytesWrittenTmp
-
-                    while len(bufferQueue) > preTriggerBufferQueueLength:
-                        bufferQueue.pop()
-
-                    if self.triggerSet and (triggerIndex != -1):
-                        self.triggerSet = False
-                        self.triggered = True
-                        self.recording = True
-                        timestampOffset = triggerIndex
-
-                        # Play trigger sound
-                        # triggerBeep.play()
-
-                        self.startNewSaveFile(self.saveFormat)
-
-                        # Write save file header information.
-                        self.writeSaveFileHeader(
-                            self.saveStream, self.infoStream, self.saveFormat, self.signalProcessor.getNumTempSensors())
-
-                        self.setStatusBarRecording(bytesPerMinute)
-
-                        totalRecordTimeSeconds = len(
-                            bufferQueue) * Rhd2000DataBlock.getSamplesPerDataBlock() / self.boardSampleRate
-
-                        # Write contents of pre-trigger buffer to file.
-                        totalBytesWritten += self.signalProcessor.saveBufferedData(bufferQueue, self.saveStream, self.saveFormat,
-                                                                                   self.saveTemp, self.saveTtlOut, timestampOffset)
-                    # New in version 1.5: episodic triggered recording
-                    elif self.triggered and (triggerIndex != -1):
-                        triggerEndCounter += 1
-                        if triggerEndCounter > triggerEndThreshold:
-                                                        # Keep recording for the specified number of seconds after the trigger has
-                                                        # been de-asserted.
-                            triggerEndCounter = 0
-                            # Enable trigger again for True episodic recording.
-                            self.triggerSet = True
-                            self.triggered = False
-                            self.recording = False
-                            self.closeSaveFile(self.saveFormat)
-                            totalRecordTimeSeconds = 0.0
-
-                            self.setStatusBarWaitForTrigger()
-
-                            # Play trigger end sound
-                            # triggerEndBeep.play()
-
-                    elif self.triggered:
-                        # Ignore brief (< 1 second) trigger-off events.
-                        triggerEndCounter = 0
-
-                # Apply notch filter to amplifier data.
-                self.signalProcessor.filterData(
-                    self.numUsbBlocksToRead, self.channelVisible)
-
                 # Trigger WavePlot widget to display new waveform data.
-                self.wavePlot.passFilteredData()
+                self.wavePlot.passFilteredData(frame)
 
                 # Trigger Spike Scope to update with new waveform data.
                 if self.spikeScopeDialog:
                     self.spikeScopeDialog.updateWaveform(
-                        self.numUsbBlocksToRead)
+                        frame.numBlocks, frame)
 
-                # If we are recording in Intan format and our data file has reached its specified
-                # maximum length (e.g., 1 minute), close the current data file and open a new one.
+                self.frameRing.releaseFrame()
 
+            # Update the status bar when the acquisition thread starts or stops
+            # recording (triggers, episodic recording and new save files).
+            if (self.recording, self.triggerSet, self.saveFileName) != recordingState:
+                recordingState = (self.recording,
+                                  self.triggerSet, self.saveFileName)
                 if self.recording:
-                    totalRecordTimeSeconds += recordTimeIncrementSeconds
-
-                    if self.saveFormat == constants.SaveFormatIntan:
-                        if totalRecordTimeSeconds >= (60 * self.newSaveFilePeriodMinutes):
-                            self.closeSaveFile(self.saveFormat)
-                            self.startNewSaveFile(self.saveFormat)
-
-                            # Write save file header information.
-                            self.writeSaveFileHeader(
-                                self.saveStream, self.infoStream, self.saveFormat, self.signalProcessor.getNumTempSensors())
-
-                            self.setStatusBarRecording(bytesPerMinute)
-
-                            totalRecordTimeSeconds = 0.0
-
-                # If the USB interface FIFO (on the FPGA board) exceeds 98% full, halt
-                # data acquisition and display a warning message.
-                if fifoPercentageFull > 98.0:
-                    # We must see the FIFO >98% full three times in a row to eliminate the possiblity
-                    fifoNearlyFull += 1
-                    # of a USB glitch causing recording to stop.  (Added for version 1.5.)
-                    if fifoNearlyFull > 2:
-                        self.running = False
-
-                        # Stop data acquisition
-                        if not self.synthMode:
-                            self.evalBoard.setContinuousRunMode(False)
-                            self.evalBoard.setMaxTimeStep(0)
-
-                        if self.recording:
-                            self.closeSaveFile(self.saveFormat)
-                            self.recording = False
-                            self.triggerSet = False
-                            self.triggered = False
-
-                        # Turn off LED.
-                        for i in range(8):
-                            ledArray[i] = 0
-                        self.ttlOut[15] = 0
-                        if not self.synthMode:
-                            self.evalBoard.setLedDisplay(ledArray)
-                            self.evalBoard.setTtlOut(self.ttlOut)
-
-                        QMessageBox.critical(self, "USB Buffer Overrun Error",
-                                             "Recording was stopped because the USB FIFO buffer on the interface "
-                                             "board reached maximum capacity.  This happens when the host computer "
-                                             "cannot keep up with the data streaming from the interface board."
-                                             "<p>Try lowering the sample rate, disabling the notch filter, or reducing "
-                                             "the number of waveforms on the screen to reduce CPU load.")
-
-                else:
-                    fifoNearlyFull = 0
-
-                # Advance LED display
-                ledArray[ledIndex] = 0
-                ledIndex += 1
-                if ledIndex == 8:
-                    ledIndex = 0
-                ledArray[ledIndex] = 1
-                if not self.synthMode:
-                    self.evalBoard.setLedDisplay(ledArray)
+                    self.setStatusBarRecording(bytesPerMinute)
+                elif self.triggerSet:
+                    self.setStatusBarWaitForTrigger()
 
             qApp.processEvents()  # Stay responsive to GUI events during this loop
             extraCycles += 1
 
-        # Stop data acquisition (when running == False)
-        if not self.synthMode:
-            self.evalBoard.setContinuousRunMode(False)
-            self.evalBoard.setMaxTimeStep(0)
+            # Don't spin while waiting for the next frame.
+            if not frame:
+                time.sleep(0.001)
+
+        acquisitionThread.join()
 
-            # Flush USB FIFO on XEM6010
-            self.evalBoard.flush()
+        if self.fifoOverrun:
+            QMessageBox.critical(self, "USB Buffer Overrun Error",
+                                 "Recording was stopped because the USB FIFO buffer on the interface "
+                                 "board reached maximum capacity.  This happens when the host computer "
+                                 "cannot keep up with the data streaming from the interface board."
+                                 "<p>Try lowering the sample rate, disabling the notch filter, or reducing "
+                                 "the number of waveforms on the screen to reduce CPU load.")
 
         # If external control of chip auxiliary output pins was enabled, make sure
         # all auxout pins are turned off when acquisition stops.
@@ -2610,25 +1599,6 @@ class MainWindow(QMainWindow):
                 self.evalBoard.enableExternalDigOut(
                     Rhd2000EvalBoard.PortD, self.auxDigOutEnabled[3])
 
-        # Close save file, if recording.
-        if self.recording:
-            self.closeSaveFile(self.saveFormat)
-            self.recording = False
-
-        # Reset trigger
-        self.triggerSet = False
-        self.triggered = False
-
-        totalRecordTimeSeconds = 0.0
-
-        # Turn off LED.
-        for i in range(8):
-            ledArray[i] = 0
-        self.ttlOut[15] = 0
-        if not self.synthMode:
-            self.evalBoard.setLedDisplay(ledArray)
-            self.evalBoard.setTtlOut(self.ttlOut)
-
         self.setStatusBarReady()
 
         # Enable/disable various GUI buttons.
@@ -2653,6 +1623,41 @@ class MainWindow(QMainWindow):
         self.sampleRateComboBox.setEnabled(True)
         self.setSaveFormatButton.setEnabled(True)
 
+        # Report any error that stopped the acquisition thread.
+        if self.acquisitionError is not None:
+            raise self.acquisitionError
+
+    # Acquisition thread started by runInterfaceBoard.  Runs the AcquisitionEngine
+    # acquisition loop, which reads waveform data from the USB interface board
+    # (or generates synthetic data), scales, filters and saves it, and handles
+    # triggered and episodic recording, until running is set to False.  The
+    # waveforms of every read are published to frameRing by publishFrame.
+    def acquireInterfaceBoard(self, seconds, callback):
+        def readCallback(engine):
+            self.publishFrame()
+            if callback:
+                callback(engine)
+
+        try:
+            super().runInterfaceBoard(seconds, readCallback)
+        except Exception as e:
+            # USB buffer overruns are reported by runInterfaceBoard.
+            if not self.fifoOverrun:
+                self.acquisitionError = e
+        finally:
+            self.running = False
+
+    # Hand a copy of the new waveform data to the GUI for display.
+    def publishFrame(self):
+        frame = self.frameRing.acquireFrame()
+        frame.copyFrom(self.signalProcessor, self.numUsbBlocksToRead,
+                       self.latency, self.fifoPercentageFull)
+        self.frameRing.publishFrame()
+
+    # Start SPI communication without saving to disk.
+    def runInterfaceBoardSlot(self):
+        self.run()
+
     # Stop SPI data acquisition.
     def stopInterfaceBoard(self):
         self.running = False
@@ -2674,6 +1679,14 @@ class MainWindow(QMainWindow):
             newFileName, _ = QFileDialog.getSaveFileName(self,
                                                          "Select Base Filename", ".",
                                                          "Intan Data Files (*.rhd)")
+        elif saveFormat == constants.SaveFormatRaw:
+            newFileName, _ = QFileDialog.getSaveFileName(self,
+                                                         "Select Base Filename", ".",
+                                                         "Raw USB Data Files (*.raw)")
+        elif saveFormat == constants.SaveFormatCompressed:
+            newFileName, _ = QFileDialog.getSaveFileName(self,
+                                                         "Select Base Filename", ".",
+                                                         "Compressed Intan Data Files (*.rhc)")
 
         if newFileName != "":
             self.saveBaseFileName = newFileName
@@ -3181,7 +2194,7 @@ class MainWindow(QMainWindow):
             return
 
         commandList = VectorInt()
-        bufferQueue = None  # Dummy variable
+        bufferRing = None  # Dummy variable
         chipRegisters = Rhd2000Registers(self.boardSampleRate)
 
         rhd2164ChipPresent = False
@@ -3330,8 +2343,8 @@ class MainWindow(QMainWindow):
                     qApp.processEvents()
 
                 self.evalBoard.readDataBlocks(numBlocks, self.dataQueue)
-                _, triggerIndex = self.signalProcessor.loadAmplifierData(self.dataQueue, numBlocks, False, 0, 0, triggerIndex, False, bufferQueue,
-                                                                         False, self.saveStream, self.saveFormat, False, False, 0)
+                self.signalProcessor.loadAmplifierData(self.dataQueue, numBlocks, False, bufferRing,
+                                                       False, self.saveStream, self.saveFormat, False, False, 0)
                 for stream in range(self.evalBoard.getNumEnabledDataStreams()):
                     if self.chipId[stream] != constants.CHIP_ID_RHD2164_B:
                         self.signalProcessor.measureComplexAmplitude(measuredMagnitude, measuredPhase,
@@ -3354,8 +2367,8 @@ class MainWindow(QMainWindow):
                         qApp.processEvents()
 
                     self.evalBoard.readDataBlocks(numBlocks, self.dataQueue)
-                    _, triggerIndex = self.signalProcessor.loadAmplifierData(self.dataQueue, numBlocks, False, 0, 0, triggerIndex, False, bufferQueue,
-                                                                             False, self.saveStream, self.saveFormat, False, False, 0)
+                    self.signalProcessor.loadAmplifierData(self.dataQueue, numBlocks, False, bufferRing,
+                                                           False, self.saveStream, self.saveFormat, False, False, 0)
                     for stream in range(self.evalBoard.getNumEnabledDataStreams()):
                         if self.chipId[stream] == constants.CHIP_ID_RHD2164_B:
                             self.signalProcessor.measureComplexAmplitude(measuredMagnitude, measuredPhase,
@@ -3630,168 +2643,26 @@ class MainWindow(QMainWindow):
                                         " MB/minute.  File size may be reduced by disabling unused inputs.)")
 
     def setStatusBarWaitForTrigger(self):
-        if self.recordTriggerPolarity == 0:
-            self.statusBarLabel.setText(
-                "Waiting for logic high trigger on digital input " + str(self.recordTriggerChannel) + "...")
+        if self.recordTriggerChannel > 15:
+            triggerInput = "analog input " + str(self.recordTriggerChannel - 15)
         else:
-            self.statusBarLabel.setText(
-                "Waiting for logic low trigger on digital input " + str(self.recordTriggerChannel) + "...")
+            triggerInput = "digital input " + str(self.recordTriggerChannel)
+        if self.recordTriggerEdge:
+            triggerType = "rising edge" if self.recordTriggerPolarity == 0 else "falling edge"
+        else:
+            triggerType = "logic high" if self.recordTriggerPolarity == 0 else "logic low"
+        self.statusBarLabel.setText(
+            "Waiting for " + triggerType + " trigger on " + triggerInput + "...")
 
     # Set the format of the saved data file.
     def setSaveFormat(self, saveFormat):
         self.saveFormat = saveFormat
 
-    # Create and open a new save file for data (saveFile), and create a new
-    # data stream (saveStream) for writing to the file.
-    def startNewSaveFile(self, saveFormat):
-        fileInfo = QFileInfo(self.saveBaseFileName)
-        dateTime = QDateTime.currentDateTime()
-
-        if saveFormat == constants.SaveFormatIntan:
-            # Add time and date stamp to base filename.
-            self.saveFileName = fileInfo.path()
-            self.saveFileName += "/"
-            self.saveFileName += fileInfo.baseName()
-            self.saveFileName += "_"
-            self.saveFileName += dateTime.toString("yyMMdd")    # date stamp
-            self.saveFileName += "_"
-            self.saveFileName += dateTime.toString("HHmmss")    # time stamp
-            self.saveFileName += ".rhd"
-
-            saveFile = QFile(self.saveFileName)
-
-            if not saveFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(saveFile.errorString()) + "\n")
-
-            self.saveStream = QDataStream(saveFile)
-            self.saveStream.setVersion(QDataStream.Qt_4_8)
-
-            # Set to little endian mode for compatibilty with MATLAB,
-            # which is little endian on all platforms
-            self.saveStream.setByteOrder(QDataStream.LittleEndian)
-
-            # Write 4-byte floating-point numbers (instead of the default 8-byte numbers)
-            # to save disk space.
-            self.saveStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
-
-        elif saveFormat == constants.SaveFormatFilePerSignalType:
-            # Create 'save file' name for status bar display.
-            self.saveFileName = fileInfo.path()
-            self.saveFileName += "/"
-            self.saveFileName += fileInfo.baseName()
-            self.saveFileName += "_"
-            self.saveFileName += dateTime.toString("yyMMdd")    # date stamp
-            self.saveFileName += "_"
-            self.saveFileName += dateTime.toString("HHmmss")    # time stamp
-
-            # Create subdirectory for data, timestamp, and info files.
-            subdirName = fileInfo.baseName()
-            subdirName += "_"
-            subdirName += dateTime.toString("yyMMdd")    # date stamp
-            subdirName += "_"
-            subdirName += dateTime.toString("HHmmss")    # time stamp
-
-            qdir = QDir(fileInfo.path())
-            qdir.mkdir(subdirName)
-
-            subdir = QDir(fileInfo.path() + "/" + subdirName)
-
-            self.infoFileName = subdir.path() + "/" + "info.rhd"
-
-            self.signalProcessor.createTimestampFilename(subdir.path())
-            self.signalProcessor.openTimestampFile()
-
-            self.signalProcessor.createSignalTypeFilenames(subdir.path())
-            self.signalProcessor.openSignalTypeFiles(self.saveTtlOut)
-
-            self.infoFile = QFile(self.infoFileName)
-
-            if not self.infoFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(self.infoFile.errorString()) + "\n")
-
-            self.infoStream = QDataStream(self.infoFile)
-            self.infoStream.setVersion(QDataStream.Qt_4_8)
-
-            # Set to little endian mode for compatibilty with MATLAB,
-            # which is little endian on all platforms
-            self.infoStream.setByteOrder(QDataStream.LittleEndian)
-
-            # Write 4-byte floating-point numbers (instead of the default 8-byte numbers)
-            # to save disk space.
-            self.infoStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
-
-        elif saveFormat == constants.SaveFormatFilePerChannel:
-            # Create 'save file' name for status bar display.
-            self.saveFileName = fileInfo.path()
-            self.saveFileName += "/"
-            self.saveFileName += fileInfo.baseName()
-            self.saveFileName += "_"
-            self.saveFileName += dateTime.toString("yyMMdd")    # date stamp
-            self.saveFileName += "_"
-            self.saveFileName += dateTime.toString("HHmmss")    # time stamp
-
-            # Create subdirectory for individual channel data files.
-            subdirName = fileInfo.baseName()
-            subdirName += "_"
-            subdirName += dateTime.toString("yyMMdd")    # date stamp
-            subdirName += "_"
-            subdirName += dateTime.toString("HHmmss")    # time stamp
-
-            qdir = QDir(fileInfo.path())
-            qdir.mkdir(subdirName)
-
-            subdir = QDir(fileInfo.path() + "/" + subdirName)
-
-            # Create filename for each channel.
-            self.signalProcessor.createTimestampFilename(subdir.path())
-            self.signalProcessor.createFilenames(
-                self.signalSources, subdir.path())
-
-            # Open save files and output streams.
-            self.signalProcessor.openTimestampFile()
-            self.signalProcessor.openSaveFiles(self.signalSources)
-
-            # Create info file.
-            self.infoFileName = subdir.path() + "/" + "info.rhd"
-
-            self.infoFile = QFile(self.infoFileName)
-
-            if not self.infoFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(self.infoFile.errorString()) + "\n")
-
-            self.infoStream = QDataStream(self.infoFile)
-            self.infoStream.setVersion(QDataStream.Qt_4_8)
-
-            # Set to little endian mode for compatibilty with MATLAB,
-            # which is little endian on all platforms
-            self.infoStream.setByteOrder(QDataStream.LittleEndian)
-
-            # Write 4-byte floating-point numbers (instead of the default 8-byte numbers)
-            # to save disk space.
-            self.infoStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
-
-    def closeSaveFile(self, saveFormat):
-        if saveFormat == constants.SaveFormatIntan:
-            self.saveFile.close()
-        elif saveFormat == constants.SaveFormatFilePerSignalType:
-            self.signalProcessor.closeTimestampFile()
-            self.signalProcessor.closeSignalTypeFiles()
-            self.infoFile.close()
-        elif saveFormat == constants.SaveFormatFilePerChannel:
-            self.signalProcessor.closeTimestampFile()
-            self.signalProcessor.closeSaveFiles(self.signalSources)
-            self.infoFile.close()
-
     # Launch save file format selection dialog.
     def setSaveFormatDialog(self):
         saveFormatDialog = SetSaveFormatDialog(
-            self.saveFormat, self.saveTemp, self.saveTtlOut, self.newSaveFilePeriodMinutes, self)
+            self.saveFormat, self.saveTemp, self.saveTtlOut, self.newSaveFilePeriodMinutes,
+            self.compressionCodec, self.channelWriteWindowSeconds, self)
 
         if saveFormatDialog.exec():
             self.saveFormat = saveFormatDialog.buttonGroup.checkedId()
@@ -3800,6 +2671,8 @@ class MainWindow(QMainWindow):
             self.saveTtlOut = (
                 saveFormatDialog.saveTtlOutCheckBox.checkState() == Qt.Checked)
             self.newSaveFilePeriodMinutes = saveFormatDialog.recordTimeSpinBox.value()
+            self.compressionCodec = saveFormatDialog.compressionComboBox.currentIndex()
+            self.channelWriteWindowSeconds = saveFormatDialog.writeWindowSpinBox.value()
 
             self.setSaveFormat(self.saveFormat)
 
@@ -14,6 +14,8 @@ class Ofstream:
     rhd2klib.openFile.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
     rhd2klib.closeFile.restype = None
     rhd2klib.closeFile.argtypes = [ctypes.c_void_p]
+    rhd2klib.writeFile.restype = ctypes.c_int
+    rhd2klib.writeFile.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
 
     def __init__(self):
         self._as_parameter_ = rhd2klib.new_ofstream()
@@ -23,3 +25,7 @@ class Ofstream:
 
     def close(self):
         rhd2klib.closeFile(self)
+
+    # Write the bytes in data; returns the number of bytes written, or -1 on error.
+    def writeRawData(self, data):
+        return rhd2klib.writeFile(self, data, len(data))
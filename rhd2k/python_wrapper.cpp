@@ -9,6 +9,7 @@ using namespace std;
 #include "rhd2000evalboard.h"
 #include "rhd2000registers.h"
 #include "rhd2000datablock.h"
+#include "rhd2000dataqueue.h"
 #include "okFrontPanelDLL.h"
 
 extern "C" {
@@ -59,8 +60,9 @@ extern "C" {
     void setTtlMode(Rhd2000EvalBoard* b, int mode){ b->setTtlMode(mode); }
     void flush(Rhd2000EvalBoard* b){ b->flush(); }
     bool readDataBlock(Rhd2000EvalBoard* b, Rhd2000DataBlock *dataBlock){ return b->readDataBlock(dataBlock); }
-    bool readDataBlocks(Rhd2000EvalBoard* b, int numBlocks, queue<Rhd2000DataBlock> &dataQueue){ return b->readDataBlocks(numBlocks, dataQueue); }
-    int queueToFile(Rhd2000EvalBoard* b, queue<Rhd2000DataBlock> &dataQueue, std::ofstream &saveOut){ return b->queueToFile(dataQueue, saveOut); }
+    bool readDataBlocks(Rhd2000EvalBoard* b, int numBlocks, Rhd2000DataQueue &dataQueue){ return b->readDataBlocks(numBlocks, dataQueue); }
+    bool readRawDataBlocks(Rhd2000EvalBoard* b, int numBlocks, unsigned char *buffer){ return b->readRawDataBlocks(numBlocks, buffer); }
+    int queueToFile(Rhd2000EvalBoard* b, Rhd2000DataQueue &dataQueue, std::ofstream &saveOut){ return b->queueToFile(dataQueue, saveOut); }
     int getBoardMode(Rhd2000EvalBoard* b){ return b->getBoardMode(); }
     int getCableDelayPort(Rhd2000EvalBoard* b, Rhd2000EvalBoard::BoardPort port){ return b->getCableDelay(port); }
     void getCableDelays(Rhd2000EvalBoard* b, vector<int> &delays){ b->getCableDelay(delays); }
@@ -75,17 +77,34 @@ extern "C" {
 }
 
 extern "C" {
-    queue<Rhd2000DataBlock>* new_queue_data(){ return new queue<Rhd2000DataBlock>; }
-    void queue_data_delete(queue<Rhd2000DataBlock>* q) {delete q;}
-    unsigned int queue_data_size(queue<Rhd2000DataBlock>* q) { return q->size(); }
-    Rhd2000DataBlock* queue_data_front(queue<Rhd2000DataBlock>* q) { return &(q->front()); }
-    void queue_data_pop(queue<Rhd2000DataBlock>* q) { q->pop(); }
+    Rhd2000DataQueue* new_queue_data(){ return new Rhd2000DataQueue; }
+    void queue_data_delete(Rhd2000DataQueue* q) {delete q;}
+    unsigned int queue_data_size(Rhd2000DataQueue* q) { return q->size(); }
+    bool queue_data_empty(Rhd2000DataQueue* q) { return q->empty(); }
+    Rhd2000DataBlock* queue_data_front(Rhd2000DataQueue* q) { return &(q->front()); }
+    void queue_data_push(Rhd2000DataQueue* q, Rhd2000DataBlock* b) { q->push(*b); }
+    void queue_data_push_from_usb_buffer(Rhd2000DataQueue* q, unsigned char* usbBuffer, int numBlocks, int numDataStreams)
+        { q->pushFromUsbBuffer(usbBuffer, numBlocks, numDataStreams); }
+    void queue_data_pop(Rhd2000DataQueue* q) { q->pop(); }
+    int queue_data_read_front(Rhd2000DataQueue* q, int numBlocks, int numDataStreams, unsigned int* timeStamp, int* amplifierData,
+                              int* auxiliaryData, int* boardAdcData, int* ttlIn, int* ttlOut)
+        { return q->readFront(numBlocks, numDataStreams, timeStamp, amplifierData, auxiliaryData, boardAdcData, ttlIn, ttlOut); }
+    int queue_data_pop_front(Rhd2000DataQueue* q, int numBlocks, int numDataStreams, unsigned int* timeStamp, int* amplifierData,
+                             int* auxiliaryData, int* boardAdcData, int* ttlIn, int* ttlOut)
+        { return q->popFront(numBlocks, numDataStreams, timeStamp, amplifierData, auxiliaryData, boardAdcData, ttlIn, ttlOut); }
+    int queue_data_copy_front_to(Rhd2000DataQueue* q, int numBlocks, Rhd2000DataQueue* destination)
+        { return q->copyFrontTo(numBlocks, *destination); }
+    int queue_data_discard(Rhd2000DataQueue* q, int numBlocks) { return q->discard(numBlocks); }
+    unsigned int queue_data_pool_size(Rhd2000DataQueue* q) { return q->poolSize(); }
+    unsigned int queue_data_num_allocated(Rhd2000DataQueue* q) { return q->numBlocksAllocated(); }
+    unsigned int* queue_data_generation(Rhd2000DataQueue* q) { return q->readGeneration(); }
 }
 
 extern "C" {
     ofstream* new_ofstream() { return new ofstream; }
     void openFile(ofstream* out, char* filename) { out->open(string(filename), ios::binary | ios::out); }
     void closeFile(ofstream* out) { out->close(); }
+    int writeFile(ofstream* out, char* data, int size) { out->write(data, size); return out->good() ? size : -1; }
 }
 
 extern "C" {
@@ -135,4 +154,9 @@ extern "C" {
   int* readADC(Rhd2000DataBlock* d, int adc) { return d->readADC(adc); }
   int* readTTLIn(Rhd2000DataBlock* d) { return d->readTTLIn(); }
   int* readTTLOut(Rhd2000DataBlock* d) { return d->readTTLOut(); }
+  int getNumDataStreams(Rhd2000DataBlock* d) { return d->getNumDataStreams(); }
+  unsigned int* readTimeStamp(Rhd2000DataBlock* d) { return d->readTimeStamp(); }
+  int* readAmplifierData(Rhd2000DataBlock* d) { return d->readAmplifierData(); }
+  int* readAuxiliaryData(Rhd2000DataBlock* d) { return d->readAuxiliaryData(); }
+  int* readBoardAdcData(Rhd2000DataBlock* d) { return d->readBoardAdcData(); }
 }
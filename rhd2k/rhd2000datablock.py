@@ -2,6 +2,8 @@ import ctypes
 import platform
 import os
 
+import numpy as np
+
 libname = '/librhd2k.so'
 if platform.system() == 'Windows' or 'CYGWIN' in platform.system():
     libname =  '/librhd2k.dll'
@@ -37,17 +39,51 @@ class Rhd2000DataBlock:
     rhd2klib.readTTLIn.argtypes = [ctypes.c_void_p]
     rhd2klib.readTTLOut.restype = ctypes.POINTER(ctypes.c_int)
     rhd2klib.readTTLOut.argtypes = [ctypes.c_void_p]
+    rhd2klib.getNumDataStreams.restype = ctypes.c_int
+    rhd2klib.getNumDataStreams.argtypes = [ctypes.c_void_p]
+    rhd2klib.readTimeStamp.restype = ctypes.POINTER(ctypes.c_uint)
+    rhd2klib.readTimeStamp.argtypes = [ctypes.c_void_p]
+    rhd2klib.readAmplifierData.restype = ctypes.POINTER(ctypes.c_int)
+    rhd2klib.readAmplifierData.argtypes = [ctypes.c_void_p]
+    rhd2klib.readAuxiliaryData.restype = ctypes.POINTER(ctypes.c_int)
+    rhd2klib.readAuxiliaryData.argtypes = [ctypes.c_void_p]
+    rhd2klib.readBoardAdcData.restype = ctypes.POINTER(ctypes.c_int)
+    rhd2klib.readBoardAdcData.argtypes = [ctypes.c_void_p]
 
+    # The sample arrays below are read-only NumPy views over the memory of the
+    # underlying C++ data block; nothing is copied.  They are only valid while
+    # that block exists, i.e. a block obtained from DataQueue.front() must not
+    # be used after the queue has been popped.
+    #   timeStamp      uint32 [SAMPLES_PER_DATA_BLOCK]
+    #   amplifierData  int32  [stream][channel 0-31][SAMPLES_PER_DATA_BLOCK]
+    #   auxiliaryData  int32  [stream][channel 0-2][SAMPLES_PER_DATA_BLOCK]
+    #   boardAdcData   int32  [channel 0-7][SAMPLES_PER_DATA_BLOCK]
+    #   ttlIn, ttlOut  int32  [SAMPLES_PER_DATA_BLOCK]
     def __init__(self, numDataStreams, ptr=None):
-        self.auxiliaryData = Rhd2000DataBlock.AuxiliaryReaderStream(self)
-        self.amplifierData = Rhd2000DataBlock.AmplifierReaderStream(self)
-        self.boardAdcData = Rhd2000DataBlock.ADCReaderStream(self)
-        self.ttlIn = Rhd2000DataBlock.TTLInReader(self)
-        self.ttlOut = Rhd2000DataBlock.TTLOutReader(self)
         if ptr is None:
             self._as_parameter_ = rhd2klib.newBlock(numDataStreams)
-            return
-        self._as_parameter_ = ptr
+        else:
+            self._as_parameter_ = ptr
+
+        self.numDataStreams = rhd2klib.getNumDataStreams(self)
+        samples = Rhd2000DataBlock.getSamplesPerDataBlock()
+        self.timeStamp = Rhd2000DataBlock._view(
+            rhd2klib.readTimeStamp(self), (samples,))
+        self.amplifierData = Rhd2000DataBlock._view(
+            rhd2klib.readAmplifierData(self), (self.numDataStreams, 32, samples))
+        self.auxiliaryData = Rhd2000DataBlock._view(
+            rhd2klib.readAuxiliaryData(self), (self.numDataStreams, 3, samples))
+        self.boardAdcData = Rhd2000DataBlock._view(
+            rhd2klib.readBoardAdcData(self), (8, samples))
+        self.ttlIn = Rhd2000DataBlock._view(rhd2klib.readTTLIn(self), (samples,))
+        self.ttlOut = Rhd2000DataBlock._view(rhd2klib.readTTLOut(self), (samples,))
+
+    # Wraps a pointer into C++ block memory in a read-only array (no copy).
+    @staticmethod
+    def _view(pointer, shape):
+        array = np.ctypeslib.as_array(pointer, shape=shape)
+        array.flags.writeable = False
+        return array
 
     @staticmethod
     def calculateDataBlockSizeInWords(numDataStreams):
@@ -83,48 +119,3 @@ class Rhd2000DataBlock:
     
     def readTTLOut(self):
         return rhd2klib.readTTLOut(self)
-    
-    class AuxiliaryReaderChannel:
-        def __init__(self, block, stream):
-            self.block = block
-            self.stream = stream
-        def __getitem__(self, channel):
-            return self.block.readAuxiliary(self.stream, channel)
-    
-    class AuxiliaryReaderStream:
-        def __init__(self, block):
-            self.block = block
-        def __getitem__(self, stream):
-            return Rhd2000DataBlock.AuxiliaryReaderChannel(self.block, stream)
-
-    class AmplifierReaderChannel:
-        def __init__(self, block, stream):
-            self.block = block
-            self.stream = stream
-        def __getitem__(self, channel):
-            return self.block.readAmplifier(self.stream, channel)
-    
-    class AmplifierReaderStream:
-        def __init__(self, block):
-            self.block = block
-        def __getitem__(self, stream):
-            return Rhd2000DataBlock.AmplifierReaderChannel(self.block, stream)
-    
-    class ADCReaderStream:
-        def __init__(self, block):
-            self.block = block
-        def __getitem__(self, stream):
-            return self.block.readADC(stream)
-    
-    class TTLInReader:
-        def __init__(self, block):
-            self.block = block
-        def __getitem__(self, idx):
-            return self.block.readTTLIn()[idx]
-
-    class TTLOutReader:
-        def __init__(self, block):
-            self.block = block
-        def __getitem__(self, idx):
-            return self.block.readTTLOut()[idx]
-            
\ No newline at end of file
@@ -1,6 +1,7 @@
 import ctypes
 import platform
 import os
+import threading
 
 libname = '/librhd2k.so'
 if platform.system() == 'Windows' or 'CYGWIN' in platform.system():
@@ -175,6 +176,11 @@ class Rhd2000EvalBoard:
     rhd2klib.readDataBlocks.restype = ctypes.c_bool
     rhd2klib.readDataBlocks.argtypes = [
         ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p]
+    rhd2klib.calculateDataBlockSizeInWords.restype = ctypes.c_uint
+    rhd2klib.calculateDataBlockSizeInWords.argtypes = [ctypes.c_int]
+    rhd2klib.readRawDataBlocks.restype = ctypes.c_bool
+    rhd2klib.readRawDataBlocks.argtypes = [
+        ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p]
     rhd2klib.queueToFile.restype = ctypes.c_int
     rhd2klib.queueToFile.argtypes = [
         ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
@@ -188,161 +194,225 @@ class Rhd2000EvalBoard:
     def __init__(self):
         self._as_parameter_ = rhd2klib.newBoard()
 
+        # Serializes access to the board between the acquisition thread and the GUI.
+        self.lock = threading.RLock()
+
     def open(self):
-        return rhd2klib.openBoard(self)
+        with self.lock:
+            return rhd2klib.openBoard(self)
 
     def uploadFpgaBitfile(self, filename):
-        return rhd2klib.uploadFpgaBitfile(self, bytes(filename, "ascii"))
+        with self.lock:
+            return rhd2klib.uploadFpgaBitfile(self, bytes(filename, "ascii"))
 
     def initialize(self):
-        rhd2klib.initialize(self)
+        with self.lock:
+            rhd2klib.initialize(self)
 
     def setSampleRate(self, newSampleRate):
-        return rhd2klib.setSampleRate(self, newSampleRate)
+        with self.lock:
+            return rhd2klib.setSampleRate(self, newSampleRate)
 
     def getSampleRate(self):
-        return rhd2klib.getSampleRate(self)
+        with self.lock:
+            return rhd2klib.getSampleRate(self)
 
     def getSampleRateEnum(self):
-        return rhd2klib.getSampleRateEnum(self)
+        with self.lock:
+            return rhd2klib.getSampleRateEnum(self)
 
     def uploadCommandList(self, commandList, auxCommandSlot, bank):
-        rhd2klib.uploadCommandList(self, commandList, auxCommandSlot, bank)
+        with self.lock:
+            rhd2klib.uploadCommandList(self, commandList, auxCommandSlot, bank)
 
     def printCommandList(self, commandList):
-        rhd2klib.printCommandList(self, commandList)
+        with self.lock:
+            rhd2klib.printCommandList(self, commandList)
 
     def selectAuxCommandBank(self, port, auxCommandSlot, bank):
-        rhd2klib.selectAuxCommandBank(self, port, auxCommandSlot, bank)
+        with self.lock:
+            rhd2klib.selectAuxCommandBank(self, port, auxCommandSlot, bank)
 
     def selectAuxCommandLength(self, auxCommandSlot, loopIndex, endIndex):
-        rhd2klib.selectAuxCommandLength(
-            self, auxCommandSlot, loopIndex, endIndex)
+        with self.lock:
+            rhd2klib.selectAuxCommandLength(
+                self, auxCommandSlot, loopIndex, endIndex)
 
     def resetBoard(self):
-        rhd2klib.resetBoard(self)
+        with self.lock:
+            rhd2klib.resetBoard(self)
 
     def setContinuousRunMode(self, continuousMode):
-        rhd2klib.setContinuousRunMode(self, continuousMode)
+        with self.lock:
+            rhd2klib.setContinuousRunMode(self, continuousMode)
 
     def setMaxTimeStep(self, maxTimeStep):
-        rhd2klib.setMaxTimeStep(self, maxTimeStep)
+        with self.lock:
+            rhd2klib.setMaxTimeStep(self, maxTimeStep)
 
     def run(self):
-        rhd2klib.run(self)
+        with self.lock:
+            rhd2klib.run(self)
 
     def isRunning(self):
-        return rhd2klib.isRunning(self)
+        with self.lock:
+            return rhd2klib.isRunning(self)
 
     def numWordsInFifo(self):
-        return rhd2klib.numWordsInFifo(self)
+        with self.lock:
+            return rhd2klib.numWordsInFifo(self)
 
     @staticmethod
     def fifoCapacityInWords():
         return rhd2klib.fifoCapacityInWords()
 
     def setCableDelay(self, port, delay):
-        rhd2klib.setCableDelay(self, port, delay)
+        with self.lock:
+            rhd2klib.setCableDelay(self, port, delay)
 
     def setCableLengthMeters(self, port, lengthInMeters):
-        rhd2klib.setCableLengthMeters(self, port, lengthInMeters)
+        with self.lock:
+            rhd2klib.setCableLengthMeters(self, port, lengthInMeters)
 
     def setCableLengthFeet(self, port, lengthInFeet):
-        rhd2klib.setCableLengthFeet(self, port, lengthInFeet)
+        with self.lock:
+            rhd2klib.setCableLengthFeet(self, port, lengthInFeet)
 
     def estimateCableLengthMeters(self, delay):
-        return rhd2klib.estimateCableLengthMeters(self, delay)
+        with self.lock:
+            return rhd2klib.estimateCableLengthMeters(self, delay)
 
     def estimateCableLengthFeet(self, delay):
-        return rhd2klib.estimateCableLengthFeet(self, delay)
+        with self.lock:
+            return rhd2klib.estimateCableLengthFeet(self, delay)
 
     def setDspSettle(self, enabled):
-        rhd2klib.setDspSettle(self, enabled)
+        with self.lock:
+            rhd2klib.setDspSettle(self, enabled)
 
     def setDataSource(self, stream, dataSource):
-        rhd2klib.setDataSource(self, stream, dataSource)
+        with self.lock:
+            rhd2klib.setDataSource(self, stream, dataSource)
 
     def enableDataStream(self, stream, enabled):
-        rhd2klib.enableDataStream(self, stream, enabled)
+        with self.lock:
+            rhd2klib.enableDataStream(self, stream, enabled)
 
     def getNumEnabledDataStreams(self):
-        return rhd2klib.getNumEnabledDataStreams(self)
+        with self.lock:
+            return rhd2klib.getNumEnabledDataStreams(self)
 
     def clearTtlOut(self):
-        rhd2klib.clearTtlOut(self)
+        with self.lock:
+            rhd2klib.clearTtlOut(self)
 
     def setTtlOut(self, ttlOutArray):
-        ttlOutArray = (ctypes.c_int * len(ttlOutArray))(*ttlOutArray)
-        rhd2klib.setTtlOut(self, ttlOutArray)
+        with self.lock:
+            ttlOutArray = (ctypes.c_int * len(ttlOutArray))(*ttlOutArray)
+            rhd2klib.setTtlOut(self, ttlOutArray)
 
     def getTtlIn(self, length):
-        ttlInArray = (ctypes.c_int * length)
-        rhd2klib.getTtlIn(self, ttlInArray)
-        return ttlInArray  # test this
+        with self.lock:
+            ttlInArray = (ctypes.c_int * length)
+            rhd2klib.getTtlIn(self, ttlInArray)
+            return ttlInArray  # test this
 
     def setDacManual(self, value):
-        rhd2klib.setDacManual(self, value)
+        with self.lock:
+            rhd2klib.setDacManual(self, value)
 
     def setLedDisplay(self, ledArray):
-        ledArray = (ctypes.c_int * len(ledArray))(*ledArray)
-        rhd2klib.setLedDisplay(self, ledArray)
+        with self.lock:
+            ledArray = (ctypes.c_int * len(ledArray))(*ledArray)
+            rhd2klib.setLedDisplay(self, ledArray)
 
     def enableDac(self, dacChannel, enabled):
-        rhd2klib.enableDac(self, dacChannel, enabled)
+        with self.lock:
+            rhd2klib.enableDac(self, dacChannel, enabled)
 
     def setDacGain(self, gain):
-        rhd2klib.setDacGain(self, gain)
+        with self.lock:
+            rhd2klib.setDacGain(self, gain)
 
     def setAudioNoiseSuppress(self, noiseSuppress):
-        rhd2klib.setAudioNoiseSuppress(self, noiseSuppress)
+        with self.lock:
+            rhd2klib.setAudioNoiseSuppress(self, noiseSuppress)
 
     def selectDacDataStream(self, dacChannel, stream):
-        rhd2klib.selectDacDataStream(self, dacChannel, stream)
+        with self.lock:
+            rhd2klib.selectDacDataStream(self, dacChannel, stream)
 
     def selectDacDataChannel(self, dacChannel, dataChannel):
-        rhd2klib.selectDacDataChannel(self, dacChannel, dataChannel)
+        with self.lock:
+            rhd2klib.selectDacDataChannel(self, dacChannel, dataChannel)
 
     def enableExternalFastSettle(self, enable):
-        rhd2klib.enableExternalFastSettle(self, enable)
+        with self.lock:
+            rhd2klib.enableExternalFastSettle(self, enable)
 
     def setExternalFastSettleChannel(self, channel):
-        rhd2klib.setExternalFastSettleChannel(self, channel)
+        with self.lock:
+            rhd2klib.setExternalFastSettleChannel(self, channel)
 
     def enableExternalDigOut(self, port, enable):
-        rhd2klib.enableExternalDigOut(self, port, enable)
+        with self.lock:
+            rhd2klib.enableExternalDigOut(self, port, enable)
 
     def setExternalDigOutChannel(self, port, channel):
-        rhd2klib.setExternalDigOutChannel(self, port, channel)
+        with self.lock:
+            rhd2klib.setExternalDigOutChannel(self, port, channel)
 
     def enableDacHighpassFilter(self, enable):
-        rhd2klib.enableDacHighpassFilter(self, enable)
+        with self.lock:
+            rhd2klib.enableDacHighpassFilter(self, enable)
 
     def setDacHighpassFilter(self, cutoff):
-        rhd2klib.setDacHighpassFilter(self, cutoff)
+        with self.lock:
+            rhd2klib.setDacHighpassFilter(self, cutoff)
 
     def setDacThreshold(self, dacChannel, threshold, trigPolarity):
-        rhd2klib.setDacThreshold(self, dacChannel, threshold, trigPolarity)
+        with self.lock:
+            rhd2klib.setDacThreshold(self, dacChannel, threshold, trigPolarity)
 
     def setTtlMode(self, mode):
-        rhd2klib.setTtlMode(self, mode)
+        with self.lock:
+            rhd2klib.setTtlMode(self, mode)
 
     def flush(self):
-        rhd2klib.flush(self)
+        with self.lock:
+            rhd2klib.flush(self)
 
     def readDataBlock(self, dataBlock):
-        return rhd2klib.readDataBlock(self, dataBlock)
+        with self.lock:
+            return rhd2klib.readDataBlock(self, dataBlock)
 
     def readDataBlocks(self, numBlocks, dataQueue):
-        return rhd2klib.readDataBlocks(self, numBlocks, dataQueue)
+        with self.lock:
+            return rhd2klib.readDataBlocks(self, numBlocks, dataQueue)
+
+    # Read numBlocks data blocks, if available, into buffer (a writable NumPy
+    # uint8 array) as raw USB bytes, which can be decoded with UsbDataBlocks.
+    def readRawDataBlocks(self, numBlocks, buffer):
+        with self.lock:
+            numBytes = 2 * numBlocks * rhd2klib.calculateDataBlockSizeInWords(
+                rhd2klib.getNumEnabledDataStreams(self))
+            if buffer.nbytes < numBytes:
+                raise ValueError("Buffer too small for " + str(numBlocks) +
+                                 " data blocks (" + str(numBytes) + " bytes)")
+            return rhd2klib.readRawDataBlocks(self, numBlocks, buffer.ctypes.data)
 
     def queueToFile(self, dataQueue, saveOut):
-        return rhd2klib.queueToFile(self, dataQueue, saveOut)
+        with self.lock:
+            return rhd2klib.queueToFile(self, dataQueue, saveOut)
 
     def getBoardMode(self):
-        return rhd2klib.getBoardMode(self)
+        with self.lock:
+            return rhd2klib.getBoardMode(self)
 
     def getCableDelayPort(self, port):
-        return rhd2klib.getCableDelay(self, port)
+        with self.lock:
+            return rhd2klib.getCableDelay(self, port)
 
     def getCableDelays(self, delays):
-        rhd2klib.getCableDelays(self, delays)
+        with self.lock:
+            rhd2klib.getCableDelays(self, delays)
@@ -0,0 +1,368 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from . import constants
+    from .datastream import DataStream
+    from .signalsources import SignalSources
+except ImportError:
+    import constants
+    from datastream import DataStream
+    from signalsources import SignalSources
+
+
+class SaveFileHeader():
+    """ This class holds the contents of a save file header written by
+    AcquisitionEngine.writeSaveFileHeader(): the acquisition settings and
+    signal sources of the Intan format header (also used for the info.rhd
+    file of the other formats) and, for the raw format, the description of
+    the USB data blocks that precedes it (the compressed format header
+    also starts with a description of its data chunks).
+    """
+
+    def __init__(self):
+        self.version = (constants.DATA_FILE_MAIN_VERSION_NUMBER,
+                        constants.DATA_FILE_SECONDARY_VERSION_NUMBER)
+        self.boardSampleRate = 0.0
+
+        self.dspEnabled = False
+        self.actualDspCutoffFreq = 0.0
+        self.actualLowerBandwidth = 0.0
+        self.actualUpperBandwidth = 0.0
+        self.desiredDspCutoffFreq = 0.0
+        self.desiredLowerBandwidth = 0.0
+        self.desiredUpperBandwidth = 0.0
+        self.notchFilterIndex = 0
+        self.desiredImpedanceFreq = 0.0
+        self.actualImpedanceFreq = 0.0
+
+        self.saveFileNotes = ["", "", ""]
+        self.numTempSensors = 0
+        self.evalBoardMode = 0
+        self.signalSources = SignalSources()
+
+        # Raw format only
+        self.numDataStreams = 0
+        self.chipId = []
+        self.timestampOffset = 0
+
+        # Compressed format only
+        self.codec = constants.CompressionZlib
+        self.blocksPerChunk = 0
+
+    # True if board digital outputs were saved.
+    def saveTtlOut(self):
+        return len(self.signalSources.signalPort) > 6 and \
+            self.signalSources.signalPort[6].numChannels() > 0 and \
+            self.signalSources.signalPort[6].channel[0].enabled
+
+    # Read a save file header in saveFormat from binary data stream inStream.
+    # Raises ValueError if the header is not valid, EOFError if it is incomplete.
+    @staticmethod
+    def readFromStream(inStream, saveFormat=constants.SaveFormatIntan):
+        ret = SaveFileHeader()
+        if saveFormat == constants.SaveFormatRaw:
+            if inStream.readUInt32() != constants.RAW_FILE_MAGIC_NUMBER:
+                raise ValueError("Not a raw data file")
+            version = inStream.readInt16()
+            if version > constants.RAW_FILE_VERSION_NUMBER:
+                raise ValueError("Unsupported raw data file version: " + str(version))
+            ret.numDataStreams = inStream.readInt16()
+            inStream.readDouble()  # sample rate, also saved below
+            ret.chipId = [inStream.readInt16() for stream in range(ret.numDataStreams)]
+            ret.timestampOffset = inStream.readUInt32()
+        elif saveFormat == constants.SaveFormatCompressed:
+            if inStream.readUInt32() != constants.COMPRESSED_FILE_MAGIC_NUMBER:
+                raise ValueError("Not a compressed data file")
+            version = inStream.readInt16()
+            if version > constants.COMPRESSED_FILE_VERSION_NUMBER:
+                raise ValueError("Unsupported compressed data file version: " + str(version))
+            ret.codec = inStream.readInt16()
+            ret.blocksPerChunk = inStream.readUInt32()
+
+        if inStream.readUInt32() != constants.DATA_FILE_MAGIC_NUMBER:
+            raise ValueError("Not an Intan data file")
+        ret.version = (inStream.readInt16(), inStream.readInt16())
+        if ret.version[0] != constants.DATA_FILE_MAIN_VERSION_NUMBER:
+            raise ValueError("Unsupported data file version: " +
+                             str(ret.version[0]) + "." + str(ret.version[1]))
+
+        ret.boardSampleRate = inStream.readDouble()
+
+        ret.dspEnabled = bool(inStream.readInt16())
+        ret.actualDspCutoffFreq = inStream.readDouble()
+        ret.actualLowerBandwidth = inStream.readDouble()
+        ret.actualUpperBandwidth = inStream.readDouble()
+
+        ret.desiredDspCutoffFreq = inStream.readDouble()
+        ret.desiredLowerBandwidth = inStream.readDouble()
+        ret.desiredUpperBandwidth = inStream.readDouble()
+
+        ret.notchFilterIndex = inStream.readInt16()
+
+        ret.desiredImpedanceFreq = inStream.readDouble()
+        ret.actualImpedanceFreq = inStream.readDouble()
+
+        ret.saveFileNotes = [inStream.readQString() for i in range(3)]
+
+        if ret.version >= (1, 1):
+            ret.numTempSensors = inStream.readInt16()
+        if ret.version >= (1, 3):
+            ret.evalBoardMode = inStream.readInt16()
+
+        SignalSources.readFromStream(inStream, ret.signalSources)
+        return ret
+
+
+class SampleArray():
+    """ This class exposes one signal of the memory-mapped data blocks of an
+    RhdFile as a [channel][sample] array (or a [sample] array for signals
+    without channels), without reading it from disk.  Indexing it with a
+    channel (int, slice or list) and a sample range (int or slice) reads
+    only the blocks holding the requested samples and returns them as a
+    NumPy array; as in NumPy, ... selects all channels or samples:
+        file.amplifierData[3, 20000:220000]    10 s of amplifier channel 3
+        file.boardAdcData[:, -100:]            last 100 samples of all ADCs
+        file.timeStamp[...]                    all timestamps
+
+    If bits is given, the signal holds 16-bit digital words and channel n
+    is bit bits[n] of each word (0 or 1).
+    """
+
+    def __init__(self, blocks, field, samplesPerBlock, bits=None):
+        self.blocks = blocks
+        self.field = field
+        self.samplesPerBlock = samplesPerBlock
+        self.bits = bits
+        self.dtype = blocks.dtype[field].base
+
+        # Shape of the field of one block: [channel][t], [channel] (one sample
+        # per block) or [t] (no channels).
+        fieldShape = blocks.dtype[field].shape
+        if bits is not None:
+            self.numChannels = len(bits)
+        elif len(fieldShape) == 2 or samplesPerBlock == 1:
+            self.numChannels = fieldShape[0]
+        else:
+            self.numChannels = None
+
+        numSamples = samplesPerBlock * len(blocks)
+        if self.numChannels is None:
+            self.shape = (numSamples,)
+        else:
+            self.shape = (self.numChannels, numSamples)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        # Complete the key to one index per axis; an Ellipsis stands for all
+        # channels and/or all samples, as in NumPy.
+        ndim = len(self.shape)
+        if not isinstance(key, tuple):
+            key = (key,)
+        ellipses = [index for index, item in enumerate(key) if item is Ellipsis]
+        if len(ellipses) > 1:
+            raise IndexError("An index can only have a single ellipsis ('...')")
+        if ellipses:
+            index = ellipses[0]
+            key = key[:index] + (slice(None),) * (ndim - len(key) + 1) + key[index + 1:]
+        if len(key) > ndim:
+            raise IndexError("Too many indices: " + self.field + " has " + str(ndim) +
+                             " dimension" + ("s" if ndim > 1 else ""))
+        key = key + (slice(None),) * (ndim - len(key))
+
+        if self.numChannels is None:
+            channels, samples = None, key[0]
+        else:
+            channels, samples = key
+
+        # Select the blocks holding samples [start, stop).
+        numSamples = self.shape[-1]
+        if isinstance(samples, slice):
+            start, stop, step = samples.indices(numSamples)
+            if step < 0:
+                raise IndexError("Negative sample steps are not supported")
+            stop = max(start, stop)
+        else:
+            index = int(samples)
+            if index < 0:
+                index += numSamples
+            if index < 0 or index >= numSamples:
+                raise IndexError("Sample " + str(samples) + " out of range (" +
+                                 str(numSamples) + " samples)")
+            start, stop, step = index, index + 1, 1
+        firstBlock = start // self.samplesPerBlock
+        lastBlock = -(-stop // self.samplesPerBlock)
+        data = self.blocks[self.field][firstBlock:lastBlock]
+
+        # Bring the data into [block][channel][t] order, selecting the channels.
+        if self.numChannels is None:
+            data = data[:, None, :]
+        else:
+            channelIndex = np.arange(self.numChannels)[channels]
+            if self.bits is not None:
+                bits = np.asarray(self.bits, dtype=self.dtype)[np.atleast_1d(channelIndex)]
+                data = (data[:, None, :] >> bits[None, :, None]) & 1
+            else:
+                data = data[:, np.atleast_1d(channelIndex)]
+                if self.samplesPerBlock == 1:
+                    data = data[:, :, None]
+
+        numBlocks, numChannels = data.shape[:2]
+        data = data.transpose(1, 0, 2).reshape(numChannels, numBlocks * self.samplesPerBlock)
+        offset = firstBlock * self.samplesPerBlock
+        data = data[:, start - offset:stop - offset:step]
+
+        # Drop the axes that were indexed with an integer.
+        if self.numChannels is None or np.ndim(channelIndex) == 0:
+            data = data[0]
+        if not isinstance(samples, slice):
+            data = data[..., 0]
+        return data
+
+
+class SaveFileReader():
+    """ This class is the base of the readers of saved data files.  It reads
+    the save file header (of an .rhd file, or the info.rhd file of the
+    other formats) into header, a SaveFileHeader, and lists the saved
+    channels of each signal type in amplifierChannels, auxInputChannels,
+    supplyVoltageChannels, tempSensorChannels, boardAdcChannels,
+    boardDigInChannels and boardDigOutChannels.
+    """
+
+    def __init__(self, headerFileName, saveFormat=constants.SaveFormatIntan):
+        with open(headerFileName, "rb") as headerFile:
+            try:
+                self.header = SaveFileHeader.readFromStream(DataStream(headerFile), saveFormat)
+            except EOFError:
+                raise ValueError(headerFileName + ": incomplete data file header")
+            self.headerSize = headerFile.tell()
+
+        self.sampleRate = self.header.boardSampleRate
+        self.createSaveLists(self.header.signalSources)
+
+    # Create the lists of saved channels of each signal type, in the order
+    # used by SignalProcessor.createSaveList().
+    def createSaveLists(self, signalSources):
+        self.amplifierChannels = []
+        self.auxInputChannels = []
+        self.supplyVoltageChannels = []
+        self.boardAdcChannels = []
+        self.boardDigInChannels = []
+        self.boardDigOutChannels = []
+        self.tempSensorChannels = []
+
+        saveLists = {constants.AmplifierSignal: self.amplifierChannels,
+                     constants.AuxInputSignal: self.auxInputChannels,
+                     constants.SupplyVoltageSignal: self.supplyVoltageChannels,
+                     constants.BoardAdcSignal: self.boardAdcChannels,
+                     constants.BoardDigInSignal: self.boardDigInChannels,
+                     constants.BoardDigOutSignal: self.boardDigOutChannels}
+
+        for port in range(len(signalSources.signalPort)):
+            for index in range(signalSources.signalPort[port].numChannels()):
+                currentChannel = signalSources.signalPort[port].channelByNativeOrder(
+                    index)
+                if currentChannel.enabled:
+                    saveLists[currentChannel.signalType].append(currentChannel)
+
+                # Temperature sensors are saved for every chip (see createSaveList()).
+                if currentChannel.signalType == constants.SupplyVoltageSignal:
+                    self.tempSensorChannels.append(currentChannel)
+
+        if self.header.numTempSensors == 0:
+            self.tempSensorChannels = []
+
+        # Digital outputs are saved as a whole when saveTtlOut is set.
+        if not self.header.saveTtlOut():
+            self.boardDigOutChannels = []
+
+    # Returns the index in the amplifier data of the amplifier channel with the given
+    # native (e.g., "A-002") or custom name.  Raises ValueError if there is none.
+    def amplifierChannelIndex(self, name):
+        for index, channel in enumerate(self.amplifierChannels):
+            if channel.nativeChannelName == name or channel.customChannelName == name:
+                return index
+        raise ValueError("No saved amplifier channel named " + str(name))
+
+
+class RhdFile(SaveFileReader):
+    """ This class reads an Intan format data file (.rhd) without loading
+    it into memory, so that parts of long recordings can be read quickly.
+    The header is parsed into header (a SaveFileHeader), and the data blocks
+    that follow it, which all have the same size, are memory-mapped.  Each
+    signal is a SampleArray holding the saved channels in save list order
+    (listed in amplifierChannels, auxInputChannels, ...):
+        timeStamp          [t]                  int32
+        amplifierData      [channel][t]         uint16, 0.195 uV per step, 32768 = 0 uV
+        auxInputData       [channel][t / 4]     uint16, 37.4 uV per step
+        supplyVoltageData  [channel][t / 60]    uint16, 74.8 uV per step
+        tempSensorData     [channel][t / 60]    int16, 0.01 degrees C per step
+        boardAdcData       [channel][t]         uint16
+        boardDigInData     [channel][t]         0 or 1
+        boardDigOutData    [channel 0-15][t]    0 or 1
+    Signals that were not saved have no channels.  Values are the words
+    saved in the file; samples are counted from the start of the file.
+    """
+
+    def __init__(self, fileName):
+        SaveFileReader.__init__(self, fileName)
+        self.fileName = fileName
+
+        self.blockDtype = self.dataBlockDtype()
+        self.bytesPerBlock = self.blockDtype.itemsize
+        self.numBlocks = (os.path.getsize(fileName) - self.headerSize) // self.bytesPerBlock
+        self.numSamples = self.numBlocks * constants.SAMPLES_PER_DATA_BLOCK
+
+        if self.numBlocks > 0:
+            self.blocks = np.memmap(fileName, dtype=self.blockDtype, mode="r",
+                                    offset=self.headerSize, shape=(self.numBlocks,))
+        else:
+            self.blocks = np.zeros(0, dtype=self.blockDtype)
+
+        self.createSampleArrays()
+
+    # Create the SampleArray of each signal from the data blocks (blocks).
+    def createSampleArrays(self):
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        self.timeStamp = SampleArray(self.blocks, "timeStamp", samples)
+        self.amplifierData = SampleArray(self.blocks, "amplifierData", samples)
+        self.auxInputData = SampleArray(self.blocks, "auxInputData", samples // 4)
+        self.supplyVoltageData = SampleArray(self.blocks, "supplyVoltageData", 1)
+        self.tempSensorData = SampleArray(self.blocks, "tempSensorData", 1)
+        self.boardAdcData = SampleArray(self.blocks, "boardAdcData", samples)
+        self.boardDigInData = SampleArray(self.blocks, "boardDigInData", samples,
+                                          [channel.nativeChannelNumber for channel in self.boardDigInChannels])
+        self.boardDigOutData = SampleArray(self.blocks, "boardDigOutData", samples,
+                                           [channel.nativeChannelNumber for channel in self.boardDigOutChannels])
+
+    # Returns the NumPy structured type of one data block record, with the
+    # same layout as DataBlockEncoder.encodeIntan().
+    def dataBlockDtype(self):
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        if self.header.version >= (1, 2):
+            timeStampType = "<i4"
+        else:
+            timeStampType = "<u4"
+
+        # In the Intan format, if ANY digital inputs are enabled, all 16
+        # channels are saved as one 16-bit word per sample.
+        return np.dtype([
+            ("timeStamp", timeStampType, (samples,)),
+            ("amplifierData", "<u2", (len(self.amplifierChannels), samples)),
+            ("auxInputData", "<u2", (len(self.auxInputChannels), samples // 4)),
+            ("supplyVoltageData", "<u2", (len(self.supplyVoltageChannels),)),
+            ("tempSensorData", "<i2", (len(self.tempSensorChannels),)),
+            ("boardAdcData", "<u2", (len(self.boardAdcChannels), samples)),
+            ("boardDigInData", "<u2", (samples if self.boardDigInChannels else 0,)),
+            ("boardDigOutData", "<u2", (samples if self.boardDigOutChannels else 0,)),
+        ])
+
+    def __len__(self):
+        return self.numSamples
@@ -0,0 +1,232 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from . import constants
+    from .rhdfile import RhdFile
+except ImportError:
+    import constants
+    from rhdfile import RhdFile
+
+# Name of the index file written in each indexed directory.
+INDEX_FILE_NAME = "rhdindex.json"
+
+# Version of the index file.
+INDEX_VERSION = 1
+
+
+class RhdIndexEntry():
+    """ This class describes one Intan format file of an RhdIndex: its size
+    and modification time (to detect changed files), the byte offset and
+    size of its data blocks, and the timestamps of its first and last
+    samples.  If contiguous is True, the timestamps increase by one every
+    sample, so the block holding any timestamp can be computed directly.
+    """
+
+    def __init__(self, fileName="", fileSize=0, modificationTime=0.0, sampleRate=0.0,
+                 headerSize=0, bytesPerBlock=0, numBlocks=0, firstTimeStamp=0,
+                 lastTimeStamp=-1, contiguous=True):
+        self.fileName = fileName
+        self.fileSize = fileSize
+        self.modificationTime = modificationTime
+        self.sampleRate = sampleRate
+        self.headerSize = headerSize
+        self.bytesPerBlock = bytesPerBlock
+        self.numBlocks = numBlocks
+        self.firstTimeStamp = firstTimeStamp
+        self.lastTimeStamp = lastTimeStamp
+        self.contiguous = contiguous
+
+        # Path of the file, set when the index is built or loaded.
+        self.path = fileName
+
+    # Create the entry of an Intan format file, reading its header and timestamps.
+    @staticmethod
+    def fromFile(path):
+        rhdFile = RhdFile(path)
+        ret = RhdIndexEntry(os.path.basename(path), os.path.getsize(path),
+                            os.path.getmtime(path), rhdFile.sampleRate,
+                            rhdFile.headerSize, rhdFile.bytesPerBlock, rhdFile.numBlocks)
+        if rhdFile.numBlocks > 0:
+            ret.firstTimeStamp = int(rhdFile.timeStamp[0])
+            ret.lastTimeStamp = int(rhdFile.timeStamp[-1])
+            ret.contiguous = bool((np.diff(rhdFile.timeStamp[:].astype(np.int64)) == 1).all())
+        return ret
+
+    # Returns the byte offset of block in the file.
+    def blockOffset(self, block):
+        return self.headerSize + block * self.bytesPerBlock
+
+    # Returns the range of samples [start, stop) of the file with timestamps in
+    # [startTimeStamp, stopTimeStamp).  rhdFile is used to search the
+    # timestamps of files that are not contiguous.
+    def sampleRange(self, startTimeStamp, stopTimeStamp, rhdFile=None):
+        if self.contiguous:
+            start = startTimeStamp - self.firstTimeStamp
+            stop = stopTimeStamp - self.firstTimeStamp
+        else:
+            if rhdFile is None:
+                rhdFile = RhdFile(self.path)
+            timeStamp = rhdFile.timeStamp[:]
+            start, stop = np.searchsorted(timeStamp, [startTimeStamp, stopTimeStamp])
+        numSamples = self.numBlocks * constants.SAMPLES_PER_DATA_BLOCK
+        start = min(max(int(start), 0), numSamples)
+        stop = min(max(int(stop), start), numSamples)
+        return start, stop
+
+    # Returns the entry as a dictionary saved in the index file.
+    def toDict(self):
+        return {key: value for key, value in self.__dict__.items() if key != "path"}
+
+    @staticmethod
+    def fromDict(values):
+        return RhdIndexEntry(**values)
+
+
+class RhdIndex():
+    """ This class indexes the Intan format files of a session directory
+    (e.g., the files started every newSaveFilePeriodMinutes, or one file
+    per triggered episode), so that data can be found by timestamp without
+    opening every file.  The index is saved in the directory as a small
+    JSON file (rhdindex.json) and is updated by build(), which only reads
+    files that are new or have changed since the index was saved.
+
+    Entries are in file name order, which is the order of recording for
+    files named with the date and time stamp added by startNewSaveFile().
+    Timestamps are the timestamps saved in the files: in triggered
+    recordings every episode has its own zero at its trigger point.
+    """
+
+    def __init__(self, directory, entries=None):
+        self.directory = directory
+        self.entries = entries or []
+
+    # Index the .rhd files in directory matching pattern, reusing the entries of
+    # unchanged files from the saved index, and save the index if save is True.
+    # Files that cannot be read are skipped and listed in skippedFiles.
+    @staticmethod
+    def build(directory, pattern="*.rhd", save=True):
+        try:
+            oldEntries = {entry.fileName: entry for entry in RhdIndex.load(directory).entries}
+        except (IOError, ValueError):
+            oldEntries = {}
+
+        ret = RhdIndex(directory)
+        ret.skippedFiles = []
+        for path in sorted(glob.glob(os.path.join(glob.escape(directory), pattern))):
+            fileName = os.path.basename(path)
+            entry = oldEntries.get(fileName)
+            if entry is None or entry.fileSize != os.path.getsize(path) or \
+                    entry.modificationTime != os.path.getmtime(path):
+                try:
+                    entry = RhdIndexEntry.fromFile(path)
+                except (IOError, ValueError):
+                    ret.skippedFiles.append(fileName)
+                    continue
+            entry.path = path
+            ret.entries.append(entry)
+
+        if save:
+            ret.save()
+        return ret
+
+    # Load the index saved in directory.  Raises IOError if there is none and
+    # ValueError if it is not valid.
+    @staticmethod
+    def load(directory):
+        with open(os.path.join(directory, INDEX_FILE_NAME)) as f:
+            try:
+                document = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError("Invalid index file: " + str(e))
+        if document.get("version") != INDEX_VERSION:
+            raise ValueError("Unsupported index file version: " + str(document.get("version")))
+
+        ret = RhdIndex(directory, [RhdIndexEntry.fromDict(values) for values in document["files"]])
+        for entry in ret.entries:
+            entry.path = os.path.join(directory, entry.fileName)
+        return ret
+
+    def save(self):
+        with open(os.path.join(self.directory, INDEX_FILE_NAME), "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "files": [entry.toDict() for entry in self.entries],
+            }, f, separators=(",", ":"))
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Returns the entries of the files with samples with timestamps in
+    # [startTimeStamp, stopTimeStamp).
+    def findFiles(self, startTimeStamp, stopTimeStamp):
+        return [entry for entry in self.entries
+                if entry.numBlocks > 0 and entry.firstTimeStamp < stopTimeStamp and
+                entry.lastTimeStamp >= startTimeStamp]
+
+    # Returns a list of (entry, start, stop) tuples with the range of samples
+    # [start, stop) of each file that has timestamps in [startTimeStamp,
+    # stopTimeStamp).  The data blocks of these samples start at byte
+    # entry.blockOffset(start // SAMPLES_PER_DATA_BLOCK) of the file.
+    def find(self, startTimeStamp, stopTimeStamp):
+        ranges = []
+        for entry in self.findFiles(startTimeStamp, stopTimeStamp):
+            start, stop = entry.sampleRange(startTimeStamp, stopTimeStamp)
+            if stop > start:
+                ranges.append((entry, start, stop))
+        return ranges
+
+    # Returns the samples of channel of signal (an RhdFile SampleArray name,
+    # e.g., "amplifierData") with timestamps in [startTimeStamp, stopTimeStamp),
+    # concatenated in file order.  Only the files holding these samples are
+    # opened.
+    def read(self, signal, channel, startTimeStamp, stopTimeStamp):
+        data = []
+        for entry in self.findFiles(startTimeStamp, stopTimeStamp):
+            rhdFile = RhdFile(entry.path)
+            start, stop = entry.sampleRange(startTimeStamp, stopTimeStamp, rhdFile)
+            sampleArray = getattr(rhdFile, signal)
+            if sampleArray.numChannels is None:
+                data.append(sampleArray[start:stop])
+            else:
+                data.append(sampleArray[channel, start:stop])
+        if not data:
+            return np.zeros(0)
+        return np.concatenate(data, axis=-1)
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Index the Intan format data files of a session directory by timestamp.")
+    parser.add_argument("directory", help="directory holding .rhd files")
+    parser.add_argument("--pattern", default="*.rhd",
+                        help="file name pattern of the indexed files (default: *.rhd)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Build or update the index of a directory and print it"""
+    args = parseArguments(sys.argv[1:] if argv is None else argv)
+
+    index = RhdIndex.build(args.directory, args.pattern)
+    for entry in index.entries:
+        print("%s: %d blocks, timestamps %d to %d%s" % (
+            entry.fileName, entry.numBlocks, entry.firstTimeStamp, entry.lastTimeStamp,
+            "" if entry.contiguous else " (not contiguous)"))
+    for fileName in index.skippedFiles:
+        print(fileName + ": skipped, not a valid Intan format file")
+    print(str(len(index)) + " files indexed in " + os.path.join(args.directory, INDEX_FILE_NAME))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,13 @@
 from PyQt5.QtWidgets import QDialog, QRadioButton, QButtonGroup, QSpinBox, QCheckBox, QDialogButtonBox
-from PyQt5.QtWidgets import QLabel, QVBoxLayout, QGroupBox, QHBoxLayout
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QGroupBox, QHBoxLayout, QComboBox, QDoubleSpinBox
 import constants
 # Save file format selection dialog.
 # Allows users to select a save file format, along with various options.
 
 
 class SetSaveFormatDialog(QDialog):
-    def __init__(self, initSaveFormat, initSaveTemperature, initSaveTtlOut, initNewSaveFilePeriodMinutes, parent):
+    def __init__(self, initSaveFormat, initSaveTemperature, initSaveTtlOut, initNewSaveFilePeriodMinutes,
+                 initCompressionCodec, initChannelWriteWindowSeconds, parent):
         super().__init__(parent)
         self.setWindowTitle("Select Saved Data File Format")
 
@@ -15,17 +16,26 @@ class SetSaveFormatDialog(QDialog):
             "\"One File Per Signal Type\" Format")
         saveFormatOpenEphysButton = QRadioButton(
             "\"One File Per Channel\" Format")
+        saveFormatRawButton = QRadioButton("Raw USB Data Format")
+        saveFormatCompressedButton = QRadioButton(
+            "Compressed Intan File Format")
 
         self.buttonGroup = QButtonGroup()
         self.buttonGroup.addButton(saveFormatIntanButton)
         self.buttonGroup.addButton(saveFormatNeuroScopeButton)
         self.buttonGroup.addButton(saveFormatOpenEphysButton)
+        self.buttonGroup.addButton(saveFormatRawButton)
+        self.buttonGroup.addButton(saveFormatCompressedButton)
         self.buttonGroup.setId(saveFormatIntanButton,
                                constants.SaveFormatIntan)
         self.buttonGroup.setId(saveFormatNeuroScopeButton,
                                constants.SaveFormatFilePerSignalType)
         self.buttonGroup.setId(saveFormatOpenEphysButton,
                                constants.SaveFormatFilePerChannel)
+        self.buttonGroup.setId(saveFormatRawButton,
+                               constants.SaveFormatRaw)
+        self.buttonGroup.setId(saveFormatCompressedButton,
+                               constants.SaveFormatCompressed)
 
         if initSaveFormat == constants.SaveFormatIntan:
             saveFormatIntanButton.setChecked(True)
@@ -33,11 +43,25 @@ class SetSaveFormatDialog(QDialog):
             saveFormatNeuroScopeButton.setChecked(True)
         elif initSaveFormat == constants.SaveFormatFilePerChannel:
             saveFormatOpenEphysButton.setChecked(True)
+        elif initSaveFormat == constants.SaveFormatRaw:
+            saveFormatRawButton.setChecked(True)
+        elif initSaveFormat == constants.SaveFormatCompressed:
+            saveFormatCompressedButton.setChecked(True)
 
         self.recordTimeSpinBox = QSpinBox()
         self.recordTimeSpinBox.setRange(1, 999)
         self.recordTimeSpinBox.setValue(initNewSaveFilePeriodMinutes)
 
+        self.compressionComboBox = QComboBox()
+        self.compressionComboBox.addItem("zlib")
+        self.compressionComboBox.addItem("LZMA (smaller, slower)")
+        self.compressionComboBox.setCurrentIndex(initCompressionCodec)
+
+        self.writeWindowSpinBox = QDoubleSpinBox()
+        self.writeWindowSpinBox.setRange(0.1, 60.0)
+        self.writeWindowSpinBox.setDecimals(1)
+        self.writeWindowSpinBox.setValue(initChannelWriteWindowSeconds)
+
         self.saveTemperatureCheckBox = QCheckBox(
             "Save On-Chip Temperature Sensor Readings")
         self.saveTemperatureCheckBox.setChecked(initSaveTemperature)
@@ -56,6 +80,17 @@ class SetSaveFormatDialog(QDialog):
         newFileTimeLayout.addWidget(QLabel("minutes"))
         newFileTimeLayout.addStretch(1)
 
+        compressionLayout = QHBoxLayout()
+        compressionLayout.addWidget(QLabel("Compression:"))
+        compressionLayout.addWidget(self.compressionComboBox)
+        compressionLayout.addStretch(1)
+
+        writeWindowLayout = QHBoxLayout()
+        writeWindowLayout.addWidget(QLabel("Write each file every"))
+        writeWindowLayout.addWidget(self.writeWindowSpinBox)
+        writeWindowLayout.addWidget(QLabel("seconds"))
+        writeWindowLayout.addStretch(1)
+
         label1 = QLabel("This option saves all waveforms in one file, along with records "
                         "of sampling rate, amplifier bandwidth, channel names, etc.  To keep "
                         "individual file size reasonable, a file is created every N minutes.  "
@@ -78,13 +113,24 @@ class SetSaveFormatDialog(QDialog):
         label3 = QLabel("This option creates a subdirectory and saves each enabled waveform "
                         "in its own *.dat raw data file.  The subdirectory also contains a time.dat "
                         "file containing a timestamp vector, and an info.rhd file containing "
-                        "records of sampling rate, amplifier bandwidth, channel names, etc.")
+                        "records of sampling rate, amplifier bandwidth, channel names, etc.  The data of "
+                        "each file is gathered in memory and written every few seconds.")
         label3.setWordWrap(True)
 
+        label6 = QLabel("This option saves the USB data exactly as it is read from the interface "
+                        "board in *.raw files, which takes the least processing while recording.  "
+                        "Raw files are converted to any of the other formats with convertraw.py.  "
+                        "A file is created every N minutes.")
+        label6.setWordWrap(True)
+
+        label7 = QLabel("This option saves the traditional Intan format data, losslessly compressed, "
+                        "in *.rhc files, which may be read with the CompressedFile class of the rhd2k "
+                        "package.  A file is created every N minutes.")
+        label7.setWordWrap(True)
+
         boxLayout1 = QVBoxLayout()
         boxLayout1.addWidget(saveFormatIntanButton)
         boxLayout1.addWidget(label1)
-        boxLayout1.addLayout(newFileTimeLayout)
         boxLayout1.addWidget(self.saveTemperatureCheckBox)
 
         boxLayout2 = QVBoxLayout()
@@ -95,6 +141,16 @@ class SetSaveFormatDialog(QDialog):
         boxLayout3 = QVBoxLayout()
         boxLayout3.addWidget(saveFormatOpenEphysButton)
         boxLayout3.addWidget(label3)
+        boxLayout3.addLayout(writeWindowLayout)
+
+        boxLayout4 = QVBoxLayout()
+        boxLayout4.addWidget(saveFormatRawButton)
+        boxLayout4.addWidget(label6)
+
+        boxLayout5 = QVBoxLayout()
+        boxLayout5.addWidget(saveFormatCompressedButton)
+        boxLayout5.addWidget(label7)
+        boxLayout5.addLayout(compressionLayout)
 
         mainGroupBox1 = QGroupBox()
         mainGroupBox1.setLayout(boxLayout1)
@@ -102,6 +158,10 @@ class SetSaveFormatDialog(QDialog):
         mainGroupBox2.setLayout(boxLayout2)
         mainGroupBox3 = QGroupBox()
         mainGroupBox3.setLayout(boxLayout3)
+        mainGroupBox4 = QGroupBox()
+        mainGroupBox4.setLayout(boxLayout4)
+        mainGroupBox5 = QGroupBox()
+        mainGroupBox5.setLayout(boxLayout5)
 
         label4 = QLabel("To minimize the disk space required for data files, remember to "
                         "disable all unused channels, including auxiliary input and supply "
@@ -120,6 +180,9 @@ class SetSaveFormatDialog(QDialog):
         mainLayout.addWidget(mainGroupBox1)
         mainLayout.addWidget(mainGroupBox2)
         mainLayout.addWidget(mainGroupBox3)
+        mainLayout.addWidget(mainGroupBox4)
+        mainLayout.addWidget(mainGroupBox5)
+        mainLayout.addLayout(newFileTimeLayout)
         mainLayout.addWidget(self.saveTtlOutCheckBox)
         mainLayout.addWidget(label4)
         mainLayout.addWidget(label5)
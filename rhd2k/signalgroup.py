@@ -1,8 +1,13 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
-import constants
-from signalchannel import SignalChannel
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from . import constants
+    from .signalchannel import SignalChannel
+except ImportError:
+    import constants
+    from signalchannel import SignalChannel
 
 
 class SignalGroup():
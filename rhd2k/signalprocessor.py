@@ -1,19 +1,21 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
-from numpy import random
+import numpy as np
 import math
 
-from PyQt5.QtCore import QFile, QIODevice, QDataStream
-
 import constants
+from datablockbatch import DataBlockBatch
+from datablockencoder import DataBlockEncoder
+from datastream import openDataStream
+from channelwriter import ChannelWriter
+from datawriter import DataWriter
+from synthgenerator import SynthDataGenerator
+from usbdecoder import dataBlockSizeInBytes
 
-dataStreamBuffer = [' '] * \
-    (2 * constants.MAX_NUM_DATA_STREAMS * 32 * constants.SAMPLES_PER_DATA_BLOCK)
-# Assume maximum number of data blocks = 16
-dataStreamBufferArray = [
-    [' ']*(2 * constants.SAMPLES_PER_DATA_BLOCK * 16)]*(constants.MAX_NUM_DATA_STREAMS * 32)
-bufferArrayIndex = [0]*(constants.MAX_NUM_DATA_STREAMS * 32)
+# Shift of each of the 16 digital lines in a TTL word, as a column to unpack
+# [t] TTL words into [line][t] bits.
+TTL_LINE_SHIFTS = np.arange(16).reshape(16, 1)
 
 
 class SignalProcessor():
@@ -27,9 +29,20 @@ class SignalProcessor():
     waveform data, measuring the amplitude of a particular frequency
     component (useful in the electrode impedance measurements), and
     generating synthetic neural or ECG data for demonstration purposes.
+
+    All waveform buffers are preallocated, contiguous NumPy arrays indexed
+    [stream][channel][t] (or [channel][t] for board signals), so other
+    components can slice them without copying.  waveformDtype selects the
+    floating-point type of the analog waveform buffers; np.float32 halves
+    their memory footprint at the cost of single-precision filtering.
+    Digital waveforms are always stored as uint8 (0 or 1).  synthSeed seeds
+    the synthetic data generator, so demonstration runs can be repeated.
     """
 
-    def __init__(self):
+    def __init__(self, waveformDtype=np.float64, synthSeed=None):
+        # Floating-point type of the analog waveform buffers.
+        self.waveformDtype = np.dtype(waveformDtype)
+
         # Notch filter initial parameters.
         self.notchFilterEnabled = False
         self.a1 = 0.0
@@ -43,12 +56,10 @@ class SignalProcessor():
         self.aHpf = 0.0
         self.bHpf = 0.0
 
-        # Set up random number generator in case we are asked to generate synthetic data.
-        # (br): replaced
-
-        # Other synthetic waveform variables.
-        self.tPulse = 0.0
-        self.synthTimeStamp = 0
+        # Seed of the random number generator used in case we are asked to
+        # generate synthetic data (None = unpredictable).
+        self.synthSeed = synthSeed
+        self.synthGenerator = None
 
         # Initialize to have definition here
         self.numDataStreams = 0
@@ -64,12 +75,10 @@ class SignalProcessor():
         self.boardAdc = 0
         self.boardDigIn = 0
         self.boardDigOut = 0
-        self.synthSpikeAmplitude = 0
-        self.synthSpikeDuration = 0
-        self.synthRelativeSpikeRate = 0
-        self.synthEcgAmplitude = 0
         self.tempRawHistory = 0
         self.saveListBoardDigIn = 0
+        self.dataBlockBatch = None
+        self.dataBlockEncoder = None
 
         # Filenames
         self.timestampFileName = ""
@@ -98,6 +107,14 @@ class SignalProcessor():
         self.digitalInputStream = None
         self.digitalOutputStream = None
 
+        # Save-to-disk data is encoded on the acquisition loop but written to
+        # disk on this background thread.
+        self.dataWriter = DataWriter()
+
+        # "One File Per Channel" data is gathered here and handed to the data
+        # writer in large writes (see AcquisitionEngine.startNewSaveFile()).
+        self.channelWriter = ChannelWriter(self.dataWriter)
+
         # Lists
         self.saveListAmplifier = []
         self.saveListAuxInput = []
@@ -109,6 +126,8 @@ class SignalProcessor():
 
         self.tempHistoryLength = 0
         self.tempHistoryMaxLength = 0
+        self.tempHistoryIndex = 0
+        self.tempHistorySum = 0
 
     # Allocate memory to store waveform data.
     def allocateMemory(self, numStreams):
@@ -120,23 +139,28 @@ class SignalProcessor():
 
         # Allocate vector memory for waveforms from USB interface board and notch filter.
         self.amplifierPreFilter = allocateDoubleArray3D(
-            numStreams, 32, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks)
+            numStreams, 32, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks, self.waveformDtype)
         self.amplifierPostFilter = allocateDoubleArray3D(
-            numStreams, 32, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks)
+            numStreams, 32, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks, self.waveformDtype)
         self.highpassFilterState = allocateDoubleArray2D(numStreams, 32)
         self.prevAmplifierPreFilter = allocateDoubleArray3D(numStreams, 32, 2)
         self.prevAmplifierPostFilter = allocateDoubleArray3D(numStreams, 32, 2)
         self.auxChannel = allocateDoubleArray3D(
-            numStreams, 3, (constants.SAMPLES_PER_DATA_BLOCK // 4) * maxNumBlocks)
-        self.supplyVoltage = allocateDoubleArray2D(numStreams, maxNumBlocks)
+            numStreams, 3, (constants.SAMPLES_PER_DATA_BLOCK // 4) * maxNumBlocks, self.waveformDtype)
+        self.supplyVoltage = allocateDoubleArray2D(
+            numStreams, maxNumBlocks, self.waveformDtype)
         self.tempRaw = allocateDoubleArray1D(numStreams)
         self.tempAvg = allocateDoubleArray1D(numStreams)
         self.boardAdc = allocateDoubleArray2D(
-            8, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks)
+            8, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks, self.waveformDtype)
         self.boardDigIn = allocateIntArray2D(
-            16, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks)
+            16, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks, np.uint8)
         self.boardDigOut = allocateIntArray2D(
-            16, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks)
+            16, constants.SAMPLES_PER_DATA_BLOCK * maxNumBlocks, np.uint8)
+
+        # Staging area for the raw contents of the data blocks of one read.
+        self.dataBlockBatch = DataBlockBatch(numStreams, maxNumBlocks)
+        self.blockTempAvg = allocateDoubleArray2D(maxNumBlocks, numStreams)
 
         # Initialize vector memory used in notch filter state.
         fillZerosDoubleArray3D(self.amplifierPostFilter)
@@ -144,34 +168,22 @@ class SignalProcessor():
         fillZerosDoubleArray3D(self.prevAmplifierPostFilter)
         fillZerosDoubleArray2D(self.highpassFilterState)
 
-        # Allocate vector memory for generating synthetic neural and ECG waveforms.
-        self.synthSpikeAmplitude = allocateDoubleArray3D(numStreams, 32, 2)
-        self.synthSpikeDuration = allocateDoubleArray3D(numStreams, 32, 2)
-        self.synthRelativeSpikeRate = allocateDoubleArray2D(numStreams, 32)
-        self.synthEcgAmplitude = allocateDoubleArray2D(numStreams, 32)
-
-        # Assign random parameters for synthetic waveforms.
-        for stream in range(0, numStreams):
-            for channel in range(0, 32):
-                self.synthEcgAmplitude[stream][channel] = random.uniform(
-                    0.5, 3.0)
-                for spikeNum in range(0, 2):
-                    self.synthSpikeAmplitude[stream][channel][spikeNum] = random.uniform(
-                        -400.0, 100.0)
-                    self.synthSpikeDuration[stream][channel][spikeNum] = random.uniform(
-                        0.3, 1.7)
-                    self.synthRelativeSpikeRate[stream][channel] = random.uniform(
-                        0.1, 5.0)
+        # Generator of synthetic neural and ECG waveforms.
+        self.synthGenerator = SynthDataGenerator(numStreams, self.synthSeed)
 
         # Initialize vector for averaging temperature readings over time.
         self.tempRawHistory = allocateDoubleArray2D(
             numStreams, maxNumBlocks)
+        self.tempHistorySum = allocateDoubleArray1D(numStreams)
         self.tempHistoryReset(4)
 
     # Creates lists (vectors, actually) of all enabled waveforms to expedite
-    # save-to-disk operations.
-    def createSaveList(self, signalSources, addTriggerChannel, triggerChannel):
-        self.synthTimeStamp = 0  # for synthetic data mode
+    # save-to-disk operations.  If addTriggerChannel is True, the digital or
+    # analog inputs in triggerChannels (0-15 or 16-23, see TriggerSource) are
+    # saved even if they are disabled.
+    def createSaveList(self, signalSources, addTriggerChannel, triggerChannels):
+        if self.synthGenerator is not None:
+            self.synthGenerator.timeStamp = 0  # for synthetic data mode
 
         self.saveListAmplifier.clear()
         self.saveListAuxInput.clear()
@@ -187,15 +199,16 @@ class SignalProcessor():
             for index in range(signalSources.signalPort[port].numChannels()):
                 currentChannel = signalSources.signalPort[port].channelByNativeOrder(
                     index)
-                # Maybe add this channel if it is the trigger channel.
+                # Maybe add this channel if it is a trigger channel.
                 if addTriggerChannel:
-                    if triggerChannel > 15 and currentChannel.signalType == constants.BoardAdcSignal:
-                        if currentChannel.nativeChannelNumber == triggerChannel - 16:
-                            currentChannel.enabled = True
+                    for triggerChannel in triggerChannels:
+                        if triggerChannel > 15 and currentChannel.signalType == constants.BoardAdcSignal:
+                            if currentChannel.nativeChannelNumber == triggerChannel - 16:
+                                currentChannel.enabled = True
 
-                elif (triggerChannel < 16 and currentChannel.signalType == constants.BoardDigInSignal):
-                    if currentChannel.nativeChannelNumber == triggerChannel:
-                        currentChannel.enabled = True
+                        elif (triggerChannel < 16 and currentChannel.signalType == constants.BoardDigInSignal):
+                            if currentChannel.nativeChannelNumber == triggerChannel:
+                                currentChannel.enabled = True
 
                 # Add all enabled channels to their appropriate save list.
                 if currentChannel.enabled:
@@ -219,6 +232,11 @@ class SignalProcessor():
                 if currentChannel.signalType == constants.SupplyVoltageSignal:
                     self.saveListTempSensor.append(currentChannel)
 
+        self.dataBlockEncoder = DataBlockEncoder(self.saveListAmplifier, self.saveListAuxInput,
+                                                 self.saveListSupplyVoltage, self.saveListTempSensor,
+                                                 self.saveListBoardAdc, self.saveListBoardDigitalIn,
+                                                 self.saveListBoardDigitalOut)
+
     # Create filename (appended to the specified path) for timestamp data.
     def createTimestampFilename(self, path):
         self.timestampFileName = path + "/" + "time" + ".dat"
@@ -235,127 +253,75 @@ class SignalProcessor():
 
     # Open timestamp save file.
     def openTimestampFile(self):
-        self.timestampFile = QFile(self.timestampFileName)
-
-        if not self.timestampFile.open(QIODevice.WriteOnly):
-            print("Cannot open file for writing: " +
-                  str(self.timestampFile.errorString()) + "\n")
-
-        timestampStream = QDataStream(self.timestampFile)
-        timestampStream.setVersion(QDataStream.Qt_4_8)
-
-        # Set to little endian mode for compatibilty with MATLAB,
-        # which is little endian on all platforms
-        timestampStream.setByteOrder(QDataStream.LittleEndian)
-
-        # Write 4-byte floating-point numbers (instead of the default 8-byte numbers)
-        # to save disk space.
-        timestampStream.setFloatingPointPrecision(QDataStream.SinglePrecision)
+        self.timestampFile, self.timestampStream = openDataStream(
+            self.timestampFileName)
 
     # Open data files for "One File Per Signal Type" format.
     def openSignalTypeFiles(self, saveTtlOut):
-        amplifierFile = 0
-        auxInputFile = 0
-        supplyFile = 0
-        adcInputFile = 0
-        digitalInputFile = 0
-        digitalOutputFile = 0
-
-        amplifierStream = 0
-        auxInputStream = 0
-        supplyStream = 0
-        adcInputStream = 0
-        digitalInputStream = 0
-        digitalOutputStream = 0
+        self.amplifierFile = None
+        self.auxInputFile = None
+        self.supplyFile = None
+        self.adcInputFile = None
+        self.digitalInputFile = None
+        self.digitalOutputFile = None
+
+        self.amplifierStream = None
+        self.auxInputStream = None
+        self.supplyStream = None
+        self.adcInputStream = None
+        self.digitalInputStream = None
+        self.digitalOutputStream = None
 
         if self.saveListAmplifier:
-            amplifierFile = QFile(self.amplifierFileName)
-            if not amplifierFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(amplifierFile.errorString()) + "\n")
-            amplifierStream = QDataStream(amplifierFile)
-            amplifierStream.setVersion(QDataStream.Qt_4_8)
-            amplifierStream.setByteOrder(QDataStream.LittleEndian)
-            amplifierStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
+            self.amplifierFile, self.amplifierStream = openDataStream(
+                self.amplifierFileName)
 
         if self.saveListAuxInput:
-            auxInputFile = QFile(self.auxInputFileName)
-            if not auxInputFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(auxInputFile.errorString()) + "\n")
-            auxInputStream = QDataStream(auxInputFile)
-            auxInputStream.setVersion(QDataStream.Qt_4_8)
-            auxInputStream.setByteOrder(QDataStream.LittleEndian)
-            auxInputStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
+            self.auxInputFile, self.auxInputStream = openDataStream(
+                self.auxInputFileName)
 
         if self.saveListSupplyVoltage:
-            supplyFile = QFile(self.supplyFileName)
-            if not supplyFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(supplyFile.errorString()) + "\n")
-            supplyStream = QDataStream(supplyFile)
-            supplyStream.setVersion(QDataStream.Qt_4_8)
-            supplyStream.setByteOrder(QDataStream.LittleEndian)
-            supplyStream.setFloatingPointPrecision(QDataStream.SinglePrecision)
+            self.supplyFile, self.supplyStream = openDataStream(
+                self.supplyFileName)
 
         if self.saveListBoardAdc:
-            adcInputFile = QFile(self.adcInputFileName)
-            if not adcInputFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(adcInputFile.errorString()) + "\n")
-            adcInputStream = QDataStream(adcInputFile)
-            adcInputStream.setVersion(QDataStream.Qt_4_8)
-            adcInputStream.setByteOrder(QDataStream.LittleEndian)
-            adcInputStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
+            self.adcInputFile, self.adcInputStream = openDataStream(
+                self.adcInputFileName)
 
         if self.saveListBoardDigitalIn:
-            digitalInputFile = QFile(self.digitalInputFileName)
-            if not digitalInputFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(digitalInputFile.errorString()) + "\n")
-            digitalInputStream = QDataStream(digitalInputFile)
-            digitalInputStream.setVersion(QDataStream.Qt_4_8)
-            digitalInputStream.setByteOrder(QDataStream.LittleEndian)
-            digitalInputStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
+            self.digitalInputFile, self.digitalInputStream = openDataStream(
+                self.digitalInputFileName)
 
         if saveTtlOut:
-            digitalOutputFile = QFile(self.digitalOutputFileName)
-            if not digitalOutputFile.open(QIODevice.WriteOnly):
-                print("Cannot open file for writing: " +
-                      str(digitalOutputFile.errorString()) + "\n")
-            digitalOutputStream = QDataStream(digitalOutputFile)
-            digitalOutputStream.setVersion(QDataStream.Qt_4_8)
-            digitalOutputStream.setByteOrder(QDataStream.LittleEndian)
-            digitalOutputStream.setFloatingPointPrecision(
-                QDataStream.SinglePrecision)
-
-    # Close timestamp save file.
+            self.digitalOutputFile, self.digitalOutputStream = openDataStream(
+                self.digitalOutputFileName)
+
+    # Close timestamp save file (on the data writer thread, once its data has
+    # been written).
     def closeTimestampFile(self):
-        self.timestampFile.close()
+        self.channelWriter.finish()
+        self.dataWriter.close(self.timestampFile)
 
-    # Close data files for "One File Per Signal Type" format.
+    # Close data files for "One File Per Signal Type" format (on the data writer
+    # thread, once their data has been written).
     def closeSignalTypeFiles(self):
         if self.amplifierFile:
-            self.amplifierFile.close()
+            self.dataWriter.close(self.amplifierFile)
 
         if self.auxInputFile:
-            self.auxInputFile.close()
+            self.dataWriter.close(self.auxInputFile)
 
         if self.supplyFile:
-            self.supplyFile.close()
+            self.dataWriter.close(self.supplyFile)
 
         if self.adcInputFile:
-            self.adcInputFile.close()
+            self.dataWriter.close(self.adcInputFile)
 
         if self.digitalInputFile:
-            self.digitalInputFile.close()
+            self.dataWriter.close(self.digitalInputFile)
 
         if self.digitalOutputFile:
-            self.digitalOutputFile.close()
+            self.dataWriter.close(self.digitalOutputFile)
 
     # Create filenames (appended to the specified path) for each waveform.
     def createFilenames(self, signalSources, path):
@@ -392,45 +358,27 @@ class SignalProcessor():
                     index)
                 # Only open files for enabled channels.
                 if currentChannel.enabled:
-                    currentChannel.saveFile = QFile(
+                    currentChannel.saveFile, currentChannel.saveStream = openDataStream(
                         currentChannel.saveFileName)
 
-                    if not currentChannel.saveFile.open(QIODevice.WriteOnly):
-                        print("Cannot open file for writing: " +
-                              str(currentChannel.saveFile.errorString()) + "\n")
-
-                    currentChannel.saveStream = QDataStream(
-                        currentChannel.saveFile)
-                    currentChannel.saveStream.setVersion(QDataStream.Qt_4_8)
-
-                    # Set to little endian mode for compatibilty with MATLAB,
-                    # which is little endian on all platforms
-                    currentChannel.saveStream.setByteOrder(
-                        QDataStream.LittleEndian)
-
-                    # Write 4-byte floating-point numbers (instead of the default 8-byte numbers)
-                    # to save disk space.
-                    currentChannel.saveStream.setFloatingPointPrecision(
-                        QDataStream.SinglePrecision)
-
-    # Close individual save data files for all enabled waveforms.
+    # Close individual save data files for all enabled waveforms (on the data
+    # writer thread, once their data has been written).
     def closeSaveFiles(self, signalSources):
+        self.channelWriter.finish()
+
         for port in range(len(signalSources.signalPort)):
             for index in range(signalSources.signalPort[port].numChannels()):
                 currentChannel = signalSources.signalPort[port].channelByNativeOrder(
                     index)
                 # Only close files for enabled channels.
                 if currentChannel.enabled:
-                    currentChannel.saveFile.close()
+                    self.dataWriter.close(currentChannel.saveFile)
 
     # Reads numBlocks blocks of raw USB data stored in a queue of Rhd2000DataBlock
     # objects, loads this data into this SignalProcessor object, scaling the raw
-    # data to generate waveforms with units of volts or microvolts.
-    #
-    # If lookForTrigger is True, this function looks for a trigger on digital input
-    # triggerChannel with triggerPolarity.  If trigger is found, triggerTimeIndex
-    # returns timestamp of trigger point.  Otherwise, triggerTimeIndex returns -1,
-    # indicating no trigger was found.
+    # data to generate waveforms with units of volts or microvolts.  The raw
+    # blocks stay staged in dataBlockBatch until the next call, so a
+    # TriggerDetector kept for the whole run can look for triggers in them.
     #
     # If saveToDisk is True, a disk-format binary datastream is written to QDataStream out.
     # If saveTemp is True, temperature readings are also saved.  A timestampOffset can be
@@ -438,1188 +386,209 @@ class SignalProcessor():
     #
     # Returns number of bytes written to binary datastream out if saveToDisk == True.
     
-    def loadAmplifierData(self, dataQueue, numBlocks, lookForTrigger, triggerChannel, triggerPolarity, triggerTimeIndex, addToBuffer, bufferQueue, saveToDisk, out, saveFormat, saveTemp, saveTtlOut, timestampOffset):
-        indexSupply = 0
+    def loadAmplifierData(self, dataQueue, numBlocks, addToBuffer, bufferRing, saveToDisk, out, saveFormat, saveTemp, saveTtlOut, timestampOffset):
         numWordsWritten = 0
 
-        triggerFound = False
-        AnalogTriggerThreshold = 1.65
+        # Stage the raw contents of all blocks and remove them from dataQueue in
+        # one call; all waveforms are scaled at once by scaleDataBlockBatch().
+        self.dataBlockBatch.clear()
+        dataQueue.popBatch(self.dataBlockBatch, numBlocks)
+        batch = self.dataBlockBatch
 
-        for i in range(len(self.saveListAmplifier)):
-            bufferArrayIndex[i] = 0
+        # Average multiple temperature readings to improve accuracy
+        self.tempHistoryPushBatch(batch)
 
-        if lookForTrigger:
-            triggerTimeIndex = -1
+        # Keep the raw blocks (e.g., pre-trigger data) in bufferRing.
+        if addToBuffer:
+            bufferRing.append(batch, 0, numBlocks, self.blockTempAvg)
 
-        for block in range(numBlocks):
+        # Scale amplifier, auxiliary input, supply voltage and board ADC
+        # waveforms and unpack the digital inputs and outputs for all blocks
+        # at once.
+        self.scaleDataBlockBatch(self.dataBlockBatch)
 
-            # Load and scale RHD2000 amplifier waveforms
-            # (sampled at amplifier sampling rate)
-
-            front_ = dataQueue.front()
-            for stream in range(self.numDataStreams):
-                stream_ = front_.amplifierData[stream]
-                for channel in range(32):
-                    channel_ = stream_[channel]
-                    preFilter_ = self.amplifierPreFilter[stream][channel]
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        # Amplifier waveform units = microvolts
-                        preFilter_[t] = 0.195 * (channel_[t] - 32768)
-
-            #TODO(br): Note the index on stream_
-            # Load and scale RHD2000 auxiliary input waveforms
-            # (sampled at 1/4 amplifier sampling rate)
-            front_ = dataQueue.front()
-            for stream in range(self.numDataStreams):
-                stream_ = front_.auxiliaryData[stream]
-                for t in range(0, constants.SAMPLES_PER_DATA_BLOCK, 4):
-                    # Auxiliary input waveform units = volts
-                    self.auxChannel[stream][0][t] = 0.0000374 * stream_[1][t + 1]
-                    self.auxChannel[stream][1][t] = 0.0000374 * stream_[1][t + 2]
-                    self.auxChannel[stream][2][t] = 0.0000374 * stream_[1][t + 3]
-
-            # Load and scale RHD2000 supply voltage and temperature sensor waveforms
-            # (sampled at 1/60 amplifier sampling rate)
-            front_ = dataQueue.front()
-            for stream in range(self.numDataStreams):
-                stream_ = front_.auxiliaryData[stream]
-                # Supply voltage waveform units = volts
-                self.supplyVoltage[stream][indexSupply] = 0.0000748 * stream_[1][28]
-                # Temperature sensor waveform units = degrees C
-                self.tempRaw[stream] = (stream_[1][20] - stream_[1][12]) / 98.9 - 273.15
-
-            indexSupply += 1
+        # Optionally send binary data to binary output stream.  The data of all
+        # blocks is encoded at once and handed to the background data writer.
+        if saveToDisk:
+            numWordsWritten += self.writeDataBlockBatch(self.dataBlockBatch, 0, numBlocks, out, saveFormat,
+                                                        self.blockTempAvg, saveTemp, saveTtlOut, timestampOffset)
 
-            # Average multiple temperature readings to improve accuracy
-            self.tempHistoryPush(self.tempRaw)
-            self.tempHistoryCalcAvg()
+        # Return total number of bytes written to binary output stream
+        return 2 * numWordsWritten
 
-            # Load and scale USB interface board ADC waveforms
-            # (sampled at amplifier sampling rate)
-            front_ = dataQueue.front()
-            for channel in range(8):
-                channel_ = front_.boardAdcData[channel]
-                target_ = self.boardAdc[channel]
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    # ADC waveform units = volts
-                    target_[t] = 0.000050354 * channel_[t]
-
-            if lookForTrigger and not triggerFound and triggerChannel >= 16:
-                adc_ = self.boardAdc[triggerChannel - 16]
-                if triggerPolarity:
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):            
-                        # Trigger on logic low
-                        if adc_[t] < AnalogTriggerThreshold:
-                            triggerTimeIndex = front_.timeStamp[t]
-                            triggerFound = True
-
-                else:
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        # Trigger on logic high
-                        if adc_[t] >= AnalogTriggerThreshold:
-                            triggerTimeIndex = front_.timeStamp[t]
-                            triggerFound = True
-
-            # Load USB interface board digital input and output waveforms
-            front_ = dataQueue.front()
-            for channel in range(16):
-                ttlIn_ = front_.ttlIn
-                ttlOut_ = front_.ttlOut
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    self.boardDigIn[channel][t] = (
-                        ttlIn_[t] & (1 << channel)) != 0
-                    self.boardDigOut[channel][t] = (
-                        ttlOut_[t] & (1 << channel)) != 0
-
-            
-            if lookForTrigger and not triggerFound and triggerChannel < 16:
-                digIn_ = self.boardDigIn[triggerChannel]
-                if triggerPolarity:
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        # Trigger on logic low
-                        if digIn_[t] == 0:
-                            triggerTimeIndex = front_.timeStamp[t]
-                            triggerFound = True
-
-                else:
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        # Trigger on logic high
-                        if digIn_[t] == 1:
-                            triggerTimeIndex = front_.timeStamp[t]
-                            triggerFound = True
-
-            # Optionally send binary data to binary output stream
-            if saveToDisk:
-                if saveFormat == constants.SaveFormatIntan:
-                    # Save timestamp data
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQint32 = dataQueue.front(
-                        ).timeStamp[t] - timestampOffset
-                        # Save qint 32 in little-endian format
-                        dataStreamBuffer[bufferIndex] = tempQint32 & 0x000000ff
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0x0000ff00) >> 8
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0x00ff0000) >> 16
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0xff000000) >> 24
-                        bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    out.writeRawData(dataStreamBuffer, bufferIndex)
-                    numWordsWritten += 2 * constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save amplifier data
-                    bufferIndex = 0
-                    for i in range(len(self.saveListAmplifier)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            tempQuint16 = dataQueue.front(
-                            ).amplifierData[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][t]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    out.writeRawData(dataStreamBuffer, bufferIndex)
-                    numWordsWritten += len(self.saveListAmplifier) * \
-                        constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save auxiliary input data
-                    bufferIndex = 0
-                    for i in range(len(self.saveListAuxInput)):
-                        for t in range(0, constants.SAMPLES_PER_DATA_BLOCK, 4):
-                            tempQuint16 = dataQueue.front(
-                            ).auxiliaryData[self.saveListAuxInput[i].boardStream][1][t + self.saveListAuxInput[i].chipChannel + 1]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    out.writeRawData(dataStreamBuffer, bufferIndex)
-                    numWordsWritten += len(self.saveListAuxInput) * \
-                        constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save supply voltage data
-                    for i in range(len(self.saveListSupplyVoltage)):
-                        out.writeUInt16(
-                            dataQueue.front().auxiliaryData[self.saveListSupplyVoltage[i].boardStream][1][28])
-                        numWordsWritten += 1
-
-                    # Save temperature sensor data if saveTemp == True
-                    # Save as temperature in degrees C, multiplied by 100 and rounded to the nearest
-                    # signed integer.
-                    if saveTemp:
-                        for i in range(len(self.saveListTempSensor)):
-                            out.writeUInt16(
-                                100.0 * self.tempAvg[self.saveListTempSensor[i].boardStream])
-                            numWordsWritten += 1
-
-                    # Save board ADC data
-                    bufferIndex = 0
-                    for i in range(len(self.saveListBoardAdc)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            tempQuint16 = dataQueue.front(
-                            ).boardAdcData[self.saveListBoardAdc[i].nativeChannelNumber][t]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    out.writeRawData(dataStreamBuffer, bufferIndex)
-                    numWordsWritten += len(self.saveListBoardAdc) * \
-                        constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save board digital input data
-                    if self.saveListBoardDigIn:
-                        # If ANY digital inputs are enabled, we save ALL 16 channels, since
-                        # we are writing 16-bit chunks of data.
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            out.writeUInt16(dataQueue.front().ttlIn[t])
-                            numWordsWritten += 1
-
-                    # Save board digital output data, if saveTtlOut = True
-                    if saveTtlOut:
-                        # Save all 16 channels, since we are writing 16-bit chunks of data.
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            out.writeUInt16(dataQueue.front().ttlOut[t])
-                            numWordsWritten += 1
-
-                elif saveFormat == constants.SaveFormatFilePerSignalType:
-                    # Save timestamp data
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQint32 = dataQueue.front(
-                        ).timeStamp[t] - timestampOffset
-                        # Save qint 32 in little-endian format
-                        dataStreamBuffer[bufferIndex] = tempQint32 & 0x000000ff
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0x0000ff00) >> 8
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0x00ff0000) >> 16
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0xff000000) >> 24
-                        bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    self.timestampStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += 2 * constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save amplifier data
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        for i in range(len(self.saveListAmplifier)):
-                            tempQint16 = dataQueue.front(
-                            ).amplifierData[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][t] - 32768
-                            # Save qint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    if bufferIndex > 0:
-                        # Stream out all data at once to speed writing
-                        self.amplifierStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)
-                        numWordsWritten += len(self.saveListAmplifier) * \
-                            constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save auxiliary input data
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tAux = 4 * math.floor(t / 4.0)
-                        for i in range(len(self.saveListAuxInput)):
-                            tempQuint16 = dataQueue.front(
-                            ).auxiliaryData[self.saveListAuxInput[i].boardStream][1][tAux + self.saveListAuxInput[i].chipChannel + 1]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    if bufferIndex > 0:
-                        # Stream out all data at once to speed writing
-                        self.auxInputStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)
-                        numWordsWritten += len(self.saveListAuxInput) * \
-                            constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save supply voltage data
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        for i in range(len(self.saveListSupplyVoltage)):
-                            tempQuint16 = dataQueue.front(
-                            ).auxiliaryData[self.saveListSupplyVoltage[i].boardStream][1][28]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    if bufferIndex > 0:
-                        # Stream out all data at once to speed writing
-                        self.supplyStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)
-                        numWordsWritten += len(self.saveListSupplyVoltage) * \
-                            constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Not saving temperature data in this save format.
-
-                    # Save board ADC data
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        for i in range(len(self.saveListBoardAdc)):
-                            tempQuint16 = dataQueue.front(
-                            ).boardAdcData[self.saveListBoardAdc[i].nativeChannelNumber][t]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    if bufferIndex > 0:
-                        # Stream out all data at once to speed writing
-                        self.adcInputStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)
-                        numWordsWritten += len(self.saveListBoardAdc) * \
-                            constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save board digital input data
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        if self.saveListBoardDigIn:
-                            # If ANY digital inputs are enabled, we save ALL 16 channels, since
-                            # we are writing 16-bit chunks of data.
-                            self.digitalInputStream.writeUInt16(
-                                dataQueue.front().ttlIn[t])
-                            numWordsWritten += 1
-
-                    # Save board digital output data, if saveTtlOut = True
-                    if saveTtlOut:
-                        # Save all 16 channels, since we are writing 16-bit chunks of data.
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            self.digitalOutputStream.writeUInt16(
-                                dataQueue.front().ttlOut[t])
-                            numWordsWritten += 1
-
-                elif saveFormat == constants.SaveFormatFilePerChannel:
-                    # Save timestamp data
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQint32 = dataQueue.front(
-                        ).timeStamp[t] - timestampOffset
-                        # Save qint 32 in little-endian format
-                        dataStreamBuffer[bufferIndex] = tempQint32 & 0x000000ff
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0x0000ff00) >> 8
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0x00ff0000) >> 16
-                        bufferIndex += 1
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint32 & 0xff000000) >> 24
-                        bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    self.timestampStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += 2 * constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save amplifier data to dataStreamBufferArray In in effort to increase write speed we will
-                    # collect amplifier data from all data blocks and then write all data at the end of this function.
-                    for i in range(len(self.saveListAmplifier)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            tempQint16 = dataQueue.front(
-                            ).amplifierData[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][t] - 32768
-                            # Save qint16 in little-endian format (LSByte first)
-                            dataStreamBufferArray[i][bufferArrayIndex[i]
-                                                     ] = tempQint16 & 0x00ff
-                            bufferArrayIndex[i] += 1
-                            # (MSByte last)
-                            dataStreamBufferArray[i][bufferArrayIndex[i]] = (
-                                tempQint16 & 0xff00) >> 8
-                            bufferArrayIndex[i] += 1
-
-                        numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save auxiliary input data
-                    for i in range(len(self.saveListAuxInput)):
-                        bufferIndex = 0
-                        for t in range(0, constants.SAMPLES_PER_DATA_BLOCK, 4):
-                            # Aux data is sampled at 1/4 amplifier sampling rate write each sample 4 times
-                            for j in range(4):
-                                tempQuint16 = dataQueue.front(
-                                ).auxiliaryData[self.saveListAuxInput[i].boardStream][1][t + self.saveListAuxInput[i].chipChannel + 1]
-                                # Save quint16 in little-endian format (LSByte first)
-                                dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                                bufferIndex += 1
-                                # (MSByte last)
-                                dataStreamBuffer[bufferIndex] = (
-                                    tempQuint16 & 0xff00) >> 8
-                                bufferIndex += 1
-
-                        # Stream out all data at once to speed writing
-                        self.saveListAuxInput[i].saveStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)
-                        numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save supply voltage data
-                    for i in range(len(self.saveListSupplyVoltage)):
-                        bufferIndex = 0
-                        # Vdd data is sampled at 1/60 amplifier sampling rate write each sample 60 times
-                        for j in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            tempQuint16 = dataQueue.front(
-                            ).auxiliaryData[self.saveListSupplyVoltage[i].boardStream][1][28]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                        self.saveListSupplyVoltage[i].saveStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)    # Stream out all data at once to speed writing
-                        numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Not saving temperature data in this save format.
-
-                    # Save board ADC data
-                    for i in range(len(self.saveListBoardAdc)):
-                        bufferIndex = 0
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            tempQuint16 = dataQueue.front(
-                            ).boardAdcData[self.saveListBoardAdc[i].nativeChannelNumber][t]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                        # Stream out all data at once to speed writing
-                        self.saveListBoardAdc[i].saveStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)
-                        numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save board digital input data
-                    for i in range(len(self.saveListBoardDigitalIn)):
-                        bufferIndex = 0
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            tempQuint16 = ((dataQueue.front().ttlIn[t] & (
-                                1 << self.saveListBoardDigitalIn[i].nativeChannelNumber)) != 0)
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                        # (MSB of individual digital input will always be zero)
-                        dataStreamBuffer[bufferIndex] = 0
-                        bufferIndex += 1
-
-                        self.saveListBoardDigitalIn[i].saveStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)    # Stream out all data at once to speed writing
-                        numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                    # Save board digital output data, if saveTtlOut = True
-                    if saveTtlOut:
-                        for i in range(16):
-                            bufferIndex = 0
-                            for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                                tempQuint16 = (
-                                    (dataQueue.front().ttlOut[t] & (1 << i)) != 0)
-                                # Save quint16 in little-endian format (LSByte first)
-                                dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                                bufferIndex += 1
-                            # (MSB of individual digital input will always be zero)
-                            dataStreamBuffer[bufferIndex] = 0
-                            bufferIndex += 1
-
-                            self.saveListBoardDigitalOut[i].saveStream.writeRawData(
-                                dataStreamBuffer, bufferIndex)    # Stream out all data at once to speed writing
-                            numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-            if addToBuffer:
-                bufferQueue.push(dataQueue.front())
-
-            # We are done with this Rhd2000DataBlock object remove it from dataQueue
-            dataQueue.pop()
-
-        # If we are operating on the "One File Per Channel" format, we have saved all amplifier data from
-        # multiple data blocks in dataStreamBufferArray.  Now we write it all at once, for each channel.
-        if saveToDisk and format == constants.SaveFormatFilePerChannel:
-            for i in range(len(self.saveListAmplifier)):
-                # Stream out all amplifier data at once to speed writing
-                self.saveListAmplifier[i].saveStream.writeRawData(
-                    dataStreamBufferArray[i], bufferArrayIndex[i])
+    # Scales the raw waveforms of all blocks staged in a DataBlockBatch into
+    # amplifierPreFilter (microvolts), auxChannel, supplyVoltage and boardAdc
+    # (volts), and unpacks the TTL words into boardDigIn and boardDigOut (0 or
+    # 1 per line).  Block b of the batch fills samples [60 * b, 60 * (b + 1))
+    # of the amplifier, ADC and digital waveforms, [15 * b, 15 * (b + 1)) of
+    # the auxiliary input waveforms and sample b of the supply voltage
+    # waveforms.
+    def scaleDataBlockBatch(self, batch):
+        numBlocks = batch.numBlocks
+        if numBlocks == 0:
+            return
+
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        length = samples * numBlocks
+
+        # Amplifier waveform units = microvolts
+        # (sampled at amplifier sampling rate)
+        amplifier_ = self.amplifierPreFilter[:, :, :length].reshape(
+            self.numDataStreams, 32, numBlocks, samples)
+        np.subtract(batch.amplifierData[:numBlocks].transpose(1, 2, 0, 3), 32768,
+                    out=amplifier_)
+        amplifier_ *= 0.195
+
+        # Auxiliary input waveform units = volts
+        # (sampled at 1/4 amplifier sampling rate).  Every fourth sample of
+        # auxiliary command slot 1 is followed by one sample from each of the
+        # three auxiliary inputs.
+        auxiliary_ = batch.auxiliaryData[:numBlocks, :, 1, :].reshape(
+            numBlocks, self.numDataStreams, samples // 4, 4)[:, :, :, 1:4]
+        auxChannel_ = self.auxChannel[:, :, :(samples // 4) * numBlocks].reshape(
+            self.numDataStreams, 3, numBlocks, samples // 4)
+        np.multiply(auxiliary_.transpose(1, 3, 0, 2), 0.0000374, out=auxChannel_)
+
+        # Supply voltage waveform units = volts
+        # (sampled at 1/60 amplifier sampling rate)
+        np.multiply(batch.auxiliaryData[:numBlocks, :, 1, 28].T, 0.0000748,
+                    out=self.supplyVoltage[:, :numBlocks])
+
+        # USB interface board ADC waveform units = volts
+        # (sampled at amplifier sampling rate)
+        boardAdc_ = self.boardAdc[:, :length].reshape(8, numBlocks, samples)
+        np.multiply(batch.boardAdcData[:numBlocks].transpose(1, 0, 2), 0.000050354,
+                    out=boardAdc_)
+
+        # USB interface board digital input and output waveforms: bit n of each
+        # TTL word is line n (sampled at amplifier sampling rate).
+        np.bitwise_and(np.right_shift(batch.ttlIn[:numBlocks].reshape(1, length), TTL_LINE_SHIFTS), 1,
+                       out=self.boardDigIn[:, :length], casting="unsafe")
+        np.bitwise_and(np.right_shift(batch.ttlOut[:numBlocks].reshape(1, length), TTL_LINE_SHIFTS), 1,
+                       out=self.boardDigOut[:, :length], casting="unsafe")
+
+    # Encodes blocks [start, stop) of a DataBlockBatch in saveFormat and queues
+    # the data on the background data writer: the Intan format goes to
+    # QDataStream out, the other formats to the streams opened by
+    # openTimestampFile(), openSignalTypeFiles() and openSaveFiles().
+    # blockTempAvg holds the averaged temperature of each stream for each block.
+    # Returns number of 16-bit words queued.
+    def writeDataBlockBatch(self, batch, start, stop, out, saveFormat, blockTempAvg, saveTemp, saveTtlOut, timestampOffset):
+        numWordsWritten = 0
+
+        # The compressed format compresses Intan format block records.
+        if saveFormat == constants.SaveFormatIntan or saveFormat == constants.SaveFormatCompressed:
+            # Encode the complete block records and stream them out with a single write.
+            record = self.dataBlockEncoder.encodeIntan(batch, start, stop, blockTempAvg[start:stop],
+                                                       timestampOffset, saveTemp, saveTtlOut)
+            self.dataWriter.write(out, record.tobytes())
+            numWordsWritten += record.size // 2
+
+        elif saveFormat == constants.SaveFormatFilePerSignalType:
+            files = self.dataBlockEncoder.encodeFilePerSignalType(
+                batch, start, stop, timestampOffset, saveTtlOut)
+            streams = {"time": self.timestampStream,
+                       "amplifier": self.amplifierStream,
+                       "auxiliary": self.auxInputStream,
+                       "supply": self.supplyStream,
+                       "analogin": self.adcInputStream,
+                       "digitalin": self.digitalInputStream,
+                       "digitalout": self.digitalOutputStream}
+
+            # Stream out all data of each file at once to speed writing
+            for name, data in files.items():
+                self.dataWriter.write(streams[name], data.tobytes())
+                numWordsWritten += data.size // 2
+
+        elif saveFormat == constants.SaveFormatFilePerChannel:
+            channels = self.dataBlockEncoder.encodeFilePerChannel(
+                batch, start, stop, timestampOffset, saveTtlOut)
+
+            # Gather the data of each file and write it in large chunks.
+            self.channelWriter.write(self.timestampStream,
+                                     channels["time"].view("<i4"))
+            numWordsWritten += channels["time"].size // 2
+
+            saveLists = {"amplifier": self.saveListAmplifier,
+                         "auxiliary": self.saveListAuxInput,
+                         "supply": self.saveListSupplyVoltage,
+                         "analogin": self.saveListBoardAdc,
+                         "digitalin": self.saveListBoardDigitalIn,
+                         "digitalout": self.saveListBoardDigitalOut}
+
+            for name, saveList in saveLists.items():
+                if name not in channels:
+                    continue
+                for channel, data in zip(saveList, channels[name]):
+                    self.channelWriter.write(channel.saveStream, data)
+                    numWordsWritten += data.size
+
+        elif saveFormat == constants.SaveFormatRaw:
+            data = self.dataBlockEncoder.encodeRaw(batch, start, stop)
+            self.dataWriter.write(out, data.tobytes())
+            numWordsWritten += data.size // 2
+
+        return numWordsWritten
+
+    # Save the entire contents of a DataBlockRing (e.g., the pre-trigger data) to disk,
+    # and empty the ring in the process.  The blocks are encoded in place, with the
+    # temperatures averaged when they were loaded.
+    # Returns number of bytes written to binary datastream out.
+    def saveBufferedData(self, bufferRing, out, saveFormat, saveTemp, saveTtlOut, timestampOffset):
+        numWordsWritten = 0
+
+        for start, stop in bufferRing.segments():
+            numWordsWritten += self.writeDataBlockBatch(bufferRing.batch, start, stop, out, saveFormat,
+                                                        bufferRing.blockTempAvg, saveTemp, saveTtlOut,
+                                                        timestampOffset)
+        bufferRing.clear()
 
         # Return total number of bytes written to binary output stream
-        return 2 * numWordsWritten, triggerTimeIndex
+        return (2 * numWordsWritten)
 
-    # Save to entire contents of the buffer queue to disk, and empty the queue in the process.
+    # Save data blocks in the raw USB format (a UsbDataBlocks object, e.g. the
+    # contents of a raw format file) to disk in saveFormat, as if they had just
+    # been read from the interface board.
     # Returns number of bytes written to binary datastream out.
-    def saveBufferedData(self, bufferQueue, out, saveFormat, saveTemp, saveTtlOut, timestampOffset):
+    def saveUsbDataBlocks(self, usbDataBlocks, out, saveFormat, saveTemp, saveTtlOut, timestampOffset):
         numWordsWritten = 0
 
-        if saveFormat == constants.SaveFormatIntan:
-            while not bufferQueue.empty():
-                # Save timestamp data
-                bufferIndex = 0
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    tempQint32 = bufferQueue.front(
-                    ).timeStamp[t] - timestampOffset
-                    # Save qint 32 in little-endian format
-                    dataStreamBuffer[bufferIndex] = tempQint32 & 0x000000ff
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0x0000ff00) >> 8
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0x00ff0000) >> 16
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0xff000000) >> 24
-                    bufferIndex += 1
-
-                # Stream out all data at once to speed writing
-                out.writeRawData(dataStreamBuffer, bufferIndex)
-                numWordsWritten += 2 * constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save amplifier data
-                bufferIndex = 0
-                for i in range(len(self.saveListAmplifier)):
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQuint16 = bufferQueue.front(
-                        ).amplifierData[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][t]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                # Stream out all data at once to speed writing
-                out.writeRawData(dataStreamBuffer, bufferIndex)
-                numWordsWritten += len(self.saveListAmplifier) * \
-                    constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save auxiliary input data
-                bufferIndex = 0
-                for i in range(len(self.saveListAuxInput)):
-                    for t in range(0, constants.SAMPLES_PER_DATA_BLOCK, 4):
-                        tempQuint16 = bufferQueue.front(
-                        ).auxiliaryData[self.saveListAuxInput[i].boardStream][1][t + self.saveListAuxInput[i].chipChannel + 1]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                # Stream out all data at once to speed writing
-                out.writeRawData(dataStreamBuffer, bufferIndex)
-                numWordsWritten += len(self.saveListAuxInput) * \
-                    constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save supply voltage data
-                for i in range(len(self.saveListSupplyVoltage)):
-                    out.writeUInt16(
-                        bufferQueue.front().auxiliaryData[self.saveListSupplyVoltage[i].boardStream][1][28])
-                    numWordsWritten += 1
-
-                # Save temperature sensor data if saveTemp == True
-                # Save as temperature in degrees C, multiplied by 100 and rounded to the nearest
-                # signed integer.
-                if saveTemp:
-                    # Load and scale RHD2000 supply voltage and temperature sensor waveforms
-                    # (sampled at 1/60 amplifier sampling rate)
-
-                    for stream in range(self.numDataStreams):
-                        # Temperature sensor waveform units = degrees C
-                        self.tempRaw[stream] = (bufferQueue.front().auxiliaryData[stream][1][20] -
-                                                bufferQueue.front().auxiliaryData[stream][1][12]) / 98.9 - 273.15
-
-                    # Average multiple temperature readings to improve accuracy
-                    self.tempHistoryPush(self.tempRaw)
-                    self.tempHistoryCalcAvg()
-
-                    for i in range(len(self.saveListTempSensor)):
-                        out.writeInt16(
-                            100.0 * self.tempAvg[self.saveListTempSensor[i].boardStream])
-                        numWordsWritten += 1
-
-                # Save board ADC data
-                bufferIndex = 0
-                for i in range(len(self.saveListBoardAdc)):
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQuint16 = bufferQueue.front(
-                        ).boardAdcData[self.saveListBoardAdc[i].nativeChannelNumber][t]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                # Stream out all data at once to speed writing
-                out.writeRawData(dataStreamBuffer, bufferIndex)
-                numWordsWritten += len(self.saveListBoardAdc) * \
-                    constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save board digital input data
-                if self.saveListBoardDigIn:
-                    # If ANY digital inputs are enabled, we save ALL 16 channels, since
-                    # we are writing 16-bit chunks of data.
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        out.writeUInt16(bufferQueue.front().ttlIn[t])
-                        numWordsWritten += 1
-
-                # Save board digital output data, is saveTtlOut = True
-                if saveTtlOut:
-                    # We save all 16 channels, since we are writing 16-bit chunks of data.
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        out.writeUInt16(bufferQueue.front().ttlOut[t])
-                        numWordsWritten += 1
-
-                # We are done with this Rhd2000DataBlock object remove it from bufferQueue
-                bufferQueue.pop()
+        batch = self.dataBlockBatch
+        for start in range(0, len(usbDataBlocks), batch.maxNumBlocks):
+            batch.clear()
+            batch.appendUsbDataBlocks(usbDataBlocks, start,
+                                      min(start + batch.maxNumBlocks, len(usbDataBlocks)))
 
-        elif saveFormat == constants.SaveFormatFilePerSignalType:
-            while not bufferQueue.empty():
-                # Save timestamp data
-                bufferIndex = 0
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    tempQint32 = bufferQueue.front(
-                    ).timeStamp[t] - timestampOffset
-                    # Save qint 32 in little-endian format
-                    dataStreamBuffer[bufferIndex] = tempQint32 & 0x000000ff
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0x0000ff00) >> 8
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0x00ff0000) >> 16
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0xff000000) >> 24
-                    bufferIndex += 1
-
-                # Stream out all data at once to speed writing
-                self.timestampStream.writeRawData(
-                    dataStreamBuffer, bufferIndex)
-                numWordsWritten += 2 * constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save amplifier data
-                bufferIndex = 0
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    for i in range(len(self.saveListAmplifier)):
-                        tempQint16 = (bufferQueue.front(
-                        ).amplifierData[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][t] - 32768)
-                        # Save qint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                if bufferIndex > 0:
-                    # Stream out all data at once to speed writing
-                    self.amplifierStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += len(self.saveListAmplifier) * \
-                        constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save auxiliary input data
-                bufferIndex = 0
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    tAux = 4 * math.floor(t / 4.0)
-                    for i in range(len(self.saveListAuxInput)):
-                        tempQuint16 = bufferQueue.front(
-                        ).auxiliaryData[self.saveListAuxInput[i].boardStream][1][tAux + self.saveListAuxInput[i].chipChannel + 1]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                if bufferIndex > 0:
-                    # Stream out all data at once to speed writing
-                    self.auxInputStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += len(self.saveListAuxInput) * \
-                        constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save supply voltage data
-                bufferIndex = 0
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    for i in range(len(self.saveListSupplyVoltage)):
-                        tempQuint16 = bufferQueue.front(
-                        ).auxiliaryData[self.saveListSupplyVoltage[i].boardStream][1][28]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                if (bufferIndex > 0):
-                    # Stream out all data at once to speed writing
-                    self.supplyStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += len(self.saveListSupplyVoltage) * \
-                        constants.SAMPLES_PER_DATA_BLOCK
-
-                # Not saving temperature data in this save format.
-
-                # Save board ADC data
-                bufferIndex = 0
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    for i in range(len(self.saveListBoardAdc)):
-                        tempQuint16 = bufferQueue.front(
-                        ).boardAdcData[self.saveListBoardAdc[i].nativeChannelNumber][t]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                if bufferIndex > 0:
-                    # Stream out all data at once to speed writing
-                    self.adcInputStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += len(self.saveListBoardAdc) * \
-                        constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save board digital input data
-                if self.saveListBoardDigIn:
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        # If ANY digital inputs are enabled, we save ALL 16 channels, since
-                        # we are writing 16-bit chunks of data.
-                        self.digitalInputStream.writeUInt16(
-                            bufferQueue.front().ttlIn[t])
-                        numWordsWritten += 1
-
-                # Save board digital output data, if saveTtlOut = True
-                if saveTtlOut:
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        # We save all 16 channels, since we are writing 16-bit chunks of data.
-                        self.digitalOutputStream.writeUInt16(
-                            bufferQueue.front().ttlOut[t])
-                        numWordsWritten += 1
-
-                # We are done with this Rhd2000DataBlock object remove it from bufferQueue
-                bufferQueue.pop()
-
-        if saveFormat == constants.SaveFormatFilePerChannel:
-            while not bufferQueue.empty():
-                # Save timestamp data
-                bufferIndex = 0
-                for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                    tempQint32 = bufferQueue.front(
-                    ).timeStamp[t] - timestampOffset
-                    # Save qint 32 in little-endian format
-                    dataStreamBuffer[bufferIndex] = tempQint32 & 0x000000ff
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0x0000ff00) >> 8
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0x00ff0000) >> 16
-                    bufferIndex += 1
-                    dataStreamBuffer[bufferIndex] = (
-                        tempQint32 & 0xff000000) >> 24
-                    bufferIndex += 1
-
-                # Stream out all data at once to speed writing
-                self.timestampStream.writeRawData(
-                    dataStreamBuffer, bufferIndex)
-                numWordsWritten += 2 * constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save amplifier data
-                for i in range(len(self.saveListAmplifier)):
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQint16 = (bufferQueue.front(
-                        ).amplifierData[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][t] - 32768)
-                        # Save qint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    self.saveListAmplifier[i].saveStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save auxiliary input data
-                for i in range(len(self.saveListAuxInput)):
-                    bufferIndex = 0
-                    for t in range(0, constants.SAMPLES_PER_DATA_BLOCK, 4):
-                            # Aux data is sampled at 1/4 amplifier sampling rate write each sample 4 times
-                        for j in range(4):
-                            tempQuint16 = bufferQueue.front(
-                            ).auxiliaryData[self.saveListAuxInput[i].boardStream][1][t + self.saveListAuxInput[i].chipChannel + 1]
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSByte last)
-                            dataStreamBuffer[bufferIndex] = (
-                                tempQuint16 & 0xff00) >> 8
-                            bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    self.saveListAuxInput[i].saveStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save supply voltage data
-                for i in range(len(self.saveListSupplyVoltage)):
-                    bufferIndex = 0
-                    # Vdd data is sampled at 1/60 amplifier sampling rate write each sample 60 times
-                    for j in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQuint16 = bufferQueue.front(
-                        ).auxiliaryData[self.saveListSupplyVoltage[i].boardStream][1][28]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                    self.saveListSupplyVoltage[i].saveStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)    # Stream out all data at once to speed writing
-                    numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                # Not saving temperature data in this save format.
-
-                # Save board ADC data
-                for i in range(len(self.saveListBoardAdc)):
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQuint16 = bufferQueue.front(
-                        ).boardAdcData[self.saveListBoardAdc[i].nativeChannelNumber][t]
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSByte last)
-                        dataStreamBuffer[bufferIndex] = (
-                            tempQuint16 & 0xff00) >> 8
-                        bufferIndex += 1
-
-                    # Stream out all data at once to speed writing
-                    self.saveListBoardAdc[i].saveStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)
-                    numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save board digital input data
-                for i in range(len(self.saveListBoardDigitalIn)):
-                    bufferIndex = 0
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        tempQuint16 = ((bufferQueue.front().ttlIn[t] & (
-                            1 << self.saveListBoardDigitalIn[i].nativeChannelNumber)) != 0)
-                        # Save quint16 in little-endian format (LSByte first)
-                        dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                        bufferIndex += 1
-                        # (MSB of individual digital input will always be zero)
-                        dataStreamBuffer[bufferIndex] = 0
-                        bufferIndex += 1
-
-                    self.saveListBoardDigitalIn[i].saveStream.writeRawData(
-                        dataStreamBuffer, bufferIndex)    # Stream out all data at once to speed writing
-                    numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                # Save board digital output data, if saveTtlOut = True
-                if saveTtlOut:
-                    for i in range(16):
-                        bufferIndex = 0
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            tempQuint16 = (
-                                (bufferQueue.front().ttlOut[t] & (1 << i)) != 0)
-                            # Save quint16 in little-endian format (LSByte first)
-                            dataStreamBuffer[bufferIndex] = tempQuint16 & 0x00ff
-                            bufferIndex += 1
-                            # (MSB of individual digital input will always be zero)
-                            dataStreamBuffer[bufferIndex] = 0
-                            bufferIndex += 1
-
-                        self.saveListBoardDigitalOut[i].saveStream.writeRawData(
-                            dataStreamBuffer, bufferIndex)    # Stream out all data at once to speed writing
-                        numWordsWritten += constants.SAMPLES_PER_DATA_BLOCK
-
-                # We are done with this Rhd2000DataBlock object remove it from bufferQueue
-                bufferQueue.pop()
+            # Save temperature sensor data if saveTemp == True
+            if saveTemp:
+                self.tempHistoryPushBatch(batch)
+
+            numWordsWritten += self.writeDataBlockBatch(batch, 0, batch.numBlocks, out, saveFormat,
+                                                        self.blockTempAvg, saveTemp, saveTtlOut,
+                                                        timestampOffset)
 
         # Return total number of bytes written to binary output stream
         return (2 * numWordsWritten)
 
     # This function behaves similarly to loadAmplifierData, but generates
     # synthetic neural or ECG data for demonstration purposes when there is
-    # no USB interface board present.
+    # no USB interface board present.  The raw data blocks are generated by
+    # synthGenerator, and then scaled and saved like data read from the board.
     # Returns number of bytes written to binary datastream out if saveToDisk == True.
     def loadSyntheticData(self, numBlocks, sampleRate, saveToDisk, out, saveFormat, saveTemp, saveTtlOut):
-        indexSupply = 0
-        indexDig = 0
         numWordsWritten = 0
 
-        tStepMsec = 1000.0 / sampleRate
-
-        # If the sample rate is 5 kS/s or higher, generate synthetic neural data
-        # otherwise, generate synthetic ECG data.
-        if sampleRate > 4999.9:
-            # Generate synthetic neural data.
-            for block in range(numBlocks):
-                for stream in range(self.numDataStreams):
-                    for channel in range(32):
-                        spikePresent = False
-                        spikeNum = 0
-                        if random.random() < self.synthRelativeSpikeRate[stream][channel] * tStepMsec:
-                            spikePresent = True
-                            # add some random time jitter
-                            spikeDelay = random.uniform(0.0, 0.3)
-                            # choose between one of two spike types
-                            if random.random() < 0.3:
-                                spikeNum = 1
-
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            # Create realistic background Gaussian noise of 2.4 uVrms (would be more in cortex)
-                            self.amplifierPreFilter[stream][channel][constants.SAMPLES_PER_DATA_BLOCK *
-                                                                     block + t] = 2.4 * random.normal(0, 1)
-                            if spikePresent:
-                                # Create synthetic spike
-                                if t * tStepMsec > spikeDelay and t * tStepMsec < self.synthSpikeDuration[stream][channel][spikeNum] + spikeDelay:
-                                    self.amplifierPreFilter[stream][channel][constants.SAMPLES_PER_DATA_BLOCK * block + t] += self.synthSpikeAmplitude[stream][channel][spikeNum] * math.exp(-2.0 * (
-                                        t * tStepMsec - spikeDelay)) * math.sin(2.0 * math.pi * (t * tStepMsec - spikeDelay) / self.synthSpikeDuration[stream][channel][spikeNum])
-
-        else:
-            # Generate synthetic ECG data.
-            for t in range(constants.SAMPLES_PER_DATA_BLOCK * numBlocks):
-                # Piece together half sine waves to model QRS complex, P wave, and T wave
-                if self.tPulse < 80.0:
-                    # P wave
-                    ecgValue = 40.0 * \
-                        math.sin(2.0 * math.pi * self.tPulse / 160.0)
-                elif self.tPulse > 100.0 and self.tPulse < 120.0:
-                    ecgValue = -250.0 * \
-                        math.sin(2.0 * math.pi *
-                                 (self.tPulse - 100.0) / 40.0)  # Q
-                elif self.tPulse > 120.0 and self.tPulse < 180.0:
-                    ecgValue = 1000.0 * \
-                        math.sin(2.0 * math.pi *
-                                 (self.tPulse - 120.0) / 120.0)  # R
-                elif self.tPulse > 180.0 and self.tPulse < 260.0:
-                    ecgValue = -120.0 * \
-                        math.sin(2.0 * math.pi *
-                                 (self.tPulse - 180.0) / 160.0)  # S
-                elif self.tPulse > 340.0 and self.tPulse < 400.0:
-                    ecgValue = 60.0 * \
-                        math.sin(2.0 * math.pi *
-                                 (self.tPulse - 340.0) / 120.0)  # T wave
-                else:
-                    ecgValue = 0.0
-
-                for stream in range(self.numDataStreams):
-                    for channel in range(32):
-                        # Multiply basic ECG waveform by channel-specific amplitude, and
-                        # add 2.4 uVrms noise.
-                        self.amplifierPreFilter[stream][channel][t] = self.synthEcgAmplitude[stream][channel] * \
-                            ecgValue + 2.4 * random.gauss(0, 1)
-
-                self.tPulse += tStepMsec
-
-        # Repeat ECG waveform with regular period.
-        if self.tPulse > 840.0:
-            self.tPulse = 0.0
-
-        for block in range(numBlocks):
-            # Generate synthetic auxiliary input data.
-            for t in range(0, constants.SAMPLES_PER_DATA_BLOCK, 4):
-                for stream in range(self.numDataStreams):
-                    # Just use DC values.
-                    self.auxChannel[stream][0][t] = 0.5
-                    self.auxChannel[stream][1][t] = 1.0
-                    self.auxChannel[stream][2][t] = 2.0
-
-            # Generate synthetic supply voltage and temperature data.
-            for stream in range(self.numDataStreams):
-                self.supplyVoltage[stream][indexSupply] = 3.3
-                self.tempRaw[stream] = 25.0
-
-            indexSupply += 1
+        self.synthGenerator.generate(self.dataBlockBatch, numBlocks, sampleRate)
 
-            # Average multiple temperature readings to improve accuracy
-            self.tempHistoryPush(self.tempRaw)
-            self.tempHistoryCalcAvg()
-
-            # Generate synthetic USB interface board ADC data.
-            for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                for channel in range(8):
-                    self.boardAdc[channel][t] = 0.0
+        # Average multiple temperature readings to improve accuracy
+        self.tempHistoryPushBatch(self.dataBlockBatch)
 
-            # Generate synthetic USB interface board digital I/O data.
-            for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                for channel in range(16):
-                    self.boardDigIn[channel][indexDig] = 0
-                    self.boardDigOut[channel][indexDig] = 0
-
-                indexDig += 1
+        self.scaleDataBlockBatch(self.dataBlockBatch)
 
         # Optionally send binary data to binary output stream
         if saveToDisk:
-            if saveFormat == constants.SaveFormatIntan:
-                for block in range(numBlocks):
-                    # Save timestamp data
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        out.writeInt32(self.synthTimeStamp)
-                        self.synthTimeStamp += 1
-                        numWordsWritten += 2
-
-                    # Save amplifier data
-                    for i in range(len(self.saveListAmplifier)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            out.writeUInt16((self.amplifierPreFilter[self.saveListAmplifier[i].boardStream]
-                                             [self.saveListAmplifier[i].chipChannel][60 * block + t] / 0.195) + 32768)
-                            numWordsWritten += 1
-
-                    # Save auxiliary input data
-                    for i in range(len(self.saveListAuxInput)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK / 4):
-                            out.writeUInt16(self.auxChannel[self.saveListAuxInput[i].boardStream]
-                                            [self.saveListAuxInput[i].chipChannel][15 * block + t] / 0.0000374)
-                            numWordsWritten += 1
-
-                    # Save supply voltage data
-                    for i in range(len(self.saveListSupplyVoltage)):
-                        out.writeUInt16(
-                            self.supplyVoltage[self.saveListSupplyVoltage[i].boardStream][block] / 0.0000748)
-                        numWordsWritten += 1
-
-                    # Save temperature sensor data if saveTemp == True
-                    # Save as temperature in degrees C, multiplied by 100 and rounded to the nearest
-                    # signed integer.
-                    if saveTemp:
-                        for i in range(len(self.saveListTempSensor)):
-                            out.writeInt16(
-                                100.0 * self.tempAvg[self.saveListTempSensor[i].boardStream])
-                            numWordsWritten += 1
-
-                    # Save board ADC data
-                    for i in range(len(self.saveListBoardAdc)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            out.writeUInt16(0)
-                            numWordsWritten += 1
-
-                    # Save board digital input data
-                    if self.saveListBoardDigIn:
-                        # If ANY digital inputs are enabled, we save ALL 16 channels, since
-                        # we are writing 16-bit chunks of data.
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            out.writeUInt16(0)
-                            numWordsWritten += 1
-
-                    # Save board digital output data
-                    if saveTtlOut:
-                        # We save all 16 channels, since we are writing 16-bit chunks of data.
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            out.writeUInt16(0)
-                            numWordsWritten += 1
-
-            elif saveFormat == constants.SaveFormatFilePerSignalType:
-                for block in range(numBlocks):
-                    # Save timestamp data
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        self.timestampStream.writeInt32(self.synthTimeStamp)
-                        self.synthTimeStamp += 1
-                        numWordsWritten += 2
-
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        # Save amplifier data
-                        for i in range(len(self.saveListAmplifier)):
-                            self.amplifierStream.writeInt16(
-                                self.amplifierPreFilter[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][60 * block + t] / 0.195)
-                            numWordsWritten += 1
-
-                        # Save auxiliary input data
-                        tAux = math.floor(t / 4.0)
-                        for i in range(len(self.saveListAuxInput)):
-                            self.auxInputStream.writeUInt16(
-                                self.auxChannel[self.saveListAuxInput[i].boardStream][self.saveListAuxInput[i].chipChannel][15 * block + tAux] / 0.0000374)
-                            numWordsWritten += 1
-
-                        # Save supply voltage data
-                        for i in range(len(self.saveListSupplyVoltage)):
-                            self.supplyStream.writeUInt16(
-                                self.supplyVoltage[self.saveListSupplyVoltage[i].boardStream][block] / 0.0000748)
-                            numWordsWritten += 1
-
-                        # Not saving temperature data in this save format.
-
-                        # Save board ADC data
-                        for i in range(len(self.saveListBoardAdc)):
-                            self.adcInputStream.writeUInt16(0)
-                            numWordsWritten += 1
-
-                        # Save board digital input data
-                        if self.saveListBoardDigIn:
-                            self.digitalInputStream.writeUInt16(0)
-                            numWordsWritten += 1
-
-                        # Save board digital output data
-                        if saveTtlOut:
-                            self.digitalOutputStream.writeUInt16(0)
-                            numWordsWritten += 1
-
-            elif saveFormat == constants.SaveFormatFilePerChannel:
-                for block in range(numBlocks):
-                    # Save timestamp data
-                    for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                        self.timestampStream.writeInt32(self.synthTimeStamp)
-                        self.synthTimeStamp += 1
-                        numWordsWritten += 2
-
-                    # Save amplifier data
-                    for i in range(len(self.saveListAmplifier)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            self.saveListAmplifier[i].saveStream.writeInt16(
-                                self.amplifierPreFilter[self.saveListAmplifier[i].boardStream][self.saveListAmplifier[i].chipChannel][60 * block + t] / 0.195)
-                            numWordsWritten += 1
-
-                    # Save auxiliary input data
-                    for i in range(len(self.saveListAuxInput)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK / 4):
-                            # Aux data is sampled at 1/4 amplifier sampling rate write each sample 4 times
-                            for j in range(4):
-                                self.saveListAuxInput[i].saveStream.writeUInt16(
-                                    self.auxChannel[self.saveListAuxInput[i].boardStream][self.saveListAuxInput[i].chipChannel][15 * block + t] / 0.0000374)
-                                numWordsWritten += 1
-
-                    # Save supply voltage data
-                    for i in range(len(self.saveListSupplyVoltage)):
-                        # Vdd data is sampled at 1/60 amplifier sampling rate write each sample 60 times
-                        for j in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            self.saveListSupplyVoltage[i].saveStream.writeUInt16(
-                                self.supplyVoltage[self.saveListSupplyVoltage[i].boardStream][block] / 0.0000748)
-                            numWordsWritten += 1
-
-                    # Not saving temperature data in this save format.
-
-                    # Save board ADC data
-                    for i in range(len(self.saveListBoardAdc)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            self.saveListBoardAdc[i].saveStream.writeUInt16(0)
-                            numWordsWritten += 1
-
-                    # Save board digital input data
-                    for i in range(len(self.saveListBoardDigitalIn)):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            self.saveListBoardDigitalIn[i].saveStream.writeUInt16(
-                                0)
-                            numWordsWritten += 1
-
-                    # Save board digital output data
-                    for i in range(16):
-                        for t in range(constants.SAMPLES_PER_DATA_BLOCK):
-                            self.saveListBoardDigitalOut[i].saveStream.writeUInt16(
-                                0)
-                            numWordsWritten += 1
+            numWordsWritten += self.writeDataBlockBatch(self.dataBlockBatch, 0, numBlocks, out, saveFormat,
+                                                        self.blockTempAvg, saveTemp, saveTtlOut, 0)
 
         # Return total number of bytes written to binary output stream
         return 2 * numWordsWritten
@@ -1671,56 +640,68 @@ class SignalProcessor():
         # opposite could be True of C++ STL (non-Qt) 'vector' containers, so some
         # experimentation may be needed to optimize the runtime performance of code.
 
-        if self.notchFilterEnabled:
-            for stream in range(self.numDataStreams):
-                for channel in range(32):
-                    if channelVisible[stream][channel]:
-                        # Execute biquad IIR notch filter.  The filter "looks backwards" two timesteps,
-                        # so we must use the prevAmplifierPreFilter and prevAmplifierPostFilter
-                        # variables to store the last two samples from the previous block of
-                        # waveform data so that the filter works smoothly across the "seams".
-                        self.amplifierPostFilter[stream][channel][0] = self.b2 * self.prevAmplifierPreFilter[stream][channel][0] + self.b1 * self.prevAmplifierPreFilter[stream][channel][1] + \
-                            self.b0 * self.amplifierPreFilter[stream][channel][0] - self.a2 * \
-                            self.prevAmplifierPostFilter[stream][channel][0] - \
-                            self.a1 * \
-                            self.prevAmplifierPostFilter[stream][channel][1]
-                        self.amplifierPostFilter[stream][channel][1] = self.b2 * self.prevAmplifierPreFilter[stream][channel][1] + self.b1 * self.amplifierPreFilter[stream][channel][0] + \
-                            self.b0 * self.amplifierPreFilter[stream][channel][1] - self.a2 * \
-                            self.prevAmplifierPostFilter[stream][channel][1] - \
-                            self.a1 * \
-                            self.amplifierPostFilter[stream][channel][0]
-                        for t in range(2, length):
-                            self.amplifierPostFilter[stream][channel][t] = self.b2 * self.amplifierPreFilter[stream][channel][t-2] + self.b1 * self.amplifierPreFilter[stream][channel][t-1] + self.b0 * \
-                                self.amplifierPreFilter[stream][channel][t] - self.a2 * self.amplifierPostFilter[stream][channel][t -
-                                                                                                                                  2] - self.a1 * self.amplifierPostFilter[stream][channel][t-1]
-        else:
-            # If the notch filter is disabled, simply copy the data without filtering.
-            for stream in range(self.numDataStreams):
-                for channel in range(32):
-                    if channelVisible[stream][channel]:
-                        for t in range(length):
-                            self.amplifierPostFilter[stream][channel][t] = self.amplifierPreFilter[stream][channel][t]
+        # The filters below run on all visible channels at once: each expression is
+        # evaluated for every visible channel with a single array operation, in the
+        # same order as the per-sample code they replace, so results are identical.
+        # Only the recursive parts of the filters still step through time.
+        visible = np.array(channelVisible, dtype=bool)[:self.numDataStreams]
+        visible = np.broadcast_to(visible, (self.numDataStreams, 32))
+        numVisible = np.count_nonzero(visible)
+
+        if numVisible > 0:
+            # Gather visible waveforms as a [t][channel] working array.
+            preFilter_ = np.ascontiguousarray(
+                self.amplifierPreFilter[visible, :length].T, dtype=np.float64)
+
+            if self.notchFilterEnabled:
+                # Execute biquad IIR notch filter.  The filter "looks backwards" two timesteps,
+                # so we must use the prevAmplifierPreFilter and prevAmplifierPostFilter
+                # variables to store the last two samples from the previous block of
+                # waveform data so that the filter works smoothly across the "seams".
+                x_ = np.empty((length + 2, numVisible))
+                x_[0] = self.prevAmplifierPreFilter[visible, 0]
+                x_[1] = self.prevAmplifierPreFilter[visible, 1]
+                x_[2:] = preFilter_
+
+                # Feed-forward part: b2 * x[t-2] + b1 * x[t-1] + b0 * x[t]
+                postFilter_ = np.empty((length + 2, numVisible))
+                postFilter_[2:] = self.b2 * x_[:-2]
+                postFilter_[2:] += self.b1 * x_[1:-1]
+                postFilter_[2:] += self.b0 * x_[2:]
+
+                # Feedback part: - a2 * y[t-2] - a1 * y[t-1]
+                postFilter_[0] = self.prevAmplifierPostFilter[visible, 0]
+                postFilter_[1] = self.prevAmplifierPostFilter[visible, 1]
+                temp_ = np.empty(numVisible)
+                for t in range(2, length + 2):
+                    np.multiply(postFilter_[t - 2], self.a2, out=temp_)
+                    postFilter_[t] -= temp_
+                    np.multiply(postFilter_[t - 1], self.a1, out=temp_)
+                    postFilter_[t] -= temp_
+                postFilter_ = postFilter_[2:]
+            else:
+                # If the notch filter is disabled, simply copy the data without filtering.
+                postFilter_ = preFilter_
 
         # Save the last two data points from each waveform to use in successive IIR filter
-        # calculations.
-        for stream in range(self.numDataStreams):
-            for channel in range(32):
-                self.prevAmplifierPreFilter[stream][channel][0] = self.amplifierPreFilter[stream][channel][length - 2]
-                self.prevAmplifierPreFilter[stream][channel][1] = self.amplifierPreFilter[stream][channel][length - 1]
-                self.prevAmplifierPostFilter[stream][channel][0] = self.amplifierPostFilter[stream][channel][length - 2]
-                self.prevAmplifierPostFilter[stream][channel][1] = self.amplifierPostFilter[stream][channel][length - 1]
+        # calculations.  (Done before the highpass filter, which changes postFilter_.)
+        self.prevAmplifierPreFilter[:, :, :] = self.amplifierPreFilter[:, :, length - 2:length]
+        if numVisible > 0:
+            self.amplifierPostFilter[visible, :length] = postFilter_.T
+        self.prevAmplifierPostFilter[:, :, :] = self.amplifierPostFilter[:, :, length - 2:length]
 
         # Apply first-order high-pass filter, if selected
-        if self.highpassFilterEnabled:
-            for stream in range(self.numDataStreams):
-                for channel in range(32):
-                    if channelVisible[stream][channel]:
-                        for t in range(length):
-                            temp = self.amplifierPostFilter[stream][channel][t]
-                            self.amplifierPostFilter[stream][channel][t] -= self.highpassFilterState[stream][channel]
-                            self.highpassFilterState[stream][channel] = self.aHpf * \
-                                self.highpassFilterState[stream][channel] + \
-                                self.bHpf * temp
+        if self.highpassFilterEnabled and numVisible > 0:
+            # y[t] = x[t] - state[t], where state[t + 1] = aHpf * state[t] + bHpf * x[t]
+            input_ = self.bHpf * postFilter_
+            state_ = np.empty((length + 1, numVisible))
+            state_[0] = self.highpassFilterState[visible]
+            for t in range(length):
+                np.multiply(state_[t], self.aHpf, out=state_[t + 1])
+                state_[t + 1] += input_[t]
+
+            self.amplifierPostFilter[visible, :length] = (postFilter_ - state_[:length]).T
+            self.highpassFilterState[visible] = state_[length]
 
     # Return the magnitude and phase (in degrees) of a selected frequency component (in Hz)
     # for a selected amplifier channel on the selected USB data stream.
@@ -1775,11 +756,11 @@ class SignalProcessor():
             return
 
         # Clear data in raw temperature sensor history vectors.
-        for stream in range(self.numDataStreams):
-            for i in range(len(self.tempRawHistory)):
-                self.tempRawHistory[stream][i] = 0.0
+        self.tempRawHistory.fill(0.0)
+        self.tempHistorySum.fill(0.0)
 
         self.tempHistoryLength = 0
+        self.tempHistoryIndex = 0
 
         # Set number of samples used to average temperature sensor readings.
         # This number must be at least four, and must be an integer multiple of
@@ -1799,6 +780,14 @@ class SignalProcessor():
 
     # Returns the total number of bytes saved to disk per data block.
     def bytesPerBlock(self, saveFormat, saveTemperature, saveTtlOut):
+        # The raw format saves the complete USB data blocks.
+        if saveFormat == constants.SaveFormatRaw:
+            return dataBlockSizeInBytes(self.numDataStreams)
+
+        # The compressed format saves Intan format blocks (counted before compression).
+        if saveFormat == constants.SaveFormatCompressed:
+            saveFormat = constants.SaveFormatIntan
+
         bytespb = 0
         bytespb += 4 * constants.SAMPLES_PER_DATA_BLOCK  # timestamps
         bytespb += 2 * constants.SAMPLES_PER_DATA_BLOCK * \
@@ -1835,98 +824,81 @@ class SignalProcessor():
             bytespb += 2 * constants.SAMPLES_PER_DATA_BLOCK * 16
         return bytespb
 
-    # Push raw temperature sensor readings into the queue-like vector that
-    # stores the last tempHistoryLength readings.
-    def tempHistoryPush(self, tempData):
-        for stream in range(self.numDataStreams):
-            i = self.tempHistoryLength
-            while i > 0:
-                self.tempRawHistory[stream][i] = self.tempRawHistory[stream][i-1]
-                i -= 1
+    # Load and scale the RHD2000 temperature sensor readings (sampled at 1/60
+    # amplifier sampling rate) of every block staged in a DataBlockBatch, and
+    # store the running average after each block in blockTempAvg.
+    def tempHistoryPushBatch(self, batch):
+        numBlocks = batch.numBlocks
 
-            self.tempRawHistory[stream][0] = tempData[stream]
+        # Temperature sensor waveform units = degrees C
+        tempRaw = (batch.auxiliaryData[:numBlocks, :, 1, 20] -
+                   batch.auxiliaryData[:numBlocks, :, 1, 12]) / 98.9 - 273.15
 
-        if self.tempHistoryLength < self.tempHistoryMaxLength:
+        for block in range(numBlocks):
+            # Average multiple temperature readings to improve accuracy
+            self.tempHistoryPush(tempRaw[block])
+            self.tempHistoryCalcAvg()
+            self.blockTempAvg[block] = self.tempAvg
+
+    # Push raw temperature sensor readings of all streams into the ring buffer
+    # that stores the last tempHistoryLength readings, replacing the oldest
+    # readings once tempHistoryMaxLength are stored.  The sum of the stored
+    # readings is kept up to date, and recomputed once per pass over the ring
+    # so rounding errors do not accumulate.
+    def tempHistoryPush(self, tempData):
+        history_ = self.tempRawHistory[:, self.tempHistoryIndex]
+        if self.tempHistoryLength == self.tempHistoryMaxLength:
+            self.tempHistorySum -= history_
+        else:
             self.tempHistoryLength += 1
+        history_[:] = tempData[:self.numDataStreams]
+        self.tempHistorySum += history_
+
+        self.tempHistoryIndex += 1
+        if self.tempHistoryIndex == self.tempHistoryMaxLength:
+            self.tempHistoryIndex = 0
+            np.sum(self.tempRawHistory[:, :self.tempHistoryMaxLength], axis=1, out=self.tempHistorySum)
 
     # Calculate running average of temperature from stored raw sensor readings.
     # Results are stored in the tempAvg vector.
     def tempHistoryCalcAvg(self):
-        for stream in range(self.numDataStreams):
-            self.tempAvg[stream] = 0.0
-            for i in range(self.tempHistoryLength):
-                self.tempAvg[stream] += self.tempRawHistory[stream][i]
-
-            if self.tempHistoryLength > 0:
-                self.tempAvg[stream] /= self.tempHistoryLength
+        if self.tempHistoryLength > 0:
+            np.divide(self.tempHistorySum, self.tempHistoryLength, out=self.tempAvg)
+        else:
+            self.tempAvg.fill(0.0)
 
-# Allocates memory for a 3-D array of doubles.
+# Allocates memory for a 3-D array of doubles (or of another floating-point dtype).
 
 
-def allocateDoubleArray3D(xSize, ySize, zSize):
-    if xSize == 0:
-        return None  # CHECK
-    ret = [0]*xSize
-    for i in range(0, xSize):
-        ret[i] = [0]*ySize
-        for j in range(0, ySize):
-            ret[i][j] = [0.0]*zSize
-    return ret
+def allocateDoubleArray3D(xSize, ySize, zSize, dtype=np.float64):
+    return np.zeros((xSize, ySize, zSize), dtype=dtype)
 
-# Allocates memory for a 2-D array of doubles.
+# Allocates memory for a 2-D array of doubles (or of another floating-point dtype).
 
 
-def allocateDoubleArray2D(xSize, ySize):
-    if xSize == 0:
-        return None  # CHECK
-    ret = [0]*xSize
-    for i in range(0, xSize):
-        ret[i] = [0.0]*ySize
-    return ret
+def allocateDoubleArray2D(xSize, ySize, dtype=np.float64):
+    return np.zeros((xSize, ySize), dtype=dtype)
 
-# Allocates memory for a 2-D array of integers.
+# Allocates memory for a 2-D array of integers (or of another integer dtype).
 
 
-def allocateIntArray2D(xSize, ySize):
-    if xSize == 0:
-        return None  # CHECK
-    ret = [0]*xSize
-    for i in range(0, xSize):
-        ret[i] = [0]*ySize
-    return ret
+def allocateIntArray2D(xSize, ySize, dtype=np.int32):
+    return np.zeros((xSize, ySize), dtype=dtype)
 
 # Allocates memory for a 1-D array of doubles.
 
 
 def allocateDoubleArray1D(xSize):
-    ret = [0.0]*xSize
-    return ret
+    return np.zeros(xSize)
 
 # Fill a 3-D array of doubles with zero.
 
 
 def fillZerosDoubleArray3D(array3D):
-    xSize = len(array3D)
-    if xSize == 0:
-        return
-
-    ySize = len(array3D[0])
-    zSize = len(array3D[0][0])
-
-    for x in range(xSize):
-        for y in range(ySize):
-            for z in range(zSize):
-                array3D[x][y][z] = 0.0
+    array3D.fill(0.0)
 
 # Fill a 2-D array of doubles with zero.
 
 
 def fillZerosDoubleArray2D(array2D):
-    xSize = len(array2D)
-    if xSize == 0:
-        return
-
-    ySize = len(array2D[0])
-    for x in range(xSize):
-        for y in range(ySize):
-            array2D[x][y] = 0.0
+    array2D.fill(0.0)
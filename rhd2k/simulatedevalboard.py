@@ -0,0 +1,649 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import collections
+import math
+import threading
+import time
+
+import numpy as np
+
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from . import constants
+    from .rhd2000evalboard import Rhd2000EvalBoard
+except ImportError:
+    import constants
+    from rhd2000evalboard import Rhd2000EvalBoard
+
+# Sample rate in Hz of each AmplifierSampleRate setting.
+SAMPLE_RATE_HZ = [1000.0, 1250.0, 1500.0, 2000.0, 2500.0, 3000.0, 10000.0 / 3.0, 4000.0, 5000.0,
+                  6250.0, 8000.0, 10000.0, 12500.0, 15000.0, 20000.0, 25000.0, 30000.0]
+
+FIFO_CAPACITY_WORDS = 67108864
+
+# USB words holding the 64-bit Rhythm header 'magic number' of each sample.
+USB_HEADER_WORDS = (0x1942, 0x2702, 0x1999, 0xc691)
+
+# RHD2000 chip name (ROM registers 48-55) and number of amplifiers (ROM register 62).
+CHIP_NAMES = {
+    constants.CHIP_ID_RHD2132: ("RHD2132", 32),
+    constants.CHIP_ID_RHD2216: ("RHD2216", 16),
+    constants.CHIP_ID_RHD2164: ("RHD2164", 64),
+}
+
+
+# Returns the list of chip IDs given as comma-separated chip names (e.g.
+# "2132,none,2164") for PortA1, PortA2, PortB1, ..., PortD2.
+def parseChips(text):
+    names = {"2132": constants.CHIP_ID_RHD2132, "2216": constants.CHIP_ID_RHD2216,
+             "2164": constants.CHIP_ID_RHD2164, "none": None, "": None}
+    chips = []
+    for name in text.split(","):
+        name = name.strip().lower()
+        if name.startswith("rhd"):
+            name = name[3:]
+        if name not in names:
+            raise ValueError("Unknown RHD2000 chip " + repr(name))
+        chips.append(names[name])
+    return chips
+
+
+class SimulatedEvalBoard():
+    """ This class is a software stand-in for Rhd2000EvalBoard, with the
+    same methods, so that the acquisition, recording and impedance
+    measurement code can be run and load-tested without an Opal Kelly
+    board or the FrontPanel drivers.  Only the data block decoder of
+    librhd2k is used: samples are generated in the interface board's USB
+    format and decoded into the DataQueue by the same C++ code as real
+    data.
+
+    chips lists the RHD2000 chip (a constants.CHIP_ID_* value, or None)
+    plugged into each of PortA1, PortA2, PortB1, ..., PortD2.  An RHD2164
+    also answers on the DDR data source of its MISO line.
+
+    The connected chips execute the uploaded auxiliary command lists:
+    register writes, reads of the RAM and ROM registers, and conversions of
+    the auxiliary inputs, supply voltage and temperature sensors return
+    the values a real chip would, with the results delayed by one sample
+    as in the Rhythm data blocks.  Amplifier channels carry Gaussian noise;
+    while impedance testing is enabled, the selected channel also carries
+    the voltage produced by the impedance test DAC current across a
+    simulated electrode.  MISO data is only sampled correctly with cable
+    delay settings within one step of the delay of the simulated cable.
+
+    Samples are produced at the board sample rate times speed (e.g. 1.0
+    for real time, 10.0 for ten times faster), or, if speed is 0, as fast
+    as they are read.  Samples that do not fit in the FIFO (fifoCapacity
+    words) are dropped, as on the real board, leaving a gap in the time
+    stamps.  Reads larger than the FIFO raise ValueError.  Samples are
+    generated when they are read, so register settings changed while data
+    is waiting in the FIFO apply to that data.
+    """
+
+    def __init__(self, chips=(constants.CHIP_ID_RHD2132,), speed=1.0, fifoCapacity=FIFO_CAPACITY_WORDS,
+                 cableLengthMeters=0.9, temperature=36.6, noiseMicrovolts=5.0, seed=0):
+        chips = list(chips) + [None] * (8 - len(chips))
+        if len(chips) > 8:
+            raise ValueError("At most eight RHD2000 chips can be connected")
+        for chip in chips:
+            if chip is not None and chip not in CHIP_NAMES:
+                raise ValueError("Unknown RHD2000 chip ID " + str(chip))
+        self.chips = chips
+        self.speed = speed
+        self.fifoCapacity = fifoCapacity
+        self.cableLengthMeters = [cableLengthMeters] * 4
+        self.temperature = temperature
+
+        # Serializes access to the board between the acquisition thread and the GUI.
+        self.lock = threading.RLock()
+
+        rng = np.random.default_rng(seed)
+        self.noise = np.round(rng.standard_normal(65536) * noiseMicrovolts / 0.195).astype(np.int32)
+        self.noiseOffset = rng.integers(0, 65536, size=(8, 64))
+        # Electrode impedance of every amplifier channel, log-uniform from 50 kOhm to 2 MOhm.
+        self.electrodeImpedance = np.exp(rng.uniform(math.log(50.0e3), math.log(2.0e6), size=(8, 64)))
+
+        self.ttlInFrequencies = [1.0, 10.0]
+
+        self.commandLists = [[[] for bank in range(16)] for slot in range(3)]
+        self.auxCommandBank = [[0, 0, 0] for port in range(4)]
+        self.auxCommandLoop = [0, 0, 0]
+        self.auxCommandEnd = [0, 0, 0]
+        self.auxTables = None
+
+        self.resetBoard()
+
+    def open(self):
+        return 1
+
+    def uploadFpgaBitfile(self, filename):
+        return True
+
+    def initialize(self):
+        with self.lock:
+            self.resetBoard()
+            self.setSampleRate(Rhd2000EvalBoard.SampleRate30000Hz)
+            for port in range(4):
+                for slot in range(3):
+                    self.selectAuxCommandBank(port, slot, 0)
+            for slot in range(3):
+                self.selectAuxCommandLength(slot, 0, 0)
+            self.setContinuousRunMode(True)
+            self.setMaxTimeStep(4294967295)
+            for port in range(4):
+                self.setCableLengthFeet(port, 3.0)
+            for stream, source in enumerate([Rhd2000EvalBoard.PortA1, Rhd2000EvalBoard.PortB1,
+                                             Rhd2000EvalBoard.PortC1, Rhd2000EvalBoard.PortD1,
+                                             Rhd2000EvalBoard.PortA2, Rhd2000EvalBoard.PortB2,
+                                             Rhd2000EvalBoard.PortC2, Rhd2000EvalBoard.PortD2]):
+                self.setDataSource(stream, source)
+                self.enableDataStream(stream, stream == 0)
+            self.clearTtlOut()
+
+    def setSampleRate(self, newSampleRate):
+        with self.lock:
+            self.sampleRateEnum = newSampleRate
+            self.sampleRate = SAMPLE_RATE_HZ[newSampleRate]
+            return True
+
+    def getSampleRate(self):
+        return self.sampleRate
+
+    def getSampleRateEnum(self):
+        return self.sampleRateEnum
+
+    def uploadCommandList(self, commandList, auxCommandSlot, bank):
+        with self.lock:
+            self.commandLists[auxCommandSlot][bank] = [commandList[i] for i in range(len(commandList))]
+            self.auxTables = None
+
+    def printCommandList(self, commandList):
+        print(" ".join("%04x" % commandList[i] for i in range(len(commandList))))
+
+    def selectAuxCommandBank(self, port, auxCommandSlot, bank):
+        with self.lock:
+            self.auxCommandBank[port][auxCommandSlot] = bank
+            self.auxTables = None
+
+    def selectAuxCommandLength(self, auxCommandSlot, loopIndex, endIndex):
+        with self.lock:
+            self.auxCommandLoop[auxCommandSlot] = loopIndex
+            self.auxCommandEnd[auxCommandSlot] = endIndex
+            self.auxTables = None
+
+    def resetBoard(self):
+        with self.lock:
+            self.sampleRateEnum = Rhd2000EvalBoard.SampleRate30000Hz
+            self.sampleRate = SAMPLE_RATE_HZ[self.sampleRateEnum]
+            self.continuousMode = True
+            self.maxTimeStep = 0
+            self.running = False
+            self.runStartTime = 0.0
+            self.cableDelay = [0, 0, 0, 0]
+            self.dataSource = [0] * constants.MAX_NUM_DATA_STREAMS
+            self.dataStreamEnabled = [False] * constants.MAX_NUM_DATA_STREAMS
+            self.ttlOut = [0] * 16
+            self.ledDisplay = [0] * 8
+            self.dacManual = 32768
+
+            # FIFO contents, as (first sample index, number of samples) segments
+            # of the current run.
+            self.fifo = collections.deque()
+            self.numWordsPerSample = self.dataBlockSizeInWords(1) // constants.SAMPLES_PER_DATA_BLOCK
+            self.runSampleIndex = 0
+            self.resetStatistics()
+
+    # Reset the sample, overrun and FIFO fill statistics.
+    def resetStatistics(self):
+        with self.lock:
+            self.numSamplesProduced = 0
+            self.numSamplesRead = 0
+            self.numSamplesDropped = 0
+            self.maxWordsInFifo = 0
+
+    def setContinuousRunMode(self, continuousMode):
+        with self.lock:
+            self.produceSamples()
+            self.continuousMode = continuousMode
+
+    def setMaxTimeStep(self, maxTimeStep):
+        with self.lock:
+            self.produceSamples()
+            self.maxTimeStep = maxTimeStep
+
+    def run(self):
+        with self.lock:
+            self.running = True
+            self.runStartTime = time.perf_counter()
+            self.runSampleIndex = 0
+            self.numWordsPerSample = self.dataBlockSizeInWords(
+                self.getNumEnabledDataStreams()) // constants.SAMPLES_PER_DATA_BLOCK
+            if self.speed == 0 and not self.continuousMode:
+                self.addSamples(self.maxTimeStep)
+            self.produceSamples()
+
+    def isRunning(self):
+        with self.lock:
+            self.produceSamples()
+            return self.running
+
+    def numWordsInFifo(self):
+        with self.lock:
+            self.produceSamples()
+            return self.numSamplesInFifo() * self.numWordsPerSample
+
+    def fifoCapacityInWords(self):
+        return self.fifoCapacity
+
+    def setCableDelay(self, port, delay):
+        with self.lock:
+            self.cableDelay[port] = delay
+
+    def setCableLengthMeters(self, port, lengthInMeters):
+        self.setCableDelay(port, self.cableDelayForLength(lengthInMeters))
+
+    def setCableLengthFeet(self, port, lengthInFeet):
+        self.setCableLengthMeters(port, 0.3048 * lengthInFeet)
+
+    def estimateCableLengthMeters(self, delay):
+        tStep = 1.0 / (2800.0 * self.sampleRate)
+        cableVelocity = 0.555 * 299792458.0
+        distance = cableVelocity * ((delay - 1.0) * tStep - (1.9e-9 + 9.0e-9 + 1.4e-9 + 6.7e-9))
+        return max(distance, 0.0) / 2.0
+
+    def estimateCableLengthFeet(self, delay):
+        return 3.2808 * self.estimateCableLengthMeters(delay)
+
+    # Returns the MISO sampling delay for a cable of lengthInMeters at the current
+    # sample rate, computed as Rhd2000EvalBoard::setCableLengthMeters() does.
+    def cableDelayForLength(self, lengthInMeters):
+        tStep = 1.0 / (2800.0 * self.sampleRate)
+        cableVelocity = 0.555 * 299792458.0
+        timeDelay = 2.0 * lengthInMeters / cableVelocity + 1.9e-9 + 9.0e-9 + 1.4e-9 + 6.7e-9
+        return min(max(int(math.floor(timeDelay / tStep + 1.0 + 0.5)), 1), 15)
+
+    def setDspSettle(self, enabled):
+        pass
+
+    def setDataSource(self, stream, dataSource):
+        with self.lock:
+            self.dataSource[stream] = dataSource
+            self.auxTables = None
+
+    def enableDataStream(self, stream, enabled):
+        with self.lock:
+            self.dataStreamEnabled[stream] = bool(enabled)
+            self.auxTables = None
+
+    def getNumEnabledDataStreams(self):
+        return sum(self.dataStreamEnabled)
+
+    def clearTtlOut(self):
+        self.setTtlOut([0] * 16)
+
+    def setTtlOut(self, ttlOutArray):
+        with self.lock:
+            self.ttlOut = list(ttlOutArray)
+
+    def getTtlIn(self, length):
+        with self.lock:
+            now = time.perf_counter() - self.runStartTime
+            ttlIn = [0] * length
+            for channel, frequency in enumerate(self.ttlInFrequencies[:length]):
+                ttlIn[channel] = int((now * frequency) % 1.0 < 0.5)
+            return ttlIn
+
+    def setDacManual(self, value):
+        self.dacManual = value
+
+    def setLedDisplay(self, ledArray):
+        with self.lock:
+            self.ledDisplay = list(ledArray)
+
+    def enableDac(self, dacChannel, enabled):
+        pass
+
+    def setDacGain(self, gain):
+        pass
+
+    def setAudioNoiseSuppress(self, noiseSuppress):
+        pass
+
+    def selectDacDataStream(self, dacChannel, stream):
+        pass
+
+    def selectDacDataChannel(self, dacChannel, dataChannel):
+        pass
+
+    def enableExternalFastSettle(self, enable):
+        pass
+
+    def setExternalFastSettleChannel(self, channel):
+        pass
+
+    def enableExternalDigOut(self, port, enable):
+        pass
+
+    def setExternalDigOutChannel(self, port, channel):
+        pass
+
+    def enableDacHighpassFilter(self, enable):
+        pass
+
+    def setDacHighpassFilter(self, cutoff):
+        pass
+
+    def setDacThreshold(self, dacChannel, threshold, trigPolarity):
+        pass
+
+    def setTtlMode(self, mode):
+        pass
+
+    def flush(self):
+        with self.lock:
+            self.produceSamples()
+            self.fifo.clear()
+
+    # Read one data block into dataBlock (an Rhd2000DataBlock), waiting for the
+    # board to produce it.  Returns False if the board stops before a complete
+    # block is available.
+    def readDataBlock(self, dataBlock):
+        with self.lock:
+            self.checkFifoCapacity(1)
+        numSamples = constants.SAMPLES_PER_DATA_BLOCK
+        while True:
+            with self.lock:
+                self.produceSamples()
+                if self.speed == 0 and self.running and self.continuousMode:
+                    self.addSamples(numSamples - self.numSamplesInFifo())
+                if self.numSamplesInFifo() >= numSamples:
+                    usbBuffer = self.readUsbWords(1)
+                    dataBlock.fillFromUsbBuffer(usbBuffer.ctypes.data, 0, self.getNumEnabledDataStreams())
+                    return True
+                if not self.running:
+                    return False
+            time.sleep(0.0005)
+
+    def readDataBlocks(self, numBlocks, dataQueue):
+        with self.lock:
+            self.checkFifoCapacity(numBlocks)
+            numSamples = numBlocks * constants.SAMPLES_PER_DATA_BLOCK
+            self.produceSamples()
+            if self.speed == 0 and self.running and self.continuousMode:
+                self.addSamples(numSamples - self.numSamplesInFifo())
+            if self.numSamplesInFifo() < numSamples:
+                return False
+
+            usbBuffer = self.readUsbWords(numBlocks)
+            dataQueue.pushFromUsbBuffer(usbBuffer, numBlocks, self.getNumEnabledDataStreams())
+            return True
+
+    def readRawDataBlocks(self, numBlocks, buffer):
+        with self.lock:
+            numBytes = 2 * numBlocks * self.dataBlockSizeInWords(self.getNumEnabledDataStreams())
+            if buffer.nbytes < numBytes:
+                raise ValueError("Buffer too small for " + str(numBlocks) +
+                                 " data blocks (" + str(numBytes) + " bytes)")
+            self.checkFifoCapacity(numBlocks)
+            numSamples = numBlocks * constants.SAMPLES_PER_DATA_BLOCK
+            self.produceSamples()
+            if self.speed == 0 and self.running and self.continuousMode:
+                self.addSamples(numSamples - self.numSamplesInFifo())
+            if self.numSamplesInFifo() < numSamples:
+                return False
+
+            buffer.reshape(-1)[:numBytes] = self.readUsbWords(numBlocks).reshape(-1).view(np.uint8)
+            return True
+
+    def queueToFile(self, dataQueue, saveOut):
+        count = 0
+        while not dataQueue.empty():
+            dataQueue.front().write(saveOut, self.getNumEnabledDataStreams())
+            dataQueue.pop()
+            count += 1
+        return count
+
+    def getBoardMode(self):
+        return 0
+
+    def getCableDelayPort(self, port):
+        return self.cableDelay[port]
+
+    def getCableDelays(self, delays):
+        delays[:] = self.cableDelay
+
+    # Returns a dictionary of produced, read and dropped sample counts and the
+    # maximum FIFO fill level.
+    def statistics(self):
+        with self.lock:
+            return {
+                "numSamplesProduced": self.numSamplesProduced,
+                "numSamplesRead": self.numSamplesRead,
+                "numSamplesDropped": self.numSamplesDropped,
+                "wordsInFifo": self.numSamplesInFifo() * self.numWordsPerSample,
+                "maxWordsInFifo": self.maxWordsInFifo,
+            }
+
+    @staticmethod
+    def dataBlockSizeInWords(numDataStreams):
+        return constants.SAMPLES_PER_DATA_BLOCK * (4 + 2 + numDataStreams * 36 + 8 + 2)
+
+    def numSamplesInFifo(self):
+        return sum(count for first, count in self.fifo)
+
+    # A read larger than the FIFO could never be satisfied; fail instead of waiting forever.
+    def checkFifoCapacity(self, numBlocks):
+        numWords = numBlocks * self.dataBlockSizeInWords(self.getNumEnabledDataStreams())
+        if numWords > self.fifoCapacity:
+            raise ValueError("FIFO capacity of " + str(self.fifoCapacity) + " words cannot hold " +
+                             str(numBlocks) + " data blocks (" + str(numWords) + " words)")
+
+    # Bring the FIFO up to date with the samples the board has acquired since run().
+    def produceSamples(self):
+        if not self.running:
+            return
+        if self.speed > 0:
+            target = int((time.perf_counter() - self.runStartTime) * self.sampleRate * self.speed)
+            if not self.continuousMode:
+                target = min(target, self.maxTimeStep)
+            self.addSamples(target - self.runSampleIndex)
+        if not self.continuousMode and self.runSampleIndex >= self.maxTimeStep:
+            self.running = False
+
+    # Acquire numSamples new samples into the FIFO, dropping those that do not fit.
+    def addSamples(self, numSamples):
+        if numSamples <= 0:
+            return
+        free = max(self.fifoCapacity // self.numWordsPerSample - self.numSamplesInFifo(), 0)
+        accepted = min(numSamples, free)
+        if accepted > 0:
+            if self.fifo and sum(self.fifo[-1]) == self.runSampleIndex:
+                first, count = self.fifo.pop()
+                self.fifo.append((first, count + accepted))
+            else:
+                self.fifo.append((self.runSampleIndex, accepted))
+        self.numSamplesDropped += numSamples - accepted
+        self.numSamplesProduced += numSamples
+        self.runSampleIndex += numSamples
+        self.maxWordsInFifo = max(self.maxWordsInFifo, self.numSamplesInFifo() * self.numWordsPerSample)
+
+    # Remove numBlocks data blocks from the FIFO and return them as an array of
+    # USB words in the format read from the interface board.
+    def readUsbWords(self, numBlocks):
+        numSamples = numBlocks * constants.SAMPLES_PER_DATA_BLOCK
+        pieces = []
+        remaining = numSamples
+        while remaining > 0:
+            first, count = self.fifo.popleft()
+            if count > remaining:
+                self.fifo.appendleft((first + remaining, count - remaining))
+                count = remaining
+            pieces.append(np.arange(first, first + count, dtype=np.int64))
+            remaining -= count
+        sampleIndex = np.concatenate(pieces)
+        self.numSamplesRead += numSamples
+        return self.encodeUsbWords(sampleIndex)
+
+    # Generate the USB words of the samples with the given indices (counted from run()).
+    def encodeUsbWords(self, sampleIndex):
+        numStreams = self.getNumEnabledDataStreams()
+        numSamples = len(sampleIndex)
+        words = np.zeros((numSamples, 16 + 36 * numStreams), dtype=np.uint16)
+
+        words[:, 0:4] = USB_HEADER_WORDS
+        timeStamp = sampleIndex & 0xffffffff
+        words[:, 4] = timeStamp & 0xffff
+        words[:, 5] = timeStamp >> 16
+
+        auxTables = self.getAuxTables()
+        aux = words[:, 6:6 + 3 * numStreams].reshape(numSamples, 3, numStreams)
+        amplifier = words[:, 6 + 3 * numStreams:6 + 35 * numStreams].reshape(numSamples, 32, numStreams)
+        streams = [stream for stream in range(constants.MAX_NUM_DATA_STREAMS) if self.dataStreamEnabled[stream]]
+        for index, stream in enumerate(streams):
+            source = self.dataSource[stream]
+            port = (source % 8) // 2
+            chip = self.chips[source % 8]
+            misoB = source >= 8
+            if chip is None or (misoB and chip != constants.CHIP_ID_RHD2164):
+                continue
+
+            # Results of the auxiliary commands of the previous sample.
+            table = auxTables[(source % 8, misoB)]
+            previous = self.auxTableIndex(table, sampleIndex - 1)
+            auxData = np.where(sampleIndex >= 1, table["results"][:, previous], 0)
+
+            ampData = self.amplifierWords(table, source % 8, 32 if misoB else 0, sampleIndex)
+
+            # Data sampled with the wrong MISO delay is shifted by one bit.
+            if abs(self.cableDelay[port] - self.cableDelayForLength(self.cableLengthMeters[port])) > 1:
+                auxData = (auxData << 1) | 1
+                ampData = (ampData << 1) | 1
+            aux[:, :, index] = auxData.T & 0xffff
+            amplifier[:, :, index] = ampData.T & 0xffff
+
+        t = sampleIndex / self.sampleRate
+        adc = words[:, 6 + 36 * numStreams:14 + 36 * numStreams]
+        adc[:] = 32768 + 16384 * np.sin(2.0 * np.pi * np.outer(t, np.arange(1, 9)))
+
+        ttlIn = np.zeros(numSamples, dtype=np.uint16)
+        for channel, frequency in enumerate(self.ttlInFrequencies):
+            ttlIn |= (((t * frequency) % 1.0) < 0.5).astype(np.uint16) << channel
+        words[:, 14 + 36 * numStreams] = ttlIn
+        words[:, 15 + 36 * numStreams] = sum(int(bool(bit)) << channel for channel, bit in enumerate(self.ttlOut))
+        return words
+
+    # Returns the amplifier words [channel][sample] of one MISO line of a chip.
+    def amplifierWords(self, table, chipSource, firstChannel, sampleIndex):
+        channels = np.arange(firstChannel, firstChannel + 32)
+        ampData = 32768 + self.noise[(sampleIndex[np.newaxis, :] +
+                                      self.noiseOffset[chipSource, channels][:, np.newaxis]) & 0xffff]
+
+        # Impedance test: the DAC drives a current through the series capacitor
+        # into the selected electrode(s).  Register values in effect during each
+        # sample are those left by the previous sample.
+        previous = self.auxTableIndex(table, np.maximum(sampleIndex - 1, 0))
+        zcheck = table["zcheck"][:, previous]
+        zcheckEn = (zcheck[0] & 1) != 0
+        if zcheckEn.any():
+            cSeries = np.choose((zcheck[0] >> 3) & 3, [0.1e-12, 1.0e-12, 1.0e-12, 10.0e-12])
+            dacVoltage = (zcheck[1] - 128) * (1.225 / 256)
+            dacStep = np.diff(dacVoltage, prepend=dacVoltage[0])
+            current = np.where(zcheckEn, cSeries * dacStep * self.sampleRate, 0.0)
+            connectAll = (zcheck[0] & 4) != 0
+            for i, channel in enumerate(channels):
+                selected = connectAll | (zcheck[2] == channel)
+                if selected.any():
+                    voltage = current * self.electrodeImpedance[chipSource, channel]
+                    ampData[i] += np.where(selected, np.round(voltage / 0.195e-6), 0).astype(np.int32)
+        return np.clip(ampData, 0, 65535)
+
+    # Map sample indices (counted from run()) to columns of an auxiliary command table.
+    @staticmethod
+    def auxTableIndex(table, sampleIndex):
+        start, period = table["start"], table["period"]
+        return np.where(sampleIndex < start + 2 * period, sampleIndex,
+                        start + period + (sampleIndex - start - period) % period)
+
+    # Returns the auxiliary command tables of all connected chips, computing them
+    # if the command lists have changed.
+    def getAuxTables(self):
+        if self.auxTables is None:
+            self.auxTables = {}
+            for source in range(8):
+                chip = self.chips[source]
+                if chip is None:
+                    continue
+                self.auxTables[(source, False)] = self.executeAuxCommands(source // 2, chip, False)
+                if chip == constants.CHIP_ID_RHD2164:
+                    self.auxTables[(source, True)] = self.executeAuxCommands(source // 2, chip, True)
+        return self.auxTables
+
+    # Run the auxiliary command sequences of a port on one chip, and tabulate the
+    # results and impedance test register values of each sample.  Command indices
+    # are periodic from the latest loop index on, and register contents one
+    # period later, so the table covers start + 2 * period samples.
+    def executeAuxCommands(self, port, chip, misoB):
+        lists = [self.commandLists[slot][self.auxCommandBank[port][slot]] for slot in range(3)]
+        loops = [min(self.auxCommandLoop[slot], self.auxCommandEnd[slot]) for slot in range(3)]
+        lengths = [self.auxCommandEnd[slot] - loops[slot] + 1 for slot in range(3)]
+        start = max(loops)
+        period = 1
+        for length in lengths:
+            period = period * length // math.gcd(period, length)
+        numSamples = start + 2 * period
+
+        name, numAmplifiers = CHIP_NAMES[chip]
+        rom = {59: constants.REGISTER_59_MISO_B if misoB else constants.REGISTER_59_MISO_A,
+               60: 1, 61: 0, 62: numAmplifiers, 63: chip}
+        for i, c in enumerate("INTAN"):
+            rom[40 + i] = ord(c)
+        for i, c in enumerate(name.ljust(8, "\0")):
+            rom[48 + i] = ord(c)
+
+        registers = [0] * 22
+        results = np.zeros((3, numSamples), dtype=np.int64)
+        zcheck = np.zeros((3, numSamples), dtype=np.int64)
+        for t in range(numSamples):
+            for slot in range(3):
+                index = t if t < loops[slot] else loops[slot] + (t - loops[slot]) % lengths[slot]
+                command = lists[slot][index] if index < len(lists[slot]) else 0
+                results[slot, t] = self.executeCommand(command, registers, rom)
+            zcheck[:, t] = (registers[5], registers[6], registers[7])
+
+        return {"start": start, "period": period, "results": results, "zcheck": zcheck}
+
+    # Execute one RHD2000 SPI command and return the result word.
+    def executeCommand(self, command, registers, rom):
+        commandType = command >> 14
+        address = (command >> 8) & 0x3f
+        if commandType == 2:
+            # WRITE
+            if address < len(registers):
+                registers[address] = command & 0xff
+            return 0xff00 | (command & 0xff)
+        if commandType == 3:
+            # READ
+            if address < len(registers):
+                return registers[address]
+            return rom.get(address, 0)
+        if commandType == 1:
+            # CALIBRATE or CLEAR
+            return 0
+        # CONVERT
+        if 32 <= address <= 34:
+            # Auxiliary inputs: 0.5, 1.0 and 1.5 V
+            return int(0.5 * (address - 31) / 37.4e-6)
+        if address == 48:
+            # Supply voltage sensor: 3.3 V
+            return int(3.3 / 74.8e-6)
+        if address == 49:
+            # Temperature sensor: the difference between the readings with only
+            # tempS2 and with both tempS1 and tempS2 set is 98.9 per kelvin.
+            tempEn, tempS1, tempS2 = [(registers[3] >> bit) & 1 for bit in (2, 3, 4)]
+            if not tempEn:
+                return 0
+            if tempS2 and not tempS1:
+                return 10000 + int(round(98.9 * (self.temperature + 273.15)))
+            return 10000
+        return 32768
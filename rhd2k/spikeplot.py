@@ -126,10 +126,10 @@ class SpikePlot(QWidget):
                          self.frame.right(), self.frame.center().y())
 
         # Draw vertical lines at 0 ms and 1 ms.
-        painter.drawLine(self.frame.left() + (1.0/3.0) * (self.frame.right() - self.frame.left()) + 1, self.frame.top(),
-                         self.frame.left() + (1.0/3.0) * (self.frame.right() - self.frame.left()) + 1, self.frame.bottom())
-        painter.drawLine(self.frame.left() + (2.0/3.0) * (self.frame.right() - self.frame.left()) + 1, self.frame.top(),
-                         self.frame.left() + (2.0/3.0) * (self.frame.right() - self.frame.left()) + 1, self.frame.bottom())
+        painter.drawLine(int(self.frame.left() + (1.0/3.0) * (self.frame.right() - self.frame.left()) + 1), self.frame.top(),
+                         int(self.frame.left() + (1.0/3.0) * (self.frame.right() - self.frame.left()) + 1), self.frame.bottom())
+        painter.drawLine(int(self.frame.left() + (2.0/3.0) * (self.frame.right() - self.frame.left()) + 1), self.frame.top(),
+                         int(self.frame.left() + (2.0/3.0) * (self.frame.right() - self.frame.left()) + 1), self.frame.bottom())
 
         self.update()
 
@@ -172,7 +172,7 @@ class SpikePlot(QWidget):
                          textBoxWidth, textBoxHeight,
                          Qt.AlignRight | Qt.AlignTop,
                          "+" + str(self.yScale) + " " + constants.QSTRING_MU_SYMBOL + "V")
-        painter.drawText(self.frame.left() - textBoxWidth - 2, self.frame.center().y() - textBoxHeight / 2,
+        painter.drawText(self.frame.left() - textBoxWidth - 2, self.frame.center().y() - textBoxHeight // 2,
                          textBoxWidth, textBoxHeight,
                          Qt.AlignRight | Qt.AlignVCenter, "0")
         painter.drawText(self.frame.left() - textBoxWidth - 2, self.frame.bottom() - textBoxHeight + 1,
@@ -181,13 +181,13 @@ class SpikePlot(QWidget):
                          "-" + str(self.yScale) + " " + constants.QSTRING_MU_SYMBOL + "V")
 
         # Label the time axis.
-        painter.drawText(self.frame.left() - textBoxWidth / 2, self.frame.bottom() + 1,
+        painter.drawText(self.frame.left() - textBoxWidth // 2, self.frame.bottom() + 1,
                          textBoxWidth, textBoxHeight,
                          Qt.AlignHCenter | Qt.AlignTop, "-1")
-        painter.drawText(self.frame.left() + (1.0/3.0) * (self.frame.right() - self.frame.left()) + 1 - textBoxWidth / 2, self.frame.bottom() + 1,
+        painter.drawText(int(self.frame.left() + (1.0/3.0) * (self.frame.right() - self.frame.left()) + 1) - textBoxWidth // 2, self.frame.bottom() + 1,
                          textBoxWidth, textBoxHeight,
                          Qt.AlignHCenter | Qt.AlignTop, "0")
-        painter.drawText(self.frame.left() + (2.0/3.0) * (self.frame.right() - self.frame.left()) + 1 - textBoxWidth / 2, self.frame.bottom() + 1,
+        painter.drawText(int(self.frame.left() + (2.0/3.0) * (self.frame.right() - self.frame.left()) + 1) - textBoxWidth // 2, self.frame.bottom() + 1,
                          textBoxWidth, textBoxHeight,
                          Qt.AlignHCenter | Qt.AlignTop, "1")
         painter.drawText(self.frame.right() - textBoxWidth + 1, self.frame.bottom() + 1,
@@ -196,10 +196,10 @@ class SpikePlot(QWidget):
 
         self.update()
 
-    # This function loads waveform data for the selected channel from the signal processor object,
+    # This function loads waveform data for the selected channel from frame (a WaveformFrame),
     # looks for trigger events, captures 3-ms snippets of the waveform after trigger events,
     # measures the rms level of the waveform, and updates the display.
-    def updateWaveform(self, numBlocks):
+    def updateWaveform(self, numBlocks, frame):
         # Make sure the selected channel is a valid amplifier channel
         if not self.selectedChannel:
             return
@@ -214,11 +214,11 @@ class SpikePlot(QWidget):
         rms = 0.0
         for i in range(constants.SAMPLES_PER_DATA_BLOCK * numBlocks):
             self.spikeWaveformBuffer[i + self.totalTSteps -
-                                     1] = self.signalProcessor.amplifierPostFilter[stream][channel][i]
-            rms += (self.signalProcessor.amplifierPostFilter[stream][channel][i]
-                    * self.signalProcessor.amplifierPostFilter[stream][channel][i])
+                                     1] = frame.amplifierPostFilter[stream][channel][i]
+            rms += (frame.amplifierPostFilter[stream][channel][i]
+                    * frame.amplifierPostFilter[stream][channel][i])
             self.digitalInputBuffer[i + self.totalTSteps -
-                                    1] = self.signalProcessor.boardDigIn[self.digitalTriggerChannel][i]
+                                    1] = frame.boardDigIn[self.digitalTriggerChannel][i]
 
         rms = math.sqrt(rms / (constants.SAMPLES_PER_DATA_BLOCK * numBlocks))
 
@@ -272,7 +272,7 @@ class SpikePlot(QWidget):
         # at the seam between two data blocks.
         index = 0
         for i in range(constants.SAMPLES_PER_DATA_BLOCK * numBlocks - self.totalTSteps + 1, constants.SAMPLES_PER_DATA_BLOCK * numBlocks):
-            self.spikeWaveformBuffer[index] = self.signalProcessor.amplifierPostFilter[stream][channel][i]
+            self.spikeWaveformBuffer[index] = frame.amplifierPostFilter[stream][channel][i]
             index = + 1
 
             if self.startingNewChannel:
@@ -332,8 +332,9 @@ class SpikePlot(QWidget):
         # If using a voltage threshold trigger, plot a line at the threshold level.
         if self.voltageTriggerMode:
             painter.setPen(Qt.red)
-            painter.drawLine(xOffset, yScaleFactor * self.voltageThreshold + yOffset,
-                             xScaleFactor * (self.totalTSteps - 1) + xOffset, yScaleFactor * self.voltageThreshold + yOffset)
+            painter.drawLine(xOffset, int(yScaleFactor * self.voltageThreshold + yOffset),
+                             int(xScaleFactor * (self.totalTSteps - 1) + xOffset),
+                             int(yScaleFactor * self.voltageThreshold + yOffset))
 
         painter.setClipping(False)
 
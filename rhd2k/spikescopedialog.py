@@ -170,8 +170,8 @@ class SpikeScopeDialog(QDialog):
     def resetThresholdToZero(self):
         self.thresholdSpinBox.setValue(0)
 
-    def updateWaveform(self, numBlocks):
-        self.spikePlot.updateWaveform(numBlocks)
+    def updateWaveform(self, numBlocks, frame):
+        self.spikePlot.updateWaveform(numBlocks, frame)
 
     # Set number of spikes plotted superimposed.
     def setNumSpikes(self, index):
@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import math
+
+import numpy as np
+
+import constants
+
+# Raw auxiliary command slot 1 results: the three auxiliary inputs (volts),
+# the supply voltage (volts) and the temperature sensor (degrees C).
+SYNTH_AUX_INPUT_VOLTS = (0.5, 1.0, 2.0)
+SYNTH_SUPPLY_VOLTS = 3.3
+SYNTH_TEMPERATURE = 25.0
+
+
+class SynthDataGenerator():
+    """ This class generates synthetic neural data (at sample rates of 5 kS/s
+    or higher) or ECG data (at lower sample rates) for demonstration and
+    load testing when there is no USB interface board.  The Gaussian noise,
+    spikes and ECG waveforms of all streams, channels and blocks of a read
+    are generated with a few array operations from a NumPy random number
+    generator; runs started with the same seed produce the same data.
+
+    generate() fills a DataBlockBatch with the raw words an interface board
+    with RHD2000 chips would return (amplifier codes, auxiliary inputs,
+    supply voltage and temperature sensor readings, and consecutive
+    timestamps), so the synthetic data is scaled, displayed and saved, in
+    any save format including the raw USB format, by the same code as
+    acquired data.  The board ADC inputs and TTL lines are 0.
+    """
+
+    def __init__(self, numStreams, seed=None):
+        self.numStreams = numStreams
+        self.random = np.random.default_rng(seed)
+        self.timeStamp = 0
+        self.tPulse = 0.0
+
+        # Assign random parameters for synthetic waveforms.
+        self.ecgAmplitude = self.random.uniform(0.5, 3.0, (numStreams, 32))
+        self.spikeAmplitude = self.random.uniform(-400.0, 100.0, (numStreams, 32, 2))
+        self.spikeDuration = self.random.uniform(0.3, 1.7, (numStreams, 32, 2))
+        self.relativeSpikeRate = self.random.uniform(0.1, 5.0, (numStreams, 32))
+
+    # Replace the contents of batch with numBlocks blocks of synthetic data
+    # sampled at sampleRate.
+    def generate(self, batch, numBlocks, sampleRate):
+        if numBlocks > batch.maxNumBlocks:
+            raise IndexError("DataBlockBatch is full (" +
+                             str(batch.maxNumBlocks) + " blocks)")
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        tStepMsec = 1000.0 / sampleRate
+
+        # If the sample rate is 5 kS/s or higher, generate synthetic neural data
+        # otherwise, generate synthetic ECG data.
+        if sampleRate > 4999.9:
+            microvolts = self.neuralData(numBlocks, tStepMsec)
+        else:
+            microvolts = self.ecgData(numBlocks, tStepMsec)
+
+        batch.clear()
+        batch.numBlocks = numBlocks
+        batch.timeStamp[:numBlocks] = (self.timeStamp + np.arange(numBlocks * samples)).reshape(
+            numBlocks, samples)
+        self.timeStamp += numBlocks * samples
+
+        # Amplifier data: 0.195 uV per step, offset by 32768.
+        np.clip(np.rint(microvolts / 0.195) + 32768, 0, 65535,
+                out=microvolts)
+        batch.amplifierData[:numBlocks] = microvolts
+
+        # Every fourth sample of auxiliary command slot 1 is followed by one
+        # sample from each of the three auxiliary inputs; samples 12 and 20
+        # hold the temperature sensor readings and sample 28 the supply voltage.
+        auxiliary_ = batch.auxiliaryData[:numBlocks]
+        auxiliary_.fill(0)
+        for auxInput, volts in enumerate(SYNTH_AUX_INPUT_VOLTS):
+            auxiliary_[:, :, 1, auxInput + 1::4] = round(volts / 0.0000374)
+        auxiliary_[:, :, 1, 20] = round((SYNTH_TEMPERATURE + 273.15) * 98.9)
+        auxiliary_[:, :, 1, 28] = round(SYNTH_SUPPLY_VOLTS / 0.0000748)
+
+        batch.boardAdcData[:numBlocks] = 0
+        batch.ttlIn[:numBlocks] = 0
+        batch.ttlOut[:numBlocks] = 0
+
+    # Returns [block][stream][channel][t] synthetic neural data in microvolts:
+    # Gaussian noise of 2.4 uVrms (would be more in cortex) and, in each block,
+    # a spike of one of two types with a random delay on some channels.
+    def neuralData(self, numBlocks, tStepMsec):
+        shape = (numBlocks, self.numStreams, 32)
+        data = self.random.standard_normal(shape + (constants.SAMPLES_PER_DATA_BLOCK,))
+        data *= 2.4
+
+        block, stream, channel = np.nonzero(
+            self.random.random(shape) < self.relativeSpikeRate * tStepMsec)
+        numSpikes = len(block)
+        if numSpikes > 0:
+            # add some random time jitter, and choose between one of two spike types
+            spikeDelay = self.random.uniform(0.0, 0.3, (numSpikes, 1))
+            spikeNum = (self.random.random(numSpikes) < 0.3).astype(np.intp)
+            amplitude = self.spikeAmplitude[stream, channel, spikeNum][:, np.newaxis]
+            duration = self.spikeDuration[stream, channel, spikeNum][:, np.newaxis]
+
+            t = np.arange(constants.SAMPLES_PER_DATA_BLOCK) * tStepMsec - spikeDelay
+            spikes = amplitude * np.exp(-2.0 * t) * np.sin(2.0 * math.pi * t / duration)
+            spikes[(t <= 0.0) | (t >= duration)] = 0.0
+            data[block, stream, channel] += spikes
+
+        return data
+
+    # Returns [block][stream][channel][t] synthetic ECG data in microvolts: half
+    # sine waves pieced together to model the P wave, QRS complex and T wave,
+    # scaled by a channel-specific amplitude, plus 2.4 uVrms noise.
+    def ecgData(self, numBlocks, tStepMsec):
+        samples = constants.SAMPLES_PER_DATA_BLOCK
+        tPulse = self.tPulse + tStepMsec * np.arange(numBlocks * samples)
+
+        # Repeat ECG waveform with regular period.
+        self.tPulse += tStepMsec * numBlocks * samples
+        if self.tPulse > 840.0:
+            self.tPulse = 0.0
+
+        ecgValue = np.select(
+            [tPulse < 80.0,
+             (tPulse > 100.0) & (tPulse < 120.0),
+             (tPulse > 120.0) & (tPulse < 180.0),
+             (tPulse > 180.0) & (tPulse < 260.0),
+             (tPulse > 340.0) & (tPulse < 400.0)],
+            [40.0 * np.sin(2.0 * math.pi * tPulse / 160.0),  # P wave
+             -250.0 * np.sin(2.0 * math.pi * (tPulse - 100.0) / 40.0),  # Q
+             1000.0 * np.sin(2.0 * math.pi * (tPulse - 120.0) / 120.0),  # R
+             -120.0 * np.sin(2.0 * math.pi * (tPulse - 180.0) / 160.0),  # S
+             60.0 * np.sin(2.0 * math.pi * (tPulse - 340.0) / 120.0)],  # T wave
+            0.0)
+
+        data = self.random.standard_normal((numBlocks, self.numStreams, 32, samples))
+        data *= 2.4
+        data += self.ecgAmplitude[:, :, np.newaxis] * ecgValue.reshape(numBlocks, 1, 1, samples)
+        return data
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import constants
+
+# Board ADC inputs (trigger channels 16-23) are high at or above this voltage.
+ANALOG_TRIGGER_THRESHOLD = 1.65
+
+# Board ADC scale factor (volts per step), as in SignalProcessor.
+BOARD_ADC_VOLTS_PER_STEP = 0.000050354
+
+
+class TriggerSource():
+    """ This class describes one input that can trigger recording: digital
+    input 0-15 or board ADC input 0-7 (channel 16-23, high at or above
+    ANALOG_TRIGGER_THRESHOLD volts).  polarity is 0 to trigger on a high
+    level (or a rising edge) and 1 to trigger on a low level (or a falling
+    edge).  If edge is False, every sample at the trigger level qualifies;
+    if edge is True, only the first sample after the input changes to the
+    trigger level does.
+    """
+
+    def __init__(self, channel, polarity=0, edge=False):
+        if channel < 0 or channel > 23:
+            raise ValueError("Trigger channel must be 0-15 (digital input) or 16-23 "
+                             "(analog input), not " + str(channel))
+        self.channel = channel
+        self.polarity = polarity
+        self.edge = edge
+
+
+class TriggerDetector():
+    """ This class finds the first sample that meets any of a list of
+    TriggerSource conditions in all the blocks of a read staged in a
+    DataBlockBatch.  The trigger levels of every source are computed for
+    the whole read with a few array operations, and the first qualifying
+    sample is found with a single search, so no Python code runs per
+    sample.
+
+    find() returns the timestamp of the first qualifying sample, or -1 if
+    there is none; findInactive() returns the timestamp of the first sample
+    at which no source is at its trigger level (the end of a trigger), or
+    -1.  The level of each source at the last sample of a read is kept, so
+    an edge between two reads is found at the first sample of the second
+    one; an input that is already at its trigger level when the detector
+    starts (or after reset()) is not an edge.
+    """
+
+    def __init__(self, sources):
+        self.sources = list(sources)
+        self.reset()
+
+    # Forget the input levels of the previous read.
+    def reset(self):
+        self.lastActive = None
+
+    # Returns a [source][t] boolean array that is True where each source is at
+    # its trigger level in the numBlocks blocks staged in batch.
+    def activeLevels(self, batch, numBlocks):
+        active = np.empty((len(self.sources), numBlocks * constants.SAMPLES_PER_DATA_BLOCK),
+                          dtype=bool)
+        for index, source in enumerate(self.sources):
+            if source.channel >= 16:
+                adc = batch.boardAdcData[:numBlocks, source.channel - 16].reshape(-1)
+                np.greater_equal(adc * BOARD_ADC_VOLTS_PER_STEP, ANALOG_TRIGGER_THRESHOLD,
+                                 out=active[index])
+            else:
+                ttlIn = batch.ttlIn[:numBlocks].reshape(-1)
+                np.not_equal(ttlIn & (1 << source.channel), 0, out=active[index])
+            if source.polarity:
+                np.logical_not(active[index], out=active[index])
+        return active
+
+    # Returns the timestamp of the first sample of the numBlocks blocks staged in
+    # batch that meets the condition of any source, or -1.
+    def find(self, batch, numBlocks=None):
+        if numBlocks is None:
+            numBlocks = batch.numBlocks
+        active = self.activeLevels(batch, numBlocks)
+        qualifying = active.copy()
+
+        for index, source in enumerate(self.sources):
+            if source.edge:
+                qualifying[index, 1:] &= ~active[index, :-1]
+                if self.lastActive is None or self.lastActive[index]:
+                    qualifying[index, 0] = False
+
+        self.keepLastLevels(active)
+        return self.firstTimeStamp(batch, numBlocks, qualifying.any(axis=0))
+
+    # Returns the timestamp of the first sample of the numBlocks blocks staged in
+    # batch at which no source is at its trigger level, or -1.
+    def findInactive(self, batch, numBlocks=None):
+        if numBlocks is None:
+            numBlocks = batch.numBlocks
+        active = self.activeLevels(batch, numBlocks)
+        self.keepLastLevels(active)
+        return self.firstTimeStamp(batch, numBlocks, ~active.any(axis=0))
+
+    def keepLastLevels(self, active):
+        if active.shape[1] > 0:
+            self.lastActive = active[:, -1].copy()
+
+    @staticmethod
+    def firstTimeStamp(batch, numBlocks, qualifying):
+        if len(qualifying) == 0:
+            return -1
+        first = int(np.argmax(qualifying))
+        if not qualifying[first]:
+            return -1
+        return int(batch.timeStamp[:numBlocks].reshape(-1)[first])
@@ -7,7 +7,7 @@ from PyQt5.QtWidgets import QDialog, QGroupBox, QVBoxLayout, QHBoxLayout, QLabel
 
 
 class TriggerRecordDialog(QDialog):
-    def __init__(self, initialTriggerChannel, initialTriggerPolarity, initialTriggerBuffer, initialPostTrigger, initialSaveTriggerChannel, parent):
+    def __init__(self, initialTriggerChannel, initialTriggerPolarity, initialTriggerEdge, initialTriggerBuffer, initialPostTrigger, initialSaveTriggerChannel, parent):
         super().__init__(parent)
 
         self.setWindowTitle("Episodic Triggered Recording Control")
@@ -53,6 +53,10 @@ class TriggerRecordDialog(QDialog):
         triggerPolarityComboBox.currentIndexChanged.connect(
             self.setTriggerPolarity)
 
+        self.triggerEdgeCheckBox = QCheckBox(
+            "Trigger Only When Input Changes to Trigger Level")
+        self.triggerEdgeCheckBox.setChecked(initialTriggerEdge)
+
         self.saveTriggerChannelCheckBox = QCheckBox(
             "Automatically Save Trigger Channel")
         self.saveTriggerChannelCheckBox.setChecked(initialSaveTriggerChannel)
@@ -60,6 +64,7 @@ class TriggerRecordDialog(QDialog):
         triggerControls = QVBoxLayout()
         triggerControls.addWidget(digitalInputComboBox)
         triggerControls.addWidget(triggerPolarityComboBox)
+        triggerControls.addWidget(self.triggerEdgeCheckBox)
         triggerControls.addWidget(self.saveTriggerChannelCheckBox)
 
         triggerHBox = QHBoxLayout()
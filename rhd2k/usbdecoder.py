@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Imported both as part of the rhd2k package and as a top-level module.
+try:
+    from . import constants
+except ImportError:
+    import constants
+
+# 64-bit magic number at the start of every sample read from the USB interface board.
+RHD2000_HEADER_MAGIC_NUMBER = 0xc691199927021942
+
+
+# Returns the NumPy structured type of one sample of a USB data block with
+# numDataStreams data streams.  Fields hold the USB words of the sample in
+# the order they are read from the board: auxiliary command results and
+# amplifier channels are interleaved across data streams ([channel][stream]),
+# followed by one filler word per stream.
+def usbSampleDtype(numDataStreams):
+    return np.dtype([
+        ("header", "<u8"),
+        ("timeStamp", "<u4"),
+        ("auxiliaryData", "<u2", (3, numDataStreams)),
+        ("amplifierData", "<u2", (32, numDataStreams)),
+        ("filler", "<u2", (numDataStreams,)),
+        ("boardAdcData", "<u2", (8,)),
+        ("ttlIn", "<u2"),
+        ("ttlOut", "<u2"),
+    ])
+
+
+# Returns the number of bytes of one USB data block with numDataStreams data streams.
+def dataBlockSizeInBytes(numDataStreams):
+    return constants.SAMPLES_PER_DATA_BLOCK * usbSampleDtype(numDataStreams).itemsize
+
+
+class UsbDataBlocks():
+    """ This class decodes data blocks in the raw byte format read from the
+    USB interface board (by Rhd2000EvalBoard.readRawDataBlocks(), or saved
+    to disk) without copying them or creating per-block objects: every
+    array is a strided NumPy view into buffer, with the same layout as the
+    arrays of a DataBlockBatch:
+        timeStamp      [block][t]
+        amplifierData  [block][stream][channel 0-31][t]
+        auxiliaryData  [block][stream][channel 0-2][t]
+        boardAdcData   [block][channel 0-7][t]
+        ttlIn, ttlOut  [block][t]
+    Values are the unsigned USB words (timeStamp is uint32, all others
+    uint16), as stored in Rhd2000DataBlock.
+
+    buffer may be any object exposing a byte buffer (bytes, bytearray,
+    mmap, a NumPy array, ...).  If numBlocks is None, all complete blocks
+    in buffer are decoded.  If checkHeaders is True, a ValueError is
+    raised if any sample does not start with the Rhythm header magic
+    number; badBlocks() lists the offending blocks.
+    """
+
+    def __init__(self, buffer, numDataStreams, numBlocks=None, checkHeaders=True):
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        blockSize = dataBlockSizeInBytes(numDataStreams)
+        if numBlocks is None:
+            numBlocks = len(data) // blockSize
+        elif numBlocks * blockSize > len(data):
+            raise ValueError("Buffer holds " + str(len(data) // blockSize) + " data blocks, not " +
+                             str(numBlocks))
+
+        self.numDataStreams = numDataStreams
+        self.numBlocks = numBlocks
+
+        samples = data[:numBlocks * blockSize].view(usbSampleDtype(numDataStreams)).reshape(
+            numBlocks, constants.SAMPLES_PER_DATA_BLOCK)
+        self.samples = samples
+        self.header = samples["header"]
+        self.timeStamp = samples["timeStamp"]
+        self.auxiliaryData = samples["auxiliaryData"].transpose(0, 3, 2, 1)
+        self.amplifierData = samples["amplifierData"].transpose(0, 3, 2, 1)
+        self.boardAdcData = samples["boardAdcData"].transpose(0, 2, 1)
+        self.ttlIn = samples["ttlIn"]
+        self.ttlOut = samples["ttlOut"]
+
+        if checkHeaders:
+            badBlocks = self.badBlocks()
+            if len(badBlocks) > 0:
+                raise ValueError("Incorrect header in " + str(len(badBlocks)) +
+                                 " data blocks, starting with block " + str(badBlocks[0]))
+
+    def __len__(self):
+        return self.numBlocks
+
+    # Returns the indices of the blocks with a sample that does not start with
+    # the header magic number.
+    def badBlocks(self):
+        return np.flatnonzero((self.header != RHD2000_HEADER_MAGIC_NUMBER).any(axis=1))
+
+
+# Returns the UsbDataBlocks of a file of raw USB data blocks with numDataStreams
+# data streams.  The file is memory-mapped, so blocks are only read from disk
+# when their arrays are used.
+def openUsbDataFile(fileName, numDataStreams, offset=0, checkHeaders=True):
+    data = np.memmap(fileName, dtype=np.uint8, mode="r", offset=offset)
+    return UsbDataBlocks(data, numDataStreams, checkHeaders=checkHeaders)
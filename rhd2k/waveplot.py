@@ -87,7 +87,7 @@ class WavePlot(QWidget):
     def createFrames(self, frameIndex, maxX, maxY):
         self.frameNumColumns[frameIndex] = maxX
 
-        xSize = (self.width() - 10 - 6 * (maxX - 1)) / maxX
+        xSize = (self.width() - 10 - 6 * (maxX - 1)) // maxX
         xOffset = xSize + 6
 
         textBoxHeight = self.fontMetrics().height()
@@ -96,7 +96,7 @@ class WavePlot(QWidget):
             ySpacing = 2 * textBoxHeight + 1
         else:
             ySpacing = 2 * textBoxHeight + 3
-        yOffset = (self.height() - 4) / maxY
+        yOffset = (self.height() - 4) // maxY
         ySize = yOffset - ySpacing
 
         self.frameList[frameIndex] = [0]*((maxY * maxX))
@@ -302,8 +302,8 @@ class WavePlot(QWidget):
             painter.setPen(self.palette().window().color())
         else:
             painter.setPen(Qt.darkRed)
-        painter.drawLine(frame.center().x() - (frame.width() / 2 + 3) + 1, frame.top() - 5,
-                         frame.center().x() - (frame.width() / 2 + 3) + 1, frame.bottom() + 7)
+        painter.drawLine(frame.center().x() - (frame.width() // 2 + 3) + 1, frame.top() - 5,
+                         frame.center().x() - (frame.width() // 2 + 3) + 1, frame.bottom() + 7)
         self.update()
 
     def wheelEvent(self, event):
@@ -524,14 +524,14 @@ class WavePlot(QWidget):
                                  frame.right(), frame.center().y())
             elif stype == constants.SupplyVoltageSignal:
                 # Draw V = 3.6V axis line.
-                painter.drawLine(frame.left(), frame.top() - 0.266667 * (frame.top() - frame.bottom()) + 1,
-                                 frame.right(), frame.top() - 0.266667 * (frame.top() - frame.bottom()) + 1)
+                painter.drawLine(frame.left(), int(frame.top() - 0.266667 * (frame.top() - frame.bottom()) + 1),
+                                 frame.right(), int(frame.top() - 0.266667 * (frame.top() - frame.bottom()) + 1))
                 # Draw V = 3.2V axis line.
-                painter.drawLine(frame.left(), frame.top() - 0.533333 * (frame.top() - frame.bottom()) + 1,
-                                 frame.right(), frame.top() - 0.533333 * (frame.top() - frame.bottom()) + 1)
+                painter.drawLine(frame.left(), int(frame.top() - 0.533333 * (frame.top() - frame.bottom()) + 1),
+                                 frame.right(), int(frame.top() - 0.533333 * (frame.top() - frame.bottom()) + 1))
                 # Draw V = 2.9V axis line.
-                painter.drawLine(frame.left(), frame.top() - 0.733333 * (frame.top() - frame.bottom()) + 1,
-                                 frame.right(), frame.top() - 0.733333 * (frame.top() - frame.bottom()) + 1)
+                painter.drawLine(frame.left(), int(frame.top() - 0.733333 * (frame.top() - frame.bottom()) + 1),
+                                 frame.right(), int(frame.top() - 0.733333 * (frame.top() - frame.bottom()) + 1))
         else:
             # Draw X showing channel is disabled.
             painter.drawLine(frame.left(), frame.top(),
@@ -627,7 +627,7 @@ class WavePlot(QWidget):
             else:
                 precision = 2
 
-            painter.drawText(frame.center().x() - textBoxWidth / 2, frame.bottom() + 1,
+            painter.drawText(frame.center().x() - textBoxWidth // 2, frame.bottom() + 1,
                              textBoxWidth, textBoxHeight, Qt.AlignHCenter | Qt.AlignTop,
                              str(("%."+str(precision)+"f") % (electrodeImpedanceMagnitude / scale)) +
                              " " + unitPrefix + constants.QSTRING_OMEGA_SYMBOL +
@@ -638,8 +638,8 @@ class WavePlot(QWidget):
     def setNumUsbBlocksToPlot(self, numBlocks):
         self.numUsbBlocksToPlot = numBlocks
 
-    # Plot waveforms on screen.
-    def drawWaveforms(self):
+    # Plot the waveforms held by frame (a WaveformFrame) on screen.
+    def drawWaveforms(self, frame):
         painter = QPainter(self.pixmap)
         length = Rhd2000DataBlock.getSamplesPerDataBlock() * self.numUsbBlocksToPlot
 
@@ -672,9 +672,9 @@ class WavePlot(QWidget):
 
                 # Erase segment of old wavefrom
                 eraseBlock = copy(adjustedFrame)
-                eraseBlock.setLeft(xOffset)
-                eraseBlock.setRight(
-                    (tAxisLength * (1000.0 / self.sampleRate) / self.tScale) * (length - 1) + xOffset)
+                eraseBlock.setLeft(int(xOffset))
+                eraseBlock.setRight(int(
+                    (tAxisLength * (1000.0 / self.sampleRate) / self.tScale) * (length - 1) + xOffset))
                 painter.eraseRect(eraseBlock)
 
                 # Redraw y = 0 axis
@@ -692,7 +692,7 @@ class WavePlot(QWidget):
                     # build waveform
                     for i in range(length):
                         polyline[i+1] = QPointF(xScaleFactor * i + xOffset, yScaleFactor *
-                                                self.signalProcessor.amplifierPostFilter[stream][channel][i] + yOffset)
+                                                frame.amplifierPostFilter[stream][channel][i] + yOffset)
 
                     # join to old waveform
                     if self.tPosition == 0.0:
@@ -703,7 +703,7 @@ class WavePlot(QWidget):
 
                     # save last point in waveform to join to next segment
                     self.plotDataOld[j + self.topLeftFrame[self.selectedPort]
-                                     ] = self.signalProcessor.amplifierPostFilter[stream][channel][length - 1]
+                                     ] = frame.amplifierPostFilter[stream][channel][length - 1]
 
                     # draw waveform
                     painter.setPen(Qt.blue)
@@ -724,7 +724,7 @@ class WavePlot(QWidget):
                     # build waveform
                     for i in range(length / 4):
                         polyline[i+1] = QPointF(xScaleFactor * i + xOffset, yScaleFactor *
-                                                self.signalProcessor.auxChannel[stream][channel][i] + yOffset)
+                                                frame.auxChannel[stream][channel][i] + yOffset)
 
                     # join to old waveform
                     if self.tPosition == 0.0:
@@ -734,7 +734,7 @@ class WavePlot(QWidget):
                             j + self.topLeftFrame[self.selectedPort]] + yOffset)
 
                     # save last point in waveform to join to next segment
-                    self.plotDataOld[j + self.topLeftFrame[self.selectedPort]] = self.signalProcessor.auxChannel[
+                    self.plotDataOld[j + self.topLeftFrame[self.selectedPort]] = frame.auxChannel[
                         stream][channel][(length / 4) - 1]
 
                     # draw waveform
@@ -761,7 +761,7 @@ class WavePlot(QWidget):
 
                     # build waveform
                     for i in range(length / 60):
-                        voltage = self.signalProcessor.supplyVoltage[stream][i]
+                        voltage = frame.supplyVoltage[stream][i]
                         polyline[i+1] = QPointF(xScaleFactor * i + xOffset,
                                                 yScaleFactor * (voltage - 2.5) + yOffset)
                         if voltage < 2.9 or voltage > 3.6:
@@ -778,7 +778,7 @@ class WavePlot(QWidget):
 
                     # save last point in waveform to join to next segment
                     self.plotDataOld[j + self.topLeftFrame[self.selectedPort]
-                                     ] = self.signalProcessor.supplyVoltage[stream][(length / 60) - 1]
+                                     ] = frame.supplyVoltage[stream][(length // 60) - 1]
 
                     # draw waveform
                     painter.setPen(Qt.green)
@@ -805,7 +805,7 @@ class WavePlot(QWidget):
                     # build waveform
                     for i in range(length):
                         polyline[i+1] = QPointF(xScaleFactor * i + xOffset, yScaleFactor *
-                                                self.signalProcessor.boardAdc[channel][i] + yOffset)
+                                                frame.boardAdc[channel][i] + yOffset)
 
                     # join to old waveform
                     if self.tPosition == 0.0:
@@ -816,7 +816,7 @@ class WavePlot(QWidget):
 
                     # save last point in waveform to join to next segment
                     self.plotDataOld[j + self.topLeftFrame[self.selectedPort]
-                                     ] = self.signalProcessor.boardAdc[channel][length - 1]
+                                     ] = frame.boardAdc[channel][length - 1]
 
                     # draw waveform
                     painter.setPen(Qt.darkGreen)
@@ -837,7 +837,7 @@ class WavePlot(QWidget):
                     # build waveform
                     for i in range(length):
                         polyline[i+1] = QPointF(xScaleFactor * i + xOffset, yScaleFactor *
-                                                self.signalProcessor.boardDigIn[channel][i] + yOffset)
+                                                frame.boardDigIn[channel][i] + yOffset)
 
                     # join to old waveform
                     if self.tPosition == 0.0:
@@ -848,7 +848,7 @@ class WavePlot(QWidget):
 
                     # save last point in waveform to join to next segment
                     self.plotDataOld[j + self.topLeftFrame[self.selectedPort]
-                                     ] = self.signalProcessor.boardDigIn[channel][length - 1]
+                                     ] = frame.boardDigIn[channel][length - 1]
 
                     # draw waveform
                     pen = QPen()
@@ -944,8 +944,8 @@ class WavePlot(QWidget):
         self.refreshScreen()
 
     # Update display when new data is available.
-    def passFilteredData(self):
-        self.drawWaveforms()
+    def passFilteredData(self, frame):
+        self.drawWaveforms(frame)
         self.update()
 
     # Enable or disable electrode impedance labels on display.
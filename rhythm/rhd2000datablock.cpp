@@ -31,12 +31,16 @@ using namespace std;
 // from a Rhythm FPGA interface controlling up to eight RHD2000 chips.
 
 // Constructor.  Allocates memory for data block.
-Rhd2000DataBlock::Rhd2000DataBlock(int numDataStreams)
+// Each sample array is stored in a single contiguous vector in row-major
+// (stream, channel, sample) order so that it can be shared without copying;
+// use amplifierIndex(), auxiliaryIndex(), and boardAdcIndex() to address it.
+Rhd2000DataBlock::Rhd2000DataBlock(int numDataStreams) :
+    numDataStreams(numDataStreams)
 {
     allocateUIntArray1D(timeStamp, SAMPLES_PER_DATA_BLOCK);
-    allocateIntArray3D(amplifierData, numDataStreams, 32, SAMPLES_PER_DATA_BLOCK);
-    allocateIntArray3D(auxiliaryData, numDataStreams, 3, SAMPLES_PER_DATA_BLOCK);
-    allocateIntArray2D(boardAdcData, 8, SAMPLES_PER_DATA_BLOCK);
+    allocateIntArray1D(amplifierData, numDataStreams * 32 * SAMPLES_PER_DATA_BLOCK);
+    allocateIntArray1D(auxiliaryData, numDataStreams * 3 * SAMPLES_PER_DATA_BLOCK);
+    allocateIntArray1D(boardAdcData, 8 * SAMPLES_PER_DATA_BLOCK);
     allocateIntArray1D(ttlIn, SAMPLES_PER_DATA_BLOCK);
     allocateIntArray1D(ttlOut, SAMPLES_PER_DATA_BLOCK);
 }
@@ -53,31 +57,6 @@ void Rhd2000DataBlock::allocateUIntArray1D(vector<unsigned int> &array1D, int xS
     array1D.resize(xSize);
 }
 
-// Allocates memory for a 2-D array of integers.
-void Rhd2000DataBlock::allocateIntArray2D(vector<vector<int> > & array2D, int xSize, int ySize)
-{
-    int i;
-
-    array2D.resize(xSize);
-    for (i = 0; i < xSize; ++i)
-        array2D[i].resize(ySize);
-}
-
-// Allocates memory for a 3-D array of integers.
-void Rhd2000DataBlock::allocateIntArray3D(vector<vector<vector<int> > > &array3D, int xSize, int ySize, int zSize)
-{
-    int i, j;
-
-    array3D.resize(xSize);
-    for (i = 0; i < xSize; ++i) {
-        array3D[i].resize(ySize);
-
-        for (j = 0; j < ySize; ++j) {
-            array3D[i][j].resize(zSize);
-        }
-    }
-}
-
 // Returns the number of samples in a USB data block.
 unsigned int Rhd2000DataBlock::getSamplesPerDataBlock()
 {
@@ -153,7 +132,7 @@ void Rhd2000DataBlock::fillFromUsbBuffer(unsigned char usbBuffer[], int blockInd
         // Read auxiliary results
         for (channel = 0; channel < 3; ++channel) {
             for (stream = 0; stream < numDataStreams; ++stream) {
-                auxiliaryData[stream][channel][t] = convertUsbWord(usbBuffer, index);
+                auxiliaryData[auxiliaryIndex(stream, channel, t)] = convertUsbWord(usbBuffer, index);
                 index += 2;
             }
         }
@@ -161,7 +140,7 @@ void Rhd2000DataBlock::fillFromUsbBuffer(unsigned char usbBuffer[], int blockInd
         // Read amplifier channels
         for (channel = 0; channel < 32; ++channel) {
             for (stream = 0; stream < numDataStreams; ++stream) {
-                amplifierData[stream][channel][t] = convertUsbWord(usbBuffer, index);
+                amplifierData[amplifierIndex(stream, channel, t)] = convertUsbWord(usbBuffer, index);
                 index += 2;
             }
         }
@@ -171,7 +150,7 @@ void Rhd2000DataBlock::fillFromUsbBuffer(unsigned char usbBuffer[], int blockInd
 
         // Read from AD5662 ADCs
         for (i = 0; i < 8; ++i) {
-            boardAdcData[i][t] = convertUsbWord(usbBuffer, index);
+            boardAdcData[boardAdcIndex(i, t)] = convertUsbWord(usbBuffer, index);
             index += 2;
         }
 
@@ -194,24 +173,24 @@ void Rhd2000DataBlock::print(int stream) const
     cout << "RHD 2000 Data Block contents:" << endl;
     cout << "  ROM contents:" << endl;
     cout << "    Chip Name: " <<
-           (char) auxiliaryData[stream][2][24] <<
-           (char) auxiliaryData[stream][2][25] <<
-           (char) auxiliaryData[stream][2][26] <<
-           (char) auxiliaryData[stream][2][27] <<
-           (char) auxiliaryData[stream][2][28] <<
-           (char) auxiliaryData[stream][2][29] <<
-           (char) auxiliaryData[stream][2][30] <<
-           (char) auxiliaryData[stream][2][31] << endl;
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 24)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 25)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 26)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 27)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 28)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 29)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 30)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 31)] << endl;
     cout << "    Company Name:" <<
-           (char) auxiliaryData[stream][2][32] <<
-           (char) auxiliaryData[stream][2][33] <<
-           (char) auxiliaryData[stream][2][34] <<
-           (char) auxiliaryData[stream][2][35] <<
-           (char) auxiliaryData[stream][2][36] << endl;
-    cout << "    Intan Chip ID: " << auxiliaryData[stream][2][19] << endl;
-    cout << "    Number of Amps: " << auxiliaryData[stream][2][20] << endl;
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 32)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 33)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 34)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 35)] <<
+           (char) auxiliaryData[auxiliaryIndex(stream, 2, 36)] << endl;
+    cout << "    Intan Chip ID: " << auxiliaryData[auxiliaryIndex(stream, 2, 19)] << endl;
+    cout << "    Number of Amps: " << auxiliaryData[auxiliaryIndex(stream, 2, 20)] << endl;
     cout << "    Unipolar/Bipolar Amps: ";
-    switch (auxiliaryData[stream][2][21]) {
+    switch (auxiliaryData[auxiliaryIndex(stream, 2, 21)]) {
         case 0:
             cout << "bipolar";
             break;
@@ -222,51 +201,51 @@ void Rhd2000DataBlock::print(int stream) const
             cout << "UNKNOWN";
     }
     cout << endl;
-    cout << "    Die Revision: " << auxiliaryData[stream][2][22] << endl;
-    cout << "    Future Expansion Register: " << auxiliaryData[stream][2][23] << endl;
+    cout << "    Die Revision: " << auxiliaryData[auxiliaryIndex(stream, 2, 22)] << endl;
+    cout << "    Future Expansion Register: " << auxiliaryData[auxiliaryIndex(stream, 2, 23)] << endl;
 
     cout << "  RAM contents:" << endl;
-    cout << "    ADC reference BW:      " << ((auxiliaryData[stream][2][RamOffset + 0] & 0xc0) >> 6) << endl;
-    cout << "    amp fast settle:       " << ((auxiliaryData[stream][2][RamOffset + 0] & 0x20) >> 5) << endl;
-    cout << "    amp Vref enable:       " << ((auxiliaryData[stream][2][RamOffset + 0] & 0x10) >> 4) << endl;
-    cout << "    ADC comparator bias:   " << ((auxiliaryData[stream][2][RamOffset + 0] & 0x0c) >> 2) << endl;
-    cout << "    ADC comparator select: " << ((auxiliaryData[stream][2][RamOffset + 0] & 0x03) >> 0) << endl;
-    cout << "    VDD sense enable:      " << ((auxiliaryData[stream][2][RamOffset + 1] & 0x40) >> 6) << endl;
-    cout << "    ADC buffer bias:       " << ((auxiliaryData[stream][2][RamOffset + 1] & 0x3f) >> 0) << endl;
-    cout << "    MUX bias:              " << ((auxiliaryData[stream][2][RamOffset + 2] & 0x3f) >> 0) << endl;
-    cout << "    MUX load:              " << ((auxiliaryData[stream][2][RamOffset + 3] & 0xe0) >> 5) << endl;
-    cout << "    tempS2, tempS1:        " << ((auxiliaryData[stream][2][RamOffset + 3] & 0x10) >> 4) << "," <<
-           ((auxiliaryData[stream][2][RamOffset + 3] & 0x08) >> 3) << endl;
-    cout << "    tempen:                " << ((auxiliaryData[stream][2][RamOffset + 3] & 0x04) >> 2) << endl;
-    cout << "    digout HiZ:            " << ((auxiliaryData[stream][2][RamOffset + 3] & 0x02) >> 1) << endl;
-    cout << "    digout:                " << ((auxiliaryData[stream][2][RamOffset + 3] & 0x01) >> 0) << endl;
-    cout << "    weak MISO:             " << ((auxiliaryData[stream][2][RamOffset + 4] & 0x80) >> 7) << endl;
-    cout << "    twoscomp:              " << ((auxiliaryData[stream][2][RamOffset + 4] & 0x40) >> 6) << endl;
-    cout << "    absmode:               " << ((auxiliaryData[stream][2][RamOffset + 4] & 0x20) >> 5) << endl;
-    cout << "    DSPen:                 " << ((auxiliaryData[stream][2][RamOffset + 4] & 0x10) >> 4) << endl;
-    cout << "    DSP cutoff freq:       " << ((auxiliaryData[stream][2][RamOffset + 4] & 0x0f) >> 0) << endl;
-    cout << "    Zcheck DAC power:      " << ((auxiliaryData[stream][2][RamOffset + 5] & 0x40) >> 6) << endl;
-    cout << "    Zcheck load:           " << ((auxiliaryData[stream][2][RamOffset + 5] & 0x20) >> 5) << endl;
-    cout << "    Zcheck scale:          " << ((auxiliaryData[stream][2][RamOffset + 5] & 0x18) >> 3) << endl;
-    cout << "    Zcheck conn all:       " << ((auxiliaryData[stream][2][RamOffset + 5] & 0x04) >> 2) << endl;
-    cout << "    Zcheck sel pol:        " << ((auxiliaryData[stream][2][RamOffset + 5] & 0x02) >> 1) << endl;
-    cout << "    Zcheck en:             " << ((auxiliaryData[stream][2][RamOffset + 5] & 0x01) >> 0) << endl;
-    cout << "    Zcheck DAC:            " << ((auxiliaryData[stream][2][RamOffset + 6] & 0xff) >> 0) << endl;
-    cout << "    Zcheck select:         " << ((auxiliaryData[stream][2][RamOffset + 7] & 0x3f) >> 0) << endl;
-    cout << "    ADC aux1 en:           " << ((auxiliaryData[stream][2][RamOffset + 9] & 0x80) >> 7) << endl;
-    cout << "    ADC aux2 en:           " << ((auxiliaryData[stream][2][RamOffset + 11] & 0x80) >> 7) << endl;
-    cout << "    ADC aux3 en:           " << ((auxiliaryData[stream][2][RamOffset + 13] & 0x80) >> 7) << endl;
-    cout << "    offchip RH1:           " << ((auxiliaryData[stream][2][RamOffset + 8] & 0x80) >> 7) << endl;
-    cout << "    offchip RH2:           " << ((auxiliaryData[stream][2][RamOffset + 10] & 0x80) >> 7) << endl;
-    cout << "    offchip RL:            " << ((auxiliaryData[stream][2][RamOffset + 12] & 0x80) >> 7) << endl;
-
-    int rH1Dac1 = auxiliaryData[stream][2][RamOffset + 8] & 0x3f;
-    int rH1Dac2 = auxiliaryData[stream][2][RamOffset + 9] & 0x1f;
-    int rH2Dac1 = auxiliaryData[stream][2][RamOffset + 10] & 0x3f;
-    int rH2Dac2 = auxiliaryData[stream][2][RamOffset + 11] & 0x1f;
-    int rLDac1 = auxiliaryData[stream][2][RamOffset + 12] & 0x7f;
-    int rLDac2 = auxiliaryData[stream][2][RamOffset + 13] & 0x3f;
-    int rLDac3 = auxiliaryData[stream][2][RamOffset + 13] & 0x40 >> 6;
+    cout << "    ADC reference BW:      " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 0)] & 0xc0) >> 6) << endl;
+    cout << "    amp fast settle:       " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 0)] & 0x20) >> 5) << endl;
+    cout << "    amp Vref enable:       " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 0)] & 0x10) >> 4) << endl;
+    cout << "    ADC comparator bias:   " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 0)] & 0x0c) >> 2) << endl;
+    cout << "    ADC comparator select: " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 0)] & 0x03) >> 0) << endl;
+    cout << "    VDD sense enable:      " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 1)] & 0x40) >> 6) << endl;
+    cout << "    ADC buffer bias:       " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 1)] & 0x3f) >> 0) << endl;
+    cout << "    MUX bias:              " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 2)] & 0x3f) >> 0) << endl;
+    cout << "    MUX load:              " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 3)] & 0xe0) >> 5) << endl;
+    cout << "    tempS2, tempS1:        " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 3)] & 0x10) >> 4) << "," <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 3)] & 0x08) >> 3) << endl;
+    cout << "    tempen:                " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 3)] & 0x04) >> 2) << endl;
+    cout << "    digout HiZ:            " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 3)] & 0x02) >> 1) << endl;
+    cout << "    digout:                " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 3)] & 0x01) >> 0) << endl;
+    cout << "    weak MISO:             " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 4)] & 0x80) >> 7) << endl;
+    cout << "    twoscomp:              " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 4)] & 0x40) >> 6) << endl;
+    cout << "    absmode:               " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 4)] & 0x20) >> 5) << endl;
+    cout << "    DSPen:                 " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 4)] & 0x10) >> 4) << endl;
+    cout << "    DSP cutoff freq:       " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 4)] & 0x0f) >> 0) << endl;
+    cout << "    Zcheck DAC power:      " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 5)] & 0x40) >> 6) << endl;
+    cout << "    Zcheck load:           " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 5)] & 0x20) >> 5) << endl;
+    cout << "    Zcheck scale:          " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 5)] & 0x18) >> 3) << endl;
+    cout << "    Zcheck conn all:       " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 5)] & 0x04) >> 2) << endl;
+    cout << "    Zcheck sel pol:        " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 5)] & 0x02) >> 1) << endl;
+    cout << "    Zcheck en:             " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 5)] & 0x01) >> 0) << endl;
+    cout << "    Zcheck DAC:            " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 6)] & 0xff) >> 0) << endl;
+    cout << "    Zcheck select:         " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 7)] & 0x3f) >> 0) << endl;
+    cout << "    ADC aux1 en:           " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 9)] & 0x80) >> 7) << endl;
+    cout << "    ADC aux2 en:           " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 11)] & 0x80) >> 7) << endl;
+    cout << "    ADC aux3 en:           " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 13)] & 0x80) >> 7) << endl;
+    cout << "    offchip RH1:           " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 8)] & 0x80) >> 7) << endl;
+    cout << "    offchip RH2:           " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 10)] & 0x80) >> 7) << endl;
+    cout << "    offchip RL:            " << ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 12)] & 0x80) >> 7) << endl;
+
+    int rH1Dac1 = auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 8)] & 0x3f;
+    int rH1Dac2 = auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 9)] & 0x1f;
+    int rH2Dac1 = auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 10)] & 0x3f;
+    int rH2Dac2 = auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 11)] & 0x1f;
+    int rLDac1 = auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 12)] & 0x7f;
+    int rLDac2 = auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 13)] & 0x3f;
+    int rLDac3 = auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 13)] & 0x40 >> 6;
 
     double rH1 = 2630.0 + rH1Dac2 * 30800.0 + rH1Dac1 * 590.0;
     double rH2 = 8200.0 + rH2Dac2 * 38400.0 + rH2Dac1 * 730.0;
@@ -282,44 +261,44 @@ void Rhd2000DataBlock::print(int stream) const
             (rL / 1000) << " kOhm" << endl;
 
     cout << "    amp power[31:0]:       " <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x80) >> 7) <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x40) >> 6) <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x20) >> 5) <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x10) >> 4) <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x08) >> 3) <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x04) >> 2) <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x02) >> 1) <<
-           ((auxiliaryData[stream][2][RamOffset + 17] & 0x01) >> 0) << " " <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x80) >> 7) <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x40) >> 6) <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x20) >> 5) <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x10) >> 4) <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x08) >> 3) <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x04) >> 2) <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x02) >> 1) <<
-           ((auxiliaryData[stream][2][RamOffset + 16] & 0x01) >> 0) << " " <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x80) >> 7) <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x40) >> 6) <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x20) >> 5) <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x10) >> 4) <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x08) >> 3) <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x04) >> 2) <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x02) >> 1) <<
-           ((auxiliaryData[stream][2][RamOffset + 15] & 0x01) >> 0) << " " <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x80) >> 7) <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x40) >> 6) <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x20) >> 5) <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x10) >> 4) <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x08) >> 3) <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x04) >> 2) <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x02) >> 1) <<
-           ((auxiliaryData[stream][2][RamOffset + 14] & 0x01) >> 0) << endl;
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x80) >> 7) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x40) >> 6) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x20) >> 5) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x10) >> 4) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x08) >> 3) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x04) >> 2) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x02) >> 1) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 17)] & 0x01) >> 0) << " " <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x80) >> 7) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x40) >> 6) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x20) >> 5) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x10) >> 4) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x08) >> 3) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x04) >> 2) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x02) >> 1) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 16)] & 0x01) >> 0) << " " <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x80) >> 7) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x40) >> 6) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x20) >> 5) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x10) >> 4) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x08) >> 3) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x04) >> 2) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x02) >> 1) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 15)] & 0x01) >> 0) << " " <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x80) >> 7) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x40) >> 6) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x20) >> 5) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x10) >> 4) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x08) >> 3) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x04) >> 2) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x02) >> 1) <<
+           ((auxiliaryData[auxiliaryIndex(stream, 2, RamOffset + 14)] & 0x01) >> 0) << endl;
 
     cout << endl;
 
-    int tempA = auxiliaryData[stream][1][12];
-    int tempB = auxiliaryData[stream][1][20];
-    int vddSample = auxiliaryData[stream][1][28];
+    int tempA = auxiliaryData[auxiliaryIndex(stream, 1, 12)];
+    int tempB = auxiliaryData[auxiliaryIndex(stream, 1, 20)];
+    int vddSample = auxiliaryData[auxiliaryIndex(stream, 1, 28)];
 
     double tempUnitsC = ((double)(tempB - tempA)) / 98.9 - 273.15;
     double tempUnitsF = (9.0/5.0) * tempUnitsC + 32.0;
@@ -364,16 +343,16 @@ void Rhd2000DataBlock::write(ofstream &saveOut, int numDataStreams) const
         writeWordLittleEndian(saveOut, timeStamp[t]);
         for (channel = 0; channel < 32; ++channel) {
             for (stream = 0; stream < numDataStreams; ++stream) {
-                writeWordLittleEndian(saveOut, amplifierData[stream][channel][t]);
+                writeWordLittleEndian(saveOut, amplifierData[amplifierIndex(stream, channel, t)]);
             }
         }
         for (channel = 0; channel < 3; ++channel) {
             for (stream = 0; stream < numDataStreams; ++stream) {
-                writeWordLittleEndian(saveOut, auxiliaryData[stream][channel][t]);
+                writeWordLittleEndian(saveOut, auxiliaryData[auxiliaryIndex(stream, channel, t)]);
             }
         }
         for (i = 0; i < 8; ++i) {
-            writeWordLittleEndian(saveOut, boardAdcData[i][t]);
+            writeWordLittleEndian(saveOut, boardAdcData[boardAdcIndex(i, t)]);
         }
         writeWordLittleEndian(saveOut, ttlIn[t]);
         writeWordLittleEndian(saveOut, ttlOut[t]);
@@ -383,19 +362,19 @@ void Rhd2000DataBlock::write(ofstream &saveOut, int numDataStreams) const
 // Read amplifier data of data block
 int* Rhd2000DataBlock::readAmplifier(int stream, int channel)
 {
-    return &amplifierData[stream][channel][0]; // this works because vectors are contiguous
+    return &amplifierData[amplifierIndex(stream, channel, 0)]; // this works because vectors are contiguous
 }
 
 // Read auxiliary data of data block
 int* Rhd2000DataBlock::readAuxiliary(int stream, int channel)
 {
-    return &auxiliaryData[stream][channel][0]; // this works because vectors are contiguous
+    return &auxiliaryData[auxiliaryIndex(stream, channel, 0)]; // this works because vectors are contiguous
 }
 
-// Read amplifier data of data block
+// Read ADC data of data block
 int* Rhd2000DataBlock::readADC(int adc)
 {
-    return &boardAdcData[adc][0]; // this works because vectors are contiguous
+    return &boardAdcData[boardAdcIndex(adc, 0)]; // this works because vectors are contiguous
 }
 
 // Read TTL IN data of data block
@@ -408,4 +387,34 @@ int* Rhd2000DataBlock::readTTLIn()
 int* Rhd2000DataBlock::readTTLOut()
 {
     return &ttlOut[0]; // this works because vectors are contiguous
-}
\ No newline at end of file
+}
+
+// Return the number of data streams this data block was allocated for
+int Rhd2000DataBlock::getNumDataStreams() const
+{
+    return numDataStreams;
+}
+
+// Read time stamps of data block
+unsigned int* Rhd2000DataBlock::readTimeStamp()
+{
+    return &timeStamp[0];
+}
+
+// Read all amplifier data of data block, laid out as [stream][channel][sample]
+int* Rhd2000DataBlock::readAmplifierData()
+{
+    return &amplifierData[0];
+}
+
+// Read all auxiliary data of data block, laid out as [stream][channel][sample]
+int* Rhd2000DataBlock::readAuxiliaryData()
+{
+    return &auxiliaryData[0];
+}
+
+// Read all ADC data of data block, laid out as [adc][sample]
+int* Rhd2000DataBlock::readBoardAdcData()
+{
+    return &boardAdcData[0];
+}
@@ -34,12 +34,19 @@ public:
     Rhd2000DataBlock(int numDataStreams);
 
     vector<unsigned int> timeStamp;
-    vector<vector<vector<int> > > amplifierData;
-    vector<vector<vector<int> > > auxiliaryData;
-    vector<vector<int> > boardAdcData;
+    vector<int> amplifierData;
+    vector<int> auxiliaryData;
+    vector<int> boardAdcData;
     vector<int> ttlIn;
     vector<int> ttlOut;
 
+    inline int amplifierIndex(int stream, int channel, int t) const
+        { return (stream * 32 + channel) * SAMPLES_PER_DATA_BLOCK + t; }
+    inline int auxiliaryIndex(int stream, int channel, int t) const
+        { return (stream * 3 + channel) * SAMPLES_PER_DATA_BLOCK + t; }
+    inline int boardAdcIndex(int channel, int t) const
+        { return channel * SAMPLES_PER_DATA_BLOCK + t; }
+
     static unsigned int calculateDataBlockSizeInWords(int numDataStreams);
     static unsigned int getSamplesPerDataBlock();
     void fillFromUsbBuffer(unsigned char usbBuffer[], int blockIndex, int numDataStreams);
@@ -50,11 +57,16 @@ public:
     int* readADC(int adc);
     int* readTTLIn();
     int* readTTLOut();
-    bool checkUsbHeader(unsigned char usbBuffer[], int index);
+    int getNumDataStreams() const;
+    unsigned int* readTimeStamp();
+    int* readAmplifierData();
+    int* readAuxiliaryData();
+    int* readBoardAdcData();
+    static bool checkUsbHeader(unsigned char usbBuffer[], int index);
 
 private:
-    void allocateIntArray3D(vector<vector<vector<int> > > &array3D, int xSize, int ySize, int zSize);
-    void allocateIntArray2D(vector<vector<int> > &array2D, int xSize, int ySize);
+    int numDataStreams;
+
     void allocateIntArray1D(vector<int> &array1D, int xSize);
     void allocateUIntArray1D(vector<unsigned int> &array1D, int xSize);
 
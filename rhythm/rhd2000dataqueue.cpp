@@ -0,0 +1,202 @@
+//----------------------------------------------------------------------------------
+// rhd2000dataqueue.cpp
+//
+// Intan Technoloies RHD2000 Rhythm Interface API
+// Rhd2000DataQueue Class
+//
+// This software is provided 'as-is', without any express or implied warranty.
+// In no event will the authors be held liable for any damages arising from the
+// use of this software.
+//----------------------------------------------------------------------------------
+
+#include <algorithm>
+#include <deque>
+#include <fstream>
+#include <vector>
+
+#include "rhd2000datablock.h"
+#include "rhd2000dataqueue.h"
+
+using namespace std;
+
+// This class is a first-in, first-out queue of Rhd2000DataBlock objects that
+// recycles its blocks.  Popped blocks are kept in a pool and reused by later
+// pushes, so once the queue has reached its working size, streaming data
+// through it does not allocate or free any memory.  Pooled blocks keep their
+// address and sample memory for the lifetime of the queue, unless they are
+// reused for a different number of data streams; the generation counter is
+// incremented whenever a block is freed, so that references to block memory
+// held elsewhere (e.g., in Python) can be invalidated.
+
+Rhd2000DataQueue::Rhd2000DataQueue() :
+    numAllocated(0),
+    generation(0)
+{
+}
+
+Rhd2000DataQueue::~Rhd2000DataQueue()
+{
+    for (unsigned int i = 0; i < blocks.size(); ++i) {
+        delete blocks[i];
+    }
+    for (unsigned int i = 0; i < freeBlocks.size(); ++i) {
+        delete freeBlocks[i];
+    }
+}
+
+// Returns the number of data blocks in the queue.
+unsigned int Rhd2000DataQueue::size() const
+{
+    return blocks.size();
+}
+
+bool Rhd2000DataQueue::empty() const
+{
+    return blocks.empty();
+}
+
+// Returns the oldest data block in the queue.
+Rhd2000DataBlock& Rhd2000DataQueue::front()
+{
+    return *blocks.front();
+}
+
+// Appends a data block for numDataStreams data streams to the queue and returns
+// it to be filled.  A pooled block is reused if one is available.  The contents
+// of the returned block are undefined.
+Rhd2000DataBlock& Rhd2000DataQueue::pushNew(int numDataStreams)
+{
+    Rhd2000DataBlock *dataBlock;
+
+    if (!freeBlocks.empty()) {
+        dataBlock = freeBlocks.back();
+        freeBlocks.pop_back();
+        if (dataBlock->getNumDataStreams() != numDataStreams) {
+            delete dataBlock;
+            --numAllocated;
+            ++generation;
+            dataBlock = new Rhd2000DataBlock(numDataStreams);
+            ++numAllocated;
+        }
+    } else {
+        dataBlock = new Rhd2000DataBlock(numDataStreams);
+        ++numAllocated;
+    }
+
+    blocks.push_back(dataBlock);
+    return *dataBlock;
+}
+
+// Appends a copy of dataBlock to the queue.
+void Rhd2000DataQueue::push(const Rhd2000DataBlock &dataBlock)
+{
+    Rhd2000DataBlock &newBlock = pushNew(dataBlock.getNumDataStreams());
+
+    // Copy element-wise into the existing sample memory of the pooled block.
+    copy(dataBlock.timeStamp.begin(), dataBlock.timeStamp.end(), newBlock.timeStamp.begin());
+    copy(dataBlock.amplifierData.begin(), dataBlock.amplifierData.end(), newBlock.amplifierData.begin());
+    copy(dataBlock.auxiliaryData.begin(), dataBlock.auxiliaryData.end(), newBlock.auxiliaryData.begin());
+    copy(dataBlock.boardAdcData.begin(), dataBlock.boardAdcData.end(), newBlock.boardAdcData.begin());
+    copy(dataBlock.ttlIn.begin(), dataBlock.ttlIn.end(), newBlock.ttlIn.begin());
+    copy(dataBlock.ttlOut.begin(), dataBlock.ttlOut.end(), newBlock.ttlOut.begin());
+}
+
+// Decodes numBlocks consecutive data blocks from a raw USB input buffer and appends them to the queue.
+void Rhd2000DataQueue::pushFromUsbBuffer(unsigned char usbBuffer[], int numBlocks, int numDataStreams)
+{
+    for (int i = 0; i < numBlocks; ++i) {
+        pushNew(numDataStreams).fillFromUsbBuffer(usbBuffer, i, numDataStreams);
+    }
+}
+
+// Removes the oldest data block from the queue and returns it to the pool.
+void Rhd2000DataQueue::pop()
+{
+    freeBlocks.push_back(blocks.front());
+    blocks.pop_front();
+}
+
+// Copies the oldest numBlocks data blocks (or all blocks, if fewer are queued) into contiguous
+// arrays without removing them from the queue.  Block b is written at the following offsets:
+//   timeStamp      b * SAMPLES_PER_DATA_BLOCK
+//   amplifierData  b * numDataStreams * 32 * SAMPLES_PER_DATA_BLOCK
+//   auxiliaryData  b * numDataStreams * 3 * SAMPLES_PER_DATA_BLOCK
+//   boardAdcData   b * 8 * SAMPLES_PER_DATA_BLOCK
+//   ttlIn, ttlOut  b * SAMPLES_PER_DATA_BLOCK
+// i.e., each array is the Rhd2000DataBlock array of the same name with a leading block index.
+// Copying stops at the first block that does not have numDataStreams data streams.  Returns the
+// number of blocks copied.
+int Rhd2000DataQueue::readFront(int numBlocks, int numDataStreams, unsigned int *timeStamp, int *amplifierData,
+                                int *auxiliaryData, int *boardAdcData, int *ttlIn, int *ttlOut) const
+{
+    int block;
+
+    for (block = 0; block < numBlocks && block < (int) blocks.size(); ++block) {
+        const Rhd2000DataBlock &dataBlock = *blocks[block];
+        if (dataBlock.getNumDataStreams() != numDataStreams) {
+            break;
+        }
+        timeStamp = copy(dataBlock.timeStamp.begin(), dataBlock.timeStamp.end(), timeStamp);
+        amplifierData = copy(dataBlock.amplifierData.begin(), dataBlock.amplifierData.end(), amplifierData);
+        auxiliaryData = copy(dataBlock.auxiliaryData.begin(), dataBlock.auxiliaryData.end(), auxiliaryData);
+        boardAdcData = copy(dataBlock.boardAdcData.begin(), dataBlock.boardAdcData.end(), boardAdcData);
+        ttlIn = copy(dataBlock.ttlIn.begin(), dataBlock.ttlIn.end(), ttlIn);
+        ttlOut = copy(dataBlock.ttlOut.begin(), dataBlock.ttlOut.end(), ttlOut);
+    }
+
+    return block;
+}
+
+// Copies the oldest numBlocks data blocks into contiguous arrays, as readFront() does, and removes
+// the copied blocks from the queue.  Returns the number of blocks copied and removed.
+int Rhd2000DataQueue::popFront(int numBlocks, int numDataStreams, unsigned int *timeStamp, int *amplifierData,
+                               int *auxiliaryData, int *boardAdcData, int *ttlIn, int *ttlOut)
+{
+    return discard(readFront(numBlocks, numDataStreams, timeStamp, amplifierData,
+                             auxiliaryData, boardAdcData, ttlIn, ttlOut));
+}
+
+// Appends copies of the oldest numBlocks data blocks (or all blocks, if fewer are queued) to
+// another queue, leaving this queue unchanged.  Returns the number of blocks copied.
+int Rhd2000DataQueue::copyFrontTo(int numBlocks, Rhd2000DataQueue &destination) const
+{
+    int block;
+
+    for (block = 0; block < numBlocks && block < (int) blocks.size(); ++block) {
+        destination.push(*blocks[block]);
+    }
+
+    return block;
+}
+
+// Removes the oldest numBlocks data blocks (or all blocks, if fewer are queued) from the queue and
+// returns them to the pool.  Returns the number of blocks removed.
+int Rhd2000DataQueue::discard(int numBlocks)
+{
+    int block;
+
+    for (block = 0; block < numBlocks && !blocks.empty(); ++block) {
+        pop();
+    }
+
+    return block;
+}
+
+// Returns the number of unused blocks kept for reuse.
+unsigned int Rhd2000DataQueue::poolSize() const
+{
+    return freeBlocks.size();
+}
+
+// Returns the total number of blocks owned by the queue (queued and pooled).
+unsigned int Rhd2000DataQueue::numBlocksAllocated() const
+{
+    return numAllocated;
+}
+
+// Returns a pointer to the generation counter, which is incremented each time
+// a block is freed.
+unsigned int* Rhd2000DataQueue::readGeneration()
+{
+    return &generation;
+}
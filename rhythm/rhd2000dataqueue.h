@@ -0,0 +1,57 @@
+//----------------------------------------------------------------------------------
+// rhd2000dataqueue.h
+//
+// Intan Technoloies RHD2000 Rhythm Interface API
+// Rhd2000DataQueue Class Header File
+//
+// This software is provided 'as-is', without any express or implied warranty.
+// In no event will the authors be held liable for any damages arising from the
+// use of this software.
+//----------------------------------------------------------------------------------
+
+#ifndef RHD2000DATAQUEUE_H
+#define RHD2000DATAQUEUE_H
+
+#include <deque>
+#include <vector>
+
+using namespace std;
+
+class Rhd2000DataBlock;
+
+class Rhd2000DataQueue
+{
+public:
+    Rhd2000DataQueue();
+    ~Rhd2000DataQueue();
+
+    unsigned int size() const;
+    bool empty() const;
+    Rhd2000DataBlock& front();
+    Rhd2000DataBlock& pushNew(int numDataStreams);
+    void push(const Rhd2000DataBlock &dataBlock);
+    void pushFromUsbBuffer(unsigned char usbBuffer[], int numBlocks, int numDataStreams);
+    void pop();
+
+    int readFront(int numBlocks, int numDataStreams, unsigned int *timeStamp, int *amplifierData,
+                  int *auxiliaryData, int *boardAdcData, int *ttlIn, int *ttlOut) const;
+    int popFront(int numBlocks, int numDataStreams, unsigned int *timeStamp, int *amplifierData,
+                 int *auxiliaryData, int *boardAdcData, int *ttlIn, int *ttlOut);
+    int copyFrontTo(int numBlocks, Rhd2000DataQueue &destination) const;
+    int discard(int numBlocks);
+
+    unsigned int poolSize() const;
+    unsigned int numBlocksAllocated() const;
+    unsigned int* readGeneration();
+
+private:
+    deque<Rhd2000DataBlock*> blocks;
+    vector<Rhd2000DataBlock*> freeBlocks;
+    unsigned int numAllocated;
+    unsigned int generation;
+
+    Rhd2000DataQueue(const Rhd2000DataQueue &);
+    Rhd2000DataQueue& operator=(const Rhd2000DataQueue &);
+};
+
+#endif // RHD2000DATAQUEUE_H
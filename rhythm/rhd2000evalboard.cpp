@@ -24,9 +24,11 @@
 #include <vector>
 #include <queue>
 #include <cmath>
+#include <algorithm>
 
 #include "rhd2000evalboard.h"
 #include "rhd2000datablock.h"
+#include "rhd2000dataqueue.h"
 
 #include "okFrontPanelDLL.h"
 
@@ -1338,11 +1340,61 @@ bool Rhd2000EvalBoard::readDataBlock(Rhd2000DataBlock *dataBlock)
 // to queue.  Returns true if data blocks were available.
 bool Rhd2000EvalBoard::readDataBlocks(int numBlocks, queue<Rhd2000DataBlock> &dataQueue)
 {
-    unsigned int numWordsToRead, numBytesToRead;
     int i;
     Rhd2000DataBlock *dataBlock;
 
-    numWordsToRead = numBlocks * dataBlock->calculateDataBlockSizeInWords(numDataStreams);
+    if (!readUsbDataBlocks(numBlocks))
+        return false;
+
+    dataBlock = new Rhd2000DataBlock(numDataStreams);
+    for (i = 0; i < numBlocks; ++i) {
+        dataBlock->fillFromUsbBuffer(usbBuffer, i, numDataStreams);
+        dataQueue.push(*dataBlock);
+    }
+    delete dataBlock;
+
+    return true;
+}
+
+// Reads a certain number of USB data blocks, if the specified number is available, and appends them
+// to a recycling data queue.  Each block is decoded directly into a block from the queue's pool, so
+// no memory is allocated once the queue has reached its working size.  Returns true if data blocks
+// were available.
+bool Rhd2000EvalBoard::readDataBlocks(int numBlocks, Rhd2000DataQueue &dataQueue)
+{
+    if (!readUsbDataBlocks(numBlocks))
+        return false;
+
+    dataQueue.pushFromUsbBuffer(usbBuffer, numBlocks, numDataStreams);
+
+    return true;
+}
+
+// Reads a certain number of USB data blocks, if the specified number is available, and copies their
+// raw USB bytes to buffer without decoding them.  buffer must hold numBlocks data blocks of
+// 2 * Rhd2000DataBlock::calculateDataBlockSizeInWords(numDataStreams) bytes.  The headers are checked
+// and the data realigned after USB glitches as in readDataBlocks().  Returns true if data blocks
+// were available.
+bool Rhd2000EvalBoard::readRawDataBlocks(int numBlocks, unsigned char buffer[])
+{
+    if (!readUsbDataBlocks(numBlocks))
+        return false;
+
+    std::copy(usbBuffer, usbBuffer + 2 * numBlocks * Rhd2000DataBlock::calculateDataBlockSizeInWords(numDataStreams),
+              buffer);
+
+    return true;
+}
+
+// Reads a certain number of USB data blocks into usbBuffer, if the specified number is available,
+// checking the header of every sample and realigning the data after USB glitches.  Returns true if
+// data blocks were available.
+bool Rhd2000EvalBoard::readUsbDataBlocks(int numBlocks)
+{
+    unsigned int numWordsToRead, numBytesToRead;
+    int i;
+
+    numWordsToRead = numBlocks * Rhd2000DataBlock::calculateDataBlockSizeInWords(numDataStreams);
 
     if (numWordsInFifo() < numWordsToRead)
         return false;
@@ -1358,8 +1410,6 @@ bool Rhd2000EvalBoard::readDataBlocks(int numBlocks, queue<Rhd2000DataBlock> &da
 
     dev->ReadFromPipeOut(PipeOutData, numBytesToRead, usbBuffer);
 
-    dataBlock = new Rhd2000DataBlock(numDataStreams);
-
     // USB data error checking added for version 1.5
 
     /*
@@ -1384,13 +1434,13 @@ bool Rhd2000EvalBoard::readDataBlocks(int numBlocks, queue<Rhd2000DataBlock> &da
     */
 
     // Look for proper 'magic number' header in all data blocks to check for USB glitches
-    unsigned int dataBlockSizeInBytes = 2 * dataBlock->calculateDataBlockSizeInWords(numDataStreams);
+    unsigned int dataBlockSizeInBytes = 2 * Rhd2000DataBlock::calculateDataBlockSizeInWords(numDataStreams);
     unsigned int sampleSizeInBytes = dataBlockSizeInBytes / SAMPLES_PER_DATA_BLOCK;
     int sample;
     int index = 0;
     int lag;
     for (sample = 0; sample < numBlocks * SAMPLES_PER_DATA_BLOCK; ++sample) {
-        if (!(dataBlock->checkUsbHeader(usbBuffer, index))) {
+        if (!(Rhd2000DataBlock::checkUsbHeader(usbBuffer, index))) {
             if (sample > 0) {
                 // If we have a bad data sample header on any sample but the first, we shouldn't trust
                 // the integrity of the prior sample, since it is likely contains a "hole" where missing
@@ -1403,7 +1453,7 @@ bool Rhd2000EvalBoard::readDataBlocks(int numBlocks, queue<Rhd2000DataBlock> &da
             // Search for correct header throughout the sample.
             lag = sampleSizeInBytes / 2;
             for (i = 1; i < sampleSizeInBytes / 2; ++i) {
-                if (dataBlock->checkUsbHeader(usbBuffer, index + 2 * i)) {
+                if (Rhd2000DataBlock::checkUsbHeader(usbBuffer, index + 2 * i)) {
                     lag = i;
                     break;
                 }
@@ -1418,7 +1468,7 @@ bool Rhd2000EvalBoard::readDataBlocks(int numBlocks, queue<Rhd2000DataBlock> &da
     /*
     index = 0;
     for (sample = 0; sample < numBlocks * SAMPLES_PER_DATA_BLOCK; ++sample) {
-        if (!(dataBlock->checkUsbHeader(usbBuffer, index))) {
+        if (!(Rhd2000DataBlock::checkUsbHeader(usbBuffer, index))) {
             cerr << "Unfixed header error at sample " << sample << endl;
         }
         index += sampleSizeInBytes;
@@ -1427,12 +1477,6 @@ bool Rhd2000EvalBoard::readDataBlocks(int numBlocks, queue<Rhd2000DataBlock> &da
 
     // End of USB error checking added for version 1.5
 
-    for (i = 0; i < numBlocks; ++i) {
-        dataBlock->fillFromUsbBuffer(usbBuffer, i, numDataStreams);
-        dataQueue.push(*dataBlock);
-    }
-    delete dataBlock;
-
     return true;
 }
 
@@ -1466,6 +1510,21 @@ int Rhd2000EvalBoard::queueToFile(queue<Rhd2000DataBlock> &dataQueue, ofstream &
     return count;
 }
 
+// Writes the contents of a recycling data block queue (dataQueue) to a binary output stream
+// (saveOut).  Returns the number of data blocks written.
+int Rhd2000EvalBoard::queueToFile(Rhd2000DataQueue &dataQueue, ofstream &saveOut)
+{
+    int count = 0;
+
+    while (!dataQueue.empty()) {
+        dataQueue.front().write(saveOut, getNumEnabledDataStreams());
+        dataQueue.pop();
+        ++count;
+    }
+
+    return count;
+}
+
 // Return name of Opal Kelly board based on model code.
 string Rhd2000EvalBoard::opalKellyModelName(int model) const
 {
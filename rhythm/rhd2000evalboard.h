@@ -32,6 +32,7 @@ using namespace std;
 
 class okCFrontPanel;
 class Rhd2000DataBlock;
+class Rhd2000DataQueue;
 
 class Rhd2000EvalBoard
 {
@@ -149,7 +150,10 @@ public:
     void flush();
     bool readDataBlock(Rhd2000DataBlock *dataBlock);
     bool readDataBlocks(int numBlocks, queue<Rhd2000DataBlock> &dataQueue);
+    bool readDataBlocks(int numBlocks, Rhd2000DataQueue &dataQueue);
+    bool readRawDataBlocks(int numBlocks, unsigned char buffer[]);
     int queueToFile(queue<Rhd2000DataBlock> &dataQueue, std::ofstream &saveOut);
+    int queueToFile(Rhd2000DataQueue &dataQueue, std::ofstream &saveOut);
     int getBoardMode() const;
     int getCableDelay(BoardPort port) const;
     void getCableDelay(vector<int> &delays) const;
@@ -225,6 +229,7 @@ private:
     bool isDcmProgDone() const;
     bool isDataClockLocked() const;
 
+    bool readUsbDataBlocks(int numBlocks);
     void readAdditionalDataWords(unsigned int numWords, unsigned int errorPoint, unsigned int bufferLength);
 };
 
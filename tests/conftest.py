@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import glob
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The rhd2k modules import each other as top-level modules.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rhd2k"))
+
+from acquisitionengine import AcquisitionEngine
+
+
+class Recording():
+    """ This class holds the file (or directory) saved by a synthetic data
+    recording, along with the raw words of every block that was saved,
+    concatenated over all reads in the layout of DataBlockBatch with the
+    block and sample axes merged:
+        timeStamp      [t]
+        amplifierData  [stream][channel 0-31][t]
+        auxiliaryData  [stream][channel 0-2][t]
+    """
+
+    def __init__(self, path, reads):
+        self.path = path
+        self.timeStamp = np.concatenate([timeStamp.reshape(-1) for timeStamp, _, _ in reads])
+        self.amplifierData = np.concatenate([amplifier.transpose(1, 2, 0, 3).reshape(
+            amplifier.shape[1], 32, -1) for _, amplifier, _ in reads], axis=2)
+        self.auxiliaryData = np.concatenate([auxiliary.transpose(1, 2, 0, 3).reshape(
+            auxiliary.shape[1], 3, -1) for _, _, auxiliary in reads], axis=2)
+
+
+# Returns a function that records seconds of synthetic data generated from seed
+# in saveFormat to a new directory of tmp_path, with the engine attributes
+# given as keyword arguments, and returns the Recording.
+@pytest.fixture
+def record(tmp_path):
+    def record(saveFormat, seed=1, seconds=0.1, **settings):
+        engine = AcquisitionEngine(synthMode=True, synthSeed=seed)
+        engine.scanPorts()
+        engine.saveFormat = saveFormat
+        for name, value in settings.items():
+            setattr(engine, name, value)
+
+        reads = []
+
+        def keepRead(engine):
+            batch = engine.signalProcessor.dataBlockBatch
+            reads.append((batch.timeStamp[:batch.numBlocks].copy(),
+                          batch.amplifierData[:batch.numBlocks].copy(),
+                          batch.auxiliaryData[:batch.numBlocks].copy()))
+
+        directory = tmp_path / str(len(list(tmp_path.iterdir())))
+        directory.mkdir()
+        engine.record(str(directory / "rec"), seconds, keepRead)
+        path, = glob.glob(str(directory / "rec_*"))
+        return Recording(path, reads)
+
+    return record
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+import numpy as np
+import pytest
+
+import acquisitionengine
+import constants
+from compressedfile import CompressedFile, CompressedStream
+from rhdfile import RhdFile
+
+
+# Save compressed files in chunks of 8 data blocks, so that short recordings
+# span several chunks.
+@pytest.fixture
+def smallChunks(monkeypatch):
+    def openCompressedStream(fileName, bytesPerBlock, numAmplifierChannels, codec=constants.CompressionZlib,
+                             numWorkers=None):
+        device = open(fileName, "wb")
+        return device, CompressedStream(device, bytesPerBlock, numAmplifierChannels, codec,
+                                        blocksPerChunk=8, numWorkers=numWorkers)
+
+    monkeypatch.setattr(acquisitionengine, "openCompressedStream", openCompressedStream)
+
+
+@pytest.mark.parametrize("codec", [constants.CompressionZlib, constants.CompressionLzma])
+def test_compressed_round_trip(record, codec):
+    recording = record(constants.SaveFormatCompressed, compressionCodec=codec)
+    compressedFile = CompressedFile(recording.path)
+
+    assert compressedFile.codec == codec
+    assert len(compressedFile) == len(recording.timeStamp) > 0
+    np.testing.assert_array_equal(compressedFile.timeStamp[:], recording.timeStamp)
+    for index, channel in enumerate(compressedFile.amplifierChannels):
+        np.testing.assert_array_equal(
+            compressedFile.amplifierData[index],
+            recording.amplifierData[channel.boardStream, channel.chipChannel])
+
+
+# A compressed recording holds the same data blocks as an Intan format
+# recording of the same synthetic data.
+def test_compressed_matches_intan(record, smallChunks):
+    compressedFile = CompressedFile(record(constants.SaveFormatCompressed, seed=4).path)
+    rhdFile = RhdFile(record(constants.SaveFormatIntan, seed=4).path)
+
+    assert compressedFile.blocksPerChunk == 8
+    assert len(compressedFile.chunkIndex) > 2
+    assert compressedFile.blockDtype == rhdFile.blockDtype
+    numBlocks = min(compressedFile.numBlocks, rhdFile.numBlocks)
+    assert compressedFile.blocks[:numBlocks].tobytes() == rhdFile.blocks[:numBlocks].tobytes()
+
+    # Ranges within a chunk and across chunk boundaries.
+    for start, stop in [(0, 10), (400, 500), (470, 1500), (959, 961)]:
+        np.testing.assert_array_equal(compressedFile.amplifierData[:, start:stop],
+                                      rhdFile.amplifierData[:, start:stop])
+
+
+# A file that was not closed has no chunk index; the data is read up to the
+# last complete chunk.
+def test_compressed_without_index(record, smallChunks):
+    recording = record(constants.SaveFormatCompressed)
+    complete = CompressedFile(recording.path)
+    lastChunk = complete.chunkIndex[-1]
+
+    with open(recording.path, "r+b") as f:
+        f.truncate(int(lastChunk["offset"]) + 8 + int(lastChunk["compressedSize"]) - 1)
+    truncated = CompressedFile(recording.path)
+
+    assert len(truncated.chunkIndex) == len(complete.chunkIndex) - 1
+    assert truncated.numBlocks == complete.numBlocks - int(lastChunk["numBlocks"])
+    np.testing.assert_array_equal(truncated.amplifierData[:],
+                                  complete.amplifierData[:, :len(truncated)])
+
+
+# The last chunks are compressed and the chunk index is written on the data
+# writer thread, so the acquisition loop never waits for compression.
+def test_compressed_close_on_writer_thread(record, monkeypatch):
+    closeThreads = []
+    close = CompressedStream.close
+
+    def recordThread(stream):
+        closeThreads.append(threading.current_thread().name)
+        close(stream)
+
+    monkeypatch.setattr(CompressedStream, "close", recordThread)
+    recording = record(constants.SaveFormatCompressed)
+
+    assert closeThreads == ["DataWriter"]
+    assert len(CompressedFile(recording.path)) == len(recording.timeStamp)
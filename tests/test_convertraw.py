@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import glob
+
+import constants
+import convertraw
+from acquisitionengine import AcquisitionEngine
+from simulatedevalboard import SimulatedEvalBoard, parseChips
+
+
+# Records seconds of data from a simulated board in saveFormat and returns the saved file.
+def recordSimulated(path, saveFormat, seconds):
+    engine = AcquisitionEngine(evalBoard=SimulatedEvalBoard(parseChips("2132,2164"), speed=0))
+    engine.openInterfaceBoard("main.bit")
+    engine.scanPorts()
+    engine.saveFormat = saveFormat
+    engine.record(str(path / "rec"), seconds)
+    saveFile, = glob.glob(str(path / "rec_*"))
+    return saveFile
+
+
+# A raw capture converted to the Intan format is the file an Intan format
+# recording of the same board would have saved.
+def test_raw_to_intan_matches_live(tmp_path):
+    (tmp_path / "raw").mkdir()
+    (tmp_path / "live").mkdir()
+    (tmp_path / "converted").mkdir()
+    rawFile = recordSimulated(tmp_path / "raw", constants.SaveFormatRaw, 0.2)
+    liveFile = recordSimulated(tmp_path / "live", constants.SaveFormatIntan, 0.2)
+
+    assert convertraw.main(["--format", "intan", "--output-dir", str(tmp_path / "converted"), rawFile]) == 0
+    convertedFile, = glob.glob(str(tmp_path / "converted" / "*"))
+    with open(liveFile, "rb") as live, open(convertedFile, "rb") as converted:
+        liveData = live.read()
+        assert len(liveData) > 500000
+        assert converted.read() == liveData
@@ -0,0 +1,31 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import filecmp
+import glob
+import os
+
+import pytest
+
+import constants
+import convertrhd
+
+
+# An Intan format recording converted to the signal-type or channel format
+# holds the same files, with the same contents, as a live recording of the
+# same synthetic data in that format.
+@pytest.mark.parametrize("name", ["signaltype", "channel"])
+def test_converted_matches_live(record, tmp_path, name):
+    rhdFile = record(constants.SaveFormatIntan).path
+    live = record(convertrhd.CONVERT_FORMATS[name]).path
+
+    outputDir = tmp_path / "converted"
+    outputDir.mkdir()
+    assert convertrhd.main(["--format", name, "--output-dir", str(outputDir), "--jobs", "2",
+                            "--channels-per-task", "5", rhdFile]) == 0
+    converted, = glob.glob(str(outputDir / "*"))
+
+    fileNames = sorted(os.listdir(live))
+    assert sorted(os.listdir(converted)) == fileNames
+    match, mismatch, errors = filecmp.cmpfiles(live, converted, fileNames, shallow=False)
+    assert (mismatch, errors) == ([], [])
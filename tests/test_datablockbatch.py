@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import constants
+from datablockbatch import DataBlockBatch, DataBlockRing
+
+SAMPLES = constants.SAMPLES_PER_DATA_BLOCK
+
+
+# The ring keeps the newest capacity blocks, oldest first in segments(), for
+# reads that fill it exactly, wrap around its end or are larger than it.
+def test_ring_wraps():
+    capacity = 7
+    ring = DataBlockRing(2, capacity)
+    batch = DataBlockBatch(2, 10)
+    appended = []
+    for numBlocks in [3, 4, 2, 5, 1, 10, 6]:
+        first = len(appended)
+        for b in range(numBlocks):
+            batch.timeStamp[b] = (first + b) * SAMPLES + np.arange(SAMPLES)
+            batch.amplifierData[b] = first + b
+        blockTempAvg = np.arange(first, first + numBlocks)[:, None] * np.ones(2)
+        ring.append(batch, 0, numBlocks, blockTempAvg)
+        appended += range(first, first + numBlocks)
+
+        kept = appended[-capacity:]
+        assert len(ring) == len(kept)
+        segments = ring.segments()
+        assert len(segments) <= 2
+        slots = [slot for start, stop in segments for slot in range(start, stop)]
+        assert list(ring.batch.timeStamp[slots, 0] // SAMPLES) == kept
+        assert list(ring.batch.amplifierData[slots, 1, 31, -1]) == kept
+        assert list(ring.blockTempAvg[slots, 1]) == kept
+
+    ring.clear()
+    assert len(ring) == 0 and ring.segments() == []
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import constants
+from datablockbatch import DataBlockBatch
+from datablockencoder import DataBlockEncoder
+
+SAMPLES = constants.SAMPLES_PER_DATA_BLOCK
+
+
+# Returns the Intan format record of block b of batch written one field at a
+# time, one byte at a time (least significant byte first), as
+# SignalProcessor.loadAmplifierData() wrote it before DataBlockEncoder.
+def referenceRecord(batch, b, saveLists, tempAvg, timestampOffset, saveTemp, saveTtlOut):
+    amplifier, auxInput, supplyVoltage, tempSensor, boardAdc, boardDigIn = saveLists
+    data = bytearray()
+
+    def writeUInt16(value):
+        data.append(value & 0x00ff)
+        data.append((value & 0xff00) >> 8)
+
+    for t in range(SAMPLES):
+        tempQint32 = int(batch.timeStamp[b][t]) - timestampOffset
+        data.append(tempQint32 & 0x000000ff)
+        data.append((tempQint32 & 0x0000ff00) >> 8)
+        data.append((tempQint32 & 0x00ff0000) >> 16)
+        data.append((tempQint32 & 0xff000000) >> 24)
+    for channel in amplifier:
+        for t in range(SAMPLES):
+            writeUInt16(int(batch.amplifierData[b][channel.boardStream][channel.chipChannel][t]))
+    for channel in auxInput:
+        for t in range(0, SAMPLES, 4):
+            writeUInt16(int(batch.auxiliaryData[b][channel.boardStream][1][t + channel.chipChannel + 1]))
+    for channel in supplyVoltage:
+        writeUInt16(int(batch.auxiliaryData[b][channel.boardStream][1][28]))
+    if saveTemp:
+        for channel in tempSensor:
+            # (qint16) (100.0 * tempAvg), truncated toward zero
+            writeUInt16(int(100.0 * tempAvg[channel.boardStream]) & 0xffff)
+    for channel in boardAdc:
+        for t in range(SAMPLES):
+            writeUInt16(int(batch.boardAdcData[b][channel.nativeChannelNumber][t]))
+    if boardDigIn:
+        for t in range(SAMPLES):
+            writeUInt16(int(batch.ttlIn[b][t]))
+    if saveTtlOut:
+        for t in range(SAMPLES):
+            writeUInt16(int(batch.ttlOut[b][t]))
+    return bytes(data)
+
+
+@pytest.mark.parametrize("saveTemp", [False, True])
+@pytest.mark.parametrize("saveTtlOut", [False, True])
+@pytest.mark.parametrize("saveDigIn", [False, True])
+@pytest.mark.parametrize("timestampOffset", [0, 5000])
+def test_encode_intan_matches_per_byte_writer(saveTemp, saveTtlOut, saveDigIn, timestampOffset):
+    numStreams = 3
+    numBlocks = 4
+    random = np.random.default_rng(11)
+    batch = DataBlockBatch(numStreams, numBlocks)
+    batch.numBlocks = numBlocks
+    batch.timeStamp[:] = (4000 + np.arange(numBlocks * SAMPLES)).reshape(numBlocks, SAMPLES)
+    batch.amplifierData[:] = random.integers(0, 65536, batch.amplifierData.shape)
+    batch.auxiliaryData[:] = random.integers(0, 65536, batch.auxiliaryData.shape)
+    batch.boardAdcData[:] = random.integers(0, 65536, batch.boardAdcData.shape)
+    batch.ttlIn[:] = random.integers(0, 65536, batch.ttlIn.shape)
+    batch.ttlOut[:] = random.integers(0, 65536, batch.ttlOut.shape)
+    tempAvg = [36.987, -4.321, 0.005]
+
+    def channel(boardStream=0, chipChannel=0, nativeChannelNumber=0):
+        return SimpleNamespace(boardStream=boardStream, chipChannel=chipChannel,
+                               nativeChannelNumber=nativeChannelNumber)
+
+    saveLists = ([channel(0, 3), channel(0, 17), channel(2, 0), channel(1, 31)],
+                 [channel(0, 0), channel(1, 2)],
+                 [channel(0), channel(1), channel(2)],
+                 [channel(0), channel(1), channel(2)],
+                 [channel(nativeChannelNumber=2), channel(nativeChannelNumber=7)],
+                 [channel(nativeChannelNumber=4)] if saveDigIn else [])
+    encoder = DataBlockEncoder(*saveLists, [])
+
+    record = encoder.encodeIntan(batch, 1, numBlocks, tempAvg, timestampOffset, saveTemp, saveTtlOut)
+
+    assert record.shape == (numBlocks - 1, encoder.intanBytesPerBlock(saveTemp, saveTtlOut))
+    for b in range(1, numBlocks):
+        assert record[b - 1].tobytes() == referenceRecord(batch, b, saveLists, tempAvg, timestampOffset,
+                                                          saveTemp, saveTtlOut)
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+
+from datawriter import DataWriter
+
+
+class SlowTarget():
+    """ This class records the writes and the close of a target whose writes
+    wait until release is set.
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.events = []
+
+    def writeRawData(self, data):
+        self.release.wait()
+        self.events.append(("write", data, threading.current_thread().name))
+        return len(data)
+
+    def close(self):
+        self.events.append(("close", None, threading.current_thread().name))
+
+
+# close() returns at once, and the target is closed on the writer thread
+# after the data queued before it has been written.
+def test_close_does_not_wait_for_writes():
+    dataWriter = DataWriter()
+    target = SlowTarget()
+    other = SlowTarget()
+    other.release.set()
+    try:
+        dataWriter.write(target, b"abc")
+        dataWriter.write(target, b"de")
+        dataWriter.close(target)
+        dataWriter.write(other, b"f")
+        assert target.events == []
+
+        target.release.set()
+        dataWriter.flush()
+    finally:
+        dataWriter.stop()
+
+    assert target.events == [("write", b"abc", "DataWriter"), ("write", b"de", "DataWriter"),
+                             ("close", None, "DataWriter")]
+    assert other.events == [("write", b"f", "DataWriter")]
+    assert dataWriter.statistics()["bytesWritten"] == 6
+
+
+# An error raised by a queued function is raised by the next call to flush().
+def test_call_error():
+    dataWriter = DataWriter()
+
+    def fail():
+        raise IOError("disk full")
+
+    try:
+        dataWriter.call(fail)
+        with pytest.raises(IOError):
+            dataWriter.flush()
+    finally:
+        dataWriter.stop()
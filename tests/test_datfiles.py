@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+
+import constants
+from datfiles import ChannelFiles, SignalTypeFiles
+
+
+# Returns the [channel][t] amplifier, auxiliary input and supply voltage words
+# of the saved channels of reader, as saved in the per-signal-type and
+# per-channel formats: signed amplifier words, and auxiliary inputs and supply
+# voltages held for 4 and 60 samples at the amplifier sampling rate.
+def expectedData(recording, reader):
+    samples = constants.SAMPLES_PER_DATA_BLOCK
+    amplifier = np.array([recording.amplifierData[channel.boardStream, channel.chipChannel]
+                          for channel in reader.amplifierChannels]) - 32768
+    auxInput = np.array([np.repeat(recording.auxiliaryData[channel.boardStream, 1, channel.chipChannel + 1::4], 4)
+                         for channel in reader.auxInputChannels])
+    supplyVoltage = np.array([np.repeat(recording.auxiliaryData[channel.boardStream, 1, 28::samples], samples)
+                              for channel in reader.supplyVoltageChannels])
+    return amplifier, auxInput, supplyVoltage
+
+
+def test_signal_type_round_trip(record):
+    recording = record(constants.SaveFormatFilePerSignalType)
+    reader = SignalTypeFiles(recording.path)
+    amplifier, auxInput, supplyVoltage = expectedData(recording, reader)
+
+    assert len(reader) == len(recording.timeStamp) > 0
+    np.testing.assert_array_equal(reader.timeStamp, recording.timeStamp)
+    np.testing.assert_array_equal(reader.amplifierData.T, amplifier)
+    np.testing.assert_array_equal(reader.auxInputData.T, auxInput)
+    np.testing.assert_array_equal(reader.supplyVoltageData.T, supplyVoltage)
+
+
+def test_channel_files_round_trip(record):
+    recording = record(constants.SaveFormatFilePerChannel)
+    reader = ChannelFiles(recording.path)
+    amplifier, auxInput, supplyVoltage = expectedData(recording, reader)
+
+    assert len(reader) == len(recording.timeStamp) > 0
+    np.testing.assert_array_equal(reader.timeStamp, recording.timeStamp)
+    np.testing.assert_array_equal(reader.amplifierData[:, :].T, amplifier)
+    np.testing.assert_array_equal(reader.auxInputData[:, :].T, auxInput)
+    np.testing.assert_array_equal(reader.supplyVoltageData[:, :].T, supplyVoltage)
+
+    # A single channel, as in the per-channel files.
+    np.testing.assert_array_equal(reader.amplifierData[10:20, 5], amplifier[5, 10:20])
+
+
+# Data gathered over write windows shorter than a read, spanning a few reads or
+# longer than the recording, with or without disk space reserved ahead, is
+# saved unchanged, and the files hold exactly the saved samples.
+@pytest.mark.parametrize("writeWindowSeconds", [0.001, 0.05, 1.0])
+@pytest.mark.parametrize("preallocateSeconds", [0.0, 1.0])
+def test_channel_files_write_window(record, writeWindowSeconds, preallocateSeconds):
+    recording = record(constants.SaveFormatFilePerChannel, seconds=0.2,
+                       channelWriteWindowSeconds=writeWindowSeconds,
+                       preallocateSeconds=preallocateSeconds)
+    reader = ChannelFiles(recording.path)
+    amplifier, _, _ = expectedData(recording, reader)
+
+    assert len(reader) == len(recording.timeStamp)
+    np.testing.assert_array_equal(reader.amplifierData[:, :].T, amplifier)
+    for channel in reader.amplifierChannels:
+        fileName = os.path.join(recording.path, "amp-" + channel.nativeChannelName + ".dat")
+        assert os.path.getsize(fileName) == 2 * len(recording.timeStamp)
+    assert os.path.getsize(os.path.join(recording.path, "time.dat")) == 4 * len(recording.timeStamp)
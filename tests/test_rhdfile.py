@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import constants
+from rhdfile import RhdFile
+
+
+def test_intan_round_trip(record):
+    recording = record(constants.SaveFormatIntan)
+    rhdFile = RhdFile(recording.path)
+
+    assert len(rhdFile) == len(recording.timeStamp) > 0
+    np.testing.assert_array_equal(rhdFile.timeStamp[:], recording.timeStamp)
+
+    assert len(rhdFile.amplifierChannels) == 32
+    for index, channel in enumerate(rhdFile.amplifierChannels):
+        np.testing.assert_array_equal(
+            rhdFile.amplifierData[index],
+            recording.amplifierData[channel.boardStream, channel.chipChannel])
+
+    # Auxiliary inputs follow every fourth sample of auxiliary command slot 1,
+    # and the supply voltage is sample 28 of each block.
+    for index, channel in enumerate(rhdFile.auxInputChannels):
+        np.testing.assert_array_equal(
+            rhdFile.auxInputData[index],
+            recording.auxiliaryData[channel.boardStream, 1, channel.chipChannel + 1::4])
+    for index, channel in enumerate(rhdFile.supplyVoltageChannels):
+        np.testing.assert_array_equal(
+            rhdFile.supplyVoltageData[index],
+            recording.auxiliaryData[channel.boardStream, 1, 28::constants.SAMPLES_PER_DATA_BLOCK])
+
+
+def test_sample_array_indices(record):
+    rhdFile = RhdFile(record(constants.SaveFormatIntan).path)
+    amplifierData = rhdFile.amplifierData[:]
+
+    np.testing.assert_array_equal(rhdFile.amplifierData[3, 70:130], amplifierData[3, 70:130])
+    np.testing.assert_array_equal(rhdFile.amplifierData[..., 59:61], amplifierData[..., 59:61])
+    np.testing.assert_array_equal(rhdFile.amplifierData[2:5, -10:], amplifierData[2:5, -10:])
+    assert rhdFile.amplifierData[0, 61] == amplifierData[0, 61]
+
+
+def test_same_seed_same_data(record):
+    first = RhdFile(record(constants.SaveFormatIntan, seed=5).path)
+    second = RhdFile(record(constants.SaveFormatIntan, seed=5).path)
+    other = RhdFile(record(constants.SaveFormatIntan, seed=6).path)
+
+    numSamples = min(len(first), len(second), len(other))
+    np.testing.assert_array_equal(first.amplifierData[:, :numSamples],
+                                  second.amplifierData[:, :numSamples])
+    assert not np.array_equal(first.amplifierData[:, :numSamples],
+                              other.amplifierData[:, :numSamples])
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+import constants
+from signalprocessor import SignalProcessor
+
+SAMPLES = constants.SAMPLES_PER_DATA_BLOCK
+
+
+class ReferenceFilter():
+    """ This class runs the notch and high-pass filters one sample at a time,
+    as SignalProcessor.filterData() did before it filtered all visible
+    channels at once, on copies of the filter state of a SignalProcessor.
+    """
+
+    def __init__(self, signalProcessor):
+        self.signalProcessor = signalProcessor
+        self.amplifierPostFilter = signalProcessor.amplifierPostFilter.copy()
+        self.prevAmplifierPreFilter = signalProcessor.prevAmplifierPreFilter.copy()
+        self.prevAmplifierPostFilter = signalProcessor.prevAmplifierPostFilter.copy()
+        self.highpassFilterState = signalProcessor.highpassFilterState.copy()
+
+    def filterData(self, numBlocks, channelVisible):
+        sp = self.signalProcessor
+        pre = sp.amplifierPreFilter
+        post = self.amplifierPostFilter
+        prevPre = self.prevAmplifierPreFilter
+        prevPost = self.prevAmplifierPostFilter
+        length = SAMPLES * numBlocks
+
+        for stream in range(sp.numDataStreams):
+            for channel in range(32):
+                if not channelVisible[stream][channel]:
+                    continue
+                if sp.notchFilterEnabled:
+                    post[stream][channel][0] = sp.b2 * prevPre[stream][channel][0] + sp.b1 * prevPre[stream][channel][1] + \
+                        sp.b0 * pre[stream][channel][0] - sp.a2 * prevPost[stream][channel][0] - \
+                        sp.a1 * prevPost[stream][channel][1]
+                    post[stream][channel][1] = sp.b2 * prevPre[stream][channel][1] + sp.b1 * pre[stream][channel][0] + \
+                        sp.b0 * pre[stream][channel][1] - sp.a2 * prevPost[stream][channel][1] - \
+                        sp.a1 * post[stream][channel][0]
+                    for t in range(2, length):
+                        post[stream][channel][t] = sp.b2 * pre[stream][channel][t - 2] + sp.b1 * pre[stream][channel][t - 1] + \
+                            sp.b0 * pre[stream][channel][t] - sp.a2 * post[stream][channel][t - 2] - \
+                            sp.a1 * post[stream][channel][t - 1]
+                else:
+                    for t in range(length):
+                        post[stream][channel][t] = pre[stream][channel][t]
+
+        for stream in range(sp.numDataStreams):
+            for channel in range(32):
+                prevPre[stream][channel][0] = pre[stream][channel][length - 2]
+                prevPre[stream][channel][1] = pre[stream][channel][length - 1]
+                prevPost[stream][channel][0] = post[stream][channel][length - 2]
+                prevPost[stream][channel][1] = post[stream][channel][length - 1]
+
+        if sp.highpassFilterEnabled:
+            state = self.highpassFilterState
+            for stream in range(sp.numDataStreams):
+                for channel in range(32):
+                    if channelVisible[stream][channel]:
+                        for t in range(length):
+                            temp = post[stream][channel][t]
+                            post[stream][channel][t] -= state[stream][channel]
+                            state[stream][channel] = sp.aHpf * state[stream][channel] + sp.bHpf * temp
+
+
+# The filters of several reads give bit-identical results to the per-sample
+# filters, including the filter state carried from one read to the next, and
+# leave the waveforms of hidden channels alone.
+@pytest.mark.parametrize("notch", [False, True])
+@pytest.mark.parametrize("highpass", [False, True])
+def test_filter_data_matches_per_sample_filters(notch, highpass):
+    numStreams = 2
+    sampleRate = 20000.0
+    signalProcessor = SignalProcessor()
+    signalProcessor.allocateMemory(numStreams)
+    signalProcessor.setNotchFilter(60.0, 10.0, sampleRate)
+    signalProcessor.setNotchFilterEnabled(notch)
+    signalProcessor.setHighpassFilter(250.0, sampleRate)
+    signalProcessor.setHighpassFilterEnabled(highpass)
+
+    random = np.random.default_rng(4)
+    channelVisible = random.random((numStreams, 32)) < 0.25
+    channelVisible[0, 0] = channelVisible[1, 31] = True
+    channelVisible[0, 1] = False
+    signalProcessor.amplifierPostFilter[:] = random.standard_normal(
+        signalProcessor.amplifierPostFilter.shape)
+    reference = ReferenceFilter(signalProcessor)
+
+    for numBlocks in [2, 1, 3, 2]:
+        length = SAMPLES * numBlocks
+        signalProcessor.amplifierPreFilter[:, :, :length] = random.normal(
+            0.0, 100.0, (numStreams, 32, length))
+        signalProcessor.filterData(numBlocks, channelVisible)
+        reference.filterData(numBlocks, channelVisible)
+
+        assert (signalProcessor.amplifierPostFilter == reference.amplifierPostFilter).all()
+        assert (signalProcessor.prevAmplifierPreFilter == reference.prevAmplifierPreFilter).all()
+        assert (signalProcessor.prevAmplifierPostFilter == reference.prevAmplifierPostFilter).all()
+        assert (signalProcessor.highpassFilterState == reference.highpassFilterState).all()
+
+
+# Filters switched on and off between reads keep the same state as the
+# per-sample filters.
+def test_filter_data_switched_between_reads():
+    signalProcessor = SignalProcessor()
+    signalProcessor.allocateMemory(1)
+    signalProcessor.setNotchFilter(50.0, 10.0, 10000.0)
+    signalProcessor.setHighpassFilter(100.0, 10000.0)
+    channelVisible = [[channel % 3 == 0 for channel in range(32)]]
+    reference = ReferenceFilter(signalProcessor)
+
+    random = np.random.default_rng(9)
+    for notch, highpass in [(True, True), (False, True), (True, False), (True, True)]:
+        signalProcessor.setNotchFilterEnabled(notch)
+        signalProcessor.setHighpassFilterEnabled(highpass)
+        signalProcessor.amplifierPreFilter[:, :, :SAMPLES] = random.normal(0.0, 50.0, (1, 32, SAMPLES))
+        signalProcessor.filterData(1, channelVisible)
+        reference.filterData(1, channelVisible)
+
+        assert (signalProcessor.amplifierPostFilter == reference.amplifierPostFilter).all()
+        assert (signalProcessor.highpassFilterState == reference.highpassFilterState).all()
+
+
+# The running mean of the temperature history equals the mean of the last
+# readings summed afresh, for history lengths rounded down to a multiple of
+# four, over several passes of the ring (each ending with a re-sum) and after
+# tempHistoryReset() starts a new history.
+def test_temperature_history_running_mean():
+    numStreams = 3
+    signalProcessor = SignalProcessor()
+    signalProcessor.allocateMemory(numStreams)
+    random = np.random.default_rng(4)
+    for requestedLength, expectedLength in [(8, 8), (14, 12), (5, 4), (2, 4)]:
+        signalProcessor.tempHistoryReset(requestedLength)
+        assert signalProcessor.tempHistoryMaxLength == expectedLength
+        readings = []
+        for i in range(5 * expectedLength + 3):
+            readings.append(random.normal(36.6, 0.5, numStreams) + random.choice([0.0, 1000.0]))
+            signalProcessor.tempHistoryPush(readings[-1])
+            signalProcessor.tempHistoryCalcAvg()
+            expected = np.sum(readings[-expectedLength:], axis=0) / len(readings[-expectedLength:])
+            assert np.allclose(signalProcessor.tempAvg, expected, rtol=1e-12, atol=0.0)
+
@@ -0,0 +1,39 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from dataqueue import DataQueue
+from simulatedevalboard import SimulatedEvalBoard, parseChips
+
+
+# Returns a simulated board running continuously with the data streams of chips enabled.
+def runningBoard(chips, fifoCapacity):
+    board = SimulatedEvalBoard(parseChips(chips), speed=0, fifoCapacity=fifoCapacity)
+    board.open()
+    board.uploadFpgaBitfile("main.bit")
+    board.initialize()
+    for stream in range(8):
+        board.enableDataStream(stream, stream < len(chips.split(",")))
+    board.setContinuousRunMode(True)
+    board.run()
+    return board
+
+
+# A read that does not fit in the FIFO fails instead of never returning True.
+def test_read_larger_than_fifo():
+    chips = ",".join(["2132"] * 8)
+    board = runningBoard(chips, 200000)
+    blockWords = board.dataBlockSizeInWords(8)
+    assert blockWords == 18240
+    with pytest.raises(ValueError):
+        board.readDataBlocks(12, DataQueue())
+    with pytest.raises(ValueError):
+        board.readRawDataBlocks(12, np.zeros(2 * 12 * blockWords, dtype=np.uint8))
+
+    # A FIFO holding exactly one read is enough.
+    board = runningBoard(chips, 12 * blockWords)
+    queue = DataQueue()
+    assert board.readDataBlocks(12, queue)
+    assert len(queue) == 12
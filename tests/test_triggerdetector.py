@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import glob
+
+import numpy as np
+import pytest
+
+import constants
+from acquisitionengine import AcquisitionEngine
+from datablockbatch import DataBlockBatch
+from rhdfile import RhdFile
+from simulatedevalboard import SimulatedEvalBoard, parseChips
+from triggerdetector import BOARD_ADC_VOLTS_PER_STEP, TriggerDetector, TriggerSource
+
+SAMPLES = constants.SAMPLES_PER_DATA_BLOCK
+
+
+# Stages one read of len(ttlIn) samples (a multiple of SAMPLES_PER_DATA_BLOCK)
+# starting at timestamp firstTimeStamp in batch, with the given digital input
+# words and board ADC input 0 voltages (volts, or 0 V if None).
+def stage(batch, firstTimeStamp, ttlIn, adcVolts=None):
+    numBlocks = len(ttlIn) // SAMPLES
+    batch.clear()
+    batch.numBlocks = numBlocks
+    batch.timeStamp[:numBlocks] = (firstTimeStamp + np.arange(numBlocks * SAMPLES)).reshape(numBlocks, SAMPLES)
+    batch.ttlIn[:numBlocks] = np.reshape(ttlIn, (numBlocks, SAMPLES))
+    batch.boardAdcData[:numBlocks] = 0
+    if adcVolts is not None:
+        batch.boardAdcData[:numBlocks, 0] = np.reshape(
+            np.rint(np.asarray(adcVolts) / BOARD_ADC_VOLTS_PER_STEP), (numBlocks, SAMPLES))
+    return batch
+
+
+# Returns the digital input words of a read of numBlocks blocks in which
+# input 0 is high from sample start to sample stop.
+def pulse(numBlocks, start, stop=None):
+    ttlIn = np.zeros(numBlocks * SAMPLES, dtype=np.int32)
+    ttlIn[start:stop] = 1
+    return ttlIn
+
+
+@pytest.fixture
+def batch():
+    return DataBlockBatch(1, 4)
+
+
+def test_level(batch):
+    detector = TriggerDetector([TriggerSource(0)])
+    assert detector.find(stage(batch, 0, pulse(2, 0, 0))) == -1
+    assert detector.find(stage(batch, 120, pulse(2, 75))) == 195
+
+    # A level trigger qualifies on every sample at the trigger level.
+    assert detector.find(stage(batch, 240, pulse(2, 0))) == 240
+
+    lowDetector = TriggerDetector([TriggerSource(0, polarity=1)])
+    assert lowDetector.find(stage(batch, 0, 1 - pulse(2, 30, 31))) == 30
+
+
+def test_edge_between_reads(batch):
+    detector = TriggerDetector([TriggerSource(0, edge=True)])
+    assert detector.find(stage(batch, 0, pulse(2, 0, 0))) == -1
+
+    # The input goes high at the first sample of the next read.
+    assert detector.find(stage(batch, 120, pulse(2, 0))) == 120
+
+
+def test_edge_held_across_reads(batch):
+    detector = TriggerDetector([TriggerSource(0, edge=True)])
+    assert detector.find(stage(batch, 0, pulse(2, 100))) == 100
+
+    # Still high at the start of the next read: not a new edge, until the
+    # input goes low and high again.
+    assert detector.find(stage(batch, 120, pulse(2, 0, 50))) == -1
+    assert detector.find(stage(batch, 240, pulse(2, 0, 0))) == -1
+    assert detector.find(stage(batch, 360, pulse(1, 10))) == 370
+
+
+def test_edge_already_at_level(batch):
+    detector = TriggerDetector([TriggerSource(0, edge=True)])
+
+    # An input that is already high when the detector starts is not an edge.
+    assert detector.find(stage(batch, 0, pulse(1, 0))) == -1
+    assert detector.find(stage(batch, 60, pulse(1, 0, 20) + pulse(1, 40))) == 100
+
+    # Nor is it after reset().
+    detector.reset()
+    assert detector.find(stage(batch, 120, pulse(1, 0))) == -1
+
+
+def test_falling_edge(batch):
+    detector = TriggerDetector([TriggerSource(0, polarity=1, edge=True)])
+    assert detector.find(stage(batch, 0, pulse(1, 0))) == -1
+    assert detector.find(stage(batch, 60, pulse(1, 0, 0))) == 60
+    assert detector.find(stage(batch, 120, pulse(1, 0, 0))) == -1
+    assert detector.find(stage(batch, 180, pulse(1, 0, 5))) == 185
+
+
+def test_analog_input(batch):
+    volts = np.zeros(2 * SAMPLES)
+    volts[50] = 1.6
+    volts[70:] = 1.7
+    assert TriggerDetector([TriggerSource(16)]).find(stage(batch, 0, pulse(2, 0, 0), volts)) == 70
+
+    edgeDetector = TriggerDetector([TriggerSource(16, edge=True)])
+    assert edgeDetector.find(stage(batch, 0, pulse(2, 0, 0), volts)) == 70
+    assert edgeDetector.find(stage(batch, 120, pulse(2, 0, 0), np.full(2 * SAMPLES, 3.3))) == -1
+
+
+def test_first_of_several_sources(batch):
+    detector = TriggerDetector([TriggerSource(0, edge=True), TriggerSource(5), TriggerSource(16)])
+    ttlIn = pulse(2, 0)
+    ttlIn[90:] |= 1 << 5
+    volts = np.zeros(2 * SAMPLES)
+    volts[80:] = 2.0
+    assert detector.find(stage(batch, 0, ttlIn, volts)) == 80
+
+    with pytest.raises(ValueError):
+        TriggerSource(24)
+
+
+def test_inactive_between_reads(batch):
+    detector = TriggerDetector([TriggerSource(0, edge=True), TriggerSource(1)])
+    assert detector.find(stage(batch, 0, pulse(1, 30))) == 30
+
+    # The trigger ends when no source is at its trigger level.
+    assert detector.findInactive(stage(batch, 60, pulse(1, 0) | (pulse(1, 0, 20) << 1))) == -1
+    assert detector.findInactive(stage(batch, 120, pulse(1, 0, 45))) == 165
+
+    # The levels seen by findInactive() are kept for the next edge.
+    assert detector.find(stage(batch, 180, pulse(1, 0))) == 180
+
+
+# The acquisition loop looks for triggers with the detector set up by
+# setTrigger() for the whole run; digital input 3 of the simulated board is
+# always low.
+def test_triggered_recording(tmp_path):
+    engine = AcquisitionEngine(evalBoard=SimulatedEvalBoard(parseChips("2132"), speed=0))
+    engine.openInterfaceBoard("main.bit")
+    engine.scanPorts()
+
+    engine.setTrigger(3, 1, 1, 1, True, moreTriggerSources=[TriggerSource(18, 0)])
+    engine.triggerRecord(str(tmp_path / "level"), 0.1)
+    rhdFile = RhdFile(glob.glob(str(tmp_path / "level_*.rhd"))[0])
+    assert len(rhdFile) > 0
+    assert rhdFile.timeStamp[0] == 0
+    assert [channel.nativeChannelNumber for channel in rhdFile.boardDigInChannels] == [3]
+    assert [channel.nativeChannelNumber for channel in rhdFile.boardAdcChannels] == [2]
+
+    engine.setTrigger(3, 1, 1, 1, True, triggerEdge=True)
+    engine.triggerRecord(str(tmp_path / "edge"), 0.1)
+    assert glob.glob(str(tmp_path / "edge_*")) == []
+
+
+# Digital input 0 of the simulated board is high for the first half of every
+# second, so a rising edge trigger fires after 20000 samples at 20 kS/s, many
+# reads into the run, once the pre-trigger ring has wrapped.  The saved file
+# holds one second of pre-trigger data, then the data that follows it.
+def test_trigger_after_ring_wraps(tmp_path):
+    engine = AcquisitionEngine(evalBoard=SimulatedEvalBoard(parseChips("2132"), speed=0))
+    engine.openInterfaceBoard("main.bit")
+    engine.scanPorts()
+    assert engine.boardSampleRate == 20000
+
+    engine.setTrigger(0, 0, 1, 1, True, triggerEdge=True)
+    engine.triggerRecord(str(tmp_path / "edge"), 1.8)
+    rhdFile = RhdFile(glob.glob(str(tmp_path / "edge_*.rhd"))[0])
+    timeStamp = rhdFile.timeStamp[:]
+    assert timeStamp[0] == -20000
+    assert np.all(np.diff(timeStamp) == 1)
+    assert timeStamp[-1] > 10000
+    trigger = 20000
+    assert list(rhdFile.boardDigInData[0, trigger - 2:trigger + 2]) == [0, 0, 1, 1]
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from acquisitionengine import AcquisitionEngine
+from rhd2000datablock import Rhd2000DataBlock
+from simulatedevalboard import SimulatedEvalBoard, parseChips
+from usbdecoder import UsbDataBlocks, dataBlockSizeInBytes
+
+
+# The strided views decode raw reads of the simulated board, with several data
+# streams, exactly as Rhd2000DataBlock.fillFromUsbBuffer() does.
+def test_views_match_data_blocks():
+    engine = AcquisitionEngine(evalBoard=SimulatedEvalBoard(parseChips("2132,2164,2216"), speed=0))
+    engine.openInterfaceBoard("main.bit")
+    engine.scanPorts()
+    board = engine.evalBoard
+    numDataStreams = board.getNumEnabledDataStreams()
+    assert numDataStreams > 2
+    board.setContinuousRunMode(True)
+    board.run()
+
+    numBlocks = 3
+    buffer = np.zeros(numBlocks * dataBlockSizeInBytes(numDataStreams), dtype=np.uint8)
+    assert board.readRawDataBlocks(numBlocks, buffer)
+    blocks = UsbDataBlocks(buffer, numDataStreams)
+    assert len(blocks) == numBlocks
+    dataBlock = Rhd2000DataBlock(numDataStreams)
+    for b in range(numBlocks):
+        dataBlock.fillFromUsbBuffer(buffer.ctypes.data, b, numDataStreams)
+        for name in ("timeStamp", "amplifierData", "auxiliaryData", "boardAdcData", "ttlIn", "ttlOut"):
+            assert np.array_equal(getattr(blocks, name)[b], getattr(dataBlock, name)), name
+
+    # A corrupted header is reported by the block it belongs to.
+    buffer[dataBlockSizeInBytes(numDataStreams) + 5] ^= 0xff
+    with pytest.raises(ValueError):
+        UsbDataBlocks(buffer, numDataStreams)
+    assert list(UsbDataBlocks(buffer, numDataStreams, checkHeaders=False).badBlocks()) == [1]